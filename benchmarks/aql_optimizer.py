@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+
+# Before/after benchmark of AQLOptimizer against the in-process UPI stub.
+# Run from the repository root: python -m benchmarks.aql_optimizer
+
+import time
+from data_access.mock_upi_connector import MockUPIConnector
+from query_processing.query_translator.aql_optimizer import AQLOptimizer
+
+QUERIES = [
+    "FOR doc IN Objects SORT doc.modified DESC FILTER doc.extension IN ['pdf'] RETURN doc",
+    "FOR doc IN Objects LET owners = (FOR u IN Users RETURN u.name) "
+    "FILTER LIKE(doc.name, 'report%') AND 1000 < doc.size FILTER doc.owner IN owners RETURN doc",
+    "FOR doc IN Objects FILTER doc.size > 1048576 RETURN doc",
+]
+
+def main():
+    optimizer = AQLOptimizer(page_size=20)
+    connector = MockUPIConnector(result_size=2000, per_row_latency=0.000005)
+    for query in QUERIES:
+        optimized = optimizer.optimize(query)
+        timings = []
+        for text in (query, optimized):
+            start = time.perf_counter()
+            for _ in range(20):
+                connector.execute_aql(text)
+            timings.append((time.perf_counter() - start) / 20 * 1000)
+        print(f"{query}\n  -> {' '.join(optimized.split())}")
+        print(f"  before: {timings[0]:.2f} ms  after: {timings[1]:.2f} ms")
+
+if __name__ == "__main__":
+    main()
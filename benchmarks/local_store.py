@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+
+# Query latency of the local metadata store on synthetic records, for the filter shapes the rule translator emits.
+# Run from the repository root: python -m benchmarks.local_store [ROWS]
+
+import sys
+import time
+from data_access.local_metadata_store import LocalMetadataStore
+from data_access.local_upi_connector import LocalUPIConnector
+from data_access.mock_upi_connector import MockUPIConnector
+from query_processing.query_translator.rule_translator import RuleBasedTranslator
+
+QUERIES = {
+    "extension": {"extensions": ["pdf"]},
+    "name token": {"name_pattern": "*file_0001*"},
+    "size range": {"size_min": 10_000_000, "size_max": 20_000_000},
+    "modified range": {"modified_after": "2026-06-01", "extensions": ["md", "txt"]},
+    "owner and name": {"owner": "alice", "name_pattern": "*.py"},
+    "path prefix": {"path_prefix": "/home/bob/"},
+}
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    records = [record for batch in MockUPIConnector(result_size=rows).cursor_aql("FOR doc IN Objects RETURN doc", 10000)
+               for record in batch]
+    start = time.perf_counter()
+    connector = LocalUPIConnector(LocalMetadataStore(records))
+    print(f"loaded {rows} records in {time.perf_counter() - start:.2f} s")
+
+    # Unbounded queries, so that the timings cover every matching row
+    translators = {"aql": RuleBasedTranslator("aql", page_size=None), "graphql": RuleBasedTranslator("graphql")}
+    repeats = 20
+    for label, filters in QUERIES.items():
+        for language, translator in translators.items():
+            query, parameters = translator.translate_parameterized({"intent": "search", "filters": filters}, None)
+            execute = connector.execute_aql if language == "aql" else connector.execute_graphql
+            before = connector.store.get_stats()
+            count = len(execute(query, parameters))
+            examined = connector.store.get_stats()["rows_examined"] - before["rows_examined"]
+            start = time.perf_counter()
+            for _ in range(repeats):
+                execute(query, parameters)
+            elapsed = (time.perf_counter() - start) / repeats
+            print(f"{label:15} {language:8} {count:7d} rows  {examined:7d} examined  {elapsed * 1e6:10.1f} us/query")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+
+# Parse throughput microbenchmark of NLParser.
+# Run from the repository root: python -m benchmarks.nl_parser
+
+import time
+from query_processing.nl_parser import NLParser, compiled_lexicon
+
+QUERIES = [
+    "pdf files larger than 10MB modified last week",
+    "show me photos from 2023 owned by alice",
+    "spreadsheets in /home/bob/finance created before 2024-01-01",
+    "how many python scripts were edited since March 5, 2024",
+    "word documents named \"quarterly report\" under 500 kb",
+    "10 largest videos in ~/Movies",
+    "notes about the kubernetes migration from yesterday",
+    "*.log files between 1mb and 20mb accessed in the past 3 days",
+]
+
+def main():
+    start = time.perf_counter()
+    compiled_lexicon.cache_clear()
+    parser = NLParser()
+    build_time = time.perf_counter() - start
+
+    for query in QUERIES:
+        parsed = parser.parse(query)
+        print(f"{query}\n  filters={parsed['filters']} entities={parsed['entities']} terms={parsed['terms']}")
+
+    rounds = 20000
+    start = time.perf_counter()
+    for i in range(rounds):
+        parser.parse(QUERIES[i % len(QUERIES)])
+    elapsed = time.perf_counter() - start
+    print(f"lexicon build: {build_time * 1000:.2f} ms ({len(parser.lexicon)} states)")
+    print(f"throughput: {rounds / elapsed:,.0f} queries/s ({elapsed / rounds * 1e6:.1f} us/query)")
+
+if __name__ == "__main__":
+    main()
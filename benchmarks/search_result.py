@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+
+# Per-row formatting cost: the former {"result": str(item)} records against SearchResult.
+# Run from the repository root: python -m benchmarks.search_result
+
+import time
+import tracemalloc
+from data_access.mock_upi_connector import MockUPIConnector
+from search_execution.search_result import SearchResult
+
+FORMATS = {
+    "str(item) dict": lambda batch: [{"result": str(item)} for item in batch],
+    "SearchResult": lambda batch: [SearchResult.from_record(item) for item in batch],
+}
+
+def main():
+    rows = 20000
+    batches = list(MockUPIConnector(result_size=rows).cursor_aql("FOR doc IN Objects RETURN doc", 1000))
+    for label, format_batch in FORMATS.items():
+        start = time.perf_counter()
+        for batch in batches:
+            format_batch(batch)
+        elapsed = time.perf_counter() - start
+
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        kept = [format_batch(batch) for batch in batches]
+        after = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        allocated = sum(stat.count_diff for stat in after.compare_to(before, "filename"))
+        size = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+        print(f"{label:15} {elapsed / rows * 1e6:6.2f} us/row  "
+              f"{allocated / rows:5.2f} allocations/row  {size / rows:6.1f} bytes/row")
+        del kept
+
+if __name__ == "__main__":
+    main()
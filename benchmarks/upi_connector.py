@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+
+# Connection reuse and cursor read-ahead benchmark of UPIConnector against the local stand-in server.
+# Run from the repository root: python -m benchmarks.upi_connector
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from data_access.mock_upi_connector import MockUPIConnector
+from data_access.upi_connector import UPIConnector
+from data_access.upi_stub_server import UPIStubServer
+
+SESSIONS, QUERIES_PER_SESSION = 16, 50
+AQL = "FOR doc IN Objects FILTER doc.extension IN @extensions LIMIT 20 RETURN doc"
+GRAPHQL = "query Files($filter: FileFilter) { files(filter: $filter, limit: 20) { name path size } }"
+
+def session(connector: UPIConnector, index: int) -> None:
+    for i in range(QUERIES_PER_SESSION):
+        if i % 2:
+            connector.execute_graphql(GRAPHQL, {"filter": {"extensions": [f"e{index}"]}})
+        else:
+            connector.execute_aql(AQL, {"extensions": [f"e{index}-{i}"]})
+
+def main():
+    for keep_alive in (False, True):
+        with UPIStubServer() as stub:
+            connector = UPIConnector([stub.base_url], pool_size=SESSIONS, keep_alive=keep_alive)
+            start = time.perf_counter()
+            with ThreadPoolExecutor(SESSIONS) as pool:
+                list(pool.map(lambda index: session(connector, index), range(SESSIONS)))
+            elapsed = time.perf_counter() - start
+            connector.close()
+        total = SESSIONS * QUERIES_PER_SESSION
+        print(f"keep_alive={keep_alive!s:5}  {total / elapsed:8,.0f} queries/s  "
+              f"{stub.connection_count} connections for {stub.request_count} requests")
+
+    # A consumer that spends as long on each batch as the server takes to produce it
+    for read_ahead in (False, True):
+        with UPIStubServer(connector=MockUPIConnector(result_size=2000, per_row_latency=0.00001)) as stub:
+            connector = UPIConnector([stub.base_url], read_ahead=read_ahead)
+            start = time.perf_counter()
+            for batch in connector.cursor_aql("FOR doc IN Objects RETURN doc", 200):
+                time.sleep(len(batch) * 0.00001)
+            elapsed = time.perf_counter() - start
+            connector.close()
+        print(f"read_ahead={read_ahead!s:5}  2000-row cursor in {elapsed * 1000:.1f} ms")
+
+if __name__ == "__main__":
+    main()
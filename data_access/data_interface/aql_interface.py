@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Any, Iterator, List, Optional
+from .interface_base import DataInterfaceBase
+
+class AQLInterface(DataInterfaceBase):
+    """
+    Speaks the ArangoDB HTTP cursor API.
+
+    A query is sent with POST /_api/cursor together with its bind variables
+    and batch size; the first batch comes back in the same response and
+    further batches are fetched with PUT /_api/cursor/<id> on the same
+    endpoint. A cursor abandoned before its last batch is deleted so the
+    server can free it.
+
+    HTTP/1.1 pipelining is not available here (neither the server nor
+    http.client supports it), so the round trips of a cursor are overlapped
+    instead: with read_ahead, the request for the next batch is sent while
+    the caller is still processing the current one.
+    """
+
+    query_language = "aql"
+
+    def __init__(self, database: str = "_system", read_ahead: bool = True,
+                 execute_batch_size: int = 1000, max_workers: int = 8):
+        """
+        Initialize the AQL interface.
+
+        Args:
+            database (str): The ArangoDB database holding the UPI collections
+            read_ahead (bool): Whether to fetch the next batch of a cursor while the current one is consumed
+            execute_batch_size (int): The batch size used when execute collects a whole result set
+            max_workers (int): The maximum number of read-ahead requests in flight
+        """
+        self.database = database
+        self.read_ahead = read_ahead
+        self.execute_batch_size = execute_batch_size
+        self.prefetcher = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="aql-read-ahead")
+        self.stats = {"cursors": 0, "batches": 0, "read_ahead": 0, "cursors_deleted": 0}
+        self._lock = threading.Lock()
+
+    @property
+    def api_path(self) -> str:
+        """
+        Get the path prefix of the database's HTTP API.
+
+        Returns:
+            str: The /_db/<database>/_api prefix
+        """
+        return f"/_db/{self.database}/_api"
+
+    def execute(self, transport: Any, query: str,
+                parameters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """
+        Execute an AQL query and collect all of its results.
+
+        Args:
+            transport (Any): The transport to send the requests through
+            query (str): The AQL query
+            parameters (Optional[Dict[str, Any]]): The values of the query's bind parameters
+
+        Returns:
+            List[Dict[str, Any]]: The result records
+        """
+        results = []
+        for batch in self.cursor(transport, query, self.execute_batch_size, parameters):
+            results.extend(batch)
+        return results
+
+    def cursor(self, transport: Any, query: str, batch_size: int,
+               parameters: Optional[Dict[str, Any]] = None) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Open a server-side cursor for an AQL query.
+
+        The cursor is created, and its first batch fetched, before this method
+        returns; later batches are fetched as the iterator advances.
+
+        Args:
+            transport (Any): The transport to send the requests through
+            query (str): The AQL query
+            batch_size (int): The maximum number of records per batch
+            parameters (Optional[Dict[str, Any]]): The values of the query's bind parameters
+
+        Returns:
+            Iterator[List[Dict[str, Any]]]: The result records, one batch at a time
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size must be positive")
+        payload = {"query": query, "bindVars": parameters or {}, "batchSize": batch_size}
+        body = self._check(*transport.request("POST", f"{self.api_path}/cursor", payload))
+        self._count("cursors")
+        return self._batches(transport, body)
+
+    def revision(self, transport: Any, collection: str) -> str:
+        """
+        Get the revision of a collection, which changes with every write to it.
+
+        Args:
+            transport (Any): The transport to send the request through
+            collection (str): The collection name
+
+        Returns:
+            str: The collection's revision
+        """
+        body = self._check(*transport.request("GET", f"{self.api_path}/collection/{collection}/revision"))
+        return str(body["revision"])
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get the cursor counters.
+
+        Returns:
+            Dict[str, Any]: The number of cursors opened, batches received, batches fetched ahead and cursors deleted early
+        """
+        with self._lock:
+            return dict(self.stats)
+
+    def close(self) -> None:
+        """
+        Release the read-ahead threads.
+        """
+        self.prefetcher.shutdown(wait=False)
+
+    def _batches(self, transport: Any, body: Dict[str, Any]) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Yield the batches of an open cursor.
+
+        Args:
+            transport (Any): The transport the cursor was opened on
+            body (Dict[str, Any]): The response that opened the cursor
+
+        Returns:
+            Iterator[List[Dict[str, Any]]]: The result records, one batch at a time
+        """
+        cursor_id = None
+        pending: Optional[Future] = None
+        try:
+            while True:
+                cursor_id = body.get("id") if body.get("hasMore") else None
+                if cursor_id is not None and self.read_ahead:
+                    pending = self.prefetcher.submit(self._next_batch, transport, cursor_id)
+                    self._count("read_ahead")
+                self._count("batches")
+                yield body.get("result") or []
+                if cursor_id is None:
+                    return
+                body = pending.result() if pending is not None else self._next_batch(transport, cursor_id)
+                pending = None
+        finally:
+            if cursor_id is not None:
+                # The caller stopped early; wait for the batch in flight, then free the cursor
+                if pending is not None:
+                    try:
+                        pending.result()
+                    except Exception:
+                        pass
+                try:
+                    status, _ = transport.request("DELETE", f"{self.api_path}/cursor/{cursor_id}")
+                except OSError:
+                    status = None
+                if status is not None and status < 300:
+                    self._count("cursors_deleted")
+
+    def _next_batch(self, transport: Any, cursor_id: str) -> Dict[str, Any]:
+        """
+        Fetch the next batch of a cursor.
+
+        Args:
+            transport (Any): The transport the cursor was opened on
+            cursor_id (str): The cursor id
+
+        Returns:
+            Dict[str, Any]: The response body with the batch and whether more follow
+        """
+        return self._check(*transport.request("PUT", f"{self.api_path}/cursor/{cursor_id}"))
+
+    def _count(self, counter: str) -> None:
+        """
+        Increment a counter.
+
+        Args:
+            counter (str): The name of the counter to increment
+        """
+        with self._lock:
+            self.stats[counter] += 1
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+
+import threading
+from typing import Dict, Any, Iterator, List, Optional
+from .interface_base import DataInterfaceBase, UPIQueryError, split_batches
+from data_access.prepared_queries import PreparedQueryCache
+
+# Error code a server answers with when it does not know a persisted query hash
+PERSISTED_QUERY_NOT_FOUND = "PERSISTED_QUERY_NOT_FOUND"
+
+class GraphQLInterface(DataInterfaceBase):
+    """
+    Speaks GraphQL over HTTP POST, with automatic persisted queries.
+
+    Every request carries the SHA-256 hash of the query text. Once the server
+    has seen a text, later requests send only the hash and the variables;
+    if the server has since forgotten the hash, the request is repeated once
+    with the full text.
+
+    GraphQL has no server-side cursor, so cursor fetches the whole result
+    set in one request and splits it into batches.
+    """
+
+    query_language = "graphql"
+
+    def __init__(self, path: str = "/graphql", persisted_queries: bool = True, max_persisted: int = 1024):
+        """
+        Initialize the GraphQL interface.
+
+        Args:
+            path (str): The path of the GraphQL endpoint
+            persisted_queries (bool): Whether to send known queries by hash only
+            max_persisted (int): The maximum number of query hashes to remember
+        """
+        self.path = path
+        self.persisted_queries = persisted_queries
+        self.known_queries = PreparedQueryCache(max_persisted)
+        self.stats = {"requests": 0, "sent_by_hash": 0, "persisted_misses": 0}
+        self._lock = threading.Lock()
+
+    def execute(self, transport: Any, query: str,
+                parameters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """
+        Execute a GraphQL query.
+
+        Args:
+            transport (Any): The transport to send the request through
+            query (str): The GraphQL query
+            parameters (Optional[Dict[str, Any]]): The values of the query's variables
+
+        Returns:
+            List[Dict[str, Any]]: The records of the query's first top-level field
+        """
+        payload = {"variables": parameters or {}}
+        if not self.persisted_queries:
+            return self._records(self._post(transport, dict(payload, query=query)))
+
+        digest, known = self.known_queries.prepare(query)
+        payload["extensions"] = {"persistedQuery": {"version": 1, "sha256Hash": digest}}
+        if known:
+            self._count("sent_by_hash")
+            try:
+                return self._records(self._post(transport, payload))
+            except UPIQueryError as e:
+                if e.code != PERSISTED_QUERY_NOT_FOUND:
+                    raise
+                self._count("persisted_misses")
+        return self._records(self._post(transport, dict(payload, query=query)))
+
+    def cursor(self, transport: Any, query: str, batch_size: int,
+               parameters: Optional[Dict[str, Any]] = None) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Execute a GraphQL query and split its results into batches.
+
+        Args:
+            transport (Any): The transport to send the request through
+            query (str): The GraphQL query
+            batch_size (int): The maximum number of records per batch
+            parameters (Optional[Dict[str, Any]]): The values of the query's variables
+
+        Returns:
+            Iterator[List[Dict[str, Any]]]: The result records, one batch at a time
+        """
+        return split_batches(self.execute(transport, query, parameters), batch_size)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get the request and persisted query counters.
+
+        Returns:
+            Dict[str, Any]: The number of requests, of queries sent by hash only and of hashes the server did not know
+        """
+        with self._lock:
+            return dict(self.stats)
+
+    def _post(self, transport: Any, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Send a GraphQL request and check its response.
+
+        Args:
+            transport (Any): The transport to send the request through
+            payload (Dict[str, Any]): The request body
+
+        Returns:
+            Dict[str, Any]: The response's data
+
+        Raises:
+            UPIQueryError: If the response reports errors
+        """
+        self._count("requests")
+        status, body = transport.request("POST", self.path, payload)
+        if isinstance(body, dict) and body.get("errors"):
+            error = body["errors"][0]
+            code = (error.get("extensions") or {}).get("code")
+            raise UPIQueryError(error.get("message", "GraphQL error"), status, code)
+        return self._check(status, body).get("data") or {}
+
+    def _records(self, data: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Get the records of the first top-level field of a response.
+
+        Args:
+            data (Dict[str, Any]): The response's data
+
+        Returns:
+            List[Dict[str, Any]]: The field's list, or its single object as a one-element list
+        """
+        for value in data.values():
+            if isinstance(value, list):
+                return value
+            return [] if value is None else [value]
+        return []
+
+    def _count(self, counter: str) -> None:
+        """
+        Increment a counter.
+
+        Args:
+            counter (str): The name of the counter to increment
+        """
+        with self._lock:
+            self.stats[counter] += 1
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+
+from abc import ABC, abstractmethod
+from typing import Dict, Any, Iterator, List, Optional
+
+class UPIQueryError(ValueError):
+    """
+    Raised when the UPI server rejects a query.
+
+    Unlike connection errors, a rejected query fails the same way on every
+    endpoint, so it is not retried elsewhere.
+    """
+
+    def __init__(self, message: str, status: int = 0, code: Any = None):
+        """
+        Initialize the error.
+
+        Args:
+            message (str): The server's error message
+            status (int): The HTTP status of the response
+            code (Any): The server's error number or code, if any
+        """
+        super().__init__(message)
+        self.status = status
+        self.code = code
+
+class DataInterfaceBase(ABC):
+    """
+    Abstract base class for the wire protocol of one UPI query language.
+
+    A data interface turns a query and its bind parameters into HTTP requests
+    and their responses into result records. It does not own connections:
+    every call is given a transport, an object with a
+    request(method, path, payload) -> (status, body) method, typically a
+    pooled connection to one server endpoint. All requests of a call,
+    including the follow-up requests of a cursor, go through that transport.
+    """
+
+    # Name of the query language the interface speaks (e.g. "aql", "graphql")
+    query_language = ""
+
+    @abstractmethod
+    def execute(self, transport: Any, query: str,
+                parameters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """
+        Execute a query and return all of its results.
+
+        Args:
+            transport (Any): The transport to send the requests through
+            query (str): The query text
+            parameters (Optional[Dict[str, Any]]): The query's bind parameters
+
+        Returns:
+            List[Dict[str, Any]]: The result records
+        """
+        pass
+
+    @abstractmethod
+    def cursor(self, transport: Any, query: str, batch_size: int,
+               parameters: Optional[Dict[str, Any]] = None) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Execute a query and return its results in batches.
+
+        Args:
+            transport (Any): The transport to send the requests through
+            query (str): The query text
+            batch_size (int): The maximum number of records per batch
+            parameters (Optional[Dict[str, Any]]): The query's bind parameters
+
+        Returns:
+            Iterator[List[Dict[str, Any]]]: The result records, one batch at a time
+        """
+        pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get the protocol counters.
+
+        Returns:
+            Dict[str, Any]: Counters specific to the protocol; empty by default
+        """
+        return {}
+
+    def close(self) -> None:
+        """
+        Release any resources held by the interface.
+        """
+        pass
+
+    def _check(self, status: int, body: Any) -> Dict[str, Any]:
+        """
+        Check a response and return its body.
+
+        Args:
+            status (int): The HTTP status of the response
+            body (Any): The decoded JSON body of the response
+
+        Returns:
+            Dict[str, Any]: The body
+
+        Raises:
+            UPIQueryError: If the status is not 2xx or the body reports an error
+        """
+        if not isinstance(body, dict):
+            raise UPIQueryError(f"Unexpected response from the UPI server: {body!r}", status)
+        if status >= 300 or body.get("error") is True:
+            message = body.get("errorMessage") or body.get("message") or f"HTTP {status}"
+            raise UPIQueryError(message, status, body.get("errorNum"))
+        return body
+
+def split_batches(records: List[Dict[str, Any]], batch_size: int) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Split a complete result set into batches.
+
+    Args:
+        records (List[Dict[str, Any]]): The result records
+        batch_size (int): The maximum number of records per batch
+
+    Returns:
+        Iterator[List[Dict[str, Any]]]: The records, one batch at a time
+    """
+    if batch_size < 1:
+        raise ValueError("batch_size must be positive")
+    return (records[start:start + batch_size] for start in range(0, len(records), batch_size))
@@ -0,0 +1,570 @@
+#!/usr/bin/env python3
+
+import json
+import threading
+from abc import abstractmethod
+from collections import OrderedDict, namedtuple
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+from .interface_base import DataInterfaceBase, UPIQueryError, split_batches
+from data_access.local_metadata_store import Condition
+from data_access.upi_schema import FILE_FIELDS, FILTER_FIELDS, GRAPHQL_FILTER_ARGUMENTS, OBJECTS_COLLECTION
+from query_processing.query_translator.aql_parser import (
+    AQLSyntaxError, AQLToken, COMPARISON_OPERATORS, matching_bracket, parse_aql
+)
+from query_processing.query_translator.graphql_parser import (
+    GraphQLEnum, GraphQLField, GraphQLSyntaxError, GraphQLVariable, parse_graphql
+)
+
+# Error code for a query outside the shapes the local store runs
+UNSUPPORTED_QUERY = "UNSUPPORTED_QUERY"
+
+# ArangoDB error numbers for a query that does not parse and for a missing bind parameter
+AQL_PARSE_ERROR = 1501
+AQL_MISSING_BIND_PARAMETER = 1551
+
+# A bind parameter or variable in a compiled query, resolved when the query runs
+Parameter = namedtuple("Parameter", ["name"])
+
+# A compiled query: conditions with Parameter operands, ordering, paging and returned fields
+LocalPlan = namedtuple("LocalPlan", ["conditions", "sort", "offset", "limit", "fields"])
+
+# A compiled GraphQL query: the root field, its arguments with Parameter operands, and the selected fields
+GraphQLPlan = namedtuple("GraphQLPlan", ["root", "arguments", "fields"])
+
+# FileFilter argument -> (record field, comparison)
+_GRAPHQL_FILTERS = {argument: FILTER_FIELDS[key] for key, argument in GRAPHQL_FILTER_ARGUMENTS.items()}
+
+class LocalInterfaceBase(DataInterfaceBase):
+    """
+    Base class for the query languages of the embedded local metadata store.
+
+    The transport of a local interface is the LocalMetadataStore itself, so
+    a query costs no network round trip. Each query text is compiled once
+    into a LocalPlan, kept in an LRU plan cache; running it binds the
+    parameters into store conditions and calls the store's find(). A query
+    outside the supported shapes raises UPIQueryError with code
+    UNSUPPORTED_QUERY.
+    """
+
+    def __init__(self, max_plans: int = 1024):
+        """
+        Initialize the local interface.
+
+        Args:
+            max_plans (int): The maximum number of compiled query texts to keep
+        """
+        self.max_plans = max_plans
+        self.plans = OrderedDict()
+        self.stats = {"queries": 0, "plans_compiled": 0, "plan_hits": 0}
+        self._lock = threading.Lock()
+
+    def execute(self, transport: Any, query: str,
+                parameters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """
+        Run a query against the store.
+
+        Args:
+            transport (Any): The LocalMetadataStore to query
+            query (str): The query text
+            parameters (Optional[Dict[str, Any]]): The query's bind parameters or variables
+
+        Returns:
+            List[Dict[str, Any]]: The result records
+        """
+        plan = self._plan(query)
+        conditions, sort, offset, limit, fields = self._bind(plan, parameters or {})
+        return transport.find(conditions, sort, offset, limit, fields)
+
+    def cursor(self, transport: Any, query: str, batch_size: int,
+               parameters: Optional[Dict[str, Any]] = None) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Run a query against the store and split its results into batches.
+
+        Args:
+            transport (Any): The LocalMetadataStore to query
+            query (str): The query text
+            batch_size (int): The maximum number of records per batch
+            parameters (Optional[Dict[str, Any]]): The query's bind parameters or variables
+
+        Returns:
+            Iterator[List[Dict[str, Any]]]: The result records, one batch at a time
+        """
+        return split_batches(self.execute(transport, query, parameters), batch_size)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get the query and plan cache counters.
+
+        Returns:
+            Dict[str, Any]: The number of queries, of query texts compiled and of plan cache hits
+        """
+        with self._lock:
+            return dict(self.stats)
+
+    def _plan(self, query: str) -> Any:
+        """
+        Get the compiled plan of a query text, compiling it on a miss.
+
+        Args:
+            query (str): The query text
+
+        Returns:
+            Any: The plan
+        """
+        with self._lock:
+            self.stats["queries"] += 1
+            plan = self.plans.get(query)
+            if plan is not None:
+                self.plans.move_to_end(query)
+                self.stats["plan_hits"] += 1
+                return plan
+        plan = self._compile(query)
+        with self._lock:
+            self.stats["plans_compiled"] += 1
+            self.plans[query] = plan
+            while len(self.plans) > self.max_plans:
+                self.plans.popitem(last=False)
+        return plan
+
+    @abstractmethod
+    def _compile(self, query: str) -> Any:
+        """
+        Compile a query text into a plan.
+
+        Args:
+            query (str): The query text
+
+        Returns:
+            Any: The plan, in the form the interface's _bind takes
+        """
+        pass
+
+    def _bind(self, plan: Any, parameters: Dict[str, Any]) -> LocalPlan:
+        """
+        Resolve the parameters of a plan.
+
+        Args:
+            plan (Any): The compiled plan, a LocalPlan by default
+            parameters (Dict[str, Any]): The query's bind parameters or variables
+
+        Returns:
+            LocalPlan: The plan with every Parameter replaced by its value
+        """
+        conditions = []
+        for field, comparison, operand, ignore_case in plan.conditions:
+            value = self._resolve(operand, parameters)
+            if comparison in ("in", "not in") and not isinstance(value, list):
+                # As in AQL, IN against anything but an array matches nothing
+                value = []
+            elif comparison in ("like", "prefix") and not isinstance(value, str):
+                raise UPIQueryError(f"Pattern of {field} must be a string, got {value!r}", 400)
+            conditions.append(Condition(field, comparison, value, ignore_case))
+        offset = self._resolve(plan.offset, parameters)
+        limit = self._resolve(plan.limit, parameters)
+        for value in (offset, limit):
+            if value is not None and (not isinstance(value, int) or isinstance(value, bool) or value < 0):
+                raise UPIQueryError(f"Limit values must be non-negative integers, got {value!r}", 400)
+        return LocalPlan(conditions, plan.sort, offset or 0, limit, plan.fields)
+
+    def _resolve(self, operand: Any, parameters: Dict[str, Any]) -> Any:
+        """
+        Replace the parameters in an operand by their values.
+
+        Args:
+            operand (Any): A literal, a Parameter, or a list or dictionary of them
+            parameters (Dict[str, Any]): The query's bind parameters or variables
+
+        Returns:
+            Any: The operand's value
+        """
+        if isinstance(operand, Parameter):
+            if operand.name not in parameters:
+                raise self._missing_parameter(operand.name)
+            return parameters[operand.name]
+        if isinstance(operand, list):
+            return [self._resolve(item, parameters) for item in operand]
+        if isinstance(operand, dict):
+            return {key: self._resolve(value, parameters) for key, value in operand.items()}
+        return operand
+
+    def _missing_parameter(self, name: str) -> UPIQueryError:
+        """
+        Build the error for a parameter without a value.
+
+        Args:
+            name (str): The parameter name
+
+        Returns:
+            UPIQueryError: The error
+        """
+        return UPIQueryError(f"No value specified for parameter '{name}'", 400)
+
+    def _unsupported(self, what: str) -> UPIQueryError:
+        """
+        Build the error for a query outside the supported shapes.
+
+        Args:
+            what (str): The construct that is not supported
+
+        Returns:
+            UPIQueryError: The error
+        """
+        return UPIQueryError(f"Not supported by the local metadata store: {what}", 400, UNSUPPORTED_QUERY)
+
+class LocalAQLInterface(LocalInterfaceBase):
+    """
+    Runs AQL against the local metadata store.
+
+    The supported shape is the one the translators emit: a single FOR over
+    the Objects collection, FILTERs that are conjunctions of comparisons,
+    IN, LIKE and STARTS_WITH on document fields, at most one SORT on
+    document fields, at most one LIMIT, and RETURN of the document.
+    Operands are literals, arrays of literals or bind parameters.
+    """
+
+    query_language = "aql"
+
+    def _compile(self, query: str) -> LocalPlan:
+        """
+        Compile an AQL query into a plan.
+
+        Args:
+            query (str): The AQL query
+
+        Returns:
+            LocalPlan: The plan
+        """
+        try:
+            operations = parse_aql(query).operations
+        except AQLSyntaxError as e:
+            raise UPIQueryError(str(e), 400, AQL_PARSE_ERROR)
+
+        loop = operations[0]
+        if (loop.keyword != "FOR" or len(loop.tokens) != 3 or loop.tokens[1] != AQLToken("keyword", "IN")
+                or loop.tokens[2].value != OBJECTS_COLLECTION or len(operations) < 2):
+            raise self._unsupported(f"a query that is not a single FOR over {OBJECTS_COLLECTION}")
+        variable = loop.tokens[0].value
+
+        conditions, sort, offset, limit = [], [], None, None
+        limited = False
+        for operation in operations[1:-1]:
+            if operation.keyword == "FILTER" and not limited:
+                conditions.extend(self._predicate(tokens, variable) for tokens in self._conjuncts(operation.tokens))
+            elif operation.keyword == "SORT" and not sort and not limited:
+                sort = [self._sort_item(tokens, variable) for tokens in self._split(operation.tokens, ",")]
+            elif operation.keyword == "LIMIT" and not limited:
+                values = [self._operand([token]) for token in operation.tokens if token.value != ","]
+                offset, limit = values if len(values) == 2 else (None, values[0])
+                limited = True
+            else:
+                raise self._unsupported(f"{operation.keyword} at this position")
+        if operations[-1].tokens != [AQLToken("name", variable)]:
+            raise self._unsupported("RETURN of anything but the document")
+        return LocalPlan(conditions, sort, offset, limit, None)
+
+    def _predicate(self, tokens: List[AQLToken], variable: str) -> Condition:
+        """
+        Compile one predicate of a FILTER.
+
+        Args:
+            tokens (List[AQLToken]): The tokens of the predicate
+            variable (str): The loop variable
+
+        Returns:
+            Condition: The condition, with a Parameter or literal operand
+        """
+        tokens = self._strip_parentheses(tokens)
+        function = tokens[0].value.upper() if len(tokens) > 3 and tokens[0].kind in ("name", "keyword") else None
+        if function in ("LIKE", "STARTS_WITH") and tokens[1] == AQLToken("op", "(") \
+                and matching_bracket(tokens, 1) == len(tokens) - 1:
+            arguments = self._split(tokens[2:-1], ",")
+            ignore_case = False
+            if function == "LIKE" and len(arguments) == 3 and arguments[2][0].value in ("TRUE", "FALSE"):
+                ignore_case = arguments.pop()[0].value == "TRUE"
+            if len(arguments) == 2:
+                field = self._field(arguments[0], variable)
+                return Condition(field, "like" if function == "LIKE" else "prefix",
+                                 self._operand(arguments[1]), ignore_case)
+            raise self._unsupported(f"{function} with {len(arguments)} arguments")
+
+        depth = 0
+        for index, token in enumerate(tokens):
+            if token.kind == "op" and token.value in ("(", "[", "{"):
+                depth += 1
+            elif token.kind == "op" and token.value in (")", "]", "}"):
+                depth -= 1
+            elif depth == 0 and (token.value in COMPARISON_OPERATORS and token.kind == "op"
+                                 or token.kind == "keyword" and token.value in ("IN", "LIKE")):
+                comparison = {"IN": "in", "LIKE": "like"}.get(token.value, token.value)
+                left, right = tokens[:index], tokens[index + 1:]
+                if comparison == "in" and left and left[-1] == AQLToken("keyword", "NOT"):
+                    comparison, left = "not in", left[:-1]
+                if self._is_field(left, variable):
+                    return Condition(self._field(left, variable), comparison, self._operand(right))
+                if comparison in COMPARISON_OPERATORS and self._is_field(right, variable):
+                    flipped = {"<": ">", "<=": ">=", ">": "<", ">=": "<="}.get(comparison, comparison)
+                    return Condition(self._field(right, variable), flipped, self._operand(left))
+                break
+        raise self._unsupported(f"the predicate {' '.join(token.value for token in tokens)}")
+
+    def _sort_item(self, tokens: List[AQLToken], variable: str) -> Tuple[str, bool]:
+        """
+        Compile one item of a SORT.
+
+        Args:
+            tokens (List[AQLToken]): The tokens of the item
+            variable (str): The loop variable
+
+        Returns:
+            Tuple[str, bool]: The field and whether the order is descending
+        """
+        descending = False
+        if tokens and tokens[-1].kind == "keyword" and tokens[-1].value in ("ASC", "DESC"):
+            descending = tokens[-1].value == "DESC"
+            tokens = tokens[:-1]
+        return self._field(tokens, variable), descending
+
+    def _is_field(self, tokens: List[AQLToken], variable: str) -> bool:
+        """
+        Check whether tokens are a top-level attribute of the loop variable.
+
+        Args:
+            tokens (List[AQLToken]): The tokens
+            variable (str): The loop variable
+
+        Returns:
+            bool: True for variable.attribute
+        """
+        return (len(tokens) == 3 and tokens[0] == AQLToken("name", variable)
+                and tokens[1] == AQLToken("op", ".") and tokens[2].kind in ("name", "keyword"))
+
+    def _field(self, tokens: List[AQLToken], variable: str) -> str:
+        """
+        Get the record field an attribute access refers to.
+
+        Args:
+            tokens (List[AQLToken]): The tokens of variable.attribute
+            variable (str): The loop variable
+
+        Returns:
+            str: The field name
+        """
+        if not self._is_field(tokens, variable):
+            raise self._unsupported(f"the expression {' '.join(token.value for token in tokens)}")
+        field = tokens[2].value.strip("`")
+        if field != "_key" and field not in FILE_FIELDS:
+            raise self._unsupported(f"the field {field}")
+        return field
+
+    def _operand(self, tokens: List[AQLToken]) -> Any:
+        """
+        Compile a literal, an array of literals or a bind parameter.
+
+        Args:
+            tokens (List[AQLToken]): The tokens of the operand
+
+        Returns:
+            Any: The value, a Parameter, or a list of them
+        """
+        if len(tokens) == 1:
+            token = tokens[0]
+            if token.kind == "bind" and not token.value.startswith("@@"):
+                return Parameter(token.value[1:])
+            if token.kind == "number":
+                return float(token.value) if any(c in token.value for c in ".eE") else int(token.value)
+            if token.kind == "string":
+                body = token.value[1:-1]
+                if token.value[0] == "'":
+                    body = body.replace("\\'", "'").replace('"', '\\"')
+                return json.loads(f'"{body}"')
+            if token.kind == "keyword" and token.value in ("NULL", "TRUE", "FALSE"):
+                return {"NULL": None, "TRUE": True, "FALSE": False}[token.value]
+        if len(tokens) == 2 and tokens[0] == AQLToken("op", "-") and tokens[1].kind == "number":
+            return -self._operand(tokens[1:])
+        if len(tokens) >= 2 and tokens[0] == AQLToken("op", "[") and matching_bracket(tokens, 0) == len(tokens) - 1:
+            return [self._operand(item) for item in self._split(tokens[1:-1], ",") if item]
+        raise self._unsupported(f"the operand {' '.join(token.value for token in tokens)}")
+
+    def _conjuncts(self, tokens: List[AQLToken]) -> List[List[AQLToken]]:
+        """
+        Split a FILTER expression at its top-level AND operators.
+
+        Args:
+            tokens (List[AQLToken]): The tokens of the expression
+
+        Returns:
+            List[List[AQLToken]]: The tokens of each conjunct
+        """
+        tokens = self._strip_parentheses(tokens)
+        conjuncts = []
+        for part in self._split(tokens, "AND"):
+            for conjunct in self._split(part, "&&"):
+                stripped = self._strip_parentheses(conjunct)
+                conjuncts.extend(self._conjuncts(stripped) if stripped != conjunct else [conjunct])
+        return conjuncts
+
+    def _split(self, tokens: List[AQLToken], separator: str) -> List[List[AQLToken]]:
+        """
+        Split tokens at a separator that is not nested in brackets.
+
+        Args:
+            tokens (List[AQLToken]): The tokens
+            separator (str): The separating token value, e.g. "," or "AND"
+
+        Returns:
+            List[List[AQLToken]]: The tokens of each part
+        """
+        parts = [[]]
+        depth = 0
+        for token in tokens:
+            if token.kind == "op" and token.value in ("(", "[", "{"):
+                depth += 1
+            elif token.kind == "op" and token.value in (")", "]", "}"):
+                depth -= 1
+            elif depth == 0 and token.value == separator and token.kind in ("op", "keyword"):
+                parts.append([])
+                continue
+            parts[-1].append(token)
+        return parts
+
+    def _strip_parentheses(self, tokens: List[AQLToken]) -> List[AQLToken]:
+        """
+        Remove parentheses enclosing a whole expression.
+
+        Args:
+            tokens (List[AQLToken]): The tokens of the expression
+
+        Returns:
+            List[AQLToken]: The tokens without the enclosing parentheses
+        """
+        while len(tokens) >= 2 and tokens[0] == AQLToken("op", "(") and matching_bracket(tokens, 0) == len(tokens) - 1:
+            tokens = tokens[1:-1]
+        return tokens
+
+    def _missing_parameter(self, name: str) -> UPIQueryError:
+        """
+        Build ArangoDB's error for a bind parameter without a value.
+
+        Args:
+            name (str): The parameter name
+
+        Returns:
+            UPIQueryError: The error
+        """
+        return UPIQueryError(f"no value specified for declared bind parameter '{name}'", 400, AQL_MISSING_BIND_PARAMETER)
+
+class LocalGraphQLInterface(LocalInterfaceBase):
+    """
+    Runs GraphQL against the local metadata store.
+
+    The supported operations are the two root fields of the UPI schema:
+    files(filter, limit, offset) and file(path), selecting leaf fields of
+    File. Argument values may be literals or variables. The nameLike
+    filter takes a case-insensitive pattern with the glob wildcards * and ?,
+    matching what the AQL translation of the same filter returns.
+    """
+
+    query_language = "graphql"
+
+    def _compile(self, query: str) -> GraphQLPlan:
+        """
+        Compile a GraphQL query into a plan.
+
+        The plan keeps the root field's arguments until they are bound, since
+        a whole FileFilter may be a single variable.
+
+        Args:
+            query (str): The GraphQL query
+
+        Returns:
+            GraphQLPlan: The plan
+        """
+        try:
+            document = parse_graphql(query)
+        except GraphQLSyntaxError as e:
+            raise UPIQueryError(str(e), 400, "GRAPHQL_PARSE_FAILED")
+        if len(document.operations) != 1 or document.operations[0].operation_type != "query":
+            raise self._unsupported("a document that is not a single query operation")
+        selections = document.operations[0].selections
+        if len(selections) != 1 or not isinstance(selections[0], GraphQLField) \
+                or selections[0].name not in ("files", "file"):
+            raise self._unsupported("root fields other than a single files or file")
+        root = selections[0]
+        fields = []
+        for selection in root.selections or []:
+            if not isinstance(selection, GraphQLField) or selection.selections is not None \
+                    or selection.name not in FILE_FIELDS:
+                raise self._unsupported(f"the selection {getattr(selection, 'name', '...')} of File")
+            fields.append(selection.name)
+        if not fields:
+            raise self._unsupported("a File without selected fields")
+        arguments = {name: self._operand(value) for name, value in root.arguments.items()}
+        return GraphQLPlan(root.name, arguments, fields)
+
+    def _bind(self, plan: GraphQLPlan, parameters: Dict[str, Any]) -> LocalPlan:
+        """
+        Resolve the variables of a plan and turn its arguments into conditions.
+
+        Args:
+            plan (GraphQLPlan): The compiled plan
+            parameters (Dict[str, Any]): The query's variables
+
+        Returns:
+            LocalPlan: The bound plan
+        """
+        arguments = {name: self._resolve(value, parameters) for name, value in plan.arguments.items()}
+        if plan.root == "file":
+            if not isinstance(arguments.get("path"), str) or set(arguments) != {"path"}:
+                raise UPIQueryError("file takes exactly one String argument, path", 400, "GRAPHQL_VALIDATION_FAILED")
+            return LocalPlan([Condition("path", "==", arguments["path"])], [], 0, 1, plan.fields)
+
+        unknown = set(arguments) - {"filter", "limit", "offset"}
+        if unknown:
+            raise UPIQueryError(f"Unknown argument {sorted(unknown)[0]} on files", 400, "GRAPHQL_VALIDATION_FAILED")
+        conditions = []
+        for name, value in (arguments.get("filter") or {}).items():
+            if name not in _GRAPHQL_FILTERS:
+                raise UPIQueryError(f"Unknown FileFilter field {name}", 400, "GRAPHQL_VALIDATION_FAILED")
+            if value is None:
+                continue
+            field, comparison = _GRAPHQL_FILTERS[name]
+            if comparison == "like":
+                conditions.append(Condition(field, "like", glob_to_like(value), True))
+            else:
+                conditions.append(Condition(field, comparison, value))
+        return super()._bind(LocalPlan(conditions, [], arguments.get("offset"), arguments.get("limit"), plan.fields),
+                             parameters)
+
+    def _operand(self, value: Any) -> Any:
+        """
+        Turn parsed GraphQL variables into Parameters.
+
+        Args:
+            value (Any): A parsed argument value
+
+        Returns:
+            Any: The value with GraphQLVariable replaced by Parameter
+        """
+        if isinstance(value, GraphQLVariable):
+            return Parameter(value.name)
+        if isinstance(value, GraphQLEnum):
+            raise self._unsupported(f"the enum value {value.name}")
+        if isinstance(value, list):
+            return [self._operand(item) for item in value]
+        if isinstance(value, dict):
+            return {key: self._operand(item) for key, item in value.items()}
+        return value
+
+def glob_to_like(pattern: Any) -> str:
+    """
+    Turn a name pattern with glob wildcards into a LIKE pattern.
+
+    Args:
+        pattern (Any): The pattern; * and ? become % and _, and a literal % or _ is escaped
+
+    Returns:
+        str: The LIKE pattern
+    """
+    if not isinstance(pattern, str):
+        raise UPIQueryError(f"nameLike must be a string, got {pattern!r}", 400, "GRAPHQL_VALIDATION_FAILED")
+    return pattern.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_").replace("*", "%").replace("?", "_")
@@ -0,0 +1,713 @@
+#!/usr/bin/env python3
+
+import bisect
+import functools
+import heapq
+import itertools
+import json
+import os
+import re
+import threading
+import uuid
+from collections import namedtuple
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+# Fields with an inverted index from each distinct value to the records holding it
+HASH_FIELDS = ("extension", "owner")
+
+# Fields with a sorted secondary index, serving range comparisons and ordering
+SORTED_FIELDS = ("size", "created", "modified", "accessed")
+
+# A token of a lower-cased file name in the name index
+NAME_TOKEN = re.compile(r"[0-9a-z]+")
+
+# A condition on one record field; comparison is one of "==", "!=", "<", "<=", ">", ">=", "in",
+# "not in", "like" (an AQL LIKE pattern) or "prefix"
+Condition = namedtuple("Condition", ["field", "comparison", "value", "ignore_case"], defaults=(False,))
+
+# The comparisons a sorted index can answer, as (lower inclusive, upper inclusive) per side
+_RANGES = {"==": (True, True), "<": (None, False), "<=": (None, True), ">": (False, None), ">=": (True, None)}
+
+def sort_key(value: Any) -> Tuple:
+    """
+    Get the key that orders values the way AQL compares them.
+
+    Values of different types compare by type first: null, then booleans,
+    numbers, strings, and arrays and objects last.
+
+    Args:
+        value (Any): A field value; None for a missing field
+
+    Returns:
+        Tuple: The type rank and the value
+    """
+    if value is None:
+        return (0, 0)
+    if isinstance(value, bool):
+        return (1, value)
+    if isinstance(value, (int, float)):
+        return (2, value)
+    if isinstance(value, str):
+        return (3, value)
+    return (4, json.dumps(value, sort_keys=True, default=str))
+
+@functools.lru_cache(maxsize=1024)
+def like_regex(pattern: str, ignore_case: bool = False) -> "re.Pattern":
+    """
+    Compile an AQL LIKE pattern.
+
+    Args:
+        pattern (str): The pattern, with % for any run of characters, _ for one character and \\ as escape
+        ignore_case (bool): Whether the match is case-insensitive
+
+    Returns:
+        re.Pattern: A regular expression to fullmatch against the value
+    """
+    parts = []
+    escaped = False
+    for char in pattern:
+        if escaped:
+            parts.append(re.escape(char))
+            escaped = False
+        elif char == "\\":
+            escaped = True
+        else:
+            parts.append(".*" if char == "%" else "." if char == "_" else re.escape(char))
+    return re.compile("".join(parts), re.DOTALL | (re.IGNORECASE if ignore_case else 0))
+
+def like_fragments(pattern: str) -> List[Tuple[str, bool, bool]]:
+    """
+    Split an AQL LIKE pattern into its literal fragments.
+
+    Args:
+        pattern (str): The LIKE pattern
+
+    Returns:
+        List[Tuple[str, bool, bool]]: Each fragment, and whether it is anchored at the start and at the end of the value
+    """
+    fragments = []
+    current = []
+    anchored = True
+    escaped = False
+    for char in pattern:
+        if escaped:
+            current.append(char)
+            escaped = False
+        elif char == "\\":
+            escaped = True
+        elif char in "%_":
+            if current:
+                fragments.append(("".join(current), anchored, False))
+            current = []
+            anchored = False
+        else:
+            current.append(char)
+    if current:
+        fragments.append(("".join(current), anchored, True))
+    return fragments
+
+class SortedRuns:
+    """
+    A sorted collection kept as a few sorted runs of decreasing size.
+
+    Added items become a new run, which is merged with the run before it
+    only while that one is less than twice its size. Loading n items in
+    batches therefore costs O(n log n) in all, rather than a merge of the
+    whole collection per batch, and there are O(log n) runs, each searched
+    with bisect.
+    """
+
+    def __init__(self):
+        """
+        Initialize an empty collection.
+        """
+        self.runs: List[List[Any]] = []
+
+    def __len__(self) -> int:
+        return sum(len(run) for run in self.runs)
+
+    def add(self, items: Iterable[Any]) -> None:
+        """
+        Add items, in any order.
+
+        Args:
+            items (Iterable[Any]): The items
+        """
+        run = sorted(items)
+        if not run:
+            return
+        self.runs.append(run)
+        while len(self.runs) > 1 and len(self.runs[-2]) < 2 * len(self.runs[-1]):
+            last = self.runs.pop()
+            # Sorting the concatenation of two sorted runs is a single merge
+            self.runs[-1].extend(last)
+            self.runs[-1].sort()
+
+    def remove(self, item: Any) -> bool:
+        """
+        Remove an item.
+
+        Args:
+            item (Any): The item
+
+        Returns:
+            bool: True if it was found
+        """
+        for index, run in enumerate(self.runs):
+            position = bisect.bisect_left(run, item)
+            if position < len(run) and run[position] == item:
+                del run[position]
+                if not run:
+                    del self.runs[index]
+                return True
+        return False
+
+    def slices(self, low: Any = None, high: Any = None) -> List[Tuple[List[Any], int, int]]:
+        """
+        Find the items from low up to, but excluding, high.
+
+        Args:
+            low (Any): The smallest item to include, or None to start at the first
+            high (Any): The first item to exclude, or None to end at the last
+
+        Returns:
+            List[Tuple[List[Any], int, int]]: The matching positions of each run, as (run, start, end)
+        """
+        found = []
+        for run in self.runs:
+            start = 0 if low is None else bisect.bisect_left(run, low)
+            end = len(run) if high is None else bisect.bisect_left(run, high, start)
+            if end > start:
+                found.append((run, start, end))
+        return found
+
+    def ordered(self, descending: bool = False) -> Iterator[Any]:
+        """
+        Iterate over all items in order.
+
+        Args:
+            descending (bool): Whether to start from the largest item
+
+        Returns:
+            Iterator[Any]: The items
+        """
+        if descending:
+            return heapq.merge(*(reversed(run) for run in self.runs), reverse=True)
+        return heapq.merge(*self.runs)
+
+class SortedIndex:
+    """
+    A secondary index holding the records of a collection in field order.
+
+    Entries are (sort_key(value), sequence number, record key) tuples in
+    SortedRuns, so a range of values is found by binary search and its size
+    is known before any record is read.
+    """
+
+    def __init__(self):
+        """
+        Initialize an empty index.
+        """
+        self.entries = SortedRuns()
+
+    def add_many(self, entries: Iterable[Tuple[Any, int, str]]) -> None:
+        """
+        Add records to the index.
+
+        Args:
+            entries (Iterable[Tuple[Any, int, str]]): The records as (value, sequence number, key)
+        """
+        self.entries.add((sort_key(value), sequence, key) for value, sequence, key in entries)
+
+    def remove(self, value: Any, sequence: int, key: str) -> None:
+        """
+        Remove a record from the index.
+
+        Args:
+            value (Any): The field value the record was added with
+            sequence (int): The record's sequence number
+            key (str): The record's key
+        """
+        self.entries.remove((sort_key(value), sequence, key))
+
+    def span(self, conditions: Iterable[Condition]) -> List[Tuple[List[Any], int, int]]:
+        """
+        Find the entries satisfying every range condition.
+
+        Args:
+            conditions (Iterable[Condition]): Conditions on the indexed field whose comparison is in _RANGES
+
+        Returns:
+            List[Tuple[List[Any], int, int]]: The matching entries of each run, as (run, start, end)
+        """
+        low = high = None
+        for condition in conditions:
+            lower, upper = _RANGES[condition.comparison]
+            key = sort_key(condition.value)
+            if lower is not None:
+                bound = (key,) if lower else (key, float("inf"))
+                low = bound if low is None else max(low, bound)
+            if upper is not None:
+                bound = (key, float("inf")) if upper else (key,)
+                high = bound if high is None else min(high, bound)
+        if low is not None and high is not None and high <= low:
+            return []
+        return self.entries.slices(low, high)
+
+    def ordered_keys(self, descending: bool = False) -> Iterator[str]:
+        """
+        Iterate over the record keys in field order.
+
+        Args:
+            descending (bool): Whether to start from the largest value
+
+        Returns:
+            Iterator[str]: The record keys
+        """
+        return (entry[2] for entry in self.entries.ordered(descending))
+
+class LocalMetadataStore:
+    """
+    An embedded, in-process store of UPI file metadata records.
+
+    Records are kept by key together with secondary indexes maintained on
+    every write: an inverted index from each distinct extension and owner to
+    its records, an inverted index from the lower-cased tokens of file names
+    to their records, and sorted indexes on size and the timestamps.
+
+    find() plans each query from the estimated size of every index that can
+    answer one of its conditions: the smallest candidate set is read and
+    the remaining conditions are checked per record. A query no index
+    serves scans every record, except that one ordered by an indexed field
+    with a limit walks that index and stops at the limit. Comparisons
+    follow AQL, so values of different types compare by type and a missing
+    field compares as null.
+
+    The store is safe for concurrent readers and writers, and can be saved
+    to and loaded from a JSON lines file.
+    """
+
+    def __init__(self, records: Optional[Iterable[Dict[str, Any]]] = None):
+        """
+        Initialize the store.
+
+        Args:
+            records (Optional[Iterable[Dict[str, Any]]]): Records to load initially
+        """
+        self.records: Dict[str, Dict[str, Any]] = {}
+        self.sequences: Dict[str, int] = {}
+        self.hash_indexes: Dict[str, Dict[Tuple, Set[str]]] = {field: {} for field in HASH_FIELDS}
+        self.name_index: Dict[str, Set[str]] = {}
+        self.vocabulary = SortedRuns()
+        self.reversed_vocabulary = SortedRuns()
+        self.sorted_indexes: Dict[str, SortedIndex] = {field: SortedIndex() for field in SORTED_FIELDS}
+        # Distinguishes this store's revisions from those of any other store, including one loaded from the same file
+        self.instance = uuid.uuid4().hex[:16]
+        self.version = 0
+        self.stats = {"writes": 0, "queries": 0, "index_scans": 0, "ordered_scans": 0, "full_scans": 0,
+                      "rows_examined": 0, "rows_returned": 0}
+        self._sequence = itertools.count()
+        self._lock = threading.RLock()
+        if records is not None:
+            self.put_many(records)
+
+    @classmethod
+    def load(cls, path: str) -> "LocalMetadataStore":
+        """
+        Load a store from a JSON lines file of records.
+
+        Args:
+            path (str): The file, one JSON record per line
+
+        Returns:
+            LocalMetadataStore: The store holding the file's records
+        """
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.loads(line) for line in f if line.strip())
+
+    def save(self, path: str) -> None:
+        """
+        Write every record to a JSON lines file, replacing it atomically.
+
+        Args:
+            path (str): The file to write
+        """
+        temporary = f"{path}.tmp"
+        with self._lock, open(temporary, "w", encoding="utf-8") as f:
+            for record in self.records.values():
+                f.write(json.dumps(record, default=str))
+                f.write("\n")
+        os.replace(temporary, path)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a record by key.
+
+        Args:
+            key (str): The record key
+
+        Returns:
+            Optional[Dict[str, Any]]: A copy of the record, or None if there is none
+        """
+        with self._lock:
+            record = self.records.get(key)
+            return None if record is None else dict(record)
+
+    def put(self, record: Dict[str, Any]) -> str:
+        """
+        Insert or replace a record.
+
+        Args:
+            record (Dict[str, Any]): The record; one with the _key of a stored record replaces it
+
+        Returns:
+            str: The record's key, assigned at random if it has none
+        """
+        return self.put_many([record])[0]
+
+    def put_many(self, records: Iterable[Dict[str, Any]]) -> List[str]:
+        """
+        Insert or replace many records, updating the indexes incrementally.
+
+        Args:
+            records (Iterable[Dict[str, Any]]): The records
+
+        Returns:
+            List[str]: The records' keys, in order
+        """
+        keys = []
+        sorted_entries = {field: [] for field in SORTED_FIELDS}
+        new_tokens = set()
+        with self._lock:
+            for record in records:
+                record = dict(record)
+                sequence = next(self._sequence)
+                # A keyless record gets a random key, which no record of a reloaded store can already hold
+                key = str(record.setdefault("_key", uuid.uuid4().hex))
+                record["_key"] = key
+                if key in self.records:
+                    # A replaced record moves to the end, keeping insertion order equal to sequence order
+                    self._unindex(key)
+                    del self.records[key]
+                self.records[key] = record
+                self.sequences[key] = sequence
+                for field in HASH_FIELDS:
+                    self.hash_indexes[field].setdefault(sort_key(record.get(field)), set()).add(key)
+                for token in set(NAME_TOKEN.findall(str(record.get("name") or "").lower())):
+                    postings = self.name_index.get(token)
+                    if postings is None:
+                        postings = self.name_index[token] = set()
+                        new_tokens.add(token)
+                    postings.add(key)
+                for field in SORTED_FIELDS:
+                    sorted_entries[field].append((record.get(field), sequence, key))
+                keys.append(key)
+            for field, entries in sorted_entries.items():
+                self.sorted_indexes[field].add_many(entries)
+            self.vocabulary.add(new_tokens)
+            self.reversed_vocabulary.add(token[::-1] for token in new_tokens)
+            if keys:
+                self.version += 1
+                self.stats["writes"] += len(keys)
+        return keys
+
+    def remove(self, key: str) -> bool:
+        """
+        Remove a record.
+
+        Args:
+            key (str): The record key
+
+        Returns:
+            bool: True if the record existed
+        """
+        with self._lock:
+            if key not in self.records:
+                return False
+            self._unindex(key)
+            del self.records[key]
+            del self.sequences[key]
+            self.version += 1
+            self.stats["writes"] += 1
+            return True
+
+    def revision(self) -> str:
+        """
+        Get the revision of the store, which changes with every write.
+
+        The revision is unique to this store object, so results cached for
+        another store, or for an earlier load of the same file, never match.
+
+        Returns:
+            str: The revision
+        """
+        return f"local-{self.instance}-{self.version}"
+
+    def find(self, conditions: Sequence[Condition], sort: Sequence[Tuple[str, bool]] = (),
+             offset: int = 0, limit: Optional[int] = None,
+             fields: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Find the records matching every condition.
+
+        Args:
+            conditions (Sequence[Condition]): The conditions, combined with AND
+            sort (Sequence[Tuple[str, bool]]): The fields to order by and whether each is descending; insertion order if empty
+            offset (int): The number of matching records to skip
+            limit (Optional[int]): The maximum number of records to return, or None for all
+            fields (Optional[Sequence[str]]): The fields to return, or None for whole records
+
+        Returns:
+            List[Dict[str, Any]]: Copies of the matching records
+        """
+        with self._lock:
+            self._count("queries")
+            candidates = self._candidates(conditions)
+            if candidates is None and limit is not None and len(sort) == 1 and sort[0][0] in SORTED_FIELDS:
+                self._count("ordered_scans")
+                matches = itertools.islice(self._ordered_scan(conditions, *sort[0]), offset, offset + limit)
+                results = [self._project(record, fields) for record in matches]
+            else:
+                if candidates is None:
+                    self._count("full_scans")
+                    candidates = self.records
+                else:
+                    self._count("index_scans")
+                    candidates = sorted(candidates, key=self.sequences.__getitem__)
+                matches = [record for record in self._examine(candidates) if self._matches(record, conditions)]
+                for field, descending in reversed(sort):
+                    matches.sort(key=lambda record: sort_key(record.get(field)), reverse=descending)
+                end = None if limit is None else offset + limit
+                results = [self._project(record, fields) for record in matches[offset:end]]
+            self.stats["rows_returned"] += len(results)
+            return results
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get the store's size and query counters.
+
+        Returns:
+            Dict[str, Any]: The number of records, name tokens and writes, and the queries by plan with rows examined and returned
+        """
+        with self._lock:
+            stats = dict(self.stats)
+            stats["records"] = len(self.records)
+            stats["name_tokens"] = len(self.name_index)
+            return stats
+
+    def _candidates(self, conditions: Sequence[Condition]) -> Optional[Set[str]]:
+        """
+        Choose the smallest candidate set any index offers for the conditions.
+
+        Args:
+            conditions (Sequence[Condition]): The query's conditions
+
+        Returns:
+            Optional[Set[str]]: The keys of the candidate records, or None if no index applies
+        """
+        options = []
+        ranges = {}
+        for condition in conditions:
+            field, comparison = condition.field, condition.comparison
+            if field == "_key" and comparison in ("==", "in"):
+                values = [condition.value] if comparison == "==" else condition.value
+                options.append((len(values), lambda values=values: {str(v) for v in values if str(v) in self.records}))
+            elif field in HASH_FIELDS and comparison in ("==", "in"):
+                index = self.hash_indexes[field]
+                values = {sort_key(v) for v in ([condition.value] if comparison == "==" else condition.value)}
+                size = sum(len(index.get(value, ())) for value in values)
+                options.append((size, lambda index=index, values=values: set().union(*(index.get(v, ()) for v in values))))
+            elif field in SORTED_FIELDS and comparison in _RANGES:
+                ranges.setdefault(field, []).append(condition)
+            elif field == "name" and comparison in ("==", "prefix", "like") and isinstance(condition.value, str):
+                keys = self._name_candidates(condition)
+                if keys is not None:
+                    options.append((len(keys), lambda keys=keys: keys))
+        for field, field_conditions in ranges.items():
+            spans = self.sorted_indexes[field].span(field_conditions)
+            options.append((sum(end - start for _, start, end in spans), lambda spans=spans: {
+                entry[2] for run, start, end in spans for entry in run[start:end]
+            }))
+        if not options:
+            return None
+        return min(options, key=lambda option: option[0])[1]()
+
+    def _name_candidates(self, condition: Condition) -> Optional[Set[str]]:
+        """
+        Get the records whose name tokens can satisfy an equality, prefix or LIKE condition on the name.
+
+        Every run of letters and digits in a literal part of the pattern lies
+        within one token of a matching name. A run bounded by separators or
+        by an anchored end of the pattern is a whole token and is looked up
+        directly; a run bounded on one side is a token prefix or suffix,
+        found by binary search in the sorted (or sorted reversed) token
+        vocabulary; only a run bounded on neither side scans the vocabulary.
+        Runs are applied cheapest first, and narrowing stops once few
+        candidates are left for the conditions to check.
+
+        Args:
+            condition (Condition): The condition on the name field
+
+        Returns:
+            Optional[Set[str]]: The keys of the candidate records, or None if the pattern has no literal runs
+        """
+        if condition.comparison == "==":
+            fragments = [(condition.value, True, True)]
+        elif condition.comparison == "prefix":
+            fragments = [(condition.value, True, False)]
+        else:
+            fragments = like_fragments(condition.value)
+        runs = []
+        for text, anchored_start, anchored_end in fragments:
+            text = text.lower()
+            for run in NAME_TOKEN.finditer(text):
+                whole_start = run.start() > 0 or anchored_start
+                whole_end = run.end() < len(text) or anchored_end
+                runs.append((2 - whole_start - whole_end, run.group(), whole_start, whole_end))
+
+        candidates = None
+        for _, token, whole_start, whole_end in sorted(runs):
+            if candidates is not None and len(candidates) <= 64:
+                break
+            if whole_start and whole_end:
+                tokens = [token] if token in self.name_index else []
+            elif whole_start:
+                tokens = self._with_prefix(self.vocabulary, token)
+            elif whole_end:
+                tokens = [reversed_token[::-1] for reversed_token in self._with_prefix(self.reversed_vocabulary, token[::-1])]
+            else:
+                tokens = [candidate for candidate in self.name_index if token in candidate]
+            keys = set().union(*(self.name_index[t] for t in tokens))
+            candidates = keys if candidates is None else candidates & keys
+        return candidates
+
+    def _with_prefix(self, tokens: SortedRuns, prefix: str) -> List[str]:
+        """
+        Get the tokens of a sorted vocabulary that start with a prefix.
+
+        Args:
+            tokens (SortedRuns): The vocabulary, or the vocabulary of reversed tokens
+            prefix (str): The prefix
+
+        Returns:
+            List[str]: The matching tokens
+        """
+        return [token for run, start, end in tokens.slices(prefix, prefix + "\uffff") for token in run[start:end]]
+
+    def _ordered_scan(self, conditions: Sequence[Condition], field: str, descending: bool) -> Iterator[Dict[str, Any]]:
+        """
+        Yield the matching records in the order of a sorted index.
+
+        Args:
+            conditions (Sequence[Condition]): The query's conditions
+            field (str): The indexed field to order by
+            descending (bool): Whether to walk the index from the largest value
+
+        Returns:
+            Iterator[Dict[str, Any]]: The matching records, in order
+        """
+        for record in self._examine(self.sorted_indexes[field].ordered_keys(descending)):
+            if self._matches(record, conditions):
+                yield record
+
+    def _examine(self, keys: Iterable[str]) -> Iterator[Dict[str, Any]]:
+        """
+        Read the records for a sequence of keys, counting them.
+
+        Args:
+            keys (Iterable[str]): The record keys
+
+        Returns:
+            Iterator[Dict[str, Any]]: The records
+        """
+        examined = 0
+        try:
+            for key in keys:
+                examined += 1
+                yield self.records[key]
+        finally:
+            self.stats["rows_examined"] += examined
+
+    def _matches(self, record: Dict[str, Any], conditions: Sequence[Condition]) -> bool:
+        """
+        Check a record against every condition.
+
+        Args:
+            record (Dict[str, Any]): The record
+            conditions (Sequence[Condition]): The conditions
+
+        Returns:
+            bool: True if the record satisfies all of them
+        """
+        for field, comparison, expected, ignore_case in conditions:
+            value = record.get(field)
+            if comparison == "like":
+                if not isinstance(value, str) or not like_regex(expected, ignore_case).fullmatch(value):
+                    return False
+            elif comparison == "prefix":
+                if not isinstance(value, str) or not isinstance(expected, str) or not value.startswith(expected):
+                    return False
+            elif comparison in ("in", "not in"):
+                found = sort_key(value) in {sort_key(v) for v in expected}
+                if found != (comparison == "in"):
+                    return False
+            else:
+                left, right = sort_key(value), sort_key(expected)
+                if not (left == right if comparison == "==" else left != right if comparison == "!="
+                        else left < right if comparison == "<" else left <= right if comparison == "<="
+                        else left > right if comparison == ">" else left >= right):
+                    return False
+        return True
+
+    def _project(self, record: Dict[str, Any], fields: Optional[Sequence[str]]) -> Dict[str, Any]:
+        """
+        Copy a record, keeping only the requested fields.
+
+        Args:
+            record (Dict[str, Any]): The stored record
+            fields (Optional[Sequence[str]]): The fields to keep, or None for all
+
+        Returns:
+            Dict[str, Any]: The copy
+        """
+        if fields is None:
+            return dict(record)
+        return {field: record.get(field) for field in fields}
+
+    def _unindex(self, key: str) -> None:
+        """
+        Remove a stored record from every index.
+
+        Args:
+            key (str): The record key
+        """
+        record = self.records[key]
+        sequence = self.sequences[key]
+        for field in HASH_FIELDS:
+            value = sort_key(record.get(field))
+            postings = self.hash_indexes[field].get(value)
+            if postings is not None:
+                postings.discard(key)
+                if not postings:
+                    del self.hash_indexes[field][value]
+        for token in set(NAME_TOKEN.findall(str(record.get("name") or "").lower())):
+            postings = self.name_index.get(token)
+            if postings is not None:
+                postings.discard(key)
+                if not postings:
+                    del self.name_index[token]
+                    self.vocabulary.remove(token)
+                    self.reversed_vocabulary.remove(token[::-1])
+        for field in SORTED_FIELDS:
+            self.sorted_indexes[field].remove(record.get(field), sequence, key)
+
+    def _count(self, counter: str) -> None:
+        """
+        Increment a counter.
+
+        Args:
+            counter (str): The name of the counter to increment
+        """
+        self.stats[counter] += 1
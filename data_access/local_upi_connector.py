@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+
+from typing import Dict, Any, Iterator, List, Optional
+from .data_interface.local_interface import LocalAQLInterface, LocalGraphQLInterface
+from .local_metadata_store import LocalMetadataStore
+from utils.request_context import RequestContext
+
+class LocalUPIConnector:
+    """
+    Data connector for the embedded local metadata store.
+
+    It answers execute_aql, execute_graphql and the cursor methods from a
+    LocalMetadataStore in the same process, through the local AQL and
+    GraphQL data interfaces, so a search needs no UPI server or network.
+    It is meant for laptops, CI and benchmarks; queries outside the shapes
+    the translators emit raise UPIQueryError.
+    """
+
+    def __init__(self, store: Optional[LocalMetadataStore] = None, max_plans: int = 1024):
+        """
+        Initialize the local connector.
+
+        Args:
+            store (Optional[LocalMetadataStore]): The store to query, or None for an empty one
+            max_plans (int): The maximum number of compiled query texts each interface keeps
+        """
+        self.store = store if store is not None else LocalMetadataStore()
+        self.aql = LocalAQLInterface(max_plans)
+        self.graphql = LocalGraphQLInterface(max_plans)
+
+    def execute_aql(self, query: str, bind_vars: Optional[Dict[str, Any]] = None,
+                    context: Optional[RequestContext] = None) -> List[Dict[str, Any]]:
+        """
+        Execute an AQL query against the store.
+
+        Args:
+            query (str): The AQL query
+            bind_vars (Optional[Dict[str, Any]]): Values of the query's bind parameters
+            context (Optional[RequestContext]): The request's deadline and cancellation state
+
+        Returns:
+            List[Dict[str, Any]]: The result records
+        """
+        if context is not None:
+            context.check("upi")
+        return self.aql.execute(self.store, query, bind_vars)
+
+    def execute_graphql(self, query: str, variables: Optional[Dict[str, Any]] = None,
+                        context: Optional[RequestContext] = None) -> List[Dict[str, Any]]:
+        """
+        Execute a GraphQL query against the store.
+
+        Args:
+            query (str): The GraphQL query
+            variables (Optional[Dict[str, Any]]): Values of the query's variables
+            context (Optional[RequestContext]): The request's deadline and cancellation state
+
+        Returns:
+            List[Dict[str, Any]]: The result records
+        """
+        if context is not None:
+            context.check("upi")
+        return self.graphql.execute(self.store, query, variables)
+
+    def cursor_aql(self, query: str, batch_size: int, bind_vars: Optional[Dict[str, Any]] = None,
+                   context: Optional[RequestContext] = None) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Execute an AQL query against the store and return its results in batches.
+
+        Args:
+            query (str): The AQL query
+            batch_size (int): The maximum number of records per batch
+            bind_vars (Optional[Dict[str, Any]]): Values of the query's bind parameters
+            context (Optional[RequestContext]): The request's deadline and cancellation state
+
+        Returns:
+            Iterator[List[Dict[str, Any]]]: The result records, one batch at a time
+        """
+        if context is not None:
+            context.check("upi")
+        return self.aql.cursor(self.store, query, batch_size, bind_vars)
+
+    def cursor_graphql(self, query: str, batch_size: int, variables: Optional[Dict[str, Any]] = None,
+                       context: Optional[RequestContext] = None) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Execute a GraphQL query against the store and return its results in batches.
+
+        Args:
+            query (str): The GraphQL query
+            batch_size (int): The maximum number of records per batch
+            variables (Optional[Dict[str, Any]]): Values of the query's variables
+            context (Optional[RequestContext]): The request's deadline and cancellation state
+
+        Returns:
+            Iterator[List[Dict[str, Any]]]: The result records, one batch at a time
+        """
+        if context is not None:
+            context.check("upi")
+        return self.graphql.cursor(self.store, query, batch_size, variables)
+
+    def collection_version(self) -> str:
+        """
+        Get the revision of the store.
+
+        Returns:
+            str: A revision that changes with every write to the store
+        """
+        return self.store.revision()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get the store and protocol counters.
+
+        Returns:
+            Dict[str, Any]: The store's size and query plan counters, and the AQL and GraphQL plan cache counters
+        """
+        stats = self.store.get_stats()
+        stats["aql"] = self.aql.get_stats()
+        stats["graphql"] = self.graphql.get_stats()
+        return stats
+
+    def close(self) -> None:
+        """
+        Release the interfaces; the store stays usable.
+        """
+        self.aql.close()
+        self.graphql.close()
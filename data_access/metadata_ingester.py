@@ -0,0 +1,413 @@
+#!/usr/bin/env python3
+
+import hashlib
+import itertools
+import json
+import os
+import stat
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Any, Callable, Iterable, Iterator, List, Optional, Tuple
+from .local_metadata_store import LocalMetadataStore
+
+try:
+    import pwd
+except ImportError:  # not available on Windows
+    pwd = None
+
+# Bytes read at a time when hashing file contents
+HASH_CHUNK_SIZE = 1 << 20
+
+def path_key(path: str) -> str:
+    """
+    Derive a record key from a file path, so that a file keeps its key across ingestions.
+
+    Args:
+        path (str): The file path
+
+    Returns:
+        str: The key
+    """
+    return hashlib.sha256(path.encode("utf-8", "surrogateescape")).hexdigest()[:32]
+
+class MetadataIngester:
+    """
+    Bulk loader of file metadata records into a LocalMetadataStore.
+
+    Records are streamed from a JSON lines file or from a walk of a
+    directory tree and written in large batches with put_many(), which
+    updates the store's name, extension, size and time indexes
+    incrementally instead of rebuilding them. During a walk, the stat and
+    content hash of each batch's files run on a pool of worker threads.
+
+    With a store_path, every batch is appended to that JSON lines file (the
+    format LocalMetadataStore.load and --local-store read) and flushed to
+    disk before a checkpoint records the source position and the file's
+    length. An ingestion that is interrupted resumes from its checkpoint
+    when it is run again on the same source: the store file is cut back to
+    the checkpointed length, reloaded, and reading continues after the last
+    recorded batch. Records are keyed, so a batch applied twice leaves the
+    same result. The checkpoint is removed when the source is exhausted.
+    """
+
+    def __init__(self, store: Optional[LocalMetadataStore] = None, store_path: Optional[str] = None,
+                 checkpoint_path: Optional[str] = None, batch_size: int = 10000, workers: int = 8,
+                 hash_contents: bool = True, progress: Optional[Callable[[Dict[str, Any]], None]] = None):
+        """
+        Initialize the ingester, reloading the store file if there is one.
+
+        Args:
+            store (Optional[LocalMetadataStore]): The store to load into, or None for a new one
+            store_path (Optional[str]): The JSON lines file the store is persisted to, or None to keep it in memory
+            checkpoint_path (Optional[str]): The checkpoint file, or None for store_path plus ".checkpoint"
+            batch_size (int): The number of records written per batch
+            workers (int): The number of threads that stat and hash files during a directory walk
+            hash_contents (bool): Whether to add the SHA-256 of each walked file's contents
+            progress (Optional[Callable[[Dict[str, Any]], None]]): Called with the running report after every batch
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size must be positive")
+        self.store = store if store is not None else LocalMetadataStore()
+        self.store_path = store_path
+        self.checkpoint_path = checkpoint_path or (f"{store_path}.checkpoint" if store_path else None)
+        self.batch_size = batch_size
+        self.workers = workers
+        self.hash_contents = hash_contents
+        self.progress = progress
+        self.stored_lines = 0
+        self._owners: Dict[int, str] = {}
+        self._owners_lock = threading.Lock()
+
+        checkpoint = self._read_checkpoint()
+        if store_path is not None and os.path.exists(store_path):
+            # Anything after the checkpointed length was written by a batch that never completed
+            if checkpoint is not None and os.path.getsize(store_path) > checkpoint["store_offset"]:
+                os.truncate(store_path, checkpoint["store_offset"])
+            with open(store_path, "r", encoding="utf-8") as f:
+                for batch in self._batches(json.loads(line) for line in f if line.strip()):
+                    self.store.put_many(batch)
+                    self.stored_lines += len(batch)
+
+    def ingest_jsonl(self, source: str) -> Dict[str, Any]:
+        """
+        Ingest the records of a JSON lines file.
+
+        Each line holds one record with the fields of upi_schema.FILE_FIELDS;
+        a missing name or extension is derived from the path. Lines that are
+        not JSON objects are counted as errors and skipped.
+
+        Args:
+            source (str): The JSON lines file
+
+        Returns:
+            Dict[str, Any]: The ingestion report
+        """
+        source = os.path.abspath(source)
+        checkpoint = self._resume("jsonl", source)
+        position = checkpoint["position"] if checkpoint else 0
+
+        def batches() -> Iterator[Tuple[List[Optional[Dict[str, Any]]], int, Optional[str]]]:
+            with open(source, "rb") as f:
+                f.seek(position)
+                offset = position
+                while True:
+                    lines = list(itertools.islice(f, self.batch_size))
+                    if not lines:
+                        return
+                    offset += sum(len(line) for line in lines)
+                    records = []
+                    for line in lines:
+                        if line.strip():
+                            try:
+                                record = json.loads(line)
+                            except ValueError:
+                                record = None
+                            records.append(self._normalize(record) if isinstance(record, dict) else None)
+                    yield records, offset, None
+
+        return self._ingest("jsonl", source, position, None, batches())
+
+    def ingest_directory(self, root: str) -> Dict[str, Any]:
+        """
+        Ingest the metadata of every regular file under a directory.
+
+        The tree is walked in sorted order without following symbolic
+        links. Files that vanish or cannot be read are counted as errors.
+        A record's key is derived from its path, so ingesting a tree again
+        updates the records of files seen before. A resumed walk skips the
+        files already ingested, unless the tree has changed so that the
+        last of them is no longer in the same place; the walk then starts
+        over.
+
+        Args:
+            root (str): The directory to walk
+
+        Returns:
+            Dict[str, Any]: The ingestion report
+        """
+        root = os.path.abspath(root)
+        checkpoint = self._resume("directory", root)
+        position = checkpoint["position"] if checkpoint else 0
+        paths = self._walk(root)
+        if position:
+            # The walk is deterministic, so the files already ingested are the first position paths
+            skipped = list(itertools.islice(paths, position))
+            if len(skipped) < position or skipped[-1] != checkpoint.get("last"):
+                position = 0
+                paths = self._walk(root)
+
+        def batches() -> Iterator[Tuple[List[Optional[Dict[str, Any]]], int, Optional[str]]]:
+            offset = position
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="ingest") as pool:
+                while True:
+                    batch = list(itertools.islice(paths, self.batch_size))
+                    if not batch:
+                        return
+                    offset += len(batch)
+                    yield list(pool.map(self._describe, batch)), offset, batch[-1]
+
+        return self._ingest("directory", root, position, checkpoint.get("last") if position else None, batches())
+
+    def _ingest(self, kind: str, source: str, position: int, last: Optional[str],
+                batches: Iterable[Tuple[List[Optional[Dict[str, Any]]], int, Optional[str]]]) -> Dict[str, Any]:
+        """
+        Write batches of records to the store, checkpointing after each one.
+
+        Args:
+            kind (str): The kind of source, "jsonl" or "directory"
+            source (str): The absolute path of the source
+            position (int): The position reading starts from
+            last (Optional[str]): The entry before that position, for sources whose position alone cannot be trusted
+            batches (Iterable[Tuple[List[Optional[Dict[str, Any]]], int, Optional[str]]]): Each batch's records (None for an unreadable entry), the source position after it, and the last entry read, for sources whose position alone cannot be trusted
+
+        Returns:
+            Dict[str, Any]: The ingestion report
+        """
+        report = {"source": source, "kind": kind, "resumed_from": position or None, "records": 0, "errors": 0,
+                  "batches": 0, "elapsed": 0.0, "records_per_second": 0.0, "store_records": len(self.store)}
+        self._write_checkpoint(kind, source, position, last)
+        start = time.perf_counter()
+        for records, offset, last in batches:
+            valid = [record for record in records if record is not None]
+            for record, key in zip(valid, self.store.put_many(valid)):
+                record["_key"] = key
+            self._append(valid)
+            self._write_checkpoint(kind, source, offset, last)
+            report["records"] += len(valid)
+            report["errors"] += len(records) - len(valid)
+            report["batches"] += 1
+            report["elapsed"] = time.perf_counter() - start
+            report["records_per_second"] = report["records"] / report["elapsed"] if report["elapsed"] else 0.0
+            report["store_records"] = len(self.store)
+            if self.progress is not None:
+                self.progress(dict(report))
+        report["elapsed"] = time.perf_counter() - start
+        report["records_per_second"] = report["records"] / report["elapsed"] if report["elapsed"] else 0.0
+        self._finish()
+        return report
+
+    def _resume(self, kind: str, source: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the checkpoint to resume a source from.
+
+        Args:
+            kind (str): The kind of source
+            source (str): The absolute path of the source
+
+        Returns:
+            Optional[Dict[str, Any]]: The checkpoint, or None if it is for another source or there is none
+        """
+        checkpoint = self._read_checkpoint()
+        if checkpoint is None or checkpoint.get("kind") != kind or checkpoint.get("source") != source:
+            return None
+        return checkpoint
+
+    def _read_checkpoint(self) -> Optional[Dict[str, Any]]:
+        """
+        Read the checkpoint file.
+
+        Returns:
+            Optional[Dict[str, Any]]: The checkpoint, or None if there is none or it is unreadable
+        """
+        if self.checkpoint_path is None or not os.path.exists(self.checkpoint_path):
+            return None
+        try:
+            with open(self.checkpoint_path, "r", encoding="utf-8") as f:
+                checkpoint = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return checkpoint if isinstance(checkpoint, dict) else None
+
+    def _write_checkpoint(self, kind: str, source: str, position: int, last: Optional[str] = None) -> None:
+        """
+        Record how far a source has been ingested, replacing the checkpoint atomically.
+
+        Args:
+            kind (str): The kind of source
+            source (str): The absolute path of the source
+            position (int): The position after the last batch written to the store file
+            last (Optional[str]): The last entry read, checked when resuming
+        """
+        if self.checkpoint_path is None:
+            return
+        store_offset = os.path.getsize(self.store_path) if self.store_path and os.path.exists(self.store_path) else 0
+        temporary = f"{self.checkpoint_path}.tmp"
+        with open(temporary, "w", encoding="utf-8") as f:
+            json.dump({"kind": kind, "source": source, "position": position, "last": last,
+                       "store_offset": store_offset}, f)
+        os.replace(temporary, self.checkpoint_path)
+
+    def _finish(self) -> None:
+        """
+        Remove the checkpoint of a completed ingestion and compact a store file that is mostly superseded lines.
+        """
+        if self.store_path is not None and self.stored_lines > 2 * len(self.store):
+            self.store.save(self.store_path)
+            self.stored_lines = len(self.store)
+        if self.checkpoint_path is not None and os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+
+    def _append(self, records: List[Dict[str, Any]]) -> None:
+        """
+        Append records to the store file and flush them to disk.
+
+        Args:
+            records (List[Dict[str, Any]]): The records, as written to the store
+        """
+        if self.store_path is None or not records:
+            return
+        with open(self.store_path, "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(record, default=str) + "\n" for record in records))
+            f.flush()
+            os.fsync(f.fileno())
+        self.stored_lines += len(records)
+
+    def _batches(self, records: Iterable[Dict[str, Any]]) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Group records into batches.
+
+        Args:
+            records (Iterable[Dict[str, Any]]): The records
+
+        Returns:
+            Iterator[List[Dict[str, Any]]]: The records, batch_size at a time
+        """
+        records = iter(records)
+        while True:
+            batch = list(itertools.islice(records, self.batch_size))
+            if not batch:
+                return
+            yield batch
+
+    def _normalize(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Fill in the key, name and extension of a record from its path.
+
+        Args:
+            record (Dict[str, Any]): The record as read
+
+        Returns:
+            Dict[str, Any]: The record
+        """
+        if "_key" not in record and record.get("path"):
+            record["_key"] = path_key(str(record["path"]))
+        if not record.get("name") and record.get("path"):
+            record["name"] = os.path.basename(str(record["path"]).rstrip("/\\"))
+        if "extension" not in record and record.get("name"):
+            record["extension"] = os.path.splitext(str(record["name"]))[1][1:].lower()
+        return record
+
+    def _walk(self, root: str) -> Iterator[str]:
+        """
+        Yield the regular files under a directory in sorted order.
+
+        Args:
+            root (str): The directory
+
+        Returns:
+            Iterator[str]: The file paths
+        """
+        try:
+            with os.scandir(root) as scan:
+                entries = sorted(scan, key=lambda entry: entry.name)
+        except OSError:
+            return
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    yield from self._walk(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    yield entry.path
+            except OSError:
+                continue
+
+    def _describe(self, path: str) -> Optional[Dict[str, Any]]:
+        """
+        Build the metadata record of a file; runs on a worker thread.
+
+        Args:
+            path (str): The file path
+
+        Returns:
+            Optional[Dict[str, Any]]: The record, or None if the file vanished or cannot be read
+        """
+        try:
+            info = os.stat(path, follow_symlinks=False)
+            if not stat.S_ISREG(info.st_mode):
+                return None
+            name = os.path.basename(path)
+            record = {
+                "_key": path_key(path),
+                "name": name,
+                "path": path,
+                "extension": os.path.splitext(name)[1][1:].lower(),
+                "size": info.st_size,
+                "created": self._timestamp(getattr(info, "st_birthtime", info.st_ctime)),
+                "modified": self._timestamp(info.st_mtime),
+                "accessed": self._timestamp(info.st_atime),
+                "owner": self._owner(info.st_uid),
+            }
+            if self.hash_contents:
+                digest = hashlib.sha256()
+                with open(path, "rb") as f:
+                    for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+                        digest.update(chunk)
+                record["content_hash"] = digest.hexdigest()
+            return record
+        except OSError:
+            return None
+
+    def _timestamp(self, seconds: float) -> str:
+        """
+        Format a file time as the store's timestamps are.
+
+        Args:
+            seconds (float): Seconds since the epoch
+
+        Returns:
+            str: The ISO-8601 local time, to the second
+        """
+        return datetime.fromtimestamp(seconds).isoformat(timespec="seconds")
+
+    def _owner(self, uid: int) -> str:
+        """
+        Get the user name of a file owner.
+
+        Args:
+            uid (int): The owner's user id
+
+        Returns:
+            str: The user name, or the id if it has no name
+        """
+        with self._owners_lock:
+            owner = self._owners.get(uid)
+        if owner is None:
+            try:
+                owner = pwd.getpwuid(uid).pw_name if pwd is not None else str(uid)
+            except KeyError:
+                owner = str(uid)
+            with self._owners_lock:
+                self._owners[uid] = owner
+        return owner
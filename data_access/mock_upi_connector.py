@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+
+import functools
+import hashlib
+import json
+import random
+import re
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Any, Iterator, List, Optional
+from utils.latency_injector import LatencyInjector
+from utils.request_context import RequestContext
+from .prepared_queries import PreparedQueryCache
+
+class MockUPIConnector:
+    """
+    In-process stand-in for the UPI data connector.
+
+    It answers execute_aql and execute_graphql with synthetic file metadata
+    records. The records for a given query are deterministic, the result-set
+    size is configurable (and capped by a LIMIT / limit argument in the
+    query), and latency and failures are injected through a LatencyInjector.
+
+    Like the real server, it keeps a plan cache for AQL and a persisted query
+    store for GraphQL, keyed by query hash: a query text seen for the first
+    time pays plan_latency, later executions with other bind parameters or
+    variables do not.
+    """
+
+    EXTENSIONS = ("pdf", "docx", "xlsx", "pptx", "txt", "md", "py", "jpg", "png", "mp4")
+    OWNERS = ("alice", "bob", "carol", "dave")
+
+    def __init__(self, result_size: int = 100, latency: Optional[LatencyInjector] = None,
+                 per_row_latency: float = 0.0, seed: int = 0, plan_latency: float = 0.0):
+        """
+        Initialize the mock connector.
+
+        Args:
+            result_size (int): The number of records returned for a query without a limit
+            latency (Optional[LatencyInjector]): Latency and failure model applied to every query, or None for no delay
+            per_row_latency (float): Additional seconds of latency per returned record
+            seed (int): Seed mixed into the generation of records
+            plan_latency (float): Additional seconds of latency for a query text whose plan is not cached
+        """
+        self.result_size = result_size
+        self.latency = latency or LatencyInjector()
+        self.per_row_latency = per_row_latency
+        self.seed = seed
+        self.query_count = 0
+        self.rows_returned = 0
+        self.version = 0
+        self.plan_latency = plan_latency
+        self.plans = PreparedQueryCache()
+        self.persisted_queries = PreparedQueryCache()
+
+    def execute_aql(self, query: str, bind_vars: Optional[Dict[str, Any]] = None,
+                    context: Optional[RequestContext] = None) -> List[Dict[str, Any]]:
+        """
+        Execute an AQL query against the synthetic data.
+
+        Args:
+            query (str): The AQL query
+            bind_vars (Optional[Dict[str, Any]]): Values of the query's bind parameters
+            context (Optional[RequestContext]): The request's deadline and cancellation state
+
+        Returns:
+            List[Dict[str, Any]]: The synthetic result records
+        """
+        extra = self._prepare(self.plans, query)
+        return self._execute(self._seed_text(query, bind_vars), self._aql_limit(query, bind_vars), extra, context)
+
+    def execute_graphql(self, query: str, variables: Optional[Dict[str, Any]] = None,
+                        context: Optional[RequestContext] = None) -> List[Dict[str, Any]]:
+        """
+        Execute a GraphQL query against the synthetic data.
+
+        Args:
+            query (str): The GraphQL query
+            variables (Optional[Dict[str, Any]]): Values of the query's variables
+            context (Optional[RequestContext]): The request's deadline and cancellation state
+
+        Returns:
+            List[Dict[str, Any]]: The synthetic result records
+        """
+        extra = self._prepare(self.persisted_queries, query)
+        return self._execute(self._seed_text(query, variables), self._graphql_limit(query, variables), extra, context)
+
+    def cursor_aql(self, query: str, batch_size: int, bind_vars: Optional[Dict[str, Any]] = None,
+                   context: Optional[RequestContext] = None) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Execute an AQL query and fetch its results through a cursor.
+
+        Args:
+            query (str): The AQL query
+            batch_size (int): The maximum number of records per batch
+            bind_vars (Optional[Dict[str, Any]]): Values of the query's bind parameters
+            context (Optional[RequestContext]): The request's deadline and cancellation state
+
+        Returns:
+            Iterator[List[Dict[str, Any]]]: The same records as execute_aql, one batch at a time
+        """
+        extra = self._prepare(self.plans, query)
+        return self._cursor(
+            self._seed_text(query, bind_vars), self._aql_limit(query, bind_vars), batch_size, extra, context
+        )
+
+    def cursor_graphql(self, query: str, batch_size: int, variables: Optional[Dict[str, Any]] = None,
+                       context: Optional[RequestContext] = None) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Execute a GraphQL query and fetch its results through a cursor.
+
+        Args:
+            query (str): The GraphQL query
+            batch_size (int): The maximum number of records per batch
+            variables (Optional[Dict[str, Any]]): Values of the query's variables
+            context (Optional[RequestContext]): The request's deadline and cancellation state
+
+        Returns:
+            Iterator[List[Dict[str, Any]]]: The same records as execute_graphql, one batch at a time
+        """
+        extra = self._prepare(self.persisted_queries, query)
+        return self._cursor(
+            self._seed_text(query, variables), self._graphql_limit(query, variables), batch_size, extra, context
+        )
+
+    def collection_version(self) -> str:
+        """
+        Get the version of the synthetic collection; bump self.version to simulate a write.
+
+        Returns:
+            str: An etag that changes whenever the collection does
+        """
+        return f"mock-{self.seed}-{self.version}"
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get the query and latency counters.
+
+        Returns:
+            Dict[str, Any]: The number of queries, returned rows, compiled and reused plans, and the injected latency statistics
+        """
+        stats = self.latency.get_stats()
+        stats["queries"] = self.query_count
+        stats["rows_returned"] = self.rows_returned
+        stats["plans_compiled"] = self.plans.stats["misses"] + self.persisted_queries.stats["misses"]
+        stats["plan_hits"] = self.plans.stats["hits"] + self.persisted_queries.stats["hits"]
+        return stats
+
+    def _prepare(self, cache: PreparedQueryCache, query: str) -> float:
+        """
+        Look a query text up in a plan cache, preparing it on a miss.
+
+        Args:
+            cache (PreparedQueryCache): The AQL plan cache or the GraphQL persisted query store
+            query (str): The query text
+
+        Returns:
+            float: The extra latency to inject, plan_latency on a miss and 0.0 on a hit
+        """
+        _, prepared = cache.prepare(query)
+        return 0.0 if prepared else self.plan_latency
+
+    def _seed_text(self, query: str, parameters: Optional[Dict[str, Any]]) -> str:
+        """
+        Get the text that seeds the records of a query and its parameters.
+
+        Args:
+            query (str): The query text
+            parameters (Optional[Dict[str, Any]]): The bind parameters or variables
+
+        Returns:
+            str: The seed text; the query itself when there are no parameters
+        """
+        if not parameters:
+            return query
+        return f"{query}\n{json.dumps(parameters, sort_keys=True, default=str)}"
+
+    def _aql_limit(self, query: str, bind_vars: Optional[Dict[str, Any]] = None) -> Optional[int]:
+        """
+        Get the row limit of an AQL query.
+
+        Args:
+            query (str): The AQL query
+            bind_vars (Optional[Dict[str, Any]]): Values of the query's bind parameters
+
+        Returns:
+            Optional[int]: The count of the last LIMIT operation, or None if there is none or it is not bound
+        """
+        limits = re.findall(r"\bLIMIT\s+(?:(@?\w+)\s*,\s*)?(@?\w+)", query, re.IGNORECASE)
+        return self._limit_value(limits[-1][1], "@", bind_vars) if limits else None
+
+    def _graphql_limit(self, query: str, variables: Optional[Dict[str, Any]] = None) -> Optional[int]:
+        """
+        Get the row limit of a GraphQL query.
+
+        Args:
+            query (str): The GraphQL query
+            variables (Optional[Dict[str, Any]]): Values of the query's variables
+
+        Returns:
+            Optional[int]: The last limit or first argument, or None if there is none or it is not bound
+        """
+        limits = re.findall(r"\b(?:limit|first)\s*:\s*(\$?\w+)", query)
+        return self._limit_value(limits[-1], "$", variables) if limits else None
+
+    def _limit_value(self, token: str, prefix: str, parameters: Optional[Dict[str, Any]]) -> Optional[int]:
+        """
+        Resolve a limit that is either a number or a parameter reference.
+
+        Args:
+            token (str): The limit as written in the query
+            prefix (str): The parameter prefix of the query language
+            parameters (Optional[Dict[str, Any]]): The bind parameters or variables
+
+        Returns:
+            Optional[int]: The limit, or None if it cannot be resolved
+        """
+        if token.startswith(prefix):
+            token = str((parameters or {}).get(token[len(prefix):], ""))
+        return int(token) if token.isdigit() else None
+
+    def _cursor(self, query: str, limit: Optional[int], batch_size: int, extra: float = 0.0,
+                context: Optional[RequestContext] = None) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Produce the synthetic results for a query in batches.
+
+        The injected latency and failures apply to the first batch, as for a
+        server that opens the cursor on the first round trip; every later
+        batch only adds its per-row latency. Records are generated as their
+        batch is fetched.
+
+        Args:
+            query (str): The query text, used to seed the generated records
+            limit (Optional[int]): The query's row limit, if any
+            batch_size (int): The maximum number of records per batch
+            extra (float): Additional latency of the first round trip, e.g. for preparing the query
+            context (Optional[RequestContext]): The request's deadline and cancellation state, which cut the latency short
+
+        Returns:
+            Iterator[List[Dict[str, Any]]]: The synthetic result records, one batch at a time
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size must be positive")
+        sleep = time.sleep if context is None else functools.partial(context.sleep, stage="upi")
+        count = self.result_size if limit is None else min(limit, self.result_size)
+        self.query_count += 1
+        digest = hashlib.sha256(f"{self.seed}:{query}".encode("utf-8")).digest()
+        generator = random.Random(int.from_bytes(digest[:8], "big"))
+        if count == 0:
+            self.latency.inject(extra=extra, sleep=sleep)
+
+        for start in range(0, count, batch_size):
+            size = min(batch_size, count - start)
+            if start == 0:
+                self.latency.inject(extra=extra + size * self.per_row_latency, sleep=sleep)
+            elif self.per_row_latency:
+                sleep(size * self.per_row_latency)
+            self.rows_returned += size
+            yield [self._make_record(generator, i) for i in range(start, start + size)]
+
+    def _execute(self, query: str, limit: Optional[int], extra: float = 0.0,
+                 context: Optional[RequestContext] = None) -> List[Dict[str, Any]]:
+        """
+        Produce the synthetic results for a query, injecting latency and failures.
+
+        Args:
+            query (str): The query text, used to seed the generated records
+            limit (Optional[int]): The query's row limit, if any
+            extra (float): Additional latency, e.g. for preparing the query
+            context (Optional[RequestContext]): The request's deadline and cancellation state, which cut the latency short
+
+        Returns:
+            List[Dict[str, Any]]: The synthetic result records
+        """
+        if context is not None:
+            context.check("upi")
+        count = self.result_size if limit is None else min(limit, self.result_size)
+        self.query_count += 1
+        self.latency.inject(extra=extra + count * self.per_row_latency,
+                            sleep=time.sleep if context is None else functools.partial(context.sleep, stage="upi"))
+        self.rows_returned += count
+
+        digest = hashlib.sha256(f"{self.seed}:{query}".encode("utf-8")).digest()
+        generator = random.Random(int.from_bytes(digest[:8], "big"))
+        return [self._make_record(generator, i) for i in range(count)]
+
+    def _make_record(self, generator: random.Random, index: int) -> Dict[str, Any]:
+        """
+        Generate one synthetic file metadata record.
+
+        Args:
+            generator (random.Random): The random generator for this result set
+            index (int): The position of the record in the result set
+
+        Returns:
+            Dict[str, Any]: The record, with the fields described in upi_schema.FILE_FIELDS
+        """
+        extension = generator.choice(self.EXTENSIONS)
+        owner = generator.choice(self.OWNERS)
+        name = f"file_{generator.randrange(1_000_000):06d}.{extension}"
+        modified = datetime(2024, 1, 1) + timedelta(seconds=generator.randrange(3 * 365 * 86400))
+        created = modified - timedelta(seconds=generator.randrange(365 * 86400))
+        return {
+            "_key": f"{index}",
+            "name": name,
+            "path": f"/home/{owner}/documents/{name}",
+            "extension": extension,
+            "size": int(generator.lognormvariate(11, 2)),
+            "created": created.isoformat(),
+            "modified": modified.isoformat(),
+            "accessed": modified.isoformat(),
+            "owner": owner,
+        }
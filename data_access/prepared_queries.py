@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Tuple
+
+def query_hash(query: str) -> str:
+    """
+    Get the hash that identifies a query text.
+
+    This is the SHA-256 of the exact text, as used by GraphQL automatic
+    persisted queries, so that repeated query shapes can be sent by hash.
+
+    Args:
+        query (str): The query text
+
+    Returns:
+        str: The hex digest of the query
+    """
+    return hashlib.sha256(query.encode("utf-8")).hexdigest()
+
+class PreparedQueryCache:
+    """
+    Bounded LRU record of query texts that have been prepared.
+
+    On the server side it stands for the plan cache (AQL) or the persisted
+    query store (GraphQL); on the client side it remembers which query
+    hashes the server already knows, so that only the hash and the bind
+    parameters need to be sent.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        """
+        Initialize the prepared query cache.
+
+        Args:
+            max_entries (int): The maximum number of query hashes to remember
+        """
+        self.max_entries = max_entries
+        self._hashes = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def prepare(self, query: str) -> Tuple[str, bool]:
+        """
+        Record that a query is being prepared.
+
+        Args:
+            query (str): The query text
+
+        Returns:
+            Tuple[str, bool]: The query hash, and whether it had already been prepared
+        """
+        digest = query_hash(query)
+        with self._lock:
+            if digest in self._hashes:
+                self._hashes.move_to_end(digest)
+                self.stats["hits"] += 1
+                return digest, True
+            self._hashes[digest] = True
+            self.stats["misses"] += 1
+            while len(self._hashes) > self.max_entries:
+                self._hashes.popitem(last=False)
+                self.stats["evictions"] += 1
+            return digest, False
+
+    def knows(self, digest: str) -> bool:
+        """
+        Check whether a query hash has been prepared, without counting a lookup.
+
+        Args:
+            digest (str): The query hash
+
+        Returns:
+            bool: True if the hash is known
+        """
+        with self._lock:
+            return digest in self._hashes
+
+    def forget(self, digest: str) -> None:
+        """
+        Drop a query hash, e.g. after the server reported it unknown.
+
+        Args:
+            digest (str): The query hash
+        """
+        with self._lock:
+            self._hashes.pop(digest, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get the prepared query counters.
+
+        Returns:
+            Dict[str, Any]: Hits, misses and evictions, the hit ratio and the number of hashes held
+        """
+        with self._lock:
+            stats = dict(self.stats)
+            stats["entries"] = len(self._hashes)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
@@ -0,0 +1,522 @@
+#!/usr/bin/env python3
+
+import base64
+import http.client
+import json
+import threading
+import time
+from typing import Callable, Dict, Any, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit
+from .data_interface.interface_base import UPIQueryError
+from .data_interface.aql_interface import AQLInterface
+from .data_interface.graphql_interface import GraphQLInterface
+from .upi_schema import OBJECTS_COLLECTION
+from utils.request_context import RequestContext
+
+# Socket timeout of the request that frees an abandoned cursor, which is sent even after the deadline
+CLEANUP_TIMEOUT = 1.0
+
+class PoolExhausted(RuntimeError):
+    """
+    Raised when no pooled connection becomes free within the pool timeout.
+    """
+    pass
+
+class ConnectionPool:
+    """
+    A bounded pool of keep-alive HTTP connections to one server endpoint.
+
+    Connections are opened on demand, up to max_connections, and returned to
+    the pool after each request unless the server asked to close them. The
+    most recently used idle connection is handed out first, so a lightly
+    loaded pool keeps reusing the same few sockets. A pooled connection the
+    server has closed in the meantime is replaced and the request sent again
+    once.
+    """
+
+    def __init__(self, url: str, max_connections: int = 8, timeout: float = 30.0,
+                 keep_alive: bool = True, headers: Optional[Dict[str, str]] = None):
+        """
+        Initialize the connection pool.
+
+        Args:
+            url (str): The endpoint's base URL, e.g. http://localhost:8529
+            max_connections (int): The maximum number of connections open at once
+            timeout (float): Seconds to wait for a free connection, and the socket timeout of each request
+            keep_alive (bool): Whether to reuse connections; when False every request opens a new one
+            headers (Optional[Dict[str, str]]): Headers sent with every request
+        """
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise ValueError(f"Invalid UPI endpoint URL: {url}")
+        self.url = url.rstrip("/")
+        self.host = parts.hostname
+        self.port = parts.port
+        self.base_path = parts.path.rstrip("/")
+        self.connection_class = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+        self.timeout = timeout
+        self.keep_alive = keep_alive
+        self.headers = dict(headers or {}, **{"Content-Type": "application/json", "Accept": "application/json"})
+        self.slots = threading.BoundedSemaphore(max_connections)
+        self.idle: List[http.client.HTTPConnection] = []
+        self.stats = {"requests": 0, "connections_opened": 0, "connections_reused": 0, "stale_retries": 0}
+        self._lock = threading.Lock()
+
+    def request(self, method: str, path: str, payload: Any = None,
+                timeout: Optional[float] = None) -> Tuple[int, Any]:
+        """
+        Send a request on a pooled connection.
+
+        Args:
+            method (str): The HTTP method
+            path (str): The request path, relative to the endpoint's base URL
+            payload (Any): The request body, encoded as JSON, or None for no body
+            timeout (Optional[float]): Seconds to wait for a free connection and the socket timeout, or None for the pool's
+
+        Returns:
+            Tuple[int, Any]: The HTTP status and the decoded JSON body (an empty dict if there is none)
+
+        Raises:
+            PoolExhausted: If no connection becomes free within the timeout
+            OSError: If the endpoint cannot be reached
+        """
+        timeout = self.timeout if timeout is None else timeout
+        body = None if payload is None else json.dumps(payload).encode("utf-8")
+        if not self.slots.acquire(timeout=timeout):
+            raise PoolExhausted(f"No connection to {self.url} became free within {timeout:g} seconds")
+        try:
+            connection, reused = self._checkout()
+            try:
+                try:
+                    response = self._send(connection, method, path, body, timeout)
+                except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                    if not reused:
+                        raise
+                    # The server closed the idle connection; retry once on a new one
+                    connection.close()
+                    connection, reused = self._open(), False
+                    self._count("stale_retries")
+                    response = self._send(connection, method, path, body, timeout)
+                data = response.read()
+            except BaseException:
+                connection.close()
+                raise
+            self._checkin(connection, self.keep_alive and not response.will_close)
+            self._count("requests")
+            return response.status, json.loads(data) if data else {}
+        finally:
+            self.slots.release()
+
+    def ping(self, path: str) -> bool:
+        """
+        Check whether the endpoint answers a request.
+
+        Args:
+            path (str): The path of a cheap GET endpoint
+
+        Returns:
+            bool: True if the endpoint answered with a 2xx status
+        """
+        try:
+            status, _ = self.request("GET", path)
+        except (OSError, http.client.HTTPException, PoolExhausted, ValueError):
+            return False
+        return status < 300
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get the pool counters.
+
+        Returns:
+            Dict[str, Any]: Requests sent, connections opened and reused, stale connections replaced, and idle connections held
+        """
+        with self._lock:
+            stats = dict(self.stats)
+            stats["idle"] = len(self.idle)
+        return stats
+
+    def close(self) -> None:
+        """
+        Close the idle connections.
+        """
+        with self._lock:
+            idle, self.idle = self.idle, []
+        for connection in idle:
+            connection.close()
+
+    def _send(self, connection: http.client.HTTPConnection, method: str, path: str,
+              body: Optional[bytes], timeout: float) -> http.client.HTTPResponse:
+        """
+        Send a request and wait for the response headers.
+
+        Args:
+            connection (http.client.HTTPConnection): The connection to use
+            method (str): The HTTP method
+            path (str): The request path, relative to the endpoint's base URL
+            body (Optional[bytes]): The encoded request body
+            timeout (float): The socket timeout of this request in seconds
+
+        Returns:
+            http.client.HTTPResponse: The response, with its body not yet read
+        """
+        # A pooled connection keeps the timeout of its previous request
+        connection.timeout = timeout
+        if connection.sock is not None:
+            connection.sock.settimeout(timeout)
+        headers = dict(self.headers)
+        if not self.keep_alive:
+            headers["Connection"] = "close"
+        connection.request(method, self.base_path + path, body=body, headers=headers)
+        return connection.getresponse()
+
+    def _checkout(self) -> Tuple[http.client.HTTPConnection, bool]:
+        """
+        Take an idle connection, or open a new one.
+
+        Returns:
+            Tuple[http.client.HTTPConnection, bool]: The connection, and whether it was reused
+        """
+        with self._lock:
+            if self.idle:
+                self.stats["connections_reused"] += 1
+                return self.idle.pop(), True
+        return self._open(), False
+
+    def _checkin(self, connection: http.client.HTTPConnection, reusable: bool) -> None:
+        """
+        Return a connection to the pool, or close it.
+
+        Args:
+            connection (http.client.HTTPConnection): The connection
+            reusable (bool): Whether the connection can carry another request
+        """
+        if not reusable:
+            connection.close()
+            return
+        with self._lock:
+            self.idle.append(connection)
+
+    def _open(self) -> http.client.HTTPConnection:
+        """
+        Open a new connection to the endpoint.
+
+        Returns:
+            http.client.HTTPConnection: The connection; the socket is connected on its first request
+        """
+        self._count("connections_opened")
+        return self.connection_class(self.host, self.port, timeout=self.timeout)
+
+    def _count(self, counter: str) -> None:
+        """
+        Increment a counter.
+
+        Args:
+            counter (str): The name of the counter to increment
+        """
+        with self._lock:
+            self.stats[counter] += 1
+
+class DeadlineTransport:
+    """
+    A connection pool seen through the budget of one request.
+
+    Every request checks the request context first and gets the smaller of
+    the pool's timeout and the time left as its timeout, so that no round
+    trip of a query (cursor batches fetched ahead included) outlives the
+    request. Requests that free an abandoned cursor are still sent after the
+    deadline, with a short timeout of their own.
+    """
+
+    def __init__(self, pool: ConnectionPool, context: RequestContext):
+        """
+        Initialize the transport.
+
+        Args:
+            pool (ConnectionPool): The endpoint's pool
+            context (RequestContext): The request's deadline and cancellation state
+        """
+        self.pool = pool
+        self.context = context
+
+    def request(self, method: str, path: str, payload: Any = None) -> Tuple[int, Any]:
+        """
+        Send a request within the request's remaining budget.
+
+        Args:
+            method (str): The HTTP method
+            path (str): The request path, relative to the endpoint's base URL
+            payload (Any): The request body, encoded as JSON, or None for no body
+
+        Returns:
+            Tuple[int, Any]: The HTTP status and the decoded JSON body
+
+        Raises:
+            RequestCancelled: If the request is cancelled or out of time before this round trip
+        """
+        if method == "DELETE":
+            return self.pool.request(method, path, payload, min(self.pool.timeout, CLEANUP_TIMEOUT))
+        self.context.check("upi")
+        return self.pool.request(method, path, payload, self.context.timeout(self.pool.timeout))
+
+class UPIConnector:
+    """
+    Connector to the UPI metadata service over HTTP.
+
+    AQL goes through the ArangoDB cursor API and GraphQL through a GraphQL
+    endpoint, both on the same servers. Each server endpoint has its own
+    pool of keep-alive connections. Requests are spread over the healthy
+    endpoints in turn; an endpoint that fails to answer is taken out of
+    rotation for health_interval seconds and must then pass a health check
+    before it is used again. A query is retried on the next endpoint only
+    for connection failures, never for errors the server reports about the
+    query itself, and never once the request it belongs to has run out of
+    time: a socket timeout shortened by the request's deadline says nothing
+    about the endpoint's health.
+    """
+
+    def __init__(self, endpoints: Optional[List[str]] = None, username: Optional[str] = None,
+                 password: Optional[str] = None, database: str = "_system", graphql_path: str = "/graphql",
+                 pool_size: int = 8, timeout: float = 30.0, keep_alive: bool = True,
+                 read_ahead: bool = True, health_interval: float = 10.0, health_path: str = "/_api/version"):
+        """
+        Initialize the UPI connector.
+
+        Args:
+            endpoints (Optional[List[str]]): Base URLs of the UPI servers, or None for http://localhost:8529
+            username (Optional[str]): User name for HTTP basic authentication, or None for none
+            password (Optional[str]): Password for HTTP basic authentication
+            database (str): The ArangoDB database holding the UPI collections
+            graphql_path (str): The path of the GraphQL endpoint
+            pool_size (int): The maximum number of connections per endpoint
+            timeout (float): The socket timeout of each request in seconds
+            keep_alive (bool): Whether to reuse connections between requests
+            read_ahead (bool): Whether AQL cursors fetch their next batch while the current one is consumed
+            health_interval (float): Seconds an unreachable endpoint stays out of rotation
+            health_path (str): The path probed to check an endpoint's health
+        """
+        headers = {}
+        if username is not None:
+            credentials = base64.b64encode(f"{username}:{password or ''}".encode("utf-8")).decode("ascii")
+            headers["Authorization"] = f"Basic {credentials}"
+        self.pools = [
+            ConnectionPool(url, pool_size, timeout, keep_alive, headers)
+            for url in endpoints or ["http://localhost:8529"]
+        ]
+        self.aql = AQLInterface(database, read_ahead)
+        self.graphql = GraphQLInterface(graphql_path)
+        self.health_interval = health_interval
+        self.health_path = health_path
+        self.down_until = {pool.url: 0.0 for pool in self.pools}
+        self.stats = {"failovers": 0, "health_checks": 0}
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def execute_aql(self, query: str, bind_vars: Optional[Dict[str, Any]] = None,
+                    context: Optional[RequestContext] = None) -> List[Dict[str, Any]]:
+        """
+        Execute an AQL query.
+
+        Args:
+            query (str): The AQL query
+            bind_vars (Optional[Dict[str, Any]]): Values of the query's bind parameters
+            context (Optional[RequestContext]): The request's deadline and cancellation state
+
+        Returns:
+            List[Dict[str, Any]]: The result records
+        """
+        return self._call(lambda transport: self.aql.execute(transport, query, bind_vars), context)
+
+    def execute_graphql(self, query: str, variables: Optional[Dict[str, Any]] = None,
+                        context: Optional[RequestContext] = None) -> List[Dict[str, Any]]:
+        """
+        Execute a GraphQL query.
+
+        Args:
+            query (str): The GraphQL query
+            variables (Optional[Dict[str, Any]]): Values of the query's variables
+            context (Optional[RequestContext]): The request's deadline and cancellation state
+
+        Returns:
+            List[Dict[str, Any]]: The result records
+        """
+        return self._call(lambda transport: self.graphql.execute(transport, query, variables), context)
+
+    def cursor_aql(self, query: str, batch_size: int, bind_vars: Optional[Dict[str, Any]] = None,
+                   context: Optional[RequestContext] = None) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Execute an AQL query and fetch its results through a server-side cursor.
+
+        The cursor is opened on one endpoint and all of its batches are
+        fetched from there, since cursors are not shared between servers.
+
+        Args:
+            query (str): The AQL query
+            batch_size (int): The maximum number of records per batch
+            bind_vars (Optional[Dict[str, Any]]): Values of the query's bind parameters
+            context (Optional[RequestContext]): The request's deadline and cancellation state
+
+        Returns:
+            Iterator[List[Dict[str, Any]]]: The result records, one batch at a time
+        """
+        return self._call(lambda transport: self.aql.cursor(transport, query, batch_size, bind_vars), context)
+
+    def cursor_graphql(self, query: str, batch_size: int, variables: Optional[Dict[str, Any]] = None,
+                       context: Optional[RequestContext] = None) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Execute a GraphQL query and return its results in batches.
+
+        Args:
+            query (str): The GraphQL query
+            batch_size (int): The maximum number of records per batch
+            variables (Optional[Dict[str, Any]]): Values of the query's variables
+            context (Optional[RequestContext]): The request's deadline and cancellation state
+
+        Returns:
+            Iterator[List[Dict[str, Any]]]: The result records, one batch at a time
+        """
+        return self._call(lambda transport: self.graphql.cursor(transport, query, batch_size, variables), context)
+
+    def collection_version(self) -> Optional[str]:
+        """
+        Get the revision of the file collection.
+
+        Returns:
+            Optional[str]: The collection's revision, or None if the server does not report one
+        """
+        try:
+            return self._call(lambda pool: self.aql.revision(pool, OBJECTS_COLLECTION))
+        except UPIQueryError:
+            return None
+
+    def check_health(self) -> Dict[str, bool]:
+        """
+        Probe every endpoint and update the rotation.
+
+        Returns:
+            Dict[str, bool]: Whether each endpoint, by URL, is healthy
+        """
+        return {pool.url: self._probe(pool) for pool in self.pools}
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get the connection, failover and protocol counters.
+
+        Returns:
+            Dict[str, Any]: Failovers and health checks, the counters of each endpoint's pool and whether it is in rotation, and the AQL and GraphQL protocol counters
+        """
+        now = time.monotonic()
+        with self._lock:
+            stats = dict(self.stats)
+            down_until = dict(self.down_until)
+        stats["endpoints"] = {
+            pool.url: dict(pool.get_stats(), healthy=down_until[pool.url] <= now) for pool in self.pools
+        }
+        stats["aql"] = self.aql.get_stats()
+        stats["graphql"] = self.graphql.get_stats()
+        return stats
+
+    def close(self) -> None:
+        """
+        Close the pooled connections and release the read-ahead threads.
+        """
+        for pool in self.pools:
+            pool.close()
+        self.aql.close()
+        self.graphql.close()
+
+    def _call(self, operation: Callable[[Any], Any], context: Optional[RequestContext] = None) -> Any:
+        """
+        Run an operation on the first healthy endpoint that answers.
+
+        Args:
+            operation (Callable[[Any], Any]): Sends the requests of a call through a transport (an endpoint's pool)
+            context (Optional[RequestContext]): The request's deadline and cancellation state, which bound every request
+
+        Returns:
+            Any: The operation's result
+
+        Raises:
+            ConnectionError: If no endpoint could be reached
+            RequestCancelled: If the request is cancelled or out of time
+        """
+        error = None
+        for pool in self._rotation():
+            try:
+                return operation(pool if context is None else DeadlineTransport(pool, context))
+            except (OSError, http.client.HTTPException, PoolExhausted) as e:
+                if context is not None and context.expired:
+                    context.check("upi")
+                if isinstance(e, PoolExhausted):
+                    raise
+                error = e
+            except UPIQueryError as e:
+                if e.status != 503:
+                    raise
+                error = e
+            self._mark_down(pool)
+            with self._lock:
+                self.stats["failovers"] += 1
+        if error is None:
+            raise ConnectionError("No UPI endpoint passed its health check")
+        raise ConnectionError(f"No UPI endpoint is reachable: {error}") from error
+
+    def _rotation(self) -> Iterator[ConnectionPool]:
+        """
+        Yield the endpoints to try for a call, starting with the next one in turn.
+
+        Endpoints still within their down period are skipped; endpoints whose
+        down period has expired are health-checked first. If that leaves no
+        endpoint at all, every endpoint is health-checked rather than failing
+        without trying.
+
+        Returns:
+            Iterator[ConnectionPool]: The pools of the usable endpoints
+        """
+        with self._lock:
+            start = self._next
+            self._next = (self._next + 1) % len(self.pools)
+        pools = [self.pools[(start + offset) % len(self.pools)] for offset in range(len(self.pools))]
+        skipped = []
+        for pool in pools:
+            with self._lock:
+                down_until = self.down_until[pool.url]
+            if down_until == 0.0:
+                yield pool
+            elif down_until > time.monotonic():
+                skipped.append(pool)
+            elif self._probe(pool):
+                yield pool
+        if len(skipped) == len(pools):
+            for pool in skipped:
+                if self._probe(pool):
+                    yield pool
+
+    def _probe(self, pool: ConnectionPool) -> bool:
+        """
+        Health-check an endpoint and put it back into or take it out of rotation.
+
+        Args:
+            pool (ConnectionPool): The endpoint's pool
+
+        Returns:
+            bool: True if the endpoint is healthy
+        """
+        with self._lock:
+            self.stats["health_checks"] += 1
+        healthy = pool.ping(f"/_db/{self.aql.database}{self.health_path}")
+        if healthy:
+            with self._lock:
+                self.down_until[pool.url] = 0.0
+        else:
+            self._mark_down(pool)
+        return healthy
+
+    def _mark_down(self, pool: ConnectionPool) -> None:
+        """
+        Take an endpoint out of rotation for health_interval seconds.
+
+        Args:
+            pool (ConnectionPool): The endpoint's pool
+        """
+        with self._lock:
+            self.down_until[pool.url] = time.monotonic() + self.health_interval
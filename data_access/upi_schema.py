@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+
+# Description of the UPI file metadata as seen by the search tool. The
+# translators, validators and local backends all refer to this module so that
+# AQL field names, GraphQL types and filter keys stay in agreement.
+
+from typing import Dict, Tuple
+
+# ArangoDB collection holding one document per file
+OBJECTS_COLLECTION = "Objects"
+
+# Fields of a file metadata record: name -> (type, description)
+FILE_FIELDS: Dict[str, Tuple[str, str]] = {
+    "name": ("string", "File name including the extension"),
+    "path": ("string", "Full path of the file"),
+    "extension": ("string", "Lower-case extension without the leading dot"),
+    "size": ("int", "Size in bytes"),
+    "created": ("string", "ISO-8601 creation timestamp"),
+    "modified": ("string", "ISO-8601 last modification timestamp"),
+    "accessed": ("string", "ISO-8601 last access timestamp"),
+    "owner": ("string", "Owning user name"),
+}
+
+# Filter keys NLParser produces: key -> (record field, comparison)
+FILTER_FIELDS: Dict[str, Tuple[str, str]] = {
+    "extensions": ("extension", "in"),
+    "name_pattern": ("name", "like"),
+    "path_prefix": ("path", "prefix"),
+    "owner": ("owner", "=="),
+    "size_min": ("size", ">="),
+    "size_max": ("size", "<="),
+    "created_after": ("created", ">="),
+    "created_before": ("created", "<"),
+    "modified_after": ("modified", ">="),
+    "modified_before": ("modified", "<"),
+    "accessed_after": ("accessed", ">="),
+    "accessed_before": ("accessed", "<"),
+}
+
+# Arguments of the GraphQL FileFilter input type for each filter key
+GRAPHQL_FILTER_ARGUMENTS: Dict[str, str] = {
+    "extensions": "extensions",
+    "name_pattern": "nameLike",
+    "path_prefix": "pathPrefix",
+    "owner": "owner",
+    "size_min": "sizeMin",
+    "size_max": "sizeMax",
+    "created_after": "createdAfter",
+    "created_before": "createdBefore",
+    "modified_after": "modifiedAfter",
+    "modified_before": "modifiedBefore",
+    "accessed_after": "accessedAfter",
+    "accessed_before": "accessedBefore",
+}
+
+# File sizes exceed the 32-bit GraphQL Int, so byte counts use a custom 64-bit Long scalar
+GRAPHQL_SCHEMA = """
+scalar Long
+
+type Query {
+  files(filter: FileFilter, limit: Int, offset: Int): [File!]!
+  file(path: String!): File
+}
+
+input FileFilter {
+  extensions: [String!]
+  nameLike: String
+  pathPrefix: String
+  owner: String
+  sizeMin: Long
+  sizeMax: Long
+  createdAfter: String
+  createdBefore: String
+  modifiedAfter: String
+  modifiedBefore: String
+  accessedAfter: String
+  accessedBefore: String
+}
+
+type File {
+  name: String!
+  path: String!
+  extension: String
+  size: Long
+  created: String
+  modified: String
+  accessed: String
+  owner: String
+}
+"""
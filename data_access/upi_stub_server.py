@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+
+import itertools
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, Optional, Tuple
+from .mock_upi_connector import MockUPIConnector
+from .prepared_queries import query_hash
+from .upi_schema import OBJECTS_COLLECTION
+
+# The path of an ArangoDB API call, with the optional /_db/<name> prefix
+API_PATH = re.compile(r"^(?:/_db/[^/]+)?(/_api/.*?)/?$")
+
+# The first field selected by a GraphQL operation
+GRAPHQL_ROOT_FIELD = re.compile(r"\{\s*(\w+)")
+
+class UPIStubServer:
+    """
+    A local HTTP server that stands in for the UPI metadata service.
+
+    It speaks enough of the ArangoDB HTTP API (cursor creation, batch
+    fetching and deletion, server version, collection revision) and of a
+    GraphQL endpoint with automatic persisted queries for UPIConnector to
+    run against it without a database. The records come from a
+    MockUPIConnector, so results, latency and failures are as configurable
+    and deterministic as the in-process mock. The server counts requests and
+    accepted connections so that connection reuse can be observed.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, connector: Optional[MockUPIConnector] = None,
+                 delay: float = 0.0, max_cursors: int = 1024, max_persisted: int = 1024):
+        """
+        Initialize the stub server.
+
+        Args:
+            host (str): The address to bind to
+            port (int): The port to bind to, or 0 to pick a free one
+            connector (Optional[MockUPIConnector]): The source of the synthetic records, or None for a default mock
+            delay (float): Seconds to wait before answering each request
+            max_cursors (int): The maximum number of open cursors; the oldest is dropped beyond it
+            max_persisted (int): The maximum number of persisted GraphQL queries kept
+        """
+        self.connector = connector or MockUPIConnector()
+        self.delay = delay
+        self.max_cursors = max_cursors
+        self.max_persisted = max_persisted
+        self.cursors = OrderedDict()
+        self.persisted = OrderedDict()
+        self.cursor_ids = itertools.count(1)
+        self.request_count = 0
+        self.connection_count = 0
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), self._make_handler(), bind_and_activate=False)
+        self.server.daemon_threads = True
+        # Accept bursts of new connections from many concurrent sessions
+        self.server.request_queue_size = 128
+        self.server.server_bind()
+        self.server.server_activate()
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        """
+        Get the base URL to configure a UPIConnector with.
+
+        Returns:
+            str: The URL of the server
+        """
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "UPIStubServer":
+        """
+        Start serving in a background thread.
+
+        Returns:
+            UPIStubServer: The stub itself
+        """
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """
+        Stop the server and release its socket.
+        """
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def handle(self, method: str, path: str, request: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+        """
+        Answer one API request.
+
+        Args:
+            method (str): The HTTP method
+            path (str): The request path
+            request (Dict[str, Any]): The decoded JSON body, empty if there is none
+
+        Returns:
+            Tuple[int, Dict[str, Any]]: The HTTP status and the response body
+        """
+        if path.rstrip("/").endswith("/graphql") and method == "POST":
+            return self._graphql(request)
+        match = API_PATH.match(path)
+        api = match.group(1) if match else ""
+        if api == "/_api/version" and method == "GET":
+            return 200, {"server": "arango", "version": "stub", "license": "community"}
+        if api == f"/_api/collection/{OBJECTS_COLLECTION}/revision" and method == "GET":
+            return 200, {"error": False, "code": 200, "name": OBJECTS_COLLECTION,
+                         "revision": self.connector.collection_version()}
+        if api == "/_api/cursor" and method == "POST":
+            return self._open_cursor(request)
+        if api.startswith("/_api/cursor/") and method in ("PUT", "POST"):
+            return self._next_batch(api.rsplit("/", 1)[1])
+        if api.startswith("/_api/cursor/") and method == "DELETE":
+            with self._lock:
+                found = self.cursors.pop(api.rsplit("/", 1)[1], None) is not None
+            if not found:
+                return self._error(404, "cursor not found", 1600)
+            return 202, {"error": False, "code": 202}
+        return self._error(404, "unknown path", 404)
+
+    def _open_cursor(self, request: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+        """
+        Run an AQL query and answer with its first batch.
+
+        Args:
+            request (Dict[str, Any]): The cursor request with query, bindVars and batchSize
+
+        Returns:
+            Tuple[int, Dict[str, Any]]: The HTTP status and the response body
+        """
+        query = request.get("query")
+        if not isinstance(query, str) or not query.strip():
+            return self._error(400, "query is empty", 1502)
+        batches = self.connector.cursor_aql(query, int(request.get("batchSize") or 1000), request.get("bindVars"))
+        try:
+            first = next(batches, [])
+            following = next(batches, None)
+        except Exception as e:
+            return self._error(500, str(e), 4)
+        cursor_id = None
+        if following is not None:
+            cursor_id = str(next(self.cursor_ids))
+            with self._lock:
+                self.cursors[cursor_id] = (following, batches)
+                while len(self.cursors) > self.max_cursors:
+                    self.cursors.popitem(last=False)
+        return 201, self._batch_body(201, first, cursor_id)
+
+    def _next_batch(self, cursor_id: str) -> Tuple[int, Dict[str, Any]]:
+        """
+        Answer with the next batch of an open cursor.
+
+        Args:
+            cursor_id (str): The cursor id
+
+        Returns:
+            Tuple[int, Dict[str, Any]]: The HTTP status and the response body
+        """
+        with self._lock:
+            entry = self.cursors.pop(cursor_id, None)
+        if entry is None:
+            return self._error(404, "cursor not found", 1600)
+        batch, batches = entry
+        try:
+            following = next(batches, None)
+        except Exception as e:
+            return self._error(500, str(e), 4)
+        if following is None:
+            return 200, self._batch_body(200, batch, None)
+        with self._lock:
+            self.cursors[cursor_id] = (following, batches)
+        return 200, self._batch_body(200, batch, cursor_id)
+
+    def _graphql(self, request: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+        """
+        Run a GraphQL request, resolving persisted query hashes.
+
+        Args:
+            request (Dict[str, Any]): The request with query and/or a persistedQuery extension, and variables
+
+        Returns:
+            Tuple[int, Dict[str, Any]]: The HTTP status and the response body
+        """
+        query = request.get("query")
+        digest = ((request.get("extensions") or {}).get("persistedQuery") or {}).get("sha256Hash")
+        if digest is not None:
+            if query is None:
+                with self._lock:
+                    query = self.persisted.get(digest)
+                if query is None:
+                    return 200, {"errors": [{
+                        "message": "PersistedQueryNotFound", "extensions": {"code": "PERSISTED_QUERY_NOT_FOUND"}
+                    }]}
+            elif query_hash(query) != digest:
+                return 400, {"errors": [{"message": "provided sha does not match query"}]}
+            with self._lock:
+                self.persisted[digest] = query
+                self.persisted.move_to_end(digest)
+                while len(self.persisted) > self.max_persisted:
+                    self.persisted.popitem(last=False)
+        if not isinstance(query, str) or not query.strip():
+            return 400, {"errors": [{"message": "query is empty"}]}
+
+        field = GRAPHQL_ROOT_FIELD.search(query)
+        try:
+            records = self.connector.execute_graphql(query, request.get("variables"))
+        except Exception as e:
+            return 200, {"errors": [{"message": str(e)}], "data": None}
+        return 200, {"data": {field.group(1) if field else "files": records}}
+
+    def _batch_body(self, code: int, batch: Any, cursor_id: Optional[str]) -> Dict[str, Any]:
+        """
+        Build the body of a cursor response.
+
+        Args:
+            code (int): The HTTP status echoed in the body
+            batch (Any): The records of the batch
+            cursor_id (Optional[str]): The cursor id, or None if this is the last batch
+
+        Returns:
+            Dict[str, Any]: The response body
+        """
+        body = {"error": False, "code": code, "result": batch, "hasMore": cursor_id is not None}
+        if cursor_id is not None:
+            body["id"] = cursor_id
+        return body
+
+    def _error(self, status: int, message: str, error_num: int) -> Tuple[int, Dict[str, Any]]:
+        """
+        Build an ArangoDB error response.
+
+        Args:
+            status (int): The HTTP status
+            message (str): The error message
+            error_num (int): The ArangoDB error number
+
+        Returns:
+            Tuple[int, Dict[str, Any]]: The HTTP status and the response body
+        """
+        return status, {"error": True, "code": status, "errorNum": error_num, "errorMessage": message}
+
+    def _make_handler(self):
+        """
+        Build the request handler class bound to this stub.
+
+        Returns:
+            type: A BaseHTTPRequestHandler subclass
+        """
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body are written separately; without TCP_NODELAY a kept-alive
+            # connection stalls on every response waiting for the client's delayed ACK
+            disable_nagle_algorithm = True
+
+            def setup(self):
+                super().setup()
+                with stub._lock:
+                    stub.connection_count += 1
+
+            def do_GET(self):
+                self._dispatch()
+
+            def do_POST(self):
+                self._dispatch()
+
+            def do_PUT(self):
+                self._dispatch()
+
+            def do_DELETE(self):
+                self._dispatch()
+
+            def _dispatch(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                with stub._lock:
+                    stub.request_count += 1
+                if stub.delay:
+                    time.sleep(stub.delay)
+                try:
+                    request = json.loads(body) if body else {}
+                except ValueError:
+                    status, payload = stub._error(400, "invalid JSON body", 600)
+                else:
+                    status, payload = stub.handle(self.command, self.path, request)
+                self._reply(status, payload)
+
+            def _reply(self, status: int, payload: Dict[str, Any]) -> None:
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                try:
+                    self.wfile.write(data)
+                except (BrokenPipeError, ConnectionResetError):
+                    self.close_connection = True
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
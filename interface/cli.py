@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 
-from typing import List, Dict, Any
+from typing import List
+from search_execution.search_result import SearchResult
 
 class CLI:
     def __init__(self):
@@ -21,26 +22,39 @@ class CLI:
         """
         return input(self.prompt).strip()
 
-    def display_results(self, results: List[Dict[str, Any]], facets: List[str]) -> None:
+    def display_results(self, results: List[SearchResult], facets: List[str], start: int = 1) -> None:
         """
         Displays the search results and suggested facets to the user.
 
         Args:
-            results (List[Dict[str, Any]]): The ranked search results
+            results (List[SearchResult]): The ranked search results
             facets (List[str]): Suggested facets for query refinement
+            start (int): The number of the first result, for results displayed in several batches
         """
         if not results:
-            print("No results found.")
+            if start == 1:
+                print("No results found.")
             return
 
-        print("\nSearch Results:")
-        for i, result in enumerate(results, 1):
-            print(f"{i}. {result['title']}")
-            print(f"   Path: {result['path']}")
-            print(f"   Relevance: {result['relevance']:.2f}")
-            print(f"   Snippet: {result['snippet']}")
+        if start == 1:
+            print("\nSearch Results:")
+        for i, result in enumerate(results, start):
+            print(f"{i}. {result.title}")
+            print(f"   Path: {result.path}")
+            print(f"   Relevance: {result.relevance:.2f}")
+            if result.snippet:
+                print(f"   Snippet: {result.snippet}")
             print()
 
+        self.display_facets(facets)
+
+    def display_facets(self, facets: List[str]) -> None:
+        """
+        Displays the suggested facets to the user.
+
+        Args:
+            facets (List[str]): Suggested facets for query refinement
+        """
         if facets:
             print("Suggested refinements:")
             for facet in facets:
@@ -88,12 +102,12 @@ class CLI:
             except ValueError:
                 print("Please enter a valid number")
 
-    def display_result_details(self, result: Dict[str, Any]) -> None:
+    def display_result_details(self, result: SearchResult) -> None:
         """
         Displays detailed information about a specific result.
 
         Args:
-            result (Dict[str, Any]): The result to display in detail
+            result (SearchResult): The result to display in detail
         """
         print("\nDetailed Result:")
         for key, value in result.items():
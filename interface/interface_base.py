@@ -1,7 +1,8 @@
 #!/usr/bin/env python3
 
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any
+from typing import List
+from search_execution.search_result import SearchResult
 
 class InterfaceBase(ABC):
     """
@@ -20,13 +21,14 @@ class InterfaceBase(ABC):
         pass
 
     @abstractmethod
-    def display_results(self, results: List[Dict[str, Any]], facets: List[str]) -> None:
+    def display_results(self, results: List[SearchResult], facets: List[str], start: int = 1) -> None:
         """
         Display search results and suggested facets to the user.
 
         Args:
-            results (List[Dict[str, Any]]): The ranked search results
+            results (List[SearchResult]): The ranked search results
             facets (List[str]): Suggested facets for query refinement
+            start (int): The number of the first result, for results displayed in several batches
         """
         pass
 
@@ -64,12 +66,12 @@ class InterfaceBase(ABC):
         pass
 
     @abstractmethod
-    def display_result_details(self, result: Dict[str, Any]) -> None:
+    def display_result_details(self, result: SearchResult) -> None:
         """
         Display detailed information about a specific result.
 
         Args:
-            result (Dict[str, Any]): The result to display in detail
+            result (SearchResult): The result to display in detail
         """
         pass
 
@@ -1,7 +1,8 @@
 #!/usr/bin/env python3
 
 import argparse
-from typing import Union
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Union
 
 # Import interface modules
 from interface.cli import CLI
@@ -9,28 +10,80 @@ from interface.cli import CLI
 # Import core modules
 from query_processing.nl_parser import NLParser
 from query_processing.query_translator.graphql_translator import GraphQLTranslator
+from query_processing.query_translator.aql_translator import AQLTranslator
+from query_processing.query_translator.translation_cache import CachingTranslator
+from query_processing.query_translator.rule_translator import RuleBasedTranslator
 from query_processing.query_history import QueryHistory
+from query_processing.query_refiner import QueryRefiner
 from search_execution.query_executor.graphql_executor import GraphQLExecutor
+from search_execution.query_executor.aql_executor import AQLExecutor
+from search_execution.query_executor.racing_executor import RacingExecutor
+from search_execution.query_executor.fanout_executor import FanoutExecutor
+from search_execution.result_set_manager import ResultSetManager
+from search_execution.search_result import SearchResult
 from result_analysis.metadata_analyzer import MetadataAnalyzer
 from result_analysis.facet_generator import FacetGenerator
 from result_analysis.result_ranker import ResultRanker
 from data_access.upi_connector import UPIConnector
+from data_access.local_metadata_store import LocalMetadataStore
+from data_access.local_upi_connector import LocalUPIConnector
+from data_access.upi_stub_server import UPIStubServer
 from utils.logging_service import LoggingService
+from utils.request_context import RequestCancelled, RequestContext
 from utils.llm_connector.openai_connector import OpenAIConnector
+from utils.llm_connector.mock_connector import MockLLMConnector
+from utils.llm_connector.cached_connector import CachedLLMConnector
+from utils.llm_connector.scheduled_connector import ScheduledLLMConnector
+from data_access.mock_upi_connector import MockUPIConnector
+
+def build_backend(query_language: str, shards: int = 1):
+    if query_language == "aql":
+        translator, executor = RuleBasedTranslator("aql", fallback=CachingTranslator(AQLTranslator())), AQLExecutor()
+    else:
+        translator, executor = RuleBasedTranslator("graphql", fallback=CachingTranslator(GraphQLTranslator())), GraphQLExecutor()
+    if shards > 1:
+        # Fan the query out to every shard and merge the per-shard results on the query's own
+        # SORT and LIMIT; like a single shard, a query without a LIMIT returns every result
+        executor = FanoutExecutor(executor, top_k=None)
+    return translator, executor
 
 class SearchTool:
-    def __init__(self, use_speech: bool = False):
+    def __init__(self, use_speech: bool = False, use_mock: bool = False, backend: str = "graphql",
+                 batch_size: Optional[int] = None, history_results: int = 100, shards: int = 1,
+                 upi_endpoints: Optional[List[str]] = None, upi_stub: bool = False,
+                 request_timeout: Optional[float] = 30.0, local_store: Optional[str] = None):
         self.interface = CLI()
         self.nl_parser = NLParser()
-        self.query_translator = GraphQLTranslator()
+        self.backends = {name: build_backend(name, shards) for name in ("graphql", "aql") if backend in (name, "race")}
+        self.query_translator, self.query_executor = next(iter(self.backends.values()))
+        self.query_racer = RacingExecutor(self.backends) if backend == "race" else None
+        self.batch_size = batch_size
+        self.request_timeout = request_timeout
+        self.history_results = history_results
         self.query_history = QueryHistory()
-        self.query_executor = GraphQLExecutor()
-        self.metadata_analyzer = MetadataAnalyzer()
+        self.result_cache = ResultSetManager(cache_path="result_cache.db")
+        self.query_refiner = QueryRefiner({name: translator for name, (translator, _) in self.backends.items()})
+        self.llm_connector = CachedLLMConnector(
+            ScheduledLLMConnector(MockLLMConnector() if use_mock else OpenAIConnector())
+        )
+        self.metadata_analyzer = MetadataAnalyzer(self.llm_connector)
         self.facet_generator = FacetGenerator()
         self.result_ranker = ResultRanker()
-        self.upi_connector = UPIConnector()
+        self.upi_stubs = []
+        if local_store is not None:
+            # An embedded store loaded from a JSON lines file answers queries in process
+            self.upi_connector = LocalUPIConnector(LocalMetadataStore.load(local_store))
+        elif use_mock:
+            shard_connectors = [MockUPIConnector(seed=shard) for shard in range(shards)]
+            self.upi_connector = shard_connectors if shards > 1 else shard_connectors[0]
+        elif upi_stub:
+            # One local stand-in server per shard, reached over HTTP like the real service
+            self.upi_stubs = [UPIStubServer(connector=MockUPIConnector(seed=shard)).start() for shard in range(shards)]
+            shard_connectors = [UPIConnector([stub.base_url]) for stub in self.upi_stubs]
+            self.upi_connector = shard_connectors if shards > 1 else shard_connectors[0]
+        else:
+            self.upi_connector = UPIConnector(upi_endpoints)
         self.logging_service = LoggingService()
-        self.llm_connector = OpenAIConnector()
 
     def run(self):
         while True:
@@ -40,36 +93,255 @@ class SearchTool:
             # Log the query
             self.logging_service.log_query(user_query)
 
-            # Process the query
-            parsed_query = self.nl_parser.parse(user_query)
-            translated_query = self.query_translator.translate(parsed_query, self.llm_connector)
-
-            # Execute the query
-            raw_results = self.query_executor.execute(translated_query, self.upi_connector)
-
-            # Analyze and refine results
-            analyzed_results = self.metadata_analyzer.analyze(raw_results)
-            facets = self.facet_generator.generate(analyzed_results)
-            ranked_results = self.result_ranker.rank(analyzed_results)
+            # Process the query within its own time budget
+            context = RequestContext(self.request_timeout)
+            facets = self._run_request(context, lambda: self._search(user_query, context))
 
-            # Display results to user
-            self.interface.display_results(ranked_results, facets)
-
-            # Update query history
-            self.query_history.add(user_query, ranked_results)
+            # Refine with facets; the previous translation is patched rather than re-translated where possible
+            facet = self.interface.get_facet_selection(facets)
+            while facet:
+                context = RequestContext(self.request_timeout)
+                try:
+                    facets = self._run_request(context, lambda: self._refine(facet, context))
+                except ValueError as e:
+                    self.interface.display_error(str(e))
+                    break
+                facet = self.interface.get_facet_selection(facets)
 
             # Check if user wants to continue
             if not self.interface.continue_session():
                 break
 
+        self.logging_service.log_system_metric("query_refinement_stats", self.query_refiner.get_stats())
+        self.logging_service.log_system_metric("result_cache_stats", self.result_cache.get_stats())
+        if self.query_racer is not None:
+            self.logging_service.log_system_metric("backend_race_stats", self.query_racer.get_stats())
+            self.query_racer.shutdown()
+        for _, query_executor in self.backends.values():
+            if isinstance(query_executor, FanoutExecutor):
+                self.logging_service.log_system_metric("shard_fanout_stats", query_executor.get_stats())
+                query_executor.shutdown()
+        shard_connectors = self.upi_connector if isinstance(self.upi_connector, list) else [self.upi_connector]
+        for connector in shard_connectors:
+            if isinstance(connector, UPIConnector):
+                self.logging_service.log_system_metric("upi_connection_stats", connector.get_stats())
+                connector.close()
+            elif isinstance(connector, LocalUPIConnector):
+                self.logging_service.log_system_metric("local_store_stats", connector.get_stats())
+                connector.close()
+        for stub in self.upi_stubs:
+            stub.stop()
         self.logging_service.log_session_end()
 
+    def _run_request(self, context: RequestContext, search: Callable[[], List[str]]) -> List[str]:
+        """
+        Run one search request, reporting it if it is interrupted or runs out of time.
+
+        Results displayed before the request stopped stay on screen; Ctrl-C
+        cancels the request instead of ending the session.
+
+        Args:
+            context (RequestContext): The request's deadline and cancellation state
+            search (Callable[[], List[str]]): Runs the request and returns the facets offered for refinement
+
+        Returns:
+            List[str]: The facets offered for refinement, or none if the request stopped before presenting results
+        """
+        try:
+            return search()
+        except KeyboardInterrupt:
+            context.cancel("interrupted")
+            error = RequestCancelled("search", "interrupted")
+        except RequestCancelled as e:
+            error = e
+        self.interface.display_error(f"Search stopped: {error}")
+        self.logging_service.log_error(str(error), type(error).__name__)
+        self.logging_service.log_system_metric("request_context", context.as_dict())
+        return []
+
+    def _search(self, user_query: str, context: RequestContext) -> List[str]:
+        """
+        Parse, translate, execute and present a new query.
+
+        Args:
+            user_query (str): The query as typed by the user
+            context (RequestContext): The request's deadline and cancellation state
+
+        Returns:
+            List[str]: The facets offered for refinement
+        """
+        parsed_query = self.nl_parser.parse(user_query, context)
+        if self.query_racer is not None:
+            # Translate and execute on every backend, keeping the first result set
+            start_time = time.perf_counter()
+            backend, translated_query, parameters, raw_results = self.query_racer.run(
+                parsed_query, self.llm_connector, self.upi_connector, context
+            )
+            self.logging_service.log_system_metric("backend_race", {
+                "winner": backend, "intent": parsed_query.get("intent"),
+                "elapsed": time.perf_counter() - start_time
+            })
+            batches = [raw_results]
+        else:
+            backend = next(iter(self.backends))
+            translated_query, parameters = self.query_translator.translate_parameterized(
+                parsed_query, self.llm_connector, context
+            )
+
+            # Execute the query
+            start_time = time.perf_counter()
+            batches = self._execute(backend, translated_query, parameters, context)
+        return self._present(user_query, parsed_query, translated_query, parameters, backend, batches,
+                             start_time, context)
+
+    def _refine(self, facet: str, context: RequestContext) -> List[str]:
+        """
+        Refine the last query with a facet, then execute and present it.
+
+        Args:
+            facet (str): The facet selected by the user
+            context (RequestContext): The request's deadline and cancellation state
+
+        Returns:
+            List[str]: The facets offered for refinement
+        """
+        entry = self.query_history.get_last_query()
+        parsed_query, translated_query, parameters = self.query_refiner.refine(
+            entry, facet, self.llm_connector, context
+        )
+        user_query = parsed_query["original_query"]
+        backend = entry["query_language"]
+        self.logging_service.log_query(user_query)
+        start_time = time.perf_counter()
+        # A facet that excludes everything the previous query matched leaves nothing to execute
+        batches = [] if translated_query is None else self._execute(backend, translated_query, parameters, context)
+        return self._present(user_query, parsed_query, translated_query, parameters, backend, batches,
+                             start_time, context)
+
+    def _execute(self, backend: str, translated_query: str, parameters: Dict[str, Any],
+                 context: Optional[RequestContext] = None) -> Iterable[List[SearchResult]]:
+        """
+        Execute a translated query on a backend.
+
+        Args:
+            backend (str): The query language of the backend
+            translated_query (str): The query to execute
+            parameters (Dict[str, Any]): The query's bind parameters
+            context (Optional[RequestContext]): The request's deadline and cancellation state
+
+        Returns:
+            Iterable[List[SearchResult]]: The results in batches; a single batch unless streaming is enabled
+
+        Results are served from the result cache when the collection has not changed since they were stored.
+        """
+        query_executor = self.backends[backend][1]
+        if self.batch_size:
+            return self.result_cache.execute_stream(
+                query_executor, translated_query, self.upi_connector, self.batch_size, parameters, backend, context
+            )
+        return [self.result_cache.execute(
+            query_executor, translated_query, self.upi_connector, parameters, backend, context
+        )]
+
+    def _present(self, user_query: str, parsed_query: Dict[str, Any], translated_query: Optional[str],
+                 parameters: Dict[str, Any], backend: str, batches: Iterable[List[SearchResult]], start_time: float,
+                 context: Optional[RequestContext] = None) -> List[str]:
+        """
+        Analyze and display results batch by batch and record them in the query history.
+
+        Each batch is displayed as soon as it has been analyzed. Only the
+        best history_results results are kept when streaming, so memory is
+        bounded by the batch size rather than the result-set size.
+
+        Args:
+            user_query (str): The query as shown to the user
+            parsed_query (Dict[str, Any]): The parsed query
+            translated_query (Optional[str]): The executed query, or None if there was nothing to execute
+            parameters (Dict[str, Any]): The bind parameters the query was executed with
+            backend (str): The query language of the backend that produced the results
+            batches (Iterable[List[SearchResult]]): The results returned by the backend, in batches
+            start_time (float): The perf_counter time at which execution started
+            context (Optional[RequestContext]): The request's deadline and cancellation state; summaries and facets are shed when it runs low
+
+        Returns:
+            List[str]: The facets offered for refinement
+        """
+        # Only time spent waiting for the backend counts as execution time
+        timing = {"execution": time.perf_counter() - start_time, "first_batch": None}
+
+        def timed(batches: Iterable[List[SearchResult]]):
+            iterator = iter(batches)
+            while True:
+                fetch_start = time.perf_counter()
+                batch = next(iterator, None)
+                timing["execution"] += time.perf_counter() - fetch_start
+                if batch is None:
+                    return
+                if timing["first_batch"] is None:
+                    timing["first_batch"] = time.perf_counter() - start_time
+                yield batch
+
+        # Analyze, display and refine results as they arrive
+        count = 0
+        facets = []
+        ranked_results = []
+        for analyzed_results in self.metadata_analyzer.analyze_stream(timed(batches), context):
+            self.interface.display_results(self.result_ranker.rank(analyzed_results), [], start=count + 1)
+            count += len(analyzed_results)
+            facets = self.facet_generator.merge(facets, self.facet_generator.generate(analyzed_results, context))
+            ranked_results = self.result_ranker.merge_top(
+                ranked_results, analyzed_results, self.history_results if self.batch_size else None
+            )
+        if count == 0:
+            self.interface.display_results([], [])
+        self.interface.display_facets(facets)
+        if context is not None and context.partial:
+            self.interface.display_error("Results may be incomplete: the search stopped before the backend finished.")
+        if context is not None and (context.partial or context.shed):
+            self.logging_service.log_system_metric("request_context", context.as_dict())
+
+        execution_time = timing["execution"]
+        self.logging_service.log_result(user_query, count, execution_time)
+        if self.batch_size and timing["first_batch"] is not None:
+            self.logging_service.log_system_metric("first_batch_latency", {
+                "seconds": timing["first_batch"], "batch_size": self.batch_size
+            })
+        query_cost = getattr(self.backends[backend][1], "last_cost", None)
+        if query_cost is not None:
+            self.logging_service.log_system_metric(
+                "query_cost", dict(query_cost.as_dict(), execution_time=execution_time)
+            )
+
+        # Update query history
+        self.query_history.add(user_query, ranked_results, parsed_query, translated_query, backend, parameters)
+        return facets
+
 def main():
     parser = argparse.ArgumentParser(description="UPI Search Tool")
     parser.add_argument("--speech", action="store_true", help="Use speech interface")
+    parser.add_argument("--mock", action="store_true", help="Use in-process mock LLM and UPI backends")
+    parser.add_argument("--backend", choices=["graphql", "aql", "race"], default="graphql",
+                        help="Query backend; race runs GraphQL and AQL concurrently and keeps the first result")
+    parser.add_argument("--batch-size", type=int, default=None,
+                        help="Stream results from a server-side cursor in batches of this size")
+    parser.add_argument("--shards", type=int, default=1,
+                        help="Number of UPI shards to fan queries out to (in-process shards with --mock)")
+    parser.add_argument("--upi-url", action="append", default=None,
+                        help="Base URL of a UPI server; repeat for several endpoints (default http://localhost:8529)")
+    parser.add_argument("--upi-stub", action="store_true",
+                        help="Serve synthetic UPI metadata from local stand-in servers over HTTP")
+    parser.add_argument("--timeout", type=float, default=30.0,
+                        help="Seconds each search may take; partial results are shown when it runs out (0 for no limit)")
+    parser.add_argument("--local-store", default=None, metavar="PATH",
+                        help="Search an embedded metadata store loaded from a JSON lines file of UPI records")
     args = parser.parse_args()
+    if args.local_store is not None and args.shards > 1:
+        parser.error("--local-store is a single store and cannot be combined with --shards")
 
-    search_tool = SearchTool(use_speech=args.speech)
+    search_tool = SearchTool(use_speech=args.speech, use_mock=args.mock, backend=args.backend,
+                             batch_size=args.batch_size, shards=args.shards,
+                             upi_endpoints=args.upi_url, upi_stub=args.upi_stub,
+                             request_timeout=args.timeout or None, local_store=args.local_store)
     search_tool.run()
 
 if __name__ == "__main__":
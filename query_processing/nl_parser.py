@@ -1,32 +1,220 @@
 #!/usr/bin/env python3
 
-from typing import Dict, Any
+import functools
+import math
+import os
+import re
+from datetime import datetime, timedelta
+from typing import Dict, Any, Callable, List, Optional, Tuple
+from utils.phrase_matcher import PhraseMatcher
+from utils.request_context import RequestContext
+
+# File type vocabulary: phrase -> extensions
+FILE_TYPES: Dict[str, List[str]] = {
+    "pdf": ["pdf"], "pdfs": ["pdf"],
+    "word document": ["doc", "docx"], "word documents": ["doc", "docx"], "word file": ["doc", "docx"],
+    "word files": ["doc", "docx"],
+    "doc": ["doc", "docx"], "docx": ["docx"],
+    "excel": ["xls", "xlsx"], "spreadsheet": ["xls", "xlsx", "ods", "csv"], "spreadsheets": ["xls", "xlsx", "ods", "csv"],
+    "xls": ["xls"], "xlsx": ["xlsx"], "csv": ["csv"], "csvs": ["csv"],
+    "powerpoint": ["ppt", "pptx"], "presentation": ["ppt", "pptx", "key", "odp"],
+    "presentations": ["ppt", "pptx", "key", "odp"], "slides": ["ppt", "pptx", "key", "odp"],
+    "ppt": ["ppt"], "pptx": ["pptx"],
+    "text file": ["txt"], "text files": ["txt"], "txt": ["txt"], "markdown": ["md"],
+    "image": ["jpg", "jpeg", "png", "gif", "bmp", "tiff", "webp", "heic"],
+    "images": ["jpg", "jpeg", "png", "gif", "bmp", "tiff", "webp", "heic"],
+    "photo": ["jpg", "jpeg", "png", "heic"], "photos": ["jpg", "jpeg", "png", "heic"],
+    "picture": ["jpg", "jpeg", "png", "gif", "heic"], "pictures": ["jpg", "jpeg", "png", "gif", "heic"],
+    "jpg": ["jpg", "jpeg"], "jpeg": ["jpg", "jpeg"], "png": ["png"], "gif": ["gif"], "pngs": ["png"],
+    "video": ["mp4", "mov", "avi", "mkv", "webm"], "videos": ["mp4", "mov", "avi", "mkv", "webm"],
+    "movie": ["mp4", "mov", "avi", "mkv"], "movies": ["mp4", "mov", "avi", "mkv"], "mp4": ["mp4"],
+    "audio": ["mp3", "wav", "flac", "m4a", "ogg"], "music": ["mp3", "flac", "m4a", "ogg"],
+    "song": ["mp3", "flac", "m4a"], "songs": ["mp3", "flac", "m4a"], "mp3": ["mp3"], "mp3s": ["mp3"],
+    "archive": ["zip", "tar", "gz", "7z", "rar"], "archives": ["zip", "tar", "gz", "7z", "rar"],
+    "zip": ["zip"], "compressed": ["zip", "tar", "gz", "7z", "rar"],
+    "python": ["py"], "python file": ["py"], "python files": ["py"], "python script": ["py"],
+    "python scripts": ["py"], "javascript": ["js"], "source code": ["py", "js", "ts", "java", "c", "cpp", "h", "go", "rs"],
+    "email": ["eml", "msg"], "emails": ["eml", "msg"], "ebook": ["epub", "mobi"], "ebooks": ["epub", "mobi"],
+    "json": ["json"], "html": ["html", "htm"], "log": ["log"], "logs": ["log"], "log files": ["log"],
+}
+
+# Words that carry no search meaning
+STOP_WORDS = (
+    "show me find list get search look for give all any every my the a an of with that which who "
+    "are is were was be been files file documents document docs items item stuff things please i "
+    "and or to than about at containing contain contains mentioning have has had me some there "
+    "it them this these those"
+).split()
+
+# Record field that date expressions refer to after each cue word
+DATE_FIELDS = {
+    "created": "created", "made": "created", "written": "created", "added": "created",
+    "modified": "modified", "edited": "modified", "changed": "modified", "updated": "modified", "saved": "modified",
+    "accessed": "accessed", "opened": "accessed", "viewed": "accessed", "read": "accessed", "used": "accessed",
+}
+
+# Date comparison cues: how a following date period becomes a bound
+DATE_COMPARISONS = {
+    "before": "before", "prior to": "before", "older than": "before", "until": "through", "through": "through",
+    "after": "after", "since": "since", "newer than": "since", "from": "during",
+    "in": "during", "on": "during", "during": "during", "between": "between",
+}
+
+# Size comparison cues
+SIZE_COMPARISONS = {
+    "larger than": "min", "bigger than": "min", "greater than": "min", "more than": "min", "over": "min",
+    "above": "min", "at least": "min", "exceeding": "min", ">": "min", ">=": "min",
+    "smaller than": "max", "less than": "max", "under": "max", "below": "max", "at most": "max",
+    "up to": "max", "<": "max", "<=": "max", "between": "between",
+}
+
+# Sort requests that the filters cannot express: phrase -> (field, direction)
+ORDERINGS = {
+    "largest": ("size", "desc"), "biggest": ("size", "desc"), "smallest": ("size", "asc"),
+    "newest": ("modified", "desc"), "latest": ("modified", "desc"), "most recent": ("modified", "desc"),
+    "oldest": ("modified", "asc"),
+}
+
+# Relative date phrases -> window in days before today
+RELATIVE_DATES = {
+    "recent": 7, "recently": 7, "past week": 7, "last week": 7, "past month": 30, "last month": 30,
+    "past year": 365, "last year": 365,
+}
+
+OWNER_CUES = ("owned by", "belonging to", "from user", "owner", "owner is", "created by user")
+SORT_CUES = ("sorted by", "sort by", "ordered by", "order by")
+# A bare "by" orders by a following sort field ("pdfs by size") and otherwise names the owner ("pdfs by alice")
+BY_CUES = ("by",)
+SORT_FIELDS = {"size": "size", "name": "name", "date": "modified", "created": "created",
+               "modified": "modified", "accessed": "accessed", "owner": "owner", "path": "path"}
+NAME_CUES = ("named", "called", "titled", "name", "with name", "whose name", "whose name is")
+# How a name operand matches after a name cue: phrase -> "prefix", "suffix" or "contains"
+NAME_MATCHES = {
+    "starts with": "prefix", "starting with": "prefix", "begins with": "prefix", "beginning with": "prefix",
+    "ends with": "suffix", "ending with": "suffix",
+    "contains": "contains", "containing": "contains", "includes": "contains", "including": "contains",
+}
+WINDOW_CUES = ("last", "past")
+COUNT_CUES = ("how many", "count", "number of")
+
+SIZE_UNITS = {"b": 1, "byte": 1, "bytes": 1, "k": 1024, "kb": 1024, "kib": 1024,
+              "m": 1024 ** 2, "mb": 1024 ** 2, "mib": 1024 ** 2, "meg": 1024 ** 2, "megs": 1024 ** 2,
+              "g": 1024 ** 3, "gb": 1024 ** 3, "gib": 1024 ** 3, "gig": 1024 ** 3, "gigs": 1024 ** 3,
+              "t": 1024 ** 4, "tb": 1024 ** 4, "tib": 1024 ** 4}
+
+WINDOW_UNITS = {"day": 1, "days": 1, "week": 7, "weeks": 7, "month": 30, "months": 30, "year": 365, "years": 365}
+
+MONTHS = {name: index + 1 for index, names in enumerate((
+    ("january", "jan"), ("february", "feb"), ("march", "mar"), ("april", "apr"), ("may",), ("june", "jun"),
+    ("july", "jul"), ("august", "aug"), ("september", "sep", "sept"), ("october", "oct"),
+    ("november", "nov"), ("december", "dec"),
+)) for name in names}
+
+_MONTH = "|".join(sorted(MONTHS, key=len, reverse=True))
+
+# One alternation that splits a query into typed tokens in a single scan
+TOKEN_PATTERN = re.compile(rf"""
+    (?P<quoted>"[^"]*"|“[^”]*”)
+  | (?<!\S)(?P<path>(?:~|[A-Za-z]:)?[\\/][^\s"]*)
+  | (?P<isodate>\d{{4}}-\d{{1,2}}-\d{{1,2}})
+  | (?P<usdate>\d{{1,2}}/\d{{1,2}}/\d{{4}})
+  | (?P<monthday>(?:{_MONTH})\.?\s+\d{{1,2}}(?:st|nd|rd|th)?,?\s+\d{{4}}\b)
+  | (?P<daymonth>\d{{1,2}}(?:st|nd|rd|th)?\s+(?:{_MONTH})\.?,?\s+\d{{4}}\b)
+  | (?P<monthyear>(?:{_MONTH})\.?\s+\d{{4}}\b)
+  | (?P<size>\d+(?:\.\d+)?\s?(?:{"|".join(sorted(SIZE_UNITS, key=len, reverse=True))})\b)
+  | (?P<glob>[\w.\-]*[*?][\w.*?\-]*)
+  | (?P<extension>(?<![\w.])\.[A-Za-z0-9]{{1,8}}\b)
+  | (?P<number>\d+(?:\.\d+)?\b)
+  | (?P<comparison>>=|<=|>|<)
+  | (?P<word>\w[\w'\-]*)
+""", re.IGNORECASE | re.VERBOSE)
+
+DIGITS_PATTERN = re.compile(r"\d+(?:\.\d+)?")
+DAY_PATTERN = re.compile(r"\d{1,2}(?=st|nd|rd|th|\b)")
+YEAR_PATTERN = re.compile(r"\d{4}")
+
+@functools.lru_cache(maxsize=None)
+def compiled_lexicon() -> PhraseMatcher:
+    """
+    Build the phrase dictionary automaton shared by every parser.
+
+    Returns:
+        PhraseMatcher: The automaton mapping each phrase to a (category, value) payload
+    """
+    phrases = {}
+    groups = (
+        ("stop", {word: None for word in STOP_WORDS}),
+        ("count", {cue: None for cue in COUNT_CUES}),
+        ("owner", {cue: None for cue in OWNER_CUES}),
+        ("name", {cue: None for cue in NAME_CUES}),
+        ("name_match", NAME_MATCHES),
+        ("window", {cue: None for cue in WINDOW_CUES}),
+        ("sort", {cue: None for cue in SORT_CUES}),
+        ("by", {cue: None for cue in BY_CUES}),
+        ("date_field", DATE_FIELDS),
+        ("date_comparison", DATE_COMPARISONS),
+        ("size_comparison", SIZE_COMPARISONS),
+        ("relative_date", RELATIVE_DATES),
+        ("order", ORDERINGS),
+        ("file_type", FILE_TYPES),
+        ("day", {"today": 0, "yesterday": 1}),
+        ("this", {"this week": "week", "this month": "month", "this year": "year"}),
+    )
+    # Later groups win over earlier ones for the same phrase
+    for category, entries in groups:
+        for phrase, value in entries.items():
+            phrases[phrase] = (category, value)
+    phrases["between"] = ("between", None)
+    return PhraseMatcher(phrases)
 
 class NLParser:
     """
     Natural Language Parser for processing user queries.
+
+    Parsing is a single pass over the query: one precompiled regular
+    expression splits it into typed tokens (quoted phrases, paths, dates,
+    sizes, globs, extensions, numbers and words), an Aho-Corasick automaton
+    over the words finds every dictionary phrase (file types, comparison and
+    date cues, owners, orderings) at once, and a left-to-right walk turns
+    cues and the tokens that follow them into typed filters. Orderings are
+    returned as order_by and order entities, and a count in front of one
+    ("10 largest") as a limit entity. Words that map to nothing are
+    returned as free-text terms.
+
+    Filters use the keys of data_access.upi_schema.FILTER_FIELDS: dates are
+    ISO-8601 strings at day granularity, sizes are byte counts.
     """
 
-    def __init__(self):
-        # Initialize any necessary components or models
-        pass
+    def __init__(self, clock: Optional[Callable[[], datetime]] = None):
+        """
+        Initialize the parser, building the phrase automaton on first use.
+
+        Args:
+            clock (Optional[Callable[[], datetime]]): Returns the current time for relative dates, or None for datetime.now
+        """
+        self.clock = clock or datetime.now
+        self.lexicon = compiled_lexicon()
 
-    def parse(self, query: str) -> Dict[str, Any]:
+    def parse(self, query: str, context: Optional[RequestContext] = None) -> Dict[str, Any]:
         """
         Parse the natural language query into a structured format.
 
         Args:
             query (str): The user's natural language query
+            context (Optional[RequestContext]): The request's deadline and cancellation state
 
         Returns:
             Dict[str, Any]: A structured representation of the query
         """
-        # Placeholder implementation
+        if context is not None:
+            context.check("parse")
+        intent, entities, filters, terms = self._analyze(query)
         parsed_query = {
             "original_query": query,
-            "intent": self._detect_intent(query),
-            "entities": self._extract_entities(query),
-            "filters": self._extract_filters(query)
+            "intent": intent,
+            "entities": entities,
+            "filters": filters,
+            "terms": terms
         }
         return parsed_query
 
@@ -40,8 +228,7 @@ class NLParser:
         Returns:
             str: The detected intent
         """
-        # Implement intent detection logic
-        return "search"  # Placeholder
+        return self._analyze(query)[0]
 
     def _extract_entities(self, query: str) -> Dict[str, Any]:
         """
@@ -53,8 +240,7 @@ class NLParser:
         Returns:
             Dict[str, Any]: Extracted entities
         """
-        # Implement entity extraction logic
-        return {}  # Placeholder
+        return self._analyze(query)[1]
 
     def _extract_filters(self, query: str) -> Dict[str, Any]:
         """
@@ -66,5 +252,255 @@ class NLParser:
         Returns:
             Dict[str, Any]: Extracted filters
         """
-        # Implement filter extraction logic
-        return {}  # Placeholder
+        return self._analyze(query)[2]
+
+    def _analyze(self, query: str) -> Tuple[str, Dict[str, Any], Dict[str, Any], List[str]]:
+        """
+        Run the single extraction pass over a query.
+
+        Args:
+            query (str): The user's query
+
+        Returns:
+            Tuple[str, Dict[str, Any], Dict[str, Any], List[str]]: The intent, entities, filters and free-text terms
+        """
+        tokens = [(match.lastgroup, match.group()) for match in TOKEN_PATTERN.finditer(query)]
+        # Only words take part in phrase matching; other tokens break phrases
+        words = [value.lower() if kind in ("word", "comparison") else "\0" for kind, value in tokens]
+        phrases = self.lexicon.longest_at(words)
+        today = self.clock().replace(hour=0, minute=0, second=0, microsecond=0)
+
+        intent = "search"
+        entities = {}
+        filters = {}
+        terms = []
+        extensions = []
+        date_field = None
+        date_comparison = None
+        size_comparison = None
+        name_match = None
+        cue = None
+
+        index = 0
+        while index < len(tokens):
+            kind, value = tokens[index]
+            end, (category, payload) = phrases.get(index, (index + 1, (None, None)))
+            period = None
+
+            if category is not None:
+                phrase = " ".join(words[index:end])
+                index = end
+                if cue in ("sort", "by") and phrase in SORT_FIELDS:
+                    # Sort fields such as "name" and "created" are also cue phrases
+                    entities["order_by"] = SORT_FIELDS[phrase]
+                    entities.setdefault("order", "asc")
+                    cue = None
+                    continue
+                if category == "file_type":
+                    extensions.extend(payload)
+                elif category == "date_field":
+                    date_field = payload
+                elif category == "date_comparison":
+                    date_comparison = payload
+                elif category == "size_comparison":
+                    size_comparison = payload
+                elif category == "between":
+                    date_comparison = size_comparison = "between"
+                elif category in ("owner", "name", "window", "sort", "by"):
+                    cue = category
+                    name_match = None
+                elif category == "name_match" and cue == "name":
+                    name_match = payload
+                elif category == "count":
+                    intent = "count"
+                elif category == "order":
+                    entities["order_by"], entities["order"] = payload
+                elif category == "relative_date":
+                    period = (today - timedelta(days=payload), None)
+                elif category == "day":
+                    start = today - timedelta(days=payload)
+                    period = (start, start + timedelta(days=1))
+                elif category == "this":
+                    period = (self._period_start(today, payload), None)
+                if period is None:
+                    continue
+            else:
+                index += 1
+                lowered = value.lower()
+                if kind == "number" and cue == "window" and index < len(tokens) \
+                        and tokens[index][1].lower() in WINDOW_UNITS:
+                    days = float(value) * WINDOW_UNITS[tokens[index][1].lower()]
+                    # A window reaching past the first representable day covers all time
+                    start = today - timedelta(days=int(days)) if days < (today - datetime.min).days else datetime.min
+                    period = (start, None)
+                    index += 1
+                elif kind == "size":
+                    amount = DIGITS_PATTERN.match(value).group()
+                    size = float(amount) * SIZE_UNITS[value[len(amount):].strip().lower()]
+                    if not math.isfinite(size):
+                        cue = None
+                        continue
+                    size = int(size)
+                    bound = size_comparison or "min"
+                    if bound == "between":
+                        filters["size_min"] = size
+                        size_comparison = "max"
+                    else:
+                        filters["size_max" if bound == "max" else "size_min"] = size
+                        size_comparison = None
+                    cue = None
+                    continue
+                elif kind in ("isodate", "usdate", "monthday", "daymonth", "monthyear"):
+                    period = self._absolute_period(kind, lowered)
+                elif kind == "number" and date_comparison and YEAR_PATTERN.fullmatch(value) and 1900 < int(value) < 2200:
+                    period = (datetime(int(value), 1, 1), datetime(int(value) + 1, 1, 1))
+                elif kind == "path":
+                    # Stored paths are absolute, so a home-relative path is expanded
+                    filters["path_prefix"] = os.path.expanduser(value) if value.startswith("~") else value
+                    cue = None
+                    continue
+                elif kind == "extension":
+                    extensions.append(lowered[1:])
+                    continue
+                elif kind == "glob":
+                    if re.fullmatch(r"\*\.[a-z0-9]+", lowered):
+                        extensions.append(lowered[2:])
+                    else:
+                        filters["name_pattern"] = value
+                    cue = None
+                    continue
+                elif kind == "quoted":
+                    text = value[1:-1].strip()
+                    if cue == "name":
+                        filters["name_pattern"] = self._name_pattern(text, name_match)
+                    elif text:
+                        terms.append(text)
+                    cue = None
+                    continue
+                elif kind == "word" and cue in ("sort", "by") and lowered in SORT_FIELDS:
+                    entities["order_by"] = SORT_FIELDS[lowered]
+                    entities.setdefault("order", "asc")
+                    cue = None
+                    continue
+                elif kind == "word" and cue in ("owner", "by"):
+                    filters["owner"] = value[:-2] if lowered.endswith("'s") else value
+                    cue = None
+                    continue
+                elif kind == "number" and value.isdigit() and int(value) > 0 \
+                        and phrases.get(index, (0, (None,)))[1][0] == "order":
+                    # "10 largest files": the count of an ordering is a limit
+                    entities["limit"] = int(value)
+                    continue
+                elif kind in ("word", "number") and cue == "name":
+                    filters["name_pattern"] = self._name_pattern(value, name_match)
+                    cue = None
+                    continue
+                elif kind in ("word", "number"):
+                    owner = lowered[:-2] if lowered.endswith("'s") else None
+                    if owner and index < len(tokens) and phrases.get(index, (0, (None,)))[1][0] in ("stop", "file_type"):
+                        filters["owner"] = value[:-2]
+                    else:
+                        terms.append(lowered)
+                    cue = date_comparison = None
+                    continue
+                else:
+                    continue
+
+            if period is not None:
+                self._apply_period(filters, date_field or "modified", date_comparison, period)
+                date_comparison = "through" if date_comparison == "between" else None
+                cue = None
+
+        if extensions:
+            filters["extensions"] = list(dict.fromkeys(extensions))
+        return intent, entities, filters, terms
+
+    def _name_pattern(self, operand: str, match: Optional[str]) -> str:
+        """
+        Turn the operand of a name cue into a name glob.
+
+        Args:
+            operand (str): The name text
+            match (Optional[str]): "prefix", "suffix" or "contains", or None for contains
+
+        Returns:
+            str: The glob
+        """
+        if match == "prefix":
+            return f"{operand}*"
+        if match == "suffix":
+            return f"*{operand}"
+        return f"*{operand}*"
+
+    def _apply_period(self, filters: Dict[str, Any], field: str, comparison: Optional[str],
+                      period: Tuple[datetime, Optional[datetime]]) -> None:
+        """
+        Turn a date period and its comparison cue into date bounds.
+
+        Args:
+            filters (Dict[str, Any]): The filters to update
+            field (str): The date field, "created", "modified" or "accessed"
+            comparison (Optional[str]): The comparison cue, or None for "during"
+            period (Tuple[datetime, Optional[datetime]]): Start and exclusive end of the period; no end means up to now
+        """
+        start, end = period
+        if comparison == "before" or (comparison == "through" and end is None):
+            filters[f"{field}_before"] = start.isoformat()
+        elif comparison == "through":
+            filters[f"{field}_before"] = end.isoformat()
+        elif comparison == "after" and end is not None:
+            filters[f"{field}_after"] = end.isoformat()
+        elif comparison in ("after", "since", "between"):
+            filters[f"{field}_after"] = start.isoformat()
+        else:
+            filters[f"{field}_after"] = start.isoformat()
+            if end is not None:
+                filters[f"{field}_before"] = end.isoformat()
+
+    def _absolute_period(self, kind: str, value: str) -> Optional[Tuple[datetime, datetime]]:
+        """
+        Convert a date token into the period it denotes.
+
+        Args:
+            kind (str): The token type
+            value (str): The lower-cased token text
+
+        Returns:
+            Optional[Tuple[datetime, datetime]]: Start and exclusive end of the day or month, or None if the date does not exist
+        """
+        try:
+            if kind == "isodate":
+                year, month, day = (int(part) for part in value.split("-"))
+            elif kind == "usdate":
+                month, day, year = (int(part) for part in value.split("/"))
+            elif kind == "monthyear":
+                year = int(YEAR_PATTERN.search(value).group())
+                month = MONTHS[re.match(r"[a-z]+", value).group()]
+                start = datetime(year, month, 1)
+                return start, datetime(year + month // 12, month % 12 + 1, 1)
+            else:
+                year = int(YEAR_PATTERN.search(value).group())
+                month = MONTHS[re.search(r"[a-z]{3,}", value.replace("st ", " ").replace("nd ", " ")
+                                         .replace("rd ", " ").replace("th ", " ")).group()]
+                day = int(DAY_PATTERN.search(value).group())
+            start = datetime(year, month, day)
+        except (ValueError, KeyError, AttributeError):
+            return None
+        return start, start + timedelta(days=1)
+
+    def _period_start(self, today: datetime, unit: str) -> datetime:
+        """
+        Get the start of the current calendar week, month or year.
+
+        Args:
+            today (datetime): Midnight of the current day
+            unit (str): "week", "month" or "year"
+
+        Returns:
+            datetime: The start of the period
+        """
+        if unit == "week":
+            return today - timedelta(days=today.weekday())
+        if unit == "month":
+            return today.replace(day=1)
+        return today.replace(month=1, day=1)
@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from collections import deque
 
 class QueryHistory:
@@ -12,15 +12,28 @@ class QueryHistory:
         self.max_history = max_history
         self.history = deque(maxlen=max_history)
 
-    def add(self, query: str, results: List[Dict[str, Any]]) -> None:
+    def add(self, query: str, results: List[Dict[str, Any]], parsed_query: Optional[Dict[str, Any]] = None,
+            translated_query: Optional[str] = None, query_language: Optional[str] = None,
+            parameters: Optional[Dict[str, Any]] = None) -> None:
         """
         Add a query and its results to the history.
 
         Args:
             query (str): The user's query
             results (List[Dict[str, Any]]): The search results for the query
+            parsed_query (Optional[Dict[str, Any]]): The parsed query, kept so that refinements need not parse again
+            translated_query (Optional[str]): The executed query, kept so that refinements can patch it
+            query_language (Optional[str]): The language of the translated query, "aql" or "graphql"
+            parameters (Optional[Dict[str, Any]]): The bind parameters the translated query was executed with
         """
-        self.history.append({"query": query, "results": results})
+        self.history.append({
+            "query": query,
+            "results": results,
+            "parsed_query": parsed_query,
+            "translated_query": translated_query,
+            "query_language": query_language,
+            "parameters": parameters or {}
+        })
 
     def get_recent_queries(self, n: int = 5) -> List[str]:
         """
@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+
+import copy
+import re
+import threading
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+from query_processing.nl_parser import SIZE_UNITS
+from query_processing.query_translator.translator_base import TranslatorBase
+from query_processing.query_translator.aql_parser import AQLOperation, AQLToken, parse_aql, tokenize_aql
+from query_processing.query_translator.graphql_parser import GraphQLField, GraphQLVariable, parse_graphql
+from query_processing.query_translator.rule_translator import aql_filter_conditions, graphql_filter_arguments
+from data_access.upi_schema import FILTER_FIELDS, OBJECTS_COLLECTION
+from utils.request_context import RequestContext
+
+# Facet names that map directly onto a filter key
+FACET_FILTERS = {
+    "extension": "extensions", "type": "extensions", "owner": "owner",
+    "path": "path_prefix", "folder": "path_prefix", "name": "name_pattern",
+}
+
+# Facet names that add a free-text term instead of a filter
+TERM_FACETS = ("keyword", "term", "topic")
+
+DATE_FACETS = ("created", "modified", "accessed")
+
+SIZE_PATTERN = re.compile(r"(\d+(?:\.\d+)?)\s*([a-z]*)", re.IGNORECASE)
+
+# Range filter pairs as (lower bound key, upper bound key, whether the upper bound is exclusive)
+RANGE_FILTERS = [("size_min", "size_max", False)] + [
+    (f"{field}_after", f"{field}_before", True) for field in DATE_FACETS
+]
+
+def parse_facet(facet: str) -> Tuple[Dict[str, Any], List[str]]:
+    """
+    Parse a "name:value" facet string into filters and terms.
+
+    Recognized facets are extension/type, owner, path/folder and name,
+    created/modified/accessed with a YYYY, YYYY-MM or YYYY-MM-DD value, size
+    with a ">10MB", "<1MB" or "1MB-10MB" value, any FILTER_FIELDS key with a
+    raw value, and keyword/term/topic, which add a free-text term.
+
+    Args:
+        facet (str): The facet selected by the user
+
+    Returns:
+        Tuple[Dict[str, Any], List[str]]: The filters and the terms the facet adds
+
+    Raises:
+        ValueError: If the facet is not understood
+    """
+    name, separator, value = facet.partition(":")
+    name, value = name.strip().lower(), value.strip()
+    if not separator or not value:
+        raise ValueError(f"Facet must have the form name:value: {facet}")
+
+    if name in TERM_FACETS:
+        return {}, [value.lower()]
+    if name in FACET_FILTERS:
+        key = FACET_FILTERS[name]
+        if key == "extensions":
+            return {key: [value.lower().lstrip(".")]}, []
+        return {key: value}, []
+    if name in DATE_FACETS:
+        start, end = _date_period(value)
+        return {f"{name}_after": start.isoformat(), f"{name}_before": end.isoformat()}, []
+    if name == "size":
+        return _size_range(value), []
+    if name in FILTER_FIELDS:
+        return {name: int(value) if name.startswith("size_") else value}, []
+    raise ValueError(f"Unknown facet: {facet}")
+
+def _date_period(value: str) -> Tuple[datetime, datetime]:
+    """
+    Convert a YYYY, YYYY-MM or YYYY-MM-DD facet value into a period.
+
+    Args:
+        value (str): The facet value
+
+    Returns:
+        Tuple[datetime, datetime]: Start and exclusive end of the period
+    """
+    parts = [int(part) for part in value.split("-")]
+    if len(parts) == 1:
+        return datetime(parts[0], 1, 1), datetime(parts[0] + 1, 1, 1)
+    if len(parts) == 2:
+        year, month = parts
+        return datetime(year, month, 1), datetime(year + month // 12, month % 12 + 1, 1)
+    start = datetime(*parts)
+    return start, datetime.fromordinal(start.toordinal() + 1)
+
+def _size_range(value: str) -> Dict[str, int]:
+    """
+    Convert a size facet value into size bounds.
+
+    Args:
+        value (str): ">10MB", "<1MB" or "1MB-10MB"
+
+    Returns:
+        Dict[str, int]: The size_min and/or size_max filters in bytes
+    """
+    def to_bytes(text: str) -> int:
+        match = SIZE_PATTERN.fullmatch(text.strip())
+        unit = match.group(2).lower() if match else ""
+        if match is None or (unit and unit not in SIZE_UNITS):
+            raise ValueError(f"Invalid size: {text}")
+        return int(float(match.group(1)) * SIZE_UNITS.get(unit, 1))
+
+    value = value.strip()
+    if value.startswith(">"):
+        return {"size_min": to_bytes(value.lstrip(">="))}
+    if value.startswith("<"):
+        return {"size_max": to_bytes(value.lstrip("<="))}
+    low, _, high = value.partition("-")
+    bounds = {"size_min": to_bytes(low)}
+    if high:
+        bounds["size_max"] = to_bytes(high)
+    return bounds
+
+def _intersect(previous: Dict[str, Any], filters: Dict[str, Any]) -> Tuple[Dict[str, Any], bool, bool]:
+    """
+    Intersect a facet's filters with the filters of the previous query.
+
+    Args:
+        previous (Dict[str, Any]): The previous query's filters
+        filters (Dict[str, Any]): The facet's filters
+
+    Returns:
+        Tuple[Dict[str, Any], bool, bool]: The filters that change, with their intersected values; whether the intersection is empty; and whether a filter had to be replaced because it cannot be intersected
+    """
+    narrowed = {}
+    empty = conflicts = False
+    for key, value in filters.items():
+        current = previous.get(key)
+        if current is None:
+            narrowed[key] = value
+            continue
+        if key == "extensions":
+            value = [extension for extension in current if extension in value]
+            empty = empty or not value
+        elif key == "path_prefix":
+            if str(current).startswith(str(value)):
+                value = current
+            elif not str(value).startswith(str(current)):
+                empty = True
+        elif key.endswith(("_min", "_after")):
+            value = max(current, value)
+        elif key.endswith(("_max", "_before")):
+            value = min(current, value)
+        elif key == "owner":
+            empty = empty or current != value
+        elif current != value:
+            conflicts = True
+        if value != current:
+            narrowed[key] = value
+
+    bounds = dict(previous, **narrowed)
+    for lower, upper, exclusive in RANGE_FILTERS:
+        if bounds.get(lower) is not None and bounds.get(upper) is not None:
+            empty = empty or bounds[lower] > bounds[upper] or (exclusive and bounds[lower] == bounds[upper])
+    return narrowed, empty, conflicts
+
+class QueryRefiner:
+    """
+    Applies a selected facet to the previous query as a delta filter.
+
+    The previous parsed query and its translation are taken from the query
+    history. A facet's filters are intersected with the previous ones: the
+    tighter bound of a size or date range, the common extensions, and the
+    longer of two nested path prefixes, so a drill-down never widens the
+    result set. The translated AQL or GraphQL is then patched in place (an
+    extra FILTER after the file loop, or a narrowed FileFilter field), so a
+    drill-down costs no translation at all. When the intersection is empty
+    there is nothing to execute and no query is returned. Facets that add
+    free text or replace a name pattern go back through the translator with
+    the merged parsed query.
+
+    Parameterized queries stay parameterized: AQL patches bind their values
+    as new bind parameters, and a GraphQL FileFilter passed as a variable is
+    narrowed in the variable's value, leaving the query text unchanged.
+    """
+
+    def __init__(self, translators: Dict[str, TranslatorBase]):
+        """
+        Initialize the query refiner.
+
+        Args:
+            translators (Dict[str, TranslatorBase]): Translator for each query language, used to validate patches and for re-translation
+        """
+        self.translators = translators
+        self.stats = {"patched": 0, "retranslated": 0, "empty": 0}
+        self._lock = threading.Lock()
+
+    def refine(self, entry: Dict[str, Any], facet: str, llm_connector: Any,
+               context: Optional[RequestContext] = None) -> Tuple[Dict[str, Any], Optional[str], Dict[str, Any]]:
+        """
+        Refine a previous query with a facet.
+
+        Args:
+            entry (Dict[str, Any]): The history entry of the previous query, with its parsed and translated query, parameters and language
+            facet (str): The facet selected by the user
+            llm_connector (Any): Connector to the LLM service, used only if the query has to be re-translated
+            context (Optional[RequestContext]): The request's deadline and cancellation state
+
+        Returns:
+            Tuple[Dict[str, Any], Optional[str], Dict[str, Any]]: The refined parsed query, its translation and its bind parameters; the translation is None if the refined query matches nothing
+        """
+        previous = entry["parsed_query"]
+        language = entry["query_language"]
+        filters, terms = parse_facet(facet)
+
+        refined = copy.deepcopy(previous)
+        refined["original_query"] = f"{previous.get('original_query', '')} [{facet}]"
+        merged = refined.setdefault("filters", {})
+        narrowed, empty, conflicts = _intersect(merged, filters)
+        merged.update(narrowed)
+        if terms:
+            refined["terms"] = list(refined.get("terms") or []) + terms
+
+        if empty:
+            self._count("empty")
+            return refined, None, {}
+        if not narrowed and not terms and entry.get("translated_query"):
+            # The facet adds nothing the previous query did not already require
+            self._count("patched")
+            return refined, entry["translated_query"], copy.deepcopy(entry.get("parameters") or {})
+        if not terms and not conflicts and entry.get("translated_query"):
+            patched = self._patch(language, entry["translated_query"], entry.get("parameters") or {}, narrowed)
+            if patched is not None:
+                self._count("patched")
+                return (refined,) + patched
+
+        self._count("retranslated")
+        return (refined,) + self.translators[language].translate_parameterized(refined, llm_connector, context)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get the refinement counters.
+
+        Returns:
+            Dict[str, Any]: The number of patched and re-translated refinements and the patch ratio
+        """
+        with self._lock:
+            stats = dict(self.stats)
+        total = stats["patched"] + stats["retranslated"]
+        stats["patch_ratio"] = stats["patched"] / total if total else 0.0
+        return stats
+
+    def _patch(self, language: str, query: str, parameters: Dict[str, Any],
+               filters: Dict[str, Any]) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """
+        Add filters to a translated query without re-translating it.
+
+        Args:
+            language (str): "aql" or "graphql"
+            query (str): The previous translated query
+            parameters (Dict[str, Any]): The previous query's bind parameters
+            filters (Dict[str, Any]): The filters to add
+
+        Returns:
+            Optional[Tuple[str, Dict[str, Any]]]: The patched query and its bind parameters, or None if the query has no recognizable file loop or selection
+        """
+        parameters = copy.deepcopy(parameters)
+        try:
+            if language == "aql":
+                patched = self._patch_aql(query, filters, parameters)
+            else:
+                patched = self._patch_graphql(query, filters, parameters)
+        except ValueError:
+            return None
+        if patched is None or not self.translators[language].validate_query(patched):
+            return None
+        return patched, parameters
+
+    def _patch_aql(self, query: str, filters: Dict[str, Any], bind_vars: Dict[str, Any]) -> Optional[str]:
+        """
+        Insert FILTER operations right after the loop over the file collection.
+
+        When the query already uses bind parameters, the new filter values are
+        added to bind_vars rather than inlined, so the patched text is the same
+        for every value of the facet.
+
+        Args:
+            query (str): The previous AQL query
+            filters (Dict[str, Any]): The filters to add
+            bind_vars (Dict[str, Any]): The query's bind parameters, updated in place
+
+        Returns:
+            Optional[str]: The patched AQL, or None if there is no loop over the file collection
+        """
+        parsed = parse_aql(query)
+        for index, operation in enumerate(parsed.operations):
+            tokens = operation.tokens
+            if (
+                operation.keyword == "FOR" and len(tokens) == 3 and tokens[0].kind == "name"
+                and tokens[1] == AQLToken("keyword", "IN") and tokens[2].value == OBJECTS_COLLECTION
+            ):
+                additions = [
+                    AQLOperation("FILTER", tokenize_aql(condition))
+                    for condition in aql_filter_conditions(filters, tokens[0].value, bind_vars if bind_vars else None)
+                ]
+                parsed.operations[index + 1:index + 1] = additions
+                return parsed.to_aql()
+        return None
+
+    def _patch_graphql(self, query: str, filters: Dict[str, Any], variables: Dict[str, Any]) -> Optional[str]:
+        """
+        Merge filters into the FileFilter argument of the files selection.
+
+        Args:
+            query (str): The previous GraphQL query
+            filters (Dict[str, Any]): The filters to add
+            variables (Dict[str, Any]): The query's variables, updated in place when the filter is a variable
+
+        Returns:
+            Optional[str]: The patched GraphQL, or None if there is no files selection with a literal or variable filter
+        """
+        document = parse_graphql(query)
+        for operation in document.operations:
+            for selection in operation.selections:
+                if not isinstance(selection, GraphQLField) or selection.name != "files":
+                    continue
+                current = selection.arguments.get("filter", {})
+                variable = None
+                if isinstance(current, GraphQLVariable):
+                    variable = current.name
+                    if not isinstance(variables.get(variable), dict):
+                        return None
+                    current = variables[variable]
+                elif not isinstance(current, dict):
+                    return None
+                for name, value in graphql_filter_arguments(filters).items():
+                    if isinstance(current.get(name), list) and isinstance(value, list):
+                        value = [item for item in current[name] if item in value] or value
+                    current[name] = value
+                if variable is not None:
+                    return query
+                selection.arguments["filter"] = current
+                return document.to_graphql()
+        return None
+
+    def _count(self, counter: str) -> None:
+        """
+        Increment a counter.
+
+        Args:
+            counter (str): The name of the counter to increment
+        """
+        with self._lock:
+            self.stats[counter] += 1
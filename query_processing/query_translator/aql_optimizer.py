@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+
+from typing import List, Optional
+from .aql_parser import (
+    AQLOperation, AQLQuery, AQLToken, COMPARISON_OPERATORS, parse_aql, matching_bracket
+)
+
+class AQLOptimizer:
+    """
+    Rewrite-based optimizer for LLM-generated AQL.
+
+    The optimizer parses a query and applies a fixed sequence of passes:
+
+    1. Split conjunctive FILTERs and rewrite predicates into forms that a
+       persistent index can serve (attribute on the left, single-element
+       IN as equality). Prefix LIKEs are left alone: the server compares
+       strings in its ICU collation, so a range bound computed from code
+       points would not select the same documents.
+    2. Push FILTERs above SORTs and above LETs they do not depend on.
+    3. Hoist LET subqueries that do not depend on the loop out of it.
+    4. Insert a LIMIT derived from the display page size if there is none.
+    """
+
+    _FLIPPED = {"==": "==", "!=": "!=", "<": ">", "<=": ">=", ">": "<", ">=": "<="}
+
+    def __init__(self, page_size: Optional[int] = 20):
+        """
+        Initialize the optimizer.
+
+        Args:
+            page_size (Optional[int]): The number of results displayed per page, used as the inserted LIMIT; None to never insert one
+        """
+        self.page_size = page_size
+
+    def optimize(self, query: str) -> str:
+        """
+        Optimize an AQL query.
+
+        Args:
+            query (str): The AQL query
+
+        Returns:
+            str: The optimized AQL query
+        """
+        parsed = parse_aql(query)
+        self.rewrite_predicates(parsed)
+        self.push_filters_up(parsed)
+        self.hoist_constant_subqueries(parsed)
+        if self.page_size is not None:
+            self.insert_limit(parsed, self.page_size)
+        return parsed.to_aql()
+
+    def rewrite_predicates(self, query: AQLQuery) -> None:
+        """
+        Split conjunctive FILTERs and rewrite their predicates for index use.
+
+        Args:
+            query (AQLQuery): The query to rewrite in place
+        """
+        operations = []
+        for operation in query.operations:
+            if operation.subquery is not None:
+                self.rewrite_predicates(operation.subquery)
+            if operation.keyword != "FILTER":
+                operations.append(operation)
+                continue
+            for conjunct in self._split_conjunction(operation.tokens):
+                for predicate in self._rewrite_predicate(conjunct):
+                    operations.append(AQLOperation("FILTER", predicate))
+        query.operations = operations
+
+    def push_filters_up(self, query: AQLQuery) -> None:
+        """
+        Move each FILTER above preceding SORTs and above LETs it does not reference.
+
+        Filtering earlier shrinks the rows a SORT has to order and skips
+        evaluating LET expressions for rows that are discarded anyway.
+
+        Args:
+            query (AQLQuery): The query to rewrite in place
+        """
+        operations = query.operations
+        for index in range(len(operations)):
+            operation = operations[index]
+            if operation.subquery is not None:
+                self.push_filters_up(operation.subquery)
+            if operation.keyword != "FILTER":
+                continue
+            references = operation.referenced_names()
+            position = index
+            while position > 0:
+                previous = operations[position - 1]
+                if previous.keyword == "SORT":
+                    pass
+                elif previous.keyword == "LET" and previous.variable not in references:
+                    pass
+                else:
+                    break
+                operations[position] = previous
+                position -= 1
+            operations[position] = operation
+
+    def hoist_constant_subqueries(self, query: AQLQuery) -> None:
+        """
+        Move LET subqueries that do not depend on loop variables before the first FOR.
+
+        Such a subquery yields the same value on every iteration, so it only
+        needs to be evaluated once.
+
+        Args:
+            query (AQLQuery): The query to rewrite in place
+        """
+        operations = query.operations
+        first_loop = next((i for i, op in enumerate(operations) if op.keyword == "FOR"), None)
+        if first_loop is None:
+            return
+
+        bound = set()
+        hoisted = []
+        remaining = []
+        for operation in operations[first_loop:]:
+            if operation.subquery is not None:
+                self.hoist_constant_subqueries(operation.subquery)
+                if not operation.referenced_names() & bound:
+                    hoisted.append(operation)
+                    continue
+            bound |= operation.defined_variables()
+            remaining.append(operation)
+        query.operations = operations[:first_loop] + hoisted + remaining
+
+    def insert_limit(self, query: AQLQuery, limit: int) -> None:
+        """
+        Insert a LIMIT before the final RETURN if the outermost loop has none.
+
+        Args:
+            query (AQLQuery): The query to rewrite in place
+            limit (int): The number of rows to return
+        """
+        operations = query.operations
+        loops = [i for i, op in enumerate(operations) if op.keyword == "FOR"]
+        if not loops or operations[-1].keyword != "RETURN":
+            return
+        if any(op.keyword == "LIMIT" for op in operations[loops[-1]:]):
+            return
+        operations.insert(len(operations) - 1, AQLOperation("LIMIT", [AQLToken("number", str(limit))]))
+
+    def _split_conjunction(self, tokens: List[AQLToken]) -> List[List[AQLToken]]:
+        """
+        Split a condition at its top-level AND operators.
+
+        The condition is left whole if it contains a top-level OR or ternary,
+        since AND binds tighter than both.
+
+        Args:
+            tokens (List[AQLToken]): The tokens of the condition
+
+        Returns:
+            List[List[AQLToken]]: The conjuncts
+        """
+        tokens = self._strip_parentheses(tokens)
+        conjuncts = [[]]
+        depth = 0
+        for token in tokens:
+            if token.kind == "op" and token.value in ("(", "[", "{"):
+                depth += 1
+            elif token.kind == "op" and token.value in (")", "]", "}"):
+                depth -= 1
+            elif depth == 0:
+                if token.value in ("OR", "||", "?"):
+                    return [tokens]
+                if token.value in ("AND", "&&"):
+                    conjuncts.append([])
+                    continue
+            conjuncts[-1].append(token)
+        if any(not conjunct for conjunct in conjuncts):
+            return [tokens]
+        return [self._strip_parentheses(conjunct) for conjunct in conjuncts]
+
+    def _strip_parentheses(self, tokens: List[AQLToken]) -> List[AQLToken]:
+        """
+        Remove parentheses that enclose a whole expression.
+
+        Args:
+            tokens (List[AQLToken]): The tokens of the expression
+
+        Returns:
+            List[AQLToken]: The tokens without redundant outer parentheses
+        """
+        while (
+            len(tokens) > 2
+            and tokens[0] == AQLToken("op", "(")
+            and not (tokens[1].kind == "keyword" and tokens[1].value in ("FOR", "LET", "RETURN"))
+            and matching_bracket(tokens, 0) == len(tokens) - 1
+        ):
+            tokens = tokens[1:-1]
+        return tokens
+
+    def _rewrite_predicate(self, tokens: List[AQLToken]) -> List[List[AQLToken]]:
+        """
+        Rewrite a single predicate into one or more index-friendly predicates.
+
+        Args:
+            tokens (List[AQLToken]): The tokens of the predicate
+
+        Returns:
+            List[List[AQLToken]]: The rewritten predicates, to be combined with AND
+        """
+        # literal == doc.attribute  ->  doc.attribute == literal
+        if (
+            len(tokens) >= 3
+            and self._is_literal(tokens[:1])
+            and tokens[1].kind == "op" and tokens[1].value in COMPARISON_OPERATORS
+            and self._is_attribute_path(tokens[2:])
+        ):
+            return [tokens[2:] + [AQLToken("op", self._FLIPPED[tokens[1].value]), tokens[0]]]
+
+        # doc.attribute IN [literal]  ->  doc.attribute == literal
+        if (
+            len(tokens) >= 5
+            and tokens[-4] == AQLToken("keyword", "IN")
+            and tokens[-3] == AQLToken("op", "[")
+            and tokens[-1] == AQLToken("op", "]")
+            and self._is_literal(tokens[-2:-1])
+            and self._is_attribute_path(tokens[:-4])
+        ):
+            return [tokens[:-4] + [AQLToken("op", "=="), tokens[-2]]]
+
+        return [tokens]
+
+    def _is_literal(self, tokens: List[AQLToken]) -> bool:
+        """
+        Check whether tokens form a single literal value or bind parameter.
+
+        Args:
+            tokens (List[AQLToken]): The tokens to check
+
+        Returns:
+            bool: True for a string, number, bind parameter, null or boolean
+        """
+        if len(tokens) != 1:
+            return False
+        token = tokens[0]
+        return token.kind in ("string", "number") or (token.kind == "bind" and not token.value.startswith("@@")) \
+            or (token.kind == "keyword" and token.value in ("NULL", "TRUE", "FALSE"))
+
+    def _is_attribute_path(self, tokens: List[AQLToken]) -> bool:
+        """
+        Check whether tokens form an attribute access such as doc.meta.size.
+
+        Args:
+            tokens (List[AQLToken]): The tokens to check
+
+        Returns:
+            bool: True if the tokens are a variable followed by one or more .name accesses
+        """
+        if len(tokens) < 3 or len(tokens) % 2 == 0 or tokens[0].kind != "name":
+            return False
+        for index in range(1, len(tokens), 2):
+            if tokens[index] != AQLToken("op", ".") or tokens[index + 1].kind not in ("name", "keyword"):
+                return False
+        return True
@@ -0,0 +1,442 @@
+#!/usr/bin/env python3
+
+import re
+from collections import namedtuple
+from typing import List, Optional, Set
+
+class AQLSyntaxError(ValueError):
+    """
+    Raised when an AQL query cannot be tokenized or parsed.
+    """
+    pass
+
+# A lexical token: kind is one of "keyword", "name", "number", "string", "bind" or "op"
+AQLToken = namedtuple("AQLToken", ["kind", "value"])
+
+KEYWORDS = frozenset((
+    "FOR", "RETURN", "FILTER", "SEARCH", "SORT", "LIMIT", "LET", "COLLECT", "WINDOW",
+    "INSERT", "UPDATE", "REPLACE", "REMOVE", "UPSERT", "WITH", "AGGREGATE", "INTO", "KEEP",
+    "COUNT", "OPTIONS", "PRUNE", "IN", "NOT", "LIKE", "AND", "OR", "ASC", "DESC", "DISTINCT",
+    "NULL", "TRUE", "FALSE", "GRAPH", "OUTBOUND", "INBOUND", "ANY", "ALL", "NONE", "AT", "LEAST",
+    "SHORTEST_PATH", "K_SHORTEST_PATHS", "K_PATHS", "ALL_SHORTEST_PATHS",
+))
+
+# Keywords that start a new operation when they appear outside of brackets
+OPERATION_KEYWORDS = frozenset((
+    "FOR", "RETURN", "FILTER", "SEARCH", "SORT", "LIMIT", "LET", "COLLECT", "WINDOW",
+    "INSERT", "UPDATE", "REPLACE", "REMOVE", "UPSERT", "WITH",
+))
+
+# Operations that modify data; the search tool only runs read-only queries
+MODIFICATION_KEYWORDS = frozenset(("INSERT", "UPDATE", "REPLACE", "REMOVE", "UPSERT"))
+
+COMPARISON_OPERATORS = frozenset(("==", "!=", "<", "<=", ">", ">="))
+
+_TOKEN_PATTERN = re.compile(r"""
+    (?P<space>\s+|//[^\n]*|/\*.*?\*/)
+  | (?P<string>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')
+  | (?P<number>\d+(?:\.\d+)?(?:[eE][+-]?\d+)?)
+  | (?P<bind>@@?[A-Za-z_][A-Za-z0-9_]*)
+  | (?P<name>`[^`]+`|[A-Za-z_][A-Za-z0-9_]*)
+  | (?P<op>==|!=|<=|>=|=~|!~|&&|\|\||\.\.|::|[<>=!+\-*/%?:.,()\[\]{}])
+""", re.VERBOSE | re.DOTALL)
+
+_CLOSING = {"(": ")", "[": "]", "{": "}"}
+
+def tokenize_aql(query: str) -> List[AQLToken]:
+    """
+    Split an AQL query into tokens, dropping whitespace and comments.
+
+    Args:
+        query (str): The AQL query
+
+    Returns:
+        List[AQLToken]: The tokens; keywords are upper-cased, except where they are attribute names
+    """
+    tokens = []
+    position = 0
+    while position < len(query):
+        match = _TOKEN_PATTERN.match(query, position)
+        if match is None:
+            raise AQLSyntaxError(f"Unexpected character {query[position]!r} at offset {position}")
+        position = match.end()
+        kind = match.lastgroup
+        if kind == "space":
+            continue
+        tokens.append(AQLToken(kind, match.group(kind)))
+
+    # Attribute names are case-sensitive, so a keyword-like name after "." or as an object key stays a name
+    brackets = []
+    for index, token in enumerate(tokens):
+        if token.kind == "op":
+            if token.value in _CLOSING:
+                brackets.append(token.value)
+            elif token.value in (")", "]", "}") and brackets:
+                brackets.pop()
+            continue
+        if token.kind != "name" or token.value.upper() not in KEYWORDS:
+            continue
+        previous = tokens[index - 1] if index > 0 else None
+        following = tokens[index + 1] if index + 1 < len(tokens) else None
+        if previous == AQLToken("op", "."):
+            continue
+        if (brackets and brackets[-1] == "{" and previous in (AQLToken("op", "{"), AQLToken("op", ","))
+                and following == AQLToken("op", ":")):
+            continue
+        tokens[index] = AQLToken("keyword", token.value.upper())
+    return tokens
+
+def render_tokens(tokens: List[AQLToken]) -> str:
+    """
+    Turn a token list back into AQL text.
+
+    Args:
+        tokens (List[AQLToken]): The tokens
+
+    Returns:
+        str: The AQL text
+    """
+    parts = []
+    previous = None
+    for token in tokens:
+        if previous is not None:
+            tight = (
+                token.value in (".", ",", ")", "]", "::")
+                or previous.value in (".", "(", "[", "::")
+                or (token.value == "(" and previous.kind in ("name", "keyword") and previous.value not in ("IN", "AND", "OR", "NOT", "RETURN", "FILTER", "SORT", "LIMIT"))
+            )
+            if not tight:
+                parts.append(" ")
+        parts.append(token.value)
+        previous = token
+    return "".join(parts)
+
+def matching_bracket(tokens: List[AQLToken], start: int) -> int:
+    """
+    Find the index of the bracket closing the one at start.
+
+    Args:
+        tokens (List[AQLToken]): The tokens
+        start (int): The index of an opening bracket
+
+    Returns:
+        int: The index of the matching closing bracket
+    """
+    stack = []
+    for index in range(start, len(tokens)):
+        value = tokens[index].value if tokens[index].kind == "op" else None
+        if value in _CLOSING:
+            stack.append(_CLOSING[value])
+        elif value in (")", "]", "}"):
+            if not stack or stack.pop() != value:
+                raise AQLSyntaxError(f"Unbalanced {value!r}")
+            if not stack:
+                return index
+    raise AQLSyntaxError("Unclosed bracket")
+
+def _is_subquery_start(tokens: List[AQLToken], index: int) -> bool:
+    """
+    Check whether the token at index opens a parenthesized subquery.
+
+    Args:
+        tokens (List[AQLToken]): The tokens
+        index (int): The index to check
+
+    Returns:
+        bool: True if the token is "(" followed by an operation keyword
+    """
+    return (
+        tokens[index] == AQLToken("op", "(")
+        and index + 1 < len(tokens)
+        and tokens[index + 1].kind == "keyword"
+        and tokens[index + 1].value in OPERATION_KEYWORDS
+    )
+
+class AQLOperation:
+    """
+    A single top-level operation of an AQL query, e.g. a FOR, FILTER or RETURN.
+
+    The operation keeps the tokens following its keyword. LET operations whose
+    value is a parenthesized subquery additionally hold the parsed subquery.
+    """
+
+    def __init__(self, keyword: str, tokens: List[AQLToken], subquery: Optional["AQLQuery"] = None):
+        """
+        Initialize the operation.
+
+        Args:
+            keyword (str): The operation keyword
+            tokens (List[AQLToken]): The tokens following the keyword
+            subquery (Optional[AQLQuery]): The parsed subquery of a LET operation, if any
+        """
+        self.keyword = keyword
+        self.tokens = tokens
+        self.subquery = subquery
+
+    @property
+    def variable(self) -> Optional[str]:
+        """
+        Get the variable assigned by a LET operation.
+
+        Returns:
+            Optional[str]: The variable name, or None for other operations
+        """
+        if self.keyword == "LET" and self.tokens:
+            return self.tokens[0].value
+        return None
+
+    def defined_variables(self) -> Set[str]:
+        """
+        Get the variables this operation introduces.
+
+        Returns:
+            Set[str]: The variable names
+        """
+        if self.keyword == "FOR":
+            names = set()
+            for token in self.tokens:
+                if token == AQLToken("keyword", "IN"):
+                    break
+                if token.kind == "name":
+                    names.add(token.value)
+            return names
+        if self.keyword == "LET":
+            return {self.variable}
+        if self.keyword in ("COLLECT", "WINDOW"):
+            names = set()
+            depth = 0
+            for index, token in enumerate(self.tokens):
+                if token.kind == "op" and token.value in _CLOSING:
+                    depth += 1
+                elif token.kind == "op" and token.value in (")", "]", "}"):
+                    depth -= 1
+                elif depth == 0 and token.kind == "name":
+                    following = self.tokens[index + 1] if index + 1 < len(self.tokens) else None
+                    preceding = self.tokens[index - 1] if index else None
+                    if following == AQLToken("op", "=") or preceding == AQLToken("keyword", "INTO"):
+                        names.add(token.value)
+            return names
+        return set()
+
+    def referenced_names(self) -> Set[str]:
+        """
+        Get the names this operation may refer to as variables.
+
+        The result over-approximates the real set (it also contains object
+        keys, for instance), which keeps rewrites relying on it safe.
+
+        Returns:
+            Set[str]: The referenced names, excluding those the operation defines itself
+        """
+        if self.subquery is not None:
+            return self.subquery.free_variables()
+
+        names = set()
+        for index, token in enumerate(self.tokens):
+            if token.kind != "name":
+                continue
+            preceding = self.tokens[index - 1] if index else None
+            following = self.tokens[index + 1] if index + 1 < len(self.tokens) else None
+            if preceding is not None and preceding.value in (".", "::"):
+                continue
+            if following is not None and following.value in ("(", "::"):
+                continue
+            names.add(token.value)
+        for start in range(len(self.tokens)):
+            if _is_subquery_start(self.tokens, start):
+                end = matching_bracket(self.tokens, start)
+                names |= parse_aql_tokens(self.tokens[start + 1:end]).free_variables()
+        if self.keyword == "LET":
+            names.discard(self.variable)
+        return names
+
+    def to_aql(self) -> str:
+        """
+        Render the operation as AQL text.
+
+        Returns:
+            str: The AQL text of the operation
+        """
+        if self.subquery is not None:
+            body = "\n".join("  " + line for line in self.subquery.to_aql().splitlines())
+            return f"LET {self.variable} = (\n{body}\n)"
+        if not self.tokens:
+            return self.keyword
+        return f"{self.keyword} {render_tokens(self.tokens)}"
+
+class AQLQuery:
+    """
+    A parsed AQL query: the ordered list of its top-level operations.
+    """
+
+    def __init__(self, operations: List[AQLOperation]):
+        """
+        Initialize the query.
+
+        Args:
+            operations (List[AQLOperation]): The operations in query order
+        """
+        self.operations = operations
+
+    def is_read_only(self) -> bool:
+        """
+        Check that neither the query nor its subqueries modify data.
+
+        Returns:
+            bool: True if the query only reads data
+        """
+        for operation in self.operations:
+            if operation.keyword in MODIFICATION_KEYWORDS:
+                return False
+            if operation.subquery is not None and not operation.subquery.is_read_only():
+                return False
+        return True
+
+    def free_variables(self) -> Set[str]:
+        """
+        Get the names the query refers to without defining them itself.
+
+        Returns:
+            Set[str]: The free variable names
+        """
+        defined = set()
+        free = set()
+        for operation in self.operations:
+            free |= operation.referenced_names() - defined
+            defined |= operation.defined_variables()
+        return free
+
+    def to_aql(self) -> str:
+        """
+        Render the query as AQL text, one operation per line.
+
+        Returns:
+            str: The AQL text of the query
+        """
+        return "\n".join(operation.to_aql() for operation in self.operations)
+
+def parse_aql_tokens(tokens: List[AQLToken]) -> AQLQuery:
+    """
+    Parse a token list into an AQLQuery.
+
+    Args:
+        tokens (List[AQLToken]): The tokens of a complete query or subquery
+
+    Returns:
+        AQLQuery: The parsed query
+    """
+    if not tokens:
+        raise AQLSyntaxError("Empty query")
+
+    # Split the tokens at operation keywords that are not nested in brackets
+    groups = []
+    depth = 0
+    for index, token in enumerate(tokens):
+        if token.kind == "op" and token.value in _CLOSING:
+            depth += 1
+        elif token.kind == "op" and token.value in (")", "]", "}"):
+            depth -= 1
+            if depth < 0:
+                raise AQLSyntaxError(f"Unbalanced {token.value!r}")
+        elif depth == 0 and token.kind == "keyword" and token.value in OPERATION_KEYWORDS:
+            # WITH also appears inside COLLECT ... WITH COUNT and UPDATE ... WITH
+            if token.value != "WITH" or index == 0:
+                groups.append([token.value, []])
+                continue
+        if not groups:
+            raise AQLSyntaxError(f"Query must start with an operation, found {token.value!r}")
+        groups[-1][1].append(token)
+    if depth != 0:
+        raise AQLSyntaxError("Unclosed bracket")
+
+    operations = [_parse_operation(keyword, body) for keyword, body in groups]
+    _check_structure(operations)
+    return AQLQuery(operations)
+
+def _parse_operation(keyword: str, body: List[AQLToken]) -> AQLOperation:
+    """
+    Parse and check the tokens of a single operation.
+
+    Args:
+        keyword (str): The operation keyword
+        body (List[AQLToken]): The tokens following the keyword
+
+    Returns:
+        AQLOperation: The parsed operation
+    """
+    if not body and keyword != "RETURN":
+        raise AQLSyntaxError(f"{keyword} without an expression")
+    if keyword == "RETURN" and (not body or body == [AQLToken("keyword", "DISTINCT")]):
+        raise AQLSyntaxError("RETURN without an expression")
+
+    if body and body[-1].kind == "op" and body[-1].value not in (")", "]", "}"):
+        raise AQLSyntaxError(f"{keyword} expression ends with {body[-1].value!r}")
+
+    if keyword == "FOR":
+        if AQLToken("keyword", "IN") not in body or body[0].kind != "name":
+            raise AQLSyntaxError("FOR must have the form FOR variable IN expression")
+        if body.index(AQLToken("keyword", "IN")) == len(body) - 1:
+            raise AQLSyntaxError("FOR without a source expression")
+
+    if keyword == "LET":
+        if len(body) < 3 or body[0].kind != "name" or body[1] != AQLToken("op", "="):
+            raise AQLSyntaxError("LET must have the form LET variable = expression")
+        if _is_subquery_start(body, 2) and matching_bracket(body, 2) == len(body) - 1:
+            return AQLOperation(keyword, body, parse_aql_tokens(body[3:-1]))
+
+    if keyword == "LIMIT":
+        values = [token for token in body if token.value != ","]
+        if not 1 <= len(values) <= 2 or len(body) != 2 * len(values) - 1:
+            raise AQLSyntaxError("LIMIT must have the form LIMIT [offset,] count")
+        if any(token.kind not in ("number", "bind") for token in values):
+            raise AQLSyntaxError("LIMIT values must be numbers or bind parameters")
+
+    # Parse nested subqueries so that their syntax is checked as well
+    for start in range(len(body)):
+        if _is_subquery_start(body, start):
+            parse_aql_tokens(body[start + 1:matching_bracket(body, start)])
+
+    return AQLOperation(keyword, body)
+
+def _check_structure(operations: List[AQLOperation]) -> None:
+    """
+    Check the order of the operations of a query.
+
+    Args:
+        operations (List[AQLOperation]): The operations of the query
+    """
+    final = operations[-1].keyword
+    if final != "RETURN" and final not in MODIFICATION_KEYWORDS:
+        raise AQLSyntaxError("Query must end with RETURN or a data-modification operation")
+    for operation in operations[:-1]:
+        if operation.keyword == "RETURN":
+            raise AQLSyntaxError("RETURN must be the last operation of a query")
+
+def parse_aql(query: str) -> AQLQuery:
+    """
+    Parse an AQL query.
+
+    Args:
+        query (str): The AQL query
+
+    Returns:
+        AQLQuery: The parsed query
+    """
+    return parse_aql_tokens(tokenize_aql(query))
+
+def is_valid_aql(query: str, read_only: bool = True) -> bool:
+    """
+    Check whether a query is syntactically valid AQL.
+
+    Args:
+        query (str): The AQL query
+        read_only (bool): Also reject queries that modify data
+
+    Returns:
+        bool: True if the query is valid, False otherwise
+    """
+    try:
+        parsed = parse_aql(query)
+    except AQLSyntaxError:
+        return False
+    return parsed.is_read_only() or not read_only
@@ -1,13 +1,32 @@
 #!/usr/bin/env python3
 
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Tuple
 from .translator_base import TranslatorBase
+from .prompt_builder import PromptBuilder
+from .aql_parser import is_valid_aql
+from .aql_optimizer import AQLOptimizer
+from utils.request_context import RequestContext
 
 class AQLTranslator(TranslatorBase):
     """
     Translator for converting parsed queries to AQL (ArangoDB Query Language).
     """
 
+    query_language = "aql"
+
+    def __init__(self, page_size: Optional[int] = 20,
+                 prompt_builder: Optional[PromptBuilder] = None):
+        """
+        Initialize the AQL translator.
+
+        Args:
+            page_size (Optional[int]): The number of results displayed per page, used to bound queries without a LIMIT
+            prompt_builder (Optional[PromptBuilder]): Builder of the translation prompts, or None for the default token budget
+        """
+        super().__init__()
+        self.optimizer = AQLOptimizer(page_size)
+        self.prompt_builder = prompt_builder or PromptBuilder("aql")
+
     def translate(self, parsed_query: Dict[str, Any], llm_connector: Any) -> str:
         """
         Translate a parsed query into an AQL query.
@@ -19,13 +38,37 @@ class AQLTranslator(TranslatorBase):
         Returns:
             str: The translated AQL query
         """
+        query, parameters = self.translate_parameterized(parsed_query, llm_connector)
+        return self._fill_template(query, parameters)
+
+    def translate_parameterized(self, parsed_query: Dict[str, Any], llm_connector: Any,
+                                context: Optional[RequestContext] = None) -> Tuple[str, Dict[str, Any]]:
+        """
+        Translate a parsed query into AQL text plus bind parameters.
+
+        Args:
+            parsed_query (Dict[str, Any]): The parsed query from NLParser
+            llm_connector (Any): Connector to the LLM service
+            context (Optional[RequestContext]): The request's deadline and cancellation state
+
+        Returns:
+            Tuple[str, Dict[str, Any]]: The AQL query and its bind parameters
+        """
+        # Serve queries whose shape has been seen before from the learned template
+        shape, parameters = self._lift_parameters(parsed_query)
+        template = self._lookup_template(shape)
+        if template is not None:
+            return self._bind_template(template, parameters)
+
         # Use the LLM to help generate the AQL query
-        prompt = self._create_translation_prompt(parsed_query)
-        aql_query = llm_connector.generate_query(prompt)
+        prompt = self._create_translation_prompt(parsed_query, parameters)
+        aql_query = self._generate_query(llm_connector, prompt, context)
 
         # Validate and optimize the generated query
         if self.validate_query(aql_query):
-            return self.optimize_query(aql_query)
+            aql_query = self.optimize_query(aql_query)
+            self._learn_template(shape, aql_query, parameters)
+            return self._bind_template(aql_query, parameters)
         else:
             raise ValueError("Generated AQL query is invalid")
 
@@ -39,9 +82,7 @@ class AQLTranslator(TranslatorBase):
         Returns:
             bool: True if the query is valid, False otherwise
         """
-        # Implement AQL validation logic
-        # This is a placeholder implementation
-        return "FOR" in query and "RETURN" in query
+        return is_valid_aql(query)
 
     def optimize_query(self, query: str) -> str:
         """
@@ -53,19 +94,18 @@ class AQLTranslator(TranslatorBase):
         Returns:
             str: The optimized AQL query
         """
-        # Implement query optimization logic
-        # This is a placeholder implementation
-        return query.strip()
+        return self.optimizer.optimize(query)
 
-    def _create_translation_prompt(self, parsed_query: Dict[str, Any]) -> str:
+    def _create_translation_prompt(self, parsed_query: Dict[str, Any],
+                                   parameters: Optional[Dict[str, Any]] = None) -> str:
         """
         Create a prompt for the LLM to generate an AQL query.
 
         Args:
             parsed_query (Dict[str, Any]): The parsed query
+            parameters (Optional[Dict[str, Any]]): Lifted literal values the query should refer to by name
 
         Returns:
             str: The prompt for the LLM
         """
-        # Implement prompt creation logic
-        return f"Translate the following parsed query into an AQL query: {parsed_query}"
+        return self.prompt_builder.build(parsed_query, parameters)
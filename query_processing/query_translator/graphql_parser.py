@@ -0,0 +1,564 @@
+#!/usr/bin/env python3
+
+import json
+import re
+from collections import namedtuple
+from typing import Dict, Any, List, Optional, Tuple
+
+class GraphQLSyntaxError(ValueError):
+    """
+    Raised when a GraphQL document cannot be tokenized or parsed.
+    """
+    pass
+
+# A lexical token: kind is one of "name", "int", "float", "string", "punct" or "eof"
+GraphQLToken = namedtuple("GraphQLToken", ["kind", "value"])
+
+# A reference to an operation variable inside a value
+GraphQLVariable = namedtuple("GraphQLVariable", ["name"])
+
+# An enum value inside a value (an unquoted name other than true, false and null)
+GraphQLEnum = namedtuple("GraphQLEnum", ["name"])
+
+_TOKEN_PATTERN = re.compile(r'''
+    (?P<ignored>[\s,\ufeff]+|\#[^\n\r]*)
+  | (?P<block>"""(?:[^"\\]|\\.|"(?!""))*""")
+  | (?P<string>"(?:[^"\\\n]|\\.)*")
+  | (?P<float>-?(?:0|[1-9]\d*)(?:\.\d+(?:[eE][+-]?\d+)?|[eE][+-]?\d+))
+  | (?P<int>-?(?:0|[1-9]\d*))
+  | (?P<name>[_A-Za-z][_0-9A-Za-z]*)
+  | (?P<punct>\.\.\.|[!$&()\:=@\[\]{|}])
+''', re.VERBOSE)
+
+_ESCAPE_PATTERN = re.compile(r"\\(u\{[0-9A-Fa-f]+\}|u[0-9A-Fa-f]{4}|.)", re.DOTALL)
+
+_ESCAPED_CHARACTERS = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+def decode_string(body: str) -> str:
+    """
+    Decode the escape sequences of a GraphQL string value.
+
+    Args:
+        body (str): The text between the quotes
+
+    Returns:
+        str: The string value
+
+    Raises:
+        GraphQLSyntaxError: If an escape sequence is invalid
+    """
+    def unescape(match: re.Match) -> str:
+        escape = match.group(1)
+        if escape in _ESCAPED_CHARACTERS:
+            return _ESCAPED_CHARACTERS[escape]
+        if escape.startswith("u{"):
+            code = int(escape[2:-1], 16)
+            if code > 0x10FFFF or 0xD800 <= code <= 0xDFFF:
+                raise GraphQLSyntaxError(f"Invalid Unicode escape \\{escape}")
+            return chr(code)
+        if escape.startswith("u") and len(escape) == 5:
+            return chr(int(escape[1:], 16))
+        raise GraphQLSyntaxError(f"Invalid escape sequence \\{escape}")
+
+    value = _ESCAPE_PATTERN.sub(unescape, body)
+    try:
+        # Combine \uXXXX surrogate pairs; a lone surrogate is an error
+        return value.encode("utf-16", "surrogatepass").decode("utf-16")
+    except UnicodeDecodeError:
+        raise GraphQLSyntaxError("Invalid surrogate in Unicode escape") from None
+
+def tokenize_graphql(document: str) -> List[GraphQLToken]:
+    """
+    Split a GraphQL document into tokens, dropping whitespace, commas and comments.
+
+    Args:
+        document (str): The GraphQL document
+
+    Returns:
+        List[GraphQLToken]: The tokens, terminated by an "eof" token
+    """
+    tokens = []
+    position = 0
+    while position < len(document):
+        match = _TOKEN_PATTERN.match(document, position)
+        if match is None:
+            raise GraphQLSyntaxError(f"Unexpected character {document[position]!r} at offset {position}")
+        position = match.end()
+        kind = match.lastgroup
+        if kind == "ignored":
+            continue
+        value = match.group(kind)
+        if kind == "block":
+            kind, value = "string", value[3:-3].replace('\\"""', '"""')
+        elif kind == "string":
+            value = decode_string(value[1:-1])
+        tokens.append(GraphQLToken(kind, value))
+    tokens.append(GraphQLToken("eof", None))
+    return tokens
+
+class GraphQLField:
+    """
+    A field selection, with its alias, arguments and nested selections.
+    """
+
+    def __init__(self, name: str, alias: Optional[str] = None, arguments: Optional[Dict[str, Any]] = None,
+                 selections: Optional[List[Any]] = None, directives: Optional[List[str]] = None):
+        """
+        Initialize the field.
+
+        Args:
+            name (str): The field name
+            alias (Optional[str]): The response alias, if any
+            arguments (Optional[Dict[str, Any]]): The argument values
+            selections (Optional[List[Any]]): The nested selections, or None for a leaf field
+            directives (Optional[List[str]]): The directives applied to the field, as GraphQL text
+        """
+        self.name = name
+        self.alias = alias
+        self.arguments = arguments or {}
+        self.selections = selections
+        self.directives = directives or []
+
+class GraphQLFragmentSpread:
+    """
+    A spread of a named fragment (...Name).
+    """
+
+    def __init__(self, name: str, directives: Optional[List[str]] = None):
+        """
+        Initialize the fragment spread.
+
+        Args:
+            name (str): The name of the spread fragment
+            directives (Optional[List[str]]): The directives applied to the spread, as GraphQL text
+        """
+        self.name = name
+        self.directives = directives or []
+
+class GraphQLInlineFragment:
+    """
+    An inline fragment (... on Type { ... }).
+    """
+
+    def __init__(self, type_condition: Optional[str], selections: List[Any],
+                 directives: Optional[List[str]] = None):
+        """
+        Initialize the inline fragment.
+
+        Args:
+            type_condition (Optional[str]): The type the fragment applies to, if any
+            selections (List[Any]): The nested selections
+            directives (Optional[List[str]]): The directives applied to the fragment, as GraphQL text
+        """
+        self.type_condition = type_condition
+        self.selections = selections
+        self.directives = directives or []
+
+class GraphQLOperation:
+    """
+    An operation definition: a query, mutation or subscription.
+    """
+
+    def __init__(self, operation_type: str, name: Optional[str], variable_definitions: List[str],
+                 selections: List[Any]):
+        """
+        Initialize the operation.
+
+        Args:
+            operation_type (str): "query", "mutation" or "subscription"
+            name (Optional[str]): The operation name, if any
+            variable_definitions (List[str]): The variable definitions, as GraphQL text
+            selections (List[Any]): The top-level selections
+        """
+        self.operation_type = operation_type
+        self.name = name
+        self.variable_definitions = variable_definitions
+        self.selections = selections
+
+class GraphQLFragment:
+    """
+    A named fragment definition.
+    """
+
+    def __init__(self, name: str, type_condition: str, selections: List[Any]):
+        """
+        Initialize the fragment.
+
+        Args:
+            name (str): The fragment name
+            type_condition (str): The type the fragment applies to
+            selections (List[Any]): The fragment's selections
+        """
+        self.name = name
+        self.type_condition = type_condition
+        self.selections = selections
+
+class GraphQLDocument:
+    """
+    A parsed GraphQL executable document.
+    """
+
+    def __init__(self, operations: List[GraphQLOperation], fragments: Dict[str, GraphQLFragment]):
+        """
+        Initialize the document.
+
+        Args:
+            operations (List[GraphQLOperation]): The operation definitions
+            fragments (Dict[str, GraphQLFragment]): The fragment definitions by name
+        """
+        self.operations = operations
+        self.fragments = fragments
+
+    def to_graphql(self) -> str:
+        """
+        Render the document as GraphQL text.
+
+        Returns:
+            str: The GraphQL text of the document
+        """
+        parts = []
+        for operation in self.operations:
+            header = operation.operation_type
+            if operation.name:
+                header += f" {operation.name}"
+            if operation.variable_definitions:
+                header += f"({', '.join(operation.variable_definitions)})"
+            parts.append(f"{header} {render_selections(operation.selections)}")
+        for fragment in self.fragments.values():
+            parts.append(
+                f"fragment {fragment.name} on {fragment.type_condition} {render_selections(fragment.selections)}"
+            )
+        return "\n".join(parts)
+
+def render_value(value: Any) -> str:
+    """
+    Render a parsed value as a GraphQL literal.
+
+    Args:
+        value (Any): The value
+
+    Returns:
+        str: The GraphQL literal
+    """
+    if isinstance(value, GraphQLVariable):
+        return f"${value.name}"
+    if isinstance(value, GraphQLEnum):
+        return value.name
+    if isinstance(value, dict):
+        return "{" + ", ".join(f"{key}: {render_value(item)}" for key, item in value.items()) + "}"
+    if isinstance(value, list):
+        return "[" + ", ".join(render_value(item) for item in value) + "]"
+    return json.dumps(value)
+
+def render_selections(selections: List[Any]) -> str:
+    """
+    Render a selection set as GraphQL text.
+
+    Args:
+        selections (List[Any]): The selections
+
+    Returns:
+        str: The selection set, including its braces
+    """
+    parts = []
+    for selection in selections:
+        directives = "".join(f" {directive}" for directive in selection.directives)
+        if isinstance(selection, GraphQLField):
+            text = f"{selection.alias}: {selection.name}" if selection.alias else selection.name
+            if selection.arguments:
+                text += "(" + ", ".join(
+                    f"{name}: {render_value(value)}" for name, value in selection.arguments.items()
+                ) + ")"
+            text += directives
+            if selection.selections is not None:
+                text += " " + render_selections(selection.selections)
+        elif isinstance(selection, GraphQLFragmentSpread):
+            text = f"...{selection.name}{directives}"
+        else:
+            condition = f" on {selection.type_condition}" if selection.type_condition else ""
+            text = f"...{condition}{directives} {render_selections(selection.selections)}"
+        parts.append(text)
+    return "{ " + " ".join(parts) + " }"
+
+class _Parser:
+    """
+    Recursive-descent parser for GraphQL executable documents.
+    """
+
+    def __init__(self, tokens: List[GraphQLToken]):
+        """
+        Initialize the parser.
+
+        Args:
+            tokens (List[GraphQLToken]): The tokens from tokenize_graphql
+        """
+        self.tokens = tokens
+        self.position = 0
+
+    def peek(self, value: Optional[str] = None, kind: Optional[str] = None) -> bool:
+        """
+        Check whether the current token has the given value and/or kind.
+        """
+        token = self.tokens[self.position]
+        return (value is None or token.value == value) and (kind is None or token.kind == kind)
+
+    def advance(self) -> GraphQLToken:
+        """
+        Consume and return the current token.
+        """
+        token = self.tokens[self.position]
+        if token.kind != "eof":
+            self.position += 1
+        return token
+
+    def expect(self, value: Optional[str] = None, kind: Optional[str] = None) -> GraphQLToken:
+        """
+        Consume the current token, raising if it does not have the given value and/or kind.
+        """
+        if not self.peek(value, kind):
+            token = self.tokens[self.position]
+            raise GraphQLSyntaxError(f"Expected {value or kind}, found {token.value!r}")
+        return self.advance()
+
+    def document(self) -> GraphQLDocument:
+        """
+        Parse a whole document.
+        """
+        operations = []
+        fragments = {}
+        while not self.peek(kind="eof"):
+            if self.peek("{"):
+                operations.append(GraphQLOperation("query", None, [], self.selection_set()))
+            elif self.peek("fragment", "name"):
+                fragment = self.fragment()
+                if fragment.name in fragments:
+                    raise GraphQLSyntaxError(f"Duplicate fragment {fragment.name}")
+                fragments[fragment.name] = fragment
+            elif self.peek(kind="name") and self.tokens[self.position].value in ("query", "mutation", "subscription"):
+                operations.append(self.operation())
+            else:
+                raise GraphQLSyntaxError(f"Unexpected {self.tokens[self.position].value!r}")
+        if not operations:
+            raise GraphQLSyntaxError("Document has no operation")
+        return GraphQLDocument(operations, fragments)
+
+    def operation(self) -> GraphQLOperation:
+        """
+        Parse an operation definition that starts with its operation type.
+        """
+        operation_type = self.advance().value
+        name = self.advance().value if self.peek(kind="name") else None
+        definitions = []
+        if self.peek("("):
+            self.advance()
+            while not self.peek(")"):
+                start = self.position
+                self.expect("$")
+                self.expect(kind="name")
+                self.expect(":")
+                self.type_reference()
+                if self.peek("="):
+                    self.advance()
+                    self.value(constant=True)
+                self.directives()
+                definitions.append(self._text(start))
+            self.expect(")")
+        self.directives()
+        return GraphQLOperation(operation_type, name, definitions, self.selection_set())
+
+    def fragment(self) -> GraphQLFragment:
+        """
+        Parse a fragment definition.
+        """
+        self.expect("fragment")
+        name = self.expect(kind="name").value
+        if name == "on":
+            raise GraphQLSyntaxError("Fragment cannot be named 'on'")
+        self.expect("on")
+        type_condition = self.expect(kind="name").value
+        self.directives()
+        return GraphQLFragment(name, type_condition, self.selection_set())
+
+    def selection_set(self) -> List[Any]:
+        """
+        Parse a braced selection set.
+        """
+        self.expect("{")
+        selections = []
+        while not self.peek("}"):
+            selections.append(self.selection())
+        self.expect("}")
+        if not selections:
+            raise GraphQLSyntaxError("Empty selection set")
+        return selections
+
+    def selection(self) -> Any:
+        """
+        Parse a field, fragment spread or inline fragment.
+        """
+        if self.peek("..."):
+            self.advance()
+            if self.peek(kind="name") and not self.peek("on"):
+                name = self.advance().value
+                return GraphQLFragmentSpread(name, self.directives())
+            type_condition = None
+            if self.peek("on"):
+                self.advance()
+                type_condition = self.expect(kind="name").value
+            directives = self.directives()
+            return GraphQLInlineFragment(type_condition, self.selection_set(), directives)
+
+        name = self.expect(kind="name").value
+        alias = None
+        if self.peek(":"):
+            self.advance()
+            alias, name = name, self.expect(kind="name").value
+        arguments = self.arguments()
+        directives = self.directives()
+        selections = self.selection_set() if self.peek("{") else None
+        return GraphQLField(name, alias, arguments, selections, directives)
+
+    def arguments(self, constant: bool = False) -> Dict[str, Any]:
+        """
+        Parse an optional parenthesized argument list.
+        """
+        arguments = {}
+        if self.peek("("):
+            self.advance()
+            while not self.peek(")"):
+                name = self.expect(kind="name").value
+                self.expect(":")
+                if name in arguments:
+                    raise GraphQLSyntaxError(f"Duplicate argument {name}")
+                arguments[name] = self.value(constant)
+            self.expect(")")
+            if not arguments:
+                raise GraphQLSyntaxError("Empty argument list")
+        return arguments
+
+    def directives(self) -> List[str]:
+        """
+        Parse any directives, returning them as GraphQL text.
+        """
+        directives = []
+        while self.peek("@"):
+            start = self.position
+            self.advance()
+            self.expect(kind="name")
+            self.arguments()
+            directives.append(self._text(start))
+        return directives
+
+    def value(self, constant: bool = False) -> Any:
+        """
+        Parse an input value into its Python representation.
+        """
+        token = self.tokens[self.position]
+        if token.value == "$" and token.kind == "punct":
+            if constant:
+                raise GraphQLSyntaxError("Variables are not allowed in constant values")
+            self.advance()
+            return GraphQLVariable(self.expect(kind="name").value)
+        if token.kind == "int":
+            self.advance()
+            return int(token.value)
+        if token.kind == "float":
+            self.advance()
+            return float(token.value)
+        if token.kind == "string":
+            self.advance()
+            return token.value
+        if token.kind == "name":
+            self.advance()
+            if token.value in ("true", "false", "null"):
+                return {"true": True, "false": False, "null": None}[token.value]
+            return GraphQLEnum(token.value)
+        if token.value == "[":
+            self.advance()
+            items = []
+            while not self.peek("]"):
+                items.append(self.value(constant))
+            self.expect("]")
+            return items
+        if token.value == "{":
+            self.advance()
+            fields = {}
+            while not self.peek("}"):
+                name = self.expect(kind="name").value
+                self.expect(":")
+                fields[name] = self.value(constant)
+            self.expect("}")
+            return fields
+        raise GraphQLSyntaxError(f"Unexpected {token.value!r} in value")
+
+    def type_reference(self) -> str:
+        """
+        Parse a type reference such as [String!]!, returning it as GraphQL text.
+        """
+        if self.peek("["):
+            self.advance()
+            inner = self.type_reference()
+            self.expect("]")
+            text = f"[{inner}]"
+        else:
+            text = self.expect(kind="name").value
+        if self.peek("!"):
+            self.advance()
+            text += "!"
+        return text
+
+    def _text(self, start: int) -> str:
+        """
+        Re-render the tokens from start to the current position as GraphQL text.
+        """
+        parts = []
+        for token in self.tokens[start:self.position]:
+            value = json.dumps(token.value) if token.kind == "string" else token.value
+            if parts and token.value not in (":", "(", ")", "]", "!") and parts[-1] not in ("$", "@", "(", "["):
+                parts.append(" ")
+            parts.append(value)
+        return "".join(parts)
+
+def parse_variable_definition(definition: str) -> Tuple[str, str, bool]:
+    """
+    Parse the text of a variable definition, as kept by GraphQLOperation.
+
+    Args:
+        definition (str): The definition, e.g. "$limit: Int = 10"
+
+    Returns:
+        Tuple[str, str, bool]: The variable name, its type as GraphQL text, and whether it has a default value
+    """
+    parser = _Parser(tokenize_graphql(definition))
+    parser.expect("$")
+    name = parser.expect(kind="name").value
+    parser.expect(":")
+    type_reference = parser.type_reference()
+    return name, type_reference, parser.peek("=")
+
+def parse_directive(directive: str) -> Tuple[str, Dict[str, Any]]:
+    """
+    Parse the text of a directive, as kept by the selections.
+
+    Args:
+        directive (str): The directive, e.g. "@include(if: $details)"
+
+    Returns:
+        Tuple[str, Dict[str, Any]]: The directive name and its argument values
+    """
+    parser = _Parser(tokenize_graphql(directive))
+    parser.expect("@")
+    name = parser.expect(kind="name").value
+    return name, parser.arguments()
+
+def parse_graphql(document: str) -> GraphQLDocument:
+    """
+    Parse a GraphQL executable document.
+
+    Args:
+        document (str): The GraphQL document
+
+    Returns:
+        GraphQLDocument: The parsed document
+    """
+    return _Parser(tokenize_graphql(document)).document()
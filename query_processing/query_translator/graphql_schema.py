@@ -0,0 +1,808 @@
+#!/usr/bin/env python3
+
+import copy
+import functools
+from typing import Dict, Any, List, Optional, Set, Tuple
+from .graphql_parser import (
+    GraphQLDocument, GraphQLEnum, GraphQLField, GraphQLFragmentSpread, GraphQLInlineFragment, GraphQLSyntaxError,
+    GraphQLVariable, parse_directive, parse_graphql, parse_variable_definition, render_value, tokenize_graphql
+)
+from data_access.upi_schema import GRAPHQL_SCHEMA
+
+class GraphQLValidationError(ValueError):
+    """
+    Raised when a GraphQL query does not conform to the schema or exceeds its cost budget.
+    """
+    pass
+
+class GraphQLFieldDefinition:
+    """
+    A field of an object, interface or input type in the schema.
+    """
+
+    def __init__(self, name: str, type_reference: str, arguments: Optional[Dict[str, str]] = None):
+        """
+        Initialize the field definition.
+
+        Args:
+            name (str): The field name
+            type_reference (str): The field type as GraphQL text, e.g. "[File!]!"
+            arguments (Optional[Dict[str, str]]): The argument types by argument name
+        """
+        self.name = name
+        self.type_reference = type_reference
+        self.arguments = arguments or {}
+
+    @property
+    def named_type(self) -> str:
+        """
+        Get the underlying type name without list and non-null wrappers.
+
+        Returns:
+            str: The named type
+        """
+        return self.type_reference.replace("[", "").replace("]", "").replace("!", "")
+
+    @property
+    def is_list(self) -> bool:
+        """
+        Check whether the field returns a list.
+
+        Returns:
+            bool: True for list-typed fields
+        """
+        return self.type_reference.startswith("[")
+
+class GraphQLCost:
+    """
+    Static cost estimate of a GraphQL query.
+    """
+
+    def __init__(self, depth: int = 0, breadth: int = 0, fields: int = 0, complexity: int = 0):
+        """
+        Initialize the cost estimate.
+
+        Args:
+            depth (int): The maximum nesting depth of field selections
+            breadth (int): The largest number of fields selected in a single selection set
+            fields (int): The number of field selections in the query
+            complexity (int): The estimated number of field values resolved, with list sizes multiplied in
+        """
+        self.depth = depth
+        self.breadth = breadth
+        self.fields = fields
+        self.complexity = complexity
+
+    def as_dict(self) -> Dict[str, int]:
+        """
+        Get the estimate as a dictionary, e.g. for logging.
+
+        Returns:
+            Dict[str, int]: The depth, breadth, field count and complexity
+        """
+        return {"depth": self.depth, "breadth": self.breadth, "fields": self.fields, "complexity": self.complexity}
+
+class GraphQLSchema:
+    """
+    A GraphQL schema loaded from SDL, used to validate queries and estimate their cost.
+    """
+
+    BUILTIN_SCALARS = frozenset(("Int", "Float", "String", "Boolean", "ID"))
+
+    # Integer scalars and the values they hold: GraphQL Int is signed 32-bit, and the
+    # custom Long scalar, which the UPI uses for byte counts, is signed 64-bit
+    INTEGER_RANGES = {"Int": (-2 ** 31, 2 ** 31 - 1), "Long": (-2 ** 63, 2 ** 63 - 1)}
+
+    # Argument types of the built-in directives
+    DIRECTIVE_ARGUMENTS = {"include": {"if": "Boolean!"}, "skip": {"if": "Boolean!"}}
+
+    # Arguments that bound the number of items a list field returns
+    SIZE_ARGUMENTS = ("limit", "first", "last", "pageSize")
+
+    def __init__(self, types: Dict[str, Dict[str, GraphQLFieldDefinition]], kinds: Dict[str, str],
+                 query_type: str = "Query", default_list_size: int = 100):
+        """
+        Initialize the schema.
+
+        Args:
+            types (Dict[str, Dict[str, GraphQLFieldDefinition]]): The fields of each object, interface and input type
+            kinds (Dict[str, str]): The kind of each named type ("type", "interface", "input", "enum", "scalar" or "union")
+            query_type (str): The name of the query root type
+            default_list_size (int): The assumed size of a list whose size is not bounded by an argument
+        """
+        self.types = types
+        self.kinds = kinds
+        self.query_type = query_type
+        self.default_list_size = default_list_size
+
+    @classmethod
+    def from_sdl(cls, sdl: str, default_list_size: int = 100) -> "GraphQLSchema":
+        """
+        Load a schema from its SDL definition.
+
+        Args:
+            sdl (str): The schema definition language text
+            default_list_size (int): The assumed size of a list whose size is not bounded by an argument
+
+        Returns:
+            GraphQLSchema: The loaded schema
+        """
+        tokens = tokenize_graphql(sdl)
+        position = 0
+        types = {}
+        kinds = {name: "scalar" for name in cls.BUILTIN_SCALARS}
+        query_type = "Query"
+
+        def peek(offset: int = 0):
+            return tokens[position + offset]
+
+        def take(value: Optional[str] = None):
+            nonlocal position
+            token = tokens[position]
+            if value is not None and token.value != value:
+                raise GraphQLSyntaxError(f"Expected {value}, found {token.value!r} in schema")
+            position += 1
+            return token
+
+        def skip_directives():
+            while peek().value == "@":
+                take()
+                take()
+                if peek().value == "(":
+                    skip_balanced("(", ")")
+
+        def skip_balanced(opening: str, closing: str):
+            depth = 0
+            while True:
+                token = take()
+                if token.kind == "eof":
+                    raise GraphQLSyntaxError("Unbalanced brackets in schema")
+                if token.value == opening:
+                    depth += 1
+                elif token.value == closing:
+                    depth -= 1
+                    if depth == 0:
+                        return
+
+        def type_reference() -> str:
+            if peek().value == "[":
+                take()
+                text = f"[{type_reference()}]"
+                take("]")
+            else:
+                text = take().value
+            if peek().value == "!":
+                take()
+                text += "!"
+            return text
+
+        def skip_default():
+            if peek().value == "=":
+                take()
+                if peek().value in ("[", "{"):
+                    skip_balanced(peek().value, "]" if peek().value == "[" else "}")
+                else:
+                    take()
+
+        while peek().kind != "eof":
+            if peek().kind == "string":
+                take()
+                continue
+            keyword = take().value
+            if keyword == "extend":
+                raise GraphQLSyntaxError("Schema extensions are not supported")
+            if keyword == "schema":
+                skip_directives()
+                take("{")
+                while peek().value != "}":
+                    operation = take().value
+                    take(":")
+                    name = take().value
+                    if operation == "query":
+                        query_type = name
+                take("}")
+                continue
+            if keyword == "directive":
+                take("@")
+                take()
+                if peek().value == "(":
+                    skip_balanced("(", ")")
+                take("on")
+                if peek().value == "|":
+                    take()
+                take()
+                while peek().value == "|":
+                    take()
+                    take()
+                continue
+
+            name = take().value
+            kinds[name] = keyword
+            if keyword == "scalar":
+                skip_directives()
+            elif keyword == "union":
+                skip_directives()
+                take("=")
+                if peek().value == "|":
+                    take()
+                take()
+                while peek().value == "|":
+                    take()
+                    take()
+            elif keyword == "enum":
+                skip_directives()
+                skip_balanced("{", "}")
+            elif keyword in ("type", "interface", "input"):
+                if peek().value == "implements":
+                    take()
+                    if peek().value == "&":
+                        take()
+                    take()
+                    while peek().value == "&":
+                        take()
+                        take()
+                skip_directives()
+                fields = {}
+                take("{")
+                while peek().value != "}":
+                    if peek().kind == "string":
+                        take()
+                        continue
+                    field_name = take().value
+                    arguments = {}
+                    if peek().value == "(":
+                        take()
+                        while peek().value != ")":
+                            if peek().kind == "string":
+                                take()
+                                continue
+                            argument = take().value
+                            take(":")
+                            arguments[argument] = type_reference()
+                            skip_default()
+                            skip_directives()
+                        take(")")
+                    take(":")
+                    fields[field_name] = GraphQLFieldDefinition(field_name, type_reference(), arguments)
+                    skip_default()
+                    skip_directives()
+                take("}")
+                types[name] = fields
+            else:
+                raise GraphQLSyntaxError(f"Unsupported schema definition {keyword!r}")
+
+        return cls(types, kinds, query_type, default_list_size)
+
+    def validate(self, document: GraphQLDocument) -> None:
+        """
+        Validate a parsed query against the schema.
+
+        Only query operations are accepted: the search tool never modifies data.
+        Argument literals must match their scalar types, and every defined
+        variable must be used, with a type allowed wherever it is used.
+        Variables that are used without being defined are taken to be
+        template placeholders, which the translators fill in with literals
+        before the query is sent.
+
+        Args:
+            document (GraphQLDocument): The parsed query
+        """
+        for operation in document.operations:
+            if operation.operation_type != "query":
+                raise GraphQLValidationError(f"Only query operations are allowed, found {operation.operation_type}")
+            variables = {}
+            for definition in operation.variable_definitions:
+                name, type_reference, has_default = parse_variable_definition(definition)
+                if name in variables:
+                    raise GraphQLValidationError(f"Variable ${name} is defined more than once")
+                named = type_reference.replace("[", "").replace("]", "").replace("!", "")
+                if self.kinds.get(named) not in ("scalar", "enum", "input"):
+                    raise GraphQLValidationError(f"Variable ${name} cannot have type {type_reference}")
+                variables[name] = (type_reference, has_default)
+            used = set()
+            self._validate_selections(operation.selections, self.query_type, document, set(), variables, used)
+            unused = sorted(set(variables) - used)
+            if unused:
+                raise GraphQLValidationError(f"Variable ${unused[0]} is defined but not used")
+
+    def estimate_cost(self, document: GraphQLDocument, variables: Optional[Dict[str, Any]] = None) -> GraphQLCost:
+        """
+        Estimate the static cost of a parsed query.
+
+        Every list field multiplies the cost of everything below it by its
+        size, taken from a size argument (limit, first, ...) or, failing
+        that, the schema's default list size.
+
+        Args:
+            document (GraphQLDocument): The parsed query
+            variables (Optional[Dict[str, Any]]): Variable values used to resolve size arguments
+
+        Returns:
+            GraphQLCost: The cost estimate
+        """
+        cost = GraphQLCost()
+        for operation in document.operations:
+            self._accumulate_cost(operation.selections, self.query_type, document, variables or {}, 1, 1, cost)
+        return cost
+
+    def trim(self, document: GraphQLDocument, max_complexity: int, max_depth: Optional[int] = None,
+             variables: Optional[Dict[str, Any]] = None) -> GraphQLDocument:
+        """
+        Trim a query so that it fits in a cost budget.
+
+        Fragments are inlined first. Selections nested deeper than max_depth
+        are removed, then the size argument of the list field with the
+        largest fan-out is halved until the complexity fits the budget.
+        Variable definitions left without uses are dropped.
+
+        Args:
+            document (GraphQLDocument): The parsed query, which is left unchanged
+            max_complexity (int): The complexity budget
+            max_depth (Optional[int]): The maximum selection depth, or None for no depth limit
+            variables (Optional[Dict[str, Any]]): Variable values used to resolve size arguments
+
+        Returns:
+            GraphQLDocument: The trimmed query
+        """
+        trimmed = copy.deepcopy(document)
+        for operation in trimmed.operations:
+            operation.selections = self._inline_fragments(operation.selections, trimmed, set())
+            if max_depth is not None:
+                operation.selections = self._trim_depth(operation.selections, 1, max_depth)
+                if not operation.selections:
+                    raise GraphQLValidationError("Query cannot be trimmed to the depth budget")
+        trimmed.fragments = {}
+
+        while self.estimate_cost(trimmed, variables).complexity > max_complexity:
+            candidate = self._largest_list(trimmed, variables or {})
+            if candidate is None:
+                raise GraphQLValidationError("Query cannot be trimmed to the cost budget")
+            field, argument, size = candidate
+            field.arguments[argument] = max(1, size // 2)
+
+        for operation in trimmed.operations:
+            used = self._variable_uses(operation.selections)
+            operation.variable_definitions = [
+                definition for definition in operation.variable_definitions
+                if parse_variable_definition(definition)[0] in used
+            ]
+        return trimmed
+
+    def _field_definition(self, type_name: str, field_name: str) -> GraphQLFieldDefinition:
+        """
+        Look up a field of a type.
+
+        Args:
+            type_name (str): The parent type
+            field_name (str): The field name
+
+        Returns:
+            GraphQLFieldDefinition: The field definition
+        """
+        fields = self.types.get(type_name)
+        if fields is None:
+            raise GraphQLValidationError(f"Type {type_name} has no fields")
+        if field_name not in fields:
+            raise GraphQLValidationError(f"Type {type_name} has no field {field_name}")
+        return fields[field_name]
+
+    def _validate_selections(self, selections: List[Any], type_name: str, document: GraphQLDocument,
+                             visiting: Set[str], variables: Dict[str, Tuple[str, bool]], used: Set[str]) -> None:
+        """
+        Validate a selection set against its parent type.
+
+        Args:
+            selections (List[Any]): The selections
+            type_name (str): The parent type
+            document (GraphQLDocument): The document, for resolving fragments
+            visiting (Set[str]): Fragments being expanded, to detect cycles
+            variables (Dict[str, Tuple[str, bool]]): The operation's variable types and whether each has a default
+            used (Set[str]): The variables used so far, updated in place
+        """
+        for selection in selections:
+            for directive in selection.directives:
+                name, arguments = parse_directive(directive)
+                types = self.DIRECTIVE_ARGUMENTS.get(name, {})
+                for argument, value in arguments.items():
+                    self._validate_value(value, types.get(argument), f"@{name}({argument})", variables, used)
+            if isinstance(selection, GraphQLFragmentSpread):
+                fragment = document.fragments.get(selection.name)
+                if fragment is None:
+                    raise GraphQLValidationError(f"Unknown fragment {selection.name}")
+                if selection.name in visiting:
+                    raise GraphQLValidationError(f"Fragment {selection.name} spreads itself")
+                self._check_type_exists(fragment.type_condition)
+                self._validate_selections(fragment.selections, fragment.type_condition, document,
+                                          visiting | {selection.name}, variables, used)
+                continue
+            if isinstance(selection, GraphQLInlineFragment):
+                condition = selection.type_condition or type_name
+                self._check_type_exists(condition)
+                self._validate_selections(selection.selections, condition, document, visiting, variables, used)
+                continue
+
+            if selection.name == "__typename":
+                continue
+            definition = self._field_definition(type_name, selection.name)
+            for argument, value in selection.arguments.items():
+                if argument not in definition.arguments:
+                    raise GraphQLValidationError(f"Field {type_name}.{selection.name} has no argument {argument}")
+                self._validate_value(value, definition.arguments[argument], f"{selection.name}({argument})",
+                                     variables, used)
+
+            kind = self.kinds.get(definition.named_type)
+            if kind in ("scalar", "enum"):
+                if selection.selections is not None:
+                    raise GraphQLValidationError(f"Leaf field {selection.name} cannot have a selection set")
+            elif selection.selections is None:
+                raise GraphQLValidationError(f"Field {selection.name} of type {definition.named_type} needs a selection set")
+            else:
+                self._validate_selections(selection.selections, definition.named_type, document, visiting,
+                                          variables, used)
+
+    def _validate_value(self, value: Any, type_reference: Optional[str], location: str,
+                        variables: Dict[str, Tuple[str, bool]], used: Set[str]) -> None:
+        """
+        Check a value against its expected type.
+
+        Args:
+            value (Any): The argument value
+            type_reference (Optional[str]): The expected type as GraphQL text, or None if unknown, e.g. for a custom directive
+            location (str): Where the value appears, for error messages
+            variables (Dict[str, Tuple[str, bool]]): The operation's variable types and whether each has a default
+            used (Set[str]): The variables used so far, updated in place
+        """
+        if isinstance(value, GraphQLVariable):
+            if value.name not in variables:
+                return
+            used.add(value.name)
+            variable_type, has_default = variables[value.name]
+            if type_reference is not None and not self._variable_allowed(variable_type, type_reference, has_default):
+                raise GraphQLValidationError(
+                    f"Variable ${value.name} of type {variable_type} cannot be used for {location} of type {type_reference}"
+                )
+            return
+        if type_reference is None:
+            items = value.values() if isinstance(value, dict) else value if isinstance(value, list) else []
+            for item in items:
+                self._validate_value(item, None, location, variables, used)
+            return
+        named = type_reference[:-1] if type_reference.endswith("!") else type_reference
+        if value is None:
+            if named != type_reference:
+                raise GraphQLValidationError(f"{location} of type {type_reference} cannot be null")
+            return
+        if named.startswith("["):
+            for item in value if isinstance(value, list) else [value]:
+                self._validate_value(item, named[1:-1], location, variables, used)
+            return
+        kind = self.kinds.get(named)
+        if kind == "input":
+            if not isinstance(value, dict):
+                raise GraphQLValidationError(f"{location} expects an input object of type {named}")
+            fields = self.types[named]
+            for key, item in value.items():
+                if key not in fields:
+                    raise GraphQLValidationError(f"Input type {named} has no field {key}")
+                self._validate_value(item, fields[key].type_reference, f"{location}.{key}", variables, used)
+            for key, field in fields.items():
+                if field.type_reference.endswith("!") and key not in value:
+                    raise GraphQLValidationError(f"{location} is missing the required field {key}")
+        elif kind == "enum":
+            if not isinstance(value, GraphQLEnum):
+                raise GraphQLValidationError(f"{location} expects a value of enum {named}, found {render_value(value)}")
+        elif kind == "scalar" and not self._scalar_literal(value, named):
+            raise GraphQLValidationError(f"{location} expects {named}, found {render_value(value)}")
+
+    def _scalar_literal(self, value: Any, scalar: str) -> bool:
+        """
+        Check whether a literal is a valid value of a scalar type.
+
+        Args:
+            value (Any): The parsed literal
+            scalar (str): The scalar type
+
+        Returns:
+            bool: True if the literal is allowed; custom scalars allow any literal
+        """
+        if isinstance(value, (dict, list, GraphQLEnum)):
+            return scalar not in self.BUILTIN_SCALARS
+        integer = isinstance(value, int) and not isinstance(value, bool)
+        if scalar in self.INTEGER_RANGES:
+            low, high = self.INTEGER_RANGES[scalar]
+            return integer and low <= value <= high
+        if scalar == "Float":
+            return integer or isinstance(value, float)
+        if scalar == "String":
+            return isinstance(value, str)
+        if scalar == "Boolean":
+            return isinstance(value, bool)
+        if scalar == "ID":
+            return integer or isinstance(value, str)
+        return True
+
+    def _variable_allowed(self, variable_type: str, location_type: str, has_default: bool) -> bool:
+        """
+        Check whether a variable's type may be used where a value of another type is expected.
+
+        Args:
+            variable_type (str): The variable's declared type
+            location_type (str): The expected type at the use
+            has_default (bool): Whether the variable has a default value, which makes a nullable variable acceptable for a non-null type
+
+        Returns:
+            bool: True if the use is allowed
+        """
+        if location_type.endswith("!"):
+            if not variable_type.endswith("!"):
+                return has_default and self._variable_allowed(variable_type, location_type[:-1], False)
+            return self._variable_allowed(variable_type[:-1], location_type[:-1], False)
+        if variable_type.endswith("!"):
+            return self._variable_allowed(variable_type[:-1], location_type, False)
+        if location_type.startswith("["):
+            return variable_type.startswith("[") and self._variable_allowed(variable_type[1:-1], location_type[1:-1], False)
+        return variable_type == location_type
+
+    def _variable_uses(self, selections: List[Any]) -> Set[str]:
+        """
+        Collect the variables used by a selection set without named fragment spreads.
+
+        Args:
+            selections (List[Any]): The selections
+
+        Returns:
+            Set[str]: The names of the variables used in arguments and directives
+        """
+        used = set()
+
+        def collect(value: Any):
+            if isinstance(value, GraphQLVariable):
+                used.add(value.name)
+            elif isinstance(value, (dict, list)):
+                for item in value.values() if isinstance(value, dict) else value:
+                    collect(item)
+
+        for selection in selections:
+            for directive in selection.directives:
+                collect(parse_directive(directive)[1])
+            if isinstance(selection, GraphQLField):
+                collect(selection.arguments)
+            if selection.selections is not None:
+                used |= self._variable_uses(selection.selections)
+        return used
+
+    def _check_type_exists(self, type_name: str) -> None:
+        """
+        Check that a type used in a type condition is defined.
+
+        Args:
+            type_name (str): The type name
+        """
+        if type_name not in self.kinds:
+            raise GraphQLValidationError(f"Unknown type {type_name}")
+
+    def _list_size(self, selection: GraphQLField, variables: Dict[str, Any]) -> Tuple[int, Optional[str]]:
+        """
+        Determine the size of a list field from its arguments.
+
+        Args:
+            selection (GraphQLField): The list field
+            variables (Dict[str, Any]): Variable values
+
+        Returns:
+            Tuple[int, Optional[str]]: The size and the name of the argument it came from, if any
+        """
+        for argument in self.SIZE_ARGUMENTS:
+            value = selection.arguments.get(argument)
+            if isinstance(value, GraphQLVariable):
+                value = variables.get(value.name)
+            if isinstance(value, int) and not isinstance(value, bool):
+                return value, argument
+        return self.default_list_size, None
+
+    def _accumulate_cost(self, selections: List[Any], type_name: str, document: GraphQLDocument,
+                         variables: Dict[str, Any], depth: int, multiplier: int, cost: GraphQLCost) -> int:
+        """
+        Add the cost of a selection set to a running estimate.
+
+        Args:
+            selections (List[Any]): The selections
+            type_name (str): The parent type
+            document (GraphQLDocument): The document, for resolving fragments
+            variables (Dict[str, Any]): Variable values
+            depth (int): The depth of the selection set
+            multiplier (int): How many times the selection set is resolved
+            cost (GraphQLCost): The running estimate
+
+        Returns:
+            int: The number of fields in the selection set, with fragments expanded
+        """
+        breadth = 0
+        for selection in selections:
+            if isinstance(selection, GraphQLFragmentSpread):
+                fragment = document.fragments[selection.name]
+                breadth += self._accumulate_cost(fragment.selections, fragment.type_condition, document,
+                                                 variables, depth, multiplier, cost)
+                continue
+            if isinstance(selection, GraphQLInlineFragment):
+                breadth += self._accumulate_cost(selection.selections, selection.type_condition or type_name,
+                                                 document, variables, depth, multiplier, cost)
+                continue
+
+            breadth += 1
+            cost.fields += 1
+            cost.complexity += multiplier
+            cost.depth = max(cost.depth, depth)
+            if selection.selections is None or selection.name == "__typename":
+                continue
+            definition = self._field_definition(type_name, selection.name)
+            child_multiplier = multiplier
+            if definition.is_list:
+                child_multiplier *= self._list_size(selection, variables)[0]
+            self._accumulate_cost(selection.selections, definition.named_type, document, variables,
+                                  depth + 1, child_multiplier, cost)
+        cost.breadth = max(cost.breadth, breadth)
+        return breadth
+
+    def _inline_fragments(self, selections: List[Any], document: GraphQLDocument, visiting: Set[str]) -> List[Any]:
+        """
+        Replace named fragment spreads by equivalent inline fragments.
+
+        Args:
+            selections (List[Any]): The selections
+            document (GraphQLDocument): The document, for resolving fragments
+            visiting (Set[str]): Fragments being expanded, to detect cycles
+
+        Returns:
+            List[Any]: The selections without named fragment spreads
+        """
+        inlined = []
+        for selection in selections:
+            if isinstance(selection, GraphQLFragmentSpread):
+                if selection.name in visiting:
+                    raise GraphQLValidationError(f"Fragment {selection.name} spreads itself")
+                fragment = document.fragments[selection.name]
+                inlined.append(GraphQLInlineFragment(
+                    fragment.type_condition,
+                    self._inline_fragments(copy.deepcopy(fragment.selections), document, visiting | {selection.name}),
+                    selection.directives
+                ))
+            else:
+                if selection.selections is not None:
+                    selection.selections = self._inline_fragments(selection.selections, document, visiting)
+                inlined.append(selection)
+        return inlined
+
+    def _trim_depth(self, selections: List[Any], depth: int, max_depth: int) -> List[Any]:
+        """
+        Remove selections nested deeper than the depth budget.
+
+        Args:
+            selections (List[Any]): The selections, without named fragment spreads
+            depth (int): The depth of the selection set
+            max_depth (int): The maximum depth
+
+        Returns:
+            List[Any]: The remaining selections; fields left without sub-selections are dropped
+        """
+        remaining = []
+        for selection in selections:
+            if isinstance(selection, GraphQLInlineFragment):
+                selection.selections = self._trim_depth(selection.selections, depth, max_depth)
+                if selection.selections:
+                    remaining.append(selection)
+                continue
+            if selection.selections is not None:
+                if depth >= max_depth:
+                    continue
+                selection.selections = self._trim_depth(selection.selections, depth + 1, max_depth)
+                if not selection.selections:
+                    continue
+            remaining.append(selection)
+        return remaining
+
+    def _largest_list(self, document: GraphQLDocument, variables: Dict[str, Any]):
+        """
+        Find the list field with the largest size that can still be reduced.
+
+        Args:
+            document (GraphQLDocument): The query, without named fragment spreads
+            variables (Dict[str, Any]): Variable values
+
+        Returns:
+            Optional[Tuple[GraphQLField, str, int]]: The field, its size argument and its current size, or None
+        """
+        best = None
+
+        def visit(selections: List[Any], type_name: str):
+            nonlocal best
+            for selection in selections:
+                if isinstance(selection, GraphQLInlineFragment):
+                    visit(selection.selections, selection.type_condition or type_name)
+                    continue
+                if selection.selections is None or selection.name == "__typename":
+                    continue
+                definition = self._field_definition(type_name, selection.name)
+                if definition.is_list:
+                    size, _ = self._list_size(selection, variables)
+                    argument = next((a for a in self.SIZE_ARGUMENTS if a in definition.arguments), None)
+                    if argument is not None and size > 1 and (best is None or size > best[2]):
+                        best = (selection, argument, size)
+                visit(selection.selections, definition.named_type)
+
+        for operation in document.operations:
+            visit(operation.selections, self.query_type)
+        return best
+
+@functools.lru_cache(maxsize=None)
+def load_upi_schema() -> GraphQLSchema:
+    """
+    Load the UPI GraphQL schema, parsing it only once per process.
+
+    Returns:
+        GraphQLSchema: The UPI schema
+    """
+    return GraphQLSchema.from_sdl(GRAPHQL_SCHEMA)
+
+class GraphQLCostGuard:
+    """
+    Validates GraphQL queries against a schema and enforces a cost budget.
+
+    Queries over budget are either trimmed until they fit or rejected.
+    """
+
+    def __init__(self, schema: Optional[GraphQLSchema] = None, max_complexity: int = 10000,
+                 max_depth: int = 6, trim: bool = True):
+        """
+        Initialize the cost guard.
+
+        Args:
+            schema (Optional[GraphQLSchema]): The schema to validate against, or None for the UPI schema
+            max_complexity (int): The complexity budget
+            max_depth (int): The maximum selection depth
+            trim (bool): Trim queries that exceed the budget instead of rejecting them
+        """
+        self.schema = schema or load_upi_schema()
+        self.max_complexity = max_complexity
+        self.max_depth = max_depth
+        self.trim = trim
+
+    def is_valid(self, query: str) -> bool:
+        """
+        Check that a query parses and conforms to the schema.
+
+        Args:
+            query (str): The GraphQL query
+
+        Returns:
+            bool: True if the query is valid, False otherwise
+        """
+        try:
+            self.schema.validate(parse_graphql(query))
+        except (GraphQLSyntaxError, GraphQLValidationError):
+            return False
+        return True
+
+    def enforce(self, query: str, variables: Optional[Dict[str, Any]] = None) -> Tuple[str, GraphQLCost]:
+        """
+        Validate a query and bring it within the budget.
+
+        Args:
+            query (str): The GraphQL query
+            variables (Optional[Dict[str, Any]]): Variable values used to resolve size arguments
+
+        Returns:
+            Tuple[str, GraphQLCost]: The query (trimmed if it was over budget) and its cost
+        """
+        document = parse_graphql(query)
+        self.schema.validate(document)
+        cost = self.schema.estimate_cost(document, variables)
+        if cost.complexity <= self.max_complexity and cost.depth <= self.max_depth:
+            return query, cost
+        if not self.trim:
+            raise GraphQLValidationError(
+                f"Query cost {cost.as_dict()} exceeds the budget "
+                f"(complexity {self.max_complexity}, depth {self.max_depth})"
+            )
+        trimmed = self.schema.trim(document, self.max_complexity, self.max_depth, variables)
+        return trimmed.to_graphql(), self.schema.estimate_cost(trimmed, variables)
@@ -1,13 +1,33 @@
 #!/usr/bin/env python3
 
-from typing import Dict, Any
+import re
+from typing import Dict, Any, Optional, Tuple
 from .translator_base import TranslatorBase
+from .prompt_builder import PromptBuilder
+from .graphql_schema import GraphQLCostGuard
+from utils.request_context import RequestContext
 
 class GraphQLTranslator(TranslatorBase):
     """
     Translator for converting parsed queries to GraphQL.
     """
 
+    query_language = "graphql"
+    parameter_prefix = "$"
+
+    def __init__(self, cost_guard: Optional[GraphQLCostGuard] = None,
+                 prompt_builder: Optional[PromptBuilder] = None):
+        """
+        Initialize the GraphQL translator.
+
+        Args:
+            cost_guard (Optional[GraphQLCostGuard]): Schema validation and cost budget, or None for the UPI schema defaults
+            prompt_builder (Optional[PromptBuilder]): Builder of the translation prompts, or None for the default token budget
+        """
+        super().__init__()
+        self.cost_guard = cost_guard or GraphQLCostGuard()
+        self.prompt_builder = prompt_builder or PromptBuilder("graphql")
+
     def translate(self, parsed_query: Dict[str, Any], llm_connector: Any) -> str:
         """
         Translate a parsed query into a GraphQL query.
@@ -19,13 +39,37 @@ class GraphQLTranslator(TranslatorBase):
         Returns:
             str: The translated GraphQL query
         """
+        query, parameters = self.translate_parameterized(parsed_query, llm_connector)
+        return self._fill_template(query, parameters)
+
+    def translate_parameterized(self, parsed_query: Dict[str, Any], llm_connector: Any,
+                                context: Optional[RequestContext] = None) -> Tuple[str, Dict[str, Any]]:
+        """
+        Translate a parsed query into GraphQL text plus variables.
+
+        Args:
+            parsed_query (Dict[str, Any]): The parsed query from NLParser
+            llm_connector (Any): Connector to the LLM service
+            context (Optional[RequestContext]): The request's deadline and cancellation state
+
+        Returns:
+            Tuple[str, Dict[str, Any]]: The GraphQL query and its variable values
+        """
+        # Serve queries whose shape has been seen before from the learned template
+        shape, parameters = self._lift_parameters(parsed_query)
+        template = self._lookup_template(shape)
+        if template is not None:
+            return self._bind_template(template, parameters)
+
         # Use the LLM to help generate the GraphQL query
-        prompt = self._create_translation_prompt(parsed_query)
-        graphql_query = llm_connector.generate_query(prompt)
+        prompt = self._create_translation_prompt(parsed_query, parameters)
+        graphql_query = self._generate_query(llm_connector, prompt, context)
 
         # Validate and optimize the generated query
         if self.validate_query(graphql_query):
-            return self.optimize_query(graphql_query)
+            graphql_query = self.optimize_query(graphql_query)
+            self._learn_template(shape, graphql_query, parameters)
+            return self._bind_template(graphql_query, parameters)
         else:
             raise ValueError("Generated GraphQL query is invalid")
 
@@ -39,13 +83,11 @@ class GraphQLTranslator(TranslatorBase):
         Returns:
             bool: True if the query is valid, False otherwise
         """
-        # Implement GraphQL validation logic
-        # This is a placeholder implementation
-        return "query" in query or "mutation" in query
+        return self.cost_guard.is_valid(query)
 
     def optimize_query(self, query: str) -> str:
         """
-        Optimize the translated GraphQL query.
+        Optimize the translated GraphQL query, trimming it if it exceeds the cost budget.
 
         Args:
             query (str): The translated GraphQL query
@@ -53,19 +95,65 @@ class GraphQLTranslator(TranslatorBase):
         Returns:
             str: The optimized GraphQL query
         """
-        # Implement query optimization logic
-        # This is a placeholder implementation
-        return query.strip()
+        optimized_query, _ = self.cost_guard.enforce(query.strip())
+        return optimized_query
+
+    def _bind_template(self, template: str, parameters: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+        """
+        Pair a GraphQL template with the variables it declares.
+
+        Parameters the template refers to without declaring them in the
+        operation header cannot be sent as variables, so they are inlined.
+
+        Args:
+            template (str): The parameterized GraphQL query
+            parameters (Dict[str, Any]): The parameter values
+
+        Returns:
+            Tuple[str, Dict[str, Any]]: The GraphQL query and its variable values
+        """
+        header = re.match(r"\s*(?:query|mutation)\b[^({]*\(([^)]*)\)", template)
+        declared = {
+            definition.split(":")[0].strip().lstrip("$")
+            for definition in (header.group(1).split(",") if header else []) if definition.strip()
+        }
+        inlined = {name: value for name, value in parameters.items() if name not in declared}
+        return super()._bind_template(self._fill_template(template, inlined) if inlined else template, parameters)
+
+    def _fill_template(self, template: str, parameters: Dict[str, Any]) -> str:
+        """
+        Substitute parameter values into a GraphQL template.
+
+        Variable definitions for the substituted parameters are removed from
+        the operation header, since the values are inlined as literals.
+
+        Args:
+            template (str): The parameterized GraphQL query
+            parameters (Dict[str, Any]): The parameter values
+
+        Returns:
+            str: The GraphQL query with the parameter values inlined
+        """
+        header = re.match(r"(\s*(?:query|mutation)\b[^({]*)\(([^)]*)\)", template)
+        if header:
+            definitions = [
+                definition for definition in header.group(2).split(",")
+                if definition.strip() and definition.split(":")[0].strip().lstrip("$") not in parameters
+            ]
+            remaining = f"({', '.join(d.strip() for d in definitions)})" if definitions else ""
+            template = header.group(1).rstrip() + remaining + template[header.end():]
+        return super()._fill_template(template, parameters)
 
-    def _create_translation_prompt(self, parsed_query: Dict[str, Any]) -> str:
+    def _create_translation_prompt(self, parsed_query: Dict[str, Any],
+                                   parameters: Optional[Dict[str, Any]] = None) -> str:
         """
         Create a prompt for the LLM to generate a GraphQL query.
 
         Args:
             parsed_query (Dict[str, Any]): The parsed query
+            parameters (Optional[Dict[str, Any]]): Lifted literal values the query should refer to by name
 
         Returns:
             str: The prompt for the LLM
         """
-        # Implement prompt creation logic
-        return f"Translate the following parsed query into a GraphQL query: {parsed_query}"
+        return self.prompt_builder.build(parsed_query, parameters)
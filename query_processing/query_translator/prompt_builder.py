@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+
+import functools
+import json
+import threading
+from typing import Dict, Any, List, Optional, Tuple
+from utils.llm_connector.batching import estimate_tokens
+from data_access.upi_schema import (
+    FILE_FIELDS, FILTER_FIELDS, GRAPHQL_FILTER_ARGUMENTS, OBJECTS_COLLECTION
+)
+
+# Fields that are always described because nearly every query returns them
+CORE_FIELDS = ("name", "path")
+
+_GRAPHQL_TYPES = {"string": "String", "int": "Long"}
+
+@functools.lru_cache(maxsize=None)
+def schema_chunks(query_language: str) -> Tuple[str, Dict[str, str]]:
+    """
+    Precompute the schema context for a query language.
+
+    The result is computed once per language and shared by every prompt
+    builder in the process.
+
+    Args:
+        query_language (str): "aql" or "graphql"
+
+    Returns:
+        Tuple[str, Dict[str, str]]: The header describing the entry point, and one description chunk per record field
+    """
+    if query_language == "aql":
+        header = f"Collection {OBJECTS_COLLECTION} holds one document per file, with these attributes:"
+        chunks = {
+            field: f"- doc.{field} ({field_type}): {description}"
+            for field, (field_type, description) in FILE_FIELDS.items()
+        }
+        return header, chunks
+
+    header = "Root field: files(filter: FileFilter, limit: Int, offset: Int): [File!]!. File fields:"
+    chunks = {}
+    for field, (field_type, description) in FILE_FIELDS.items():
+        arguments = [
+            f"{GRAPHQL_FILTER_ARGUMENTS[key]}: {'[String!]' if comparison == 'in' else _GRAPHQL_TYPES[field_type]}"
+            for key, (filter_field, comparison) in FILTER_FIELDS.items() if filter_field == field
+        ]
+        chunk = f"- {field}: {_GRAPHQL_TYPES[field_type]} - {description}"
+        if arguments:
+            chunk += f" (FileFilter: {', '.join(arguments)})"
+        chunks[field] = chunk
+    return header, chunks
+
+class PromptBuilder:
+    """
+    Builds token-budgeted translation prompts with relevant schema context.
+
+    Only the schema fragments for the fields a parsed query's filters and
+    entities touch are included, together with the core fields every result
+    shows. A query with no recognized fields gets the whole schema, in schema
+    order, for as long as the token budget allows. Token counts of the built
+    prompts are recorded.
+    """
+
+    LANGUAGE_NAMES = {"aql": "AQL (ArangoDB Query Language)", "graphql": "GraphQL"}
+
+    def __init__(self, query_language: str, max_prompt_tokens: int = 600):
+        """
+        Initialize the prompt builder.
+
+        Args:
+            query_language (str): "aql" or "graphql"
+            max_prompt_tokens (int): The token budget of a prompt
+        """
+        if query_language not in self.LANGUAGE_NAMES:
+            raise ValueError(f"Unsupported query language: {query_language}")
+        self.query_language = query_language
+        self.max_prompt_tokens = max_prompt_tokens
+        self.header, self.chunks = schema_chunks(query_language)
+        self.chunk_tokens = {field: estimate_tokens(chunk) + 1 for field, chunk in self.chunks.items()}
+        self.last_prompt_tokens = 0
+        self.stats = {"prompts": 0, "total_tokens": 0, "max_tokens": 0, "over_budget": 0}
+        self._lock = threading.Lock()
+
+    def build(self, parsed_query: Dict[str, Any], parameters: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Build the translation prompt for a parsed query.
+
+        Args:
+            parsed_query (Dict[str, Any]): The parsed query from NLParser
+            parameters (Optional[Dict[str, Any]]): Lifted literal values the query should refer to by name
+
+        Returns:
+            str: The prompt for the LLM
+        """
+        language = self.LANGUAGE_NAMES[self.query_language]
+        request = {
+            key: parsed_query[key]
+            for key in ("original_query", "intent", "entities", "filters", "terms")
+            if parsed_query.get(key)
+        }
+        lines = [
+            f"Translate the search request below into a single read-only {language} query.",
+            "Reply with the query only, without explanation or code fences.",
+            f"Request: {json.dumps(request, sort_keys=True, default=str)}",
+        ]
+        if parameters:
+            prefix = "@" if self.query_language == "aql" else "$"
+            kind = "bind parameters" if self.query_language == "aql" else "variables"
+            names = ", ".join(f"{prefix}{name}" for name in parameters)
+            declare = "" if self.query_language == "aql" else ", declared in the operation header,"
+            lines.append(
+                f"Do not inline literal values. Refer to them through these {kind}{declare} instead: {names}. "
+                f"Their current values are: {json.dumps(parameters, sort_keys=True, default=str)}"
+            )
+        lines.append(self.header)
+
+        budget = self.max_prompt_tokens - estimate_tokens("\n".join(lines))
+        for field in self._select_fields(parsed_query):
+            if self.chunk_tokens[field] > budget and field not in CORE_FIELDS:
+                continue
+            lines.append(self.chunks[field])
+            budget -= self.chunk_tokens[field]
+
+        prompt = "\n".join(lines)
+        self._record(estimate_tokens(prompt))
+        return prompt
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get the prompt token statistics.
+
+        Returns:
+            Dict[str, Any]: The number of prompts built, their mean and maximum token counts and how many exceeded the budget
+        """
+        with self._lock:
+            stats = dict(self.stats)
+        stats["mean_tokens"] = stats["total_tokens"] / stats["prompts"] if stats["prompts"] else 0.0
+        stats["last_tokens"] = self.last_prompt_tokens
+        return stats
+
+    def _select_fields(self, parsed_query: Dict[str, Any]) -> List[str]:
+        """
+        Order the record fields by their relevance to a parsed query.
+
+        Args:
+            parsed_query (Dict[str, Any]): The parsed query from NLParser
+
+        Returns:
+            List[str]: Fields referenced by the filters and entities followed by the core fields, or every field if none is referenced
+        """
+        relevant = []
+        for key in parsed_query.get("filters") or {}:
+            if key in FILTER_FIELDS:
+                relevant.append(FILTER_FIELDS[key][0])
+        for key in parsed_query.get("entities") or {}:
+            if key in FILE_FIELDS:
+                relevant.append(key)
+        if not relevant:
+            return list(FILE_FIELDS)
+        return list(dict.fromkeys(relevant + list(CORE_FIELDS)))
+
+    def _record(self, tokens: int) -> None:
+        """
+        Record the token count of a built prompt.
+
+        Args:
+            tokens (int): The estimated token count
+        """
+        with self._lock:
+            self.last_prompt_tokens = tokens
+            self.stats["prompts"] += 1
+            self.stats["total_tokens"] += tokens
+            self.stats["max_tokens"] = max(self.stats["max_tokens"], tokens)
+            if tokens > self.max_prompt_tokens:
+                self.stats["over_budget"] += 1
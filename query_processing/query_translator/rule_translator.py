@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+
+import json
+import threading
+from typing import Dict, Any, List, Optional, Tuple
+from .translator_base import TranslatorBase
+from .aql_parser import is_valid_aql
+from .graphql_schema import GraphQLCostGuard
+from utils.request_context import RequestContext
+from data_access.upi_schema import (
+    FILE_FIELDS, FILTER_FIELDS, GRAPHQL_FILTER_ARGUMENTS, OBJECTS_COLLECTION
+)
+
+class RuleBasedTranslator(TranslatorBase):
+    """
+    Deterministic translator for fully structured queries.
+
+    Queries whose intent, entities and filters are all understood (file type,
+    date range, size bound, name pattern, ...) are compiled directly into AQL
+    or GraphQL without calling the LLM. Anything else is handed to the
+    fallback translator.
+
+    An ordering entity compiles to a SORT in AQL; GraphQL's files field has
+    no sort argument, so ordered queries are left to the fallback there. A
+    limit entity compiles to a LIMIT or the files limit argument, and AQL
+    queries without one are bounded by the display page size, as the LLM
+    translator's optimizer bounds its queries.
+    """
+
+    # Intents the rule-based translator can compile
+    SUPPORTED_INTENTS = ("search",)
+
+    # Entities each language can compile
+    SUPPORTED_ENTITIES = {"aql": ("order_by", "order", "limit"), "graphql": ("limit",)}
+
+    def __init__(self, query_language: str = "aql", fallback: Optional[TranslatorBase] = None,
+                 page_size: Optional[int] = 20):
+        """
+        Initialize the rule-based translator.
+
+        Args:
+            query_language (str): The language to compile to, "aql" or "graphql"
+            fallback (Optional[TranslatorBase]): Translator used for queries the rules do not fully cover
+            page_size (Optional[int]): The number of results displayed per page, used to bound AQL queries without a limit; None for no bound
+        """
+        if query_language not in ("aql", "graphql"):
+            raise ValueError(f"Unsupported query language: {query_language}")
+        super().__init__()
+        self.query_language = query_language
+        self.parameter_prefix = "@" if query_language == "aql" else "$"
+        self.fallback = fallback
+        self.page_size = page_size
+        self.cost_guard = GraphQLCostGuard() if query_language == "graphql" else None
+        self.stats = {"fast_path": 0, "fallback": 0}
+        self._lock = threading.Lock()
+
+    def translate(self, parsed_query: Dict[str, Any], llm_connector: Any) -> str:
+        """
+        Translate a parsed query, compiling it directly when the rules cover it.
+
+        Args:
+            parsed_query (Dict[str, Any]): The parsed query from NLParser
+            llm_connector (Any): Connector to the LLM service, used by the fallback translator
+
+        Returns:
+            str: The translated query string
+        """
+        if self.covers(parsed_query):
+            self._count("fast_path")
+            entities = parsed_query.get("entities") or {}
+            if self.query_language == "aql":
+                return self._compile_aql(parsed_query["filters"], entities=entities)
+            return self._compile_graphql(parsed_query["filters"], entities=entities)
+
+        if self.fallback is None:
+            raise ValueError("Query is not covered by the translation rules and no fallback translator is set")
+        self._count("fallback")
+        return self.fallback.translate(parsed_query, llm_connector)
+
+    def translate_parameterized(self, parsed_query: Dict[str, Any], llm_connector: Any,
+                                context: Optional[RequestContext] = None) -> Tuple[str, Dict[str, Any]]:
+        """
+        Translate a parsed query into query text plus bind parameters.
+
+        Covered queries are compiled with every filter value as a bind
+        parameter (AQL) or with the whole FileFilter as one variable
+        (GraphQL), so all queries with the same filter keys share one text.
+
+        Args:
+            parsed_query (Dict[str, Any]): The parsed query from NLParser
+            llm_connector (Any): Connector to the LLM service, used by the fallback translator
+            context (Optional[RequestContext]): The request's deadline and cancellation state
+
+        Returns:
+            Tuple[str, Dict[str, Any]]: The query text and its bind parameters
+        """
+        if context is not None:
+            context.check("translate")
+        if self.covers(parsed_query):
+            self._count("fast_path")
+            bind_vars = {}
+            entities = parsed_query.get("entities") or {}
+            if self.query_language == "aql":
+                return self._compile_aql(parsed_query["filters"], bind_vars, entities), bind_vars
+            return self._compile_graphql(parsed_query["filters"], bind_vars, entities), bind_vars
+
+        if self.fallback is None:
+            raise ValueError("Query is not covered by the translation rules and no fallback translator is set")
+        self._count("fallback")
+        return self.fallback.translate_parameterized(parsed_query, llm_connector, context)
+
+    def covers(self, parsed_query: Dict[str, Any]) -> bool:
+        """
+        Check whether the rules fully cover a parsed query.
+
+        A query is covered when its intent is supported, it has at least one
+        filter, every filter is one the rules know how to compile, every
+        entity is an ordering or limit the language can express, and NLParser
+        found no free-text terms it could not map to a filter.
+
+        Args:
+            parsed_query (Dict[str, Any]): The parsed query from NLParser
+
+        Returns:
+            bool: True if the query can be compiled without the LLM
+        """
+        filters = parsed_query.get("filters") or {}
+        return (
+            parsed_query.get("intent") in self.SUPPORTED_INTENTS
+            and bool(filters)
+            and all(key in FILTER_FIELDS for key in filters)
+            and all(key in self.SUPPORTED_ENTITIES[self.query_language] for key in parsed_query.get("entities") or {})
+            and not parsed_query.get("terms")
+        )
+
+    def validate_query(self, query: str) -> bool:
+        """
+        Validate the translated query.
+
+        Args:
+            query (str): The translated query
+
+        Returns:
+            bool: True if the query is valid, False otherwise
+        """
+        if self.fallback is not None:
+            return self.fallback.validate_query(query)
+        if self.query_language == "aql":
+            return is_valid_aql(query)
+        return self.cost_guard.is_valid(query)
+
+    def optimize_query(self, query: str) -> str:
+        """
+        Optimize the translated query.
+
+        Args:
+            query (str): The translated query
+
+        Returns:
+            str: The optimized query
+        """
+        if self.fallback is not None:
+            return self.fallback.optimize_query(query)
+        return query.strip()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get the fast-path counters.
+
+        Returns:
+            Dict[str, Any]: The fast-path and fallback counts and the fast-path coverage ratio
+        """
+        with self._lock:
+            stats = dict(self.stats)
+        total = stats["fast_path"] + stats["fallback"]
+        stats["coverage"] = stats["fast_path"] / total if total else 0.0
+        return stats
+
+    def _compile_aql(self, filters: Dict[str, Any], bind_vars: Optional[Dict[str, Any]] = None,
+                     entities: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Compile filters into an AQL query.
+
+        Args:
+            filters (Dict[str, Any]): The covered filters
+            bind_vars (Optional[Dict[str, Any]]): Receives the filter values as bind parameters, or None to inline them
+            entities (Optional[Dict[str, Any]]): The covered ordering and limit entities
+
+        Returns:
+            str: The AQL query
+        """
+        entities = entities or {}
+        lines = [f"FOR doc IN {OBJECTS_COLLECTION}"]
+        lines.extend(f"  FILTER {condition}" for condition in aql_filter_conditions(filters, bind_vars=bind_vars))
+        if entities.get("order_by"):
+            direction = "DESC" if entities.get("order") == "desc" else "ASC"
+            lines.append(f"  SORT doc.{entities['order_by']} {direction}")
+        limit = entities.get("limit", self.page_size)
+        if limit is not None:
+            lines.append(f"  LIMIT {int(limit)}")
+        lines.append("  RETURN doc")
+        return "\n".join(lines)
+
+    def _compile_graphql(self, filters: Dict[str, Any], variables: Optional[Dict[str, Any]] = None,
+                         entities: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Compile filters into a GraphQL query.
+
+        Args:
+            filters (Dict[str, Any]): The covered filters
+            variables (Optional[Dict[str, Any]]): Receives the FileFilter as the $filter variable, or None to inline it
+            entities (Optional[Dict[str, Any]]): The covered limit entity
+
+        Returns:
+            str: The GraphQL query
+        """
+        arguments = graphql_filter_arguments(filters)
+        selection = " ".join(FILE_FIELDS)
+        limit = (entities or {}).get("limit")
+        paging = f", limit: {int(limit)}" if limit is not None else ""
+        if variables is not None:
+            variables["filter"] = arguments
+            return f"query Files($filter: FileFilter) {{ files(filter: $filter{paging}) {{ {selection} }} }}"
+        rendered = ", ".join(f"{name}: {json.dumps(value)}" for name, value in arguments.items())
+        return f"query {{ files(filter: {{{rendered}}}{paging}) {{ {selection} }} }}"
+
+    def _count(self, counter: str) -> None:
+        """
+        Increment a counter.
+
+        Args:
+            counter (str): The name of the counter to increment
+        """
+        with self._lock:
+            self.stats[counter] += 1
+
+def aql_filter_conditions(filters: Dict[str, Any], variable: str = "doc",
+                          bind_vars: Optional[Dict[str, Any]] = None) -> List[str]:
+    """
+    Compile filters into AQL FILTER conditions.
+
+    Args:
+        filters (Dict[str, Any]): Filters keyed as in FILTER_FIELDS
+        variable (str): The loop variable bound to each file document
+        bind_vars (Optional[Dict[str, Any]]): Receives the values as bind parameters named after their filter keys (with a numeric suffix if a name is taken), or None to inline them
+
+    Returns:
+        List[str]: One condition per filter, in key order
+    """
+    def operand(key: str, value: Any) -> str:
+        if bind_vars is None:
+            return json.dumps(value)
+        name, suffix = key, 2
+        while name in bind_vars:
+            name, suffix = f"{key}_{suffix}", suffix + 1
+        bind_vars[name] = value
+        return f"@{name}"
+
+    conditions = []
+    for key in sorted(filters):
+        field, comparison = FILTER_FIELDS[key]
+        value = filters[key]
+        if comparison == "in":
+            values = value if isinstance(value, (list, tuple)) else [value]
+            conditions.append(f"{variable}.{field} IN {operand(key, [str(v).lower() for v in values])}")
+        elif comparison == "like":
+            # The escape character is escaped first, so that it does not escape the escapes added after it
+            pattern = (str(value).replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+                       .replace("*", "%").replace("?", "_"))
+            conditions.append(f"LIKE({variable}.{field}, {operand(key, pattern)}, true)")
+        elif comparison == "prefix":
+            conditions.append(f"STARTS_WITH({variable}.{field}, {operand(key, value)})")
+        else:
+            conditions.append(f"{variable}.{field} {comparison} {operand(key, value)}")
+    return conditions
+
+def graphql_filter_arguments(filters: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Compile filters into the fields of a GraphQL FileFilter input.
+
+    Args:
+        filters (Dict[str, Any]): Filters keyed as in FILTER_FIELDS
+
+    Returns:
+        Dict[str, Any]: FileFilter field name to value, in key order
+    """
+    arguments = {}
+    for key in sorted(filters):
+        value = filters[key]
+        if FILTER_FIELDS[key][1] == "in":
+            values = value if isinstance(value, (list, tuple)) else [value]
+            value = [str(v).lower() for v in values]
+        arguments[GRAPHQL_FILTER_ARGUMENTS[key]] = value
+    return arguments
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+from .translator_base import TranslatorBase
+from utils.disk_cache import DiskCache
+from utils.request_context import RequestContext
+
+class CachingTranslator(TranslatorBase):
+    """
+    Translation cache that wraps any TranslatorBase implementation.
+
+    Translations are keyed on a canonical form of the parsed query and the
+    target query language. Recent entries are kept in an in-memory LRU with a
+    TTL, backed by an on-disk store so that a restarted session can reuse
+    translations without asking the LLM again.
+    """
+
+    def __init__(self, translator: TranslatorBase, max_entries: int = 256, ttl: float = 3600.0,
+                 cache_path: Optional[str] = "translation_cache.db"):
+        """
+        Initialize the caching translator.
+
+        Args:
+            translator (TranslatorBase): The translator to delegate cache misses to
+            max_entries (int): The maximum number of translations kept in memory
+            ttl (float): Seconds a translation stays valid
+            cache_path (Optional[str]): Path of the on-disk store, or None to cache in memory only
+        """
+        super().__init__()
+        self.translator = translator
+        self.query_language = translator.query_language or type(translator).__name__
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.disk_cache = DiskCache(cache_path, ttl=ttl, max_entries=max_entries * 16) if cache_path else None
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "memory_hits": 0, "disk_hits": 0, "evictions": 0}
+
+    def translate(self, parsed_query: Dict[str, Any], llm_connector: Any) -> str:
+        """
+        Translate a parsed query, serving it from the cache when possible.
+
+        Args:
+            parsed_query (Dict[str, Any]): The parsed query from NLParser
+            llm_connector (Any): Connector to the LLM service
+
+        Returns:
+            str: The translated query string
+        """
+        key = self.make_key(parsed_query)
+        cached = self._lookup(key)
+        if cached is not None:
+            return cached
+
+        self._count("misses")
+        translated_query = self.translator.translate(parsed_query, llm_connector)
+        self._store(key, translated_query)
+        return translated_query
+
+    def translate_parameterized(self, parsed_query: Dict[str, Any], llm_connector: Any,
+                                context: Optional[RequestContext] = None) -> Tuple[str, Dict[str, Any]]:
+        """
+        Translate a parsed query into query text plus bind parameters, serving it from the cache when possible.
+
+        Args:
+            parsed_query (Dict[str, Any]): The parsed query from NLParser
+            llm_connector (Any): Connector to the LLM service
+            context (Optional[RequestContext]): The request's deadline and cancellation state
+
+        Returns:
+            Tuple[str, Dict[str, Any]]: The query text and its bind parameters
+        """
+        key = self.make_key(parsed_query, parameterized=True)
+        cached = self._lookup(key)
+        if cached is not None:
+            entry = json.loads(cached)
+            return entry["query"], entry["parameters"]
+
+        self._count("misses")
+        query, parameters = self.translator.translate_parameterized(parsed_query, llm_connector, context)
+        self._store(key, json.dumps({"query": query, "parameters": parameters}, default=str))
+        return query, parameters
+
+    async def translate_async(self, parsed_query: Dict[str, Any], llm_connector: Any) -> str:
+        """
+        Translate a parsed query with an asynchronous LLM connector, serving it from the cache when possible.
+
+        Args:
+            parsed_query (Dict[str, Any]): The parsed query from NLParser
+            llm_connector (Any): Asynchronous connector to the LLM service (an AsyncLLMBase)
+
+        Returns:
+            str: The translated query string
+        """
+        key = self.make_key(parsed_query)
+        cached = self._lookup(key)
+        if cached is not None:
+            return cached
+
+        self._count("misses")
+        translated_query = await self.translator.translate_async(parsed_query, llm_connector)
+        self._store(key, translated_query)
+        return translated_query
+
+    def validate_query(self, query: str) -> bool:
+        """
+        Validate the translated query using the wrapped translator.
+
+        Args:
+            query (str): The translated query
+
+        Returns:
+            bool: True if the query is valid, False otherwise
+        """
+        return self.translator.validate_query(query)
+
+    def optimize_query(self, query: str) -> str:
+        """
+        Optimize the translated query using the wrapped translator.
+
+        Args:
+            query (str): The translated query
+
+        Returns:
+            str: The optimized query
+        """
+        return self.translator.optimize_query(query)
+
+    def make_key(self, parsed_query: Dict[str, Any], parameterized: bool = False) -> str:
+        """
+        Build the cache key for a parsed query.
+
+        The original query text is case-folded and its whitespace collapsed,
+        and the remaining fields are serialized with sorted keys, so that
+        trivially different spellings of the same query share an entry.
+
+        Args:
+            parsed_query (Dict[str, Any]): The parsed query from NLParser
+            parameterized (bool): Whether the key is for a translation with separate bind parameters
+
+        Returns:
+            str: A hex digest identifying the query and target language
+        """
+        canonical = dict(parsed_query)
+        original = canonical.get("original_query")
+        if isinstance(original, str):
+            canonical["original_query"] = " ".join(original.lower().split())
+
+        key = {"language": self.query_language, "query": canonical}
+        if parameterized:
+            key["parameterized"] = True
+        payload = json.dumps(
+            key,
+            sort_keys=True, separators=(",", ":"), default=str
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get the cache hit/miss counters.
+
+        Returns:
+            Dict[str, Any]: The counters, the hit ratio and the number of entries held in memory
+        """
+        with self._lock:
+            stats = dict(self.stats)
+            stats["entries"] = len(self._entries)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+    def clear(self) -> None:
+        """
+        Drop all cached translations, in memory and on disk.
+        """
+        with self._lock:
+            self._entries.clear()
+        if self.disk_cache is not None:
+            self.disk_cache.clear()
+
+    def _lookup(self, key: str) -> Optional[str]:
+        """
+        Look up a translation in memory, then on disk, counting the hit.
+
+        Args:
+            key (str): The cache key
+
+        Returns:
+            Optional[str]: The cached translation, or None on a miss
+        """
+        cached = self._get_memory(key)
+        if cached is not None:
+            self._count("hits", "memory_hits")
+            return cached
+
+        if self.disk_cache is not None:
+            cached = self.disk_cache.get(key)
+            if cached is not None:
+                self._count("hits", "disk_hits")
+                self._put_memory(key, cached)
+                return cached
+        return None
+
+    def _store(self, key: str, translated_query: str) -> None:
+        """
+        Store a translation in memory and on disk.
+
+        Args:
+            key (str): The cache key
+            translated_query (str): The translated query
+        """
+        self._put_memory(key, translated_query)
+        if self.disk_cache is not None:
+            self.disk_cache.set(key, translated_query)
+
+    def _get_memory(self, key: str) -> Optional[str]:
+        """
+        Look up a translation in the in-memory LRU.
+
+        Args:
+            key (str): The cache key
+
+        Returns:
+            Optional[str]: The cached translation, or None if missing or expired
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, translated_query = entry
+            if time.monotonic() - stored_at > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return translated_query
+
+    def _put_memory(self, key: str, translated_query: str) -> None:
+        """
+        Store a translation in the in-memory LRU, evicting the oldest entries if needed.
+
+        Args:
+            key (str): The cache key
+            translated_query (str): The translated query
+        """
+        with self._lock:
+            self._entries[key] = (time.monotonic(), translated_query)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def _count(self, *counters: str) -> None:
+        """
+        Increment one or more counters.
+
+        Args:
+            *counters (str): The names of the counters to increment
+        """
+        with self._lock:
+            for counter in counters:
+                self.stats[counter] += 1
@@ -1,13 +1,43 @@
 #!/usr/bin/env python3
 
+import asyncio
+import json
+import re
+import threading
 from abc import ABC, abstractmethod
-from typing import Dict, Any
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+from utils.request_context import RequestContext
 
 class TranslatorBase(ABC):
     """
     Abstract base class for query translators.
+
+    Besides the abstract translation interface, the base class keeps a store
+    of learned query templates. Literals from the parsed query's entities and
+    filters are lifted into named parameters, and the query generated for one
+    query shape is reused for every later query with the same shape by
+    substituting the new parameter values.
     """
 
+    # Name of the query language the translator produces (e.g. "aql", "graphql")
+    query_language = ""
+
+    # Prefix used for parameter placeholders in generated queries
+    parameter_prefix = "@"
+
+    def __init__(self, max_templates: int = 512):
+        """
+        Initialize the translator's template store.
+
+        Args:
+            max_templates (int): The maximum number of query templates to keep
+        """
+        self.max_templates = max_templates
+        self.templates = OrderedDict()
+        self.template_stats = {"reused": 0, "learned": 0, "unparameterized": 0, "misses": 0}
+        self._template_lock = threading.Lock()
+
     @abstractmethod
     def translate(self, parsed_query: Dict[str, Any], llm_connector: Any) -> str:
         """
@@ -47,3 +77,248 @@ class TranslatorBase(ABC):
             str: The optimized query
         """
         pass
+
+    def translate_parameterized(self, parsed_query: Dict[str, Any], llm_connector: Any,
+                                context: Optional[RequestContext] = None) -> Tuple[str, Dict[str, Any]]:
+        """
+        Translate a parsed query into query text plus bind parameters.
+
+        Literal values are passed as bind parameters (AQL bindVars or GraphQL
+        variables) instead of being inlined, so queries of the same shape
+        share one query text and the database can reuse its plan for it.
+        This default implementation inlines everything.
+
+        Args:
+            parsed_query (Dict[str, Any]): The parsed query from NLParser
+            llm_connector (Any): Connector to the LLM service
+            context (Optional[RequestContext]): The request's deadline and cancellation state
+
+        Returns:
+            Tuple[str, Dict[str, Any]]: The query text and its bind parameters
+        """
+        if context is not None:
+            context.check("translate")
+        return self.translate(parsed_query, llm_connector), {}
+
+    async def translate_async(self, parsed_query: Dict[str, Any], llm_connector: Any) -> str:
+        """
+        Translate a parsed query using an asynchronous LLM connector.
+
+        Args:
+            parsed_query (Dict[str, Any]): The parsed query from NLParser
+            llm_connector (Any): Asynchronous connector to the LLM service (an AsyncLLMBase)
+
+        Returns:
+            str: The translated query string
+        """
+        shape, parameters = self._lift_parameters(parsed_query)
+        template = self._lookup_template(shape)
+        if template is not None:
+            return self._fill_template(template, parameters)
+
+        prompt = self._create_translation_prompt(parsed_query, parameters)
+        query = await llm_connector.generate_query(prompt)
+
+        if not self.validate_query(query):
+            raise ValueError(f"Generated {self.query_language} query is invalid")
+        query = self.optimize_query(query)
+        self._learn_template(shape, query, parameters)
+        return self._fill_template(query, parameters)
+
+    async def translate_many_async(self, parsed_queries: List[Dict[str, Any]], llm_connector: Any) -> List[str]:
+        """
+        Translate several parsed queries concurrently.
+
+        Args:
+            parsed_queries (List[Dict[str, Any]]): The parsed queries from NLParser
+            llm_connector (Any): Asynchronous connector to the LLM service (an AsyncLLMBase)
+
+        Returns:
+            List[str]: The translated queries, in the order of the input
+        """
+        return list(await asyncio.gather(
+            *(self.translate_async(parsed_query, llm_connector) for parsed_query in parsed_queries)
+        ))
+
+    def get_template_stats(self) -> Dict[str, Any]:
+        """
+        Get statistics about template reuse.
+
+        Returns:
+            Dict[str, Any]: The reuse/learn counters, the reuse ratio and the number of templates held
+        """
+        with self._template_lock:
+            stats = dict(self.template_stats)
+            stats["templates"] = len(self.templates)
+        lookups = stats["reused"] + stats["misses"]
+        stats["reuse_ratio"] = stats["reused"] / lookups if lookups else 0.0
+        return stats
+
+    def _generate_query(self, llm_connector: Any, prompt: str, context: Optional[RequestContext] = None) -> str:
+        """
+        Ask the LLM for a query, within the request's remaining budget.
+
+        Args:
+            llm_connector (Any): Connector to the LLM service
+            prompt (str): The translation prompt
+            context (Optional[RequestContext]): The request's deadline and cancellation state
+
+        Returns:
+            str: The generated query
+
+        Raises:
+            RequestCancelled: If the request is cancelled or out of time before the LLM answers
+        """
+        if context is None:
+            return llm_connector.generate_query(prompt)
+        return context.call("translate", llm_connector.generate_query, prompt)
+
+    def _lift_parameters(self, parsed_query: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+        """
+        Lift the literal values of a parsed query into named parameters.
+
+        Every scalar (or list of scalars) found in the entities and filters is
+        replaced by a slot named after its key path, e.g. "filters_file_type".
+        The returned shape identifies the query with its literals removed.
+        Free text outside the extracted structure still distinguishes one
+        shape from another: the parser's leftover terms are used when present,
+        otherwise the original query text with the literals replaced by their
+        slot names.
+
+        Args:
+            parsed_query (Dict[str, Any]): The parsed query from NLParser
+
+        Returns:
+            Tuple[str, Dict[str, Any]]: The template shape and the lifted parameter values
+        """
+        parameters = {}
+
+        def lift(value: Any, path: str) -> Any:
+            if isinstance(value, dict):
+                return {key: lift(value[key], f"{path}_{key}") for key in sorted(value)}
+            slot = re.sub(r"\W", "_", path)
+            parameters[slot] = value
+            return {"slot": slot, "type": type(value).__name__}
+
+        structure = {
+            "intent": parsed_query.get("intent"),
+            "entities": lift(parsed_query.get("entities") or {}, "entities"),
+            "filters": lift(parsed_query.get("filters") or {}, "filters"),
+        }
+
+        if "terms" in parsed_query:
+            # NLParser already separated the free text from the structure
+            structure["text"] = " ".join(parsed_query["terms"])
+            shape = json.dumps(structure, sort_keys=True, separators=(",", ":"), default=str)
+            return shape, parameters
+
+        text = " ".join(str(parsed_query.get("original_query", "")).lower().split())
+        for slot, value in parameters.items():
+            literals = value if isinstance(value, (list, tuple)) else [value]
+            for literal in literals:
+                if isinstance(literal, bool) or not isinstance(literal, (str, int, float)):
+                    continue
+                literal = str(literal).lower()
+                if literal:
+                    text = re.sub(rf"\b{re.escape(literal)}(?:e?s)?\b", "{" + slot + "}", text)
+        structure["text"] = text
+
+        shape = json.dumps(structure, sort_keys=True, separators=(",", ":"), default=str)
+        return shape, parameters
+
+    def _lookup_template(self, shape: str) -> Optional[str]:
+        """
+        Look up the learned template for a query shape.
+
+        Args:
+            shape (str): The template shape from _lift_parameters
+
+        Returns:
+            Optional[str]: The parameterized query, or None if the shape has not been seen
+        """
+        with self._template_lock:
+            template = self.templates.get(shape)
+            if template is None:
+                self.template_stats["misses"] += 1
+                return None
+            self.templates.move_to_end(shape)
+            self.template_stats["reused"] += 1
+            return template
+
+    def _learn_template(self, shape: str, query: str, parameters: Dict[str, Any]) -> None:
+        """
+        Remember a generated query as the template for its shape.
+
+        The query is only kept if it refers to every lifted parameter through a
+        placeholder; a query with inlined literals would be wrong for the next
+        query of the same shape.
+
+        Args:
+            shape (str): The template shape from _lift_parameters
+            query (str): The validated and optimized query generated by the LLM
+            parameters (Dict[str, Any]): The lifted parameter values
+        """
+        referenced = set(self._placeholder_pattern().findall(query))
+        with self._template_lock:
+            if not set(parameters) <= referenced:
+                self.template_stats["unparameterized"] += 1
+                return
+            self.templates[shape] = query
+            self.templates.move_to_end(shape)
+            self.template_stats["learned"] += 1
+            while len(self.templates) > self.max_templates:
+                self.templates.popitem(last=False)
+
+    def _bind_template(self, template: str, parameters: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+        """
+        Pair a template with the bind parameters it refers to.
+
+        Args:
+            template (str): The parameterized query
+            parameters (Dict[str, Any]): The parameter values
+
+        Returns:
+            Tuple[str, Dict[str, Any]]: The query text and the values of the placeholders it contains
+        """
+        referenced = set(self._placeholder_pattern().findall(template))
+        return template, {name: value for name, value in parameters.items() if name in referenced}
+
+    def _fill_template(self, template: str, parameters: Dict[str, Any]) -> str:
+        """
+        Substitute parameter values into a template.
+
+        Args:
+            template (str): The parameterized query
+            parameters (Dict[str, Any]): The parameter values
+
+        Returns:
+            str: The query with every known placeholder replaced by its literal value
+        """
+        def substitute(match: re.Match) -> str:
+            name = match.group(1)
+            if name not in parameters:
+                return match.group(0)
+            return self._format_literal(parameters[name])
+
+        return self._placeholder_pattern().sub(substitute, template)
+
+    def _format_literal(self, value: Any) -> str:
+        """
+        Format a parameter value as a literal of the target query language.
+
+        Args:
+            value (Any): The parameter value
+
+        Returns:
+            str: The literal
+        """
+        return json.dumps(value, default=str)
+
+    def _placeholder_pattern(self) -> re.Pattern:
+        """
+        Get the pattern matching parameter placeholders in the target query language.
+
+        Returns:
+            re.Pattern: A pattern whose first group is the parameter name
+        """
+        return re.compile(rf"(?<![\w@$]){re.escape(self.parameter_prefix)}(\w+)")
@@ -1,25 +1,39 @@
 #!/usr/bin/env python3
 
-from typing import List, Dict, Any
+import asyncio
+from collections import Counter
+from typing import List, Any, Optional
+from search_execution.search_result import SearchResult
+from utils.request_context import RequestContext
 
 class FacetGenerator:
     """
     Generates facets for query refinement based on search results.
     """
 
+    # Number of facets offered per facet kind (type, date, other metadata)
+    FACETS_PER_KIND = 2
+
     def __init__(self, max_facets: int = 5):
         self.max_facets = max_facets
 
-    def generate(self, analyzed_results: List[Dict[str, Any]]) -> List[str]:
+    def generate(self, analyzed_results: List[SearchResult],
+                 context: Optional[RequestContext] = None) -> List[str]:
         """
         Generate facets based on the analyzed search results.
 
+        Facets are optional and are skipped when the request's budget is
+        nearly spent.
+
         Args:
-            analyzed_results (List[Dict[str, Any]]): The analyzed search results
+            analyzed_results (List[SearchResult]): The analyzed search results
+            context (Optional[RequestContext]): The request's deadline and cancellation state
 
         Returns:
-            List[str]: A list of suggested facets for query refinement
+            List[str]: A list of suggested facets for query refinement, empty if they were skipped
         """
+        if context is not None and context.skip_optional("facets"):
+            return []
         facets = []
         facets.extend(self._generate_type_facets(analyzed_results))
         facets.extend(self._generate_date_facets(analyzed_results))
@@ -27,41 +41,94 @@ class FacetGenerator:
 
         return facets[:self.max_facets]
 
-    def _generate_type_facets(self, results: List[Dict[str, Any]]) -> List[str]:
+    def merge(self, facets: List[str], more: List[str]) -> List[str]:
+        """
+        Merge the facets generated for another batch of results.
+
+        Args:
+            facets (List[str]): The facets collected so far
+            more (List[str]): The facets of the next batch
+
+        Returns:
+            List[str]: The facets in first-seen order, at most max_facets of them
+        """
+        return list(dict.fromkeys(facets + more))[:self.max_facets]
+
+    async def generate_async(self, analyzed_results: List[SearchResult], llm_connector: Any) -> List[str]:
+        """
+        Generate facets, adding keyword facets extracted from the results concurrently.
+
+        Args:
+            analyzed_results (List[SearchResult]): The analyzed search results
+            llm_connector (Any): Asynchronous connector to the LLM service (an AsyncLLMBase)
+
+        Returns:
+            List[str]: A list of suggested facets for query refinement
+        """
+        facets = self.generate(analyzed_results)
+        if len(facets) >= self.max_facets:
+            return facets
+
+        texts = [result.summary for result in analyzed_results]
+        keyword_lists = await asyncio.gather(
+            *(llm_connector.extract_keywords(text) for text in texts if text)
+        )
+        counts = Counter(keyword.lower() for keywords in keyword_lists for keyword in keywords if keyword)
+        facets.extend(f"keyword:{keyword}" for keyword, _ in counts.most_common())
+
+        return facets[:self.max_facets]
+
+    def _generate_type_facets(self, results: List[SearchResult]) -> List[str]:
         """
         Generate facets based on file types in the results.
 
         Args:
-            results (List[Dict[str, Any]]): The analyzed search results
+            results (List[SearchResult]): The analyzed search results
 
         Returns:
             List[str]: Facets based on file types
         """
-        # Implement logic to generate file type facets
-        return []  # Placeholder
+        return self._common_values("extension", (result.extension for result in results))
 
-    def _generate_date_facets(self, results: List[Dict[str, Any]]) -> List[str]:
+    def _generate_date_facets(self, results: List[SearchResult]) -> List[str]:
         """
         Generate facets based on dates in the results.
 
         Args:
-            results (List[Dict[str, Any]]): The analyzed search results
+            results (List[SearchResult]): The analyzed search results
 
         Returns:
             List[str]: Facets based on dates
         """
-        # Implement logic to generate date-based facets
-        return []  # Placeholder
+        return self._common_values("modified", (result.modified[:4] for result in results if result.modified))
 
-    def _generate_metadata_facets(self, results: List[Dict[str, Any]]) -> List[str]:
+    def _generate_metadata_facets(self, results: List[SearchResult]) -> List[str]:
         """
         Generate facets based on other metadata in the results.
 
         Args:
-            results (List[Dict[str, Any]]): The analyzed search results
+            results (List[SearchResult]): The analyzed search results
 
         Returns:
             List[str]: Facets based on other metadata
         """
-        # Implement logic to generate metadata-based facets
-        return []  # Placeholder
+        return self._common_values("owner", (result.owner for result in results))
+
+    def _common_values(self, name: str, values: Any) -> List[str]:
+        """
+        Build facets for the most common values of a field.
+
+        Nothing is offered for a field with a single value, since selecting
+        it would not narrow the results.
+
+        Args:
+            name (str): The facet name, as understood by the query refiner
+            values (Any): The field's values in the results
+
+        Returns:
+            List[str]: "name:value" facets for the FACETS_PER_KIND most common values
+        """
+        counts = Counter(value for value in values if value)
+        if len(counts) < 2:
+            return []
+        return [f"{name}:{value}" for value, _ in counts.most_common(self.FACETS_PER_KIND)]
@@ -1,39 +1,105 @@
 #!/usr/bin/env python3
 
-from typing import List, Dict, Any
+import asyncio
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
+from search_execution.search_result import SearchResult
+from utils.request_context import RequestCancelled, RequestContext
 
 class MetadataAnalyzer:
     """
     Analyzes metadata of search results to extract useful information.
     """
 
-    def analyze(self, raw_results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def __init__(self, llm_connector: Any = None, summary_length: int = 100, num_keywords: int = 5):
+        """
+        Initialize the metadata analyzer.
+
+        Args:
+            llm_connector (Any): Connector to the LLM service (an LLMBase) used for summaries and keywords, or None to skip them
+            summary_length (int): The maximum length of each content summary
+            num_keywords (int): The number of keywords to extract per result
+        """
+        self.llm_connector = llm_connector
+        self.summary_length = summary_length
+        self.num_keywords = num_keywords
+
+    def analyze(self, raw_results: List[SearchResult],
+                context: Optional[RequestContext] = None) -> List[SearchResult]:
         """
         Analyze the metadata of the raw search results.
 
+        Summaries and keywords for the whole result set are requested through
+        the connector's batch APIs, so the number of LLM requests grows with
+        the number of batches rather than the number of results. The
+        analysis is filled into the results themselves rather than into
+        wrapping dictionaries.
+
+        Summaries and keywords are optional: they are skipped when the
+        request's budget is nearly spent, and abandoned if the LLM does not
+        answer within it, so the results are still returned in time.
+
+        Args:
+            raw_results (List[SearchResult]): The raw search results
+            context (Optional[RequestContext]): The request's deadline and cancellation state
+
+        Returns:
+            List[SearchResult]: The same results with relevance, summary, keywords and metadata set
+        """
+        summaries, keywords = self._summarize_batch(raw_results, context)
+
+        for result, summary, result_keywords in zip(raw_results, summaries, keywords):
+            metadata = self._extract_metadata(result)
+            result.metadata = metadata or None
+            result.summary = summary
+            result.keywords = result_keywords or None
+            result.relevance = self._calculate_relevance(result)
+        return raw_results
+
+    def analyze_stream(self, batches: Iterable[List[SearchResult]],
+                       context: Optional[RequestContext] = None) -> Iterator[List[SearchResult]]:
+        """
+        Analyze a stream of result batches, one batch at a time.
+
+        Each batch is analyzed as soon as it arrives, so the first results
+        can be shown while later batches are still being fetched, and only
+        one batch of raw results is held at a time.
+
+        Args:
+            batches (Iterable[List[SearchResult]]): The raw search results in batches
+            context (Optional[RequestContext]): The request's deadline and cancellation state
+
+        Returns:
+            Iterator[List[SearchResult]]: The analyzed results, one batch per input batch
+        """
+        for batch in batches:
+            yield self.analyze(batch, context)
+
+    async def analyze_async(self, raw_results: List[SearchResult], llm_connector: Any) -> List[SearchResult]:
+        """
+        Analyze the raw search results, summarizing their content concurrently.
+
         Args:
-            raw_results (List[Dict[str, Any]]): The raw search results
+            raw_results (List[SearchResult]): The raw search results
+            llm_connector (Any): Asynchronous connector to the LLM service (an AsyncLLMBase)
 
         Returns:
-            List[Dict[str, Any]]: The analyzed results with extracted metadata
+            List[SearchResult]: The same results with relevance, summary and metadata set
         """
-        analyzed_results = []
-        for result in raw_results:
-            analyzed_result = {
-                "original": result,
-                "extracted_metadata": self._extract_metadata(result),
-                "content_summary": self._summarize_content(result),
-                "relevance_score": self._calculate_relevance(result)
-            }
-            analyzed_results.append(analyzed_result)
-        return analyzed_results
+        summaries = await asyncio.gather(
+            *(self._summarize_content_async(result, llm_connector) for result in raw_results)
+        )
+        for result, summary in zip(raw_results, summaries):
+            result.metadata = self._extract_metadata(result) or None
+            result.summary = summary
+            result.relevance = self._calculate_relevance(result)
+        return raw_results
 
-    def _extract_metadata(self, result: Dict[str, Any]) -> Dict[str, Any]:
+    def _extract_metadata(self, result: SearchResult) -> Dict[str, Any]:
         """
         Extract useful metadata from a single result.
 
         Args:
-            result (Dict[str, Any]): A single search result
+            result (SearchResult): A single search result
 
         Returns:
             Dict[str, Any]: Extracted metadata
@@ -41,12 +107,12 @@ class MetadataAnalyzer:
         # Implement metadata extraction logic
         return {}  # Placeholder
 
-    def _summarize_content(self, result: Dict[str, Any]) -> str:
+    def _summarize_content(self, result: SearchResult) -> str:
         """
         Generate a summary of the content for a single result.
 
         Args:
-            result (Dict[str, Any]): A single search result
+            result (SearchResult): A single search result
 
         Returns:
             str: A summary of the content
@@ -54,12 +120,88 @@ class MetadataAnalyzer:
         # Implement content summarization logic
         return ""  # Placeholder
 
-    def _calculate_relevance(self, result: Dict[str, Any]) -> float:
+    def _summarize_batch(self, results: List[SearchResult],
+                         context: Optional[RequestContext] = None) -> Tuple[List[str], List[List[str]]]:
+        """
+        Summarize and extract keywords for a whole result set using the connector's batch APIs.
+
+        Args:
+            results (List[SearchResult]): The raw search results
+            context (Optional[RequestContext]): The request's deadline and cancellation state
+
+        Returns:
+            Tuple[List[str], List[List[str]]]: The summary and keywords of each result, in order; empty where they were shed
+        """
+        if self.llm_connector is None:
+            return [self._summarize_content(result) for result in results], [[] for _ in results]
+
+        texts = [self._result_text(result) for result in results]
+        with_text = [i for i, text in enumerate(texts) if text]
+        summaries = [""] * len(results)
+        keywords = [[] for _ in results]
+        if not with_text or (context is not None and context.skip_optional("summaries")):
+            return summaries, keywords
+
+        batch_texts = [texts[i] for i in with_text]
+        batch_summaries, batch_keywords = [], []
+        if context is None:
+            batch_summaries = self.llm_connector.summarize_batch(batch_texts, self.summary_length)
+            batch_keywords = self.llm_connector.extract_keywords_batch(batch_texts, self.num_keywords)
+        else:
+            # Keep whatever arrived before the budget ran out
+            try:
+                batch_summaries = context.call(
+                    "summaries", self.llm_connector.summarize_batch, batch_texts, self.summary_length
+                )
+                batch_keywords = context.call(
+                    "summaries", self.llm_connector.extract_keywords_batch, batch_texts, self.num_keywords
+                )
+            except RequestCancelled:
+                context.mark_shed("summaries")
+        for i, summary in zip(with_text, batch_summaries):
+            summaries[i] = summary
+        for i, result_keywords in zip(with_text, batch_keywords):
+            keywords[i] = result_keywords
+        return summaries, keywords
+
+    async def _summarize_content_async(self, result: SearchResult, llm_connector: Any) -> str:
+        """
+        Generate a summary of the content for a single result using an asynchronous LLM connector.
+
+        Args:
+            result (SearchResult): A single search result
+            llm_connector (Any): Asynchronous connector to the LLM service (an AsyncLLMBase)
+
+        Returns:
+            str: A summary of the content, or an empty string if the result has no text
+        """
+        text = self._result_text(result)
+        if not text:
+            return ""
+        return await llm_connector.summarize_text(text)
+
+    def _result_text(self, result: SearchResult) -> str:
+        """
+        Get the text of a single result that summaries and keywords are derived from.
+
+        Args:
+            result (SearchResult): A single search result
+
+        Returns:
+            str: The result's content or snippet, or an empty string if the record has neither
+        """
+        for key in ("content", "snippet"):
+            value = result.get(key)
+            if value:
+                return str(value)
+        return ""
+
+    def _calculate_relevance(self, result: SearchResult) -> float:
         """
         Calculate a relevance score for a single result.
 
         Args:
-            result (Dict[str, Any]): A single search result
+            result (SearchResult): A single search result
 
         Returns:
             float: A relevance score between 0 and 1
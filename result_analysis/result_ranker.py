@@ -1,21 +1,24 @@
 #!/usr/bin/env python3
 
-from typing import List, Dict, Any
+import heapq
+import itertools
+from typing import List, Optional
+from search_execution.search_result import SearchResult
 
 class ResultRanker:
     """
     Ranks the analyzed search results based on relevance and other factors.
     """
 
-    def rank(self, analyzed_results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def rank(self, analyzed_results: List[SearchResult]) -> List[SearchResult]:
         """
         Rank the analyzed search results.
 
         Args:
-            analyzed_results (List[Dict[str, Any]]): The analyzed search results
+            analyzed_results (List[SearchResult]): The analyzed search results
 
         Returns:
-            List[Dict[str, Any]]: The ranked search results
+            List[SearchResult]: The ranked search results
         """
         ranked_results = sorted(
             analyzed_results,
@@ -24,12 +27,32 @@ class ResultRanker:
         )
         return ranked_results
 
-    def _calculate_rank_score(self, result: Dict[str, Any]) -> float:
+    def merge_top(self, ranked: List[SearchResult], batch: List[SearchResult],
+                  limit: Optional[int] = None) -> List[SearchResult]:
+        """
+        Merge a batch of analyzed results into the best results seen so far.
+
+        Used when results are streamed: only the best limit results are
+        kept, so memory stays bounded by limit plus one batch.
+
+        Args:
+            ranked (List[SearchResult]): The ranked results kept so far
+            batch (List[SearchResult]): The next batch of analyzed results
+            limit (Optional[int]): The number of results to keep, or None to keep all
+
+        Returns:
+            List[SearchResult]: The ranked results, at most limit of them
+        """
+        if limit is None:
+            return self.rank(ranked + batch)
+        return heapq.nlargest(limit, itertools.chain(ranked, batch), key=self._calculate_rank_score)
+
+    def _calculate_rank_score(self, result: SearchResult) -> float:
         """
         Calculate a ranking score for a single result.
 
         Args:
-            result (Dict[str, Any]): A single analyzed result
+            result (SearchResult): A single analyzed result
 
         Returns:
             float: A ranking score
@@ -41,25 +64,24 @@ class ResultRanker:
         score += self._user_preference_score(result)
         return score
 
-    def _relevance_score(self, result: Dict[str, Any]) -> float:
+    def _relevance_score(self, result: SearchResult) -> float:
         """
         Calculate a score based on the result's relevance.
 
         Args:
-            result (Dict[str, Any]): A single analyzed result
+            result (SearchResult): A single analyzed result
 
         Returns:
             float: A relevance-based score
         """
-        # Implement relevance scoring logic
-        return 0.0  # Placeholder
+        return result.relevance
 
-    def _recency_score(self, result: Dict[str, Any]) -> float:
+    def _recency_score(self, result: SearchResult) -> float:
         """
         Calculate a score based on the result's recency.
 
         Args:
-            result (Dict[str, Any]): A single analyzed result
+            result (SearchResult): A single analyzed result
 
         Returns:
             float: A recency-based score
@@ -67,12 +89,12 @@ class ResultRanker:
         # Implement recency scoring logic
         return 0.0  # Placeholder
 
-    def _popularity_score(self, result: Dict[str, Any]) -> float:
+    def _popularity_score(self, result: SearchResult) -> float:
         """
         Calculate a score based on the result's popularity.
 
         Args:
-            result (Dict[str, Any]): A single analyzed result
+            result (SearchResult): A single analyzed result
 
         Returns:
             float: A popularity-based score
@@ -80,12 +102,12 @@ class ResultRanker:
         # Implement popularity scoring logic
         return 0.0  # Placeholder
 
-    def _user_preference_score(self, result: Dict[str, Any]) -> float:
+    def _user_preference_score(self, result: SearchResult) -> float:
         """
         Calculate a score based on user preferences.
 
         Args:
-            result (Dict[str, Any]): A single analyzed result
+            result (SearchResult): A single analyzed result
 
         Returns:
             float: A user preference-based score
@@ -1,30 +1,106 @@
 #!/usr/bin/env python3
 
-from typing import List, Dict, Any
-from .executor_base import ExecutorBase
+from typing import List, Dict, Any, Iterator, Optional, Tuple
+from .executor_base import ExecutorBase, DEFAULT_BATCH_SIZE
+from query_processing.query_translator.aql_parser import AQLSyntaxError, AQLToken, is_valid_aql, parse_aql
+from search_execution.search_result import SearchResult
+from utils.request_context import RequestContext
 
 class AQLExecutor(ExecutorBase):
     """
     Executor for AQL (ArangoDB Query Language) queries.
     """
 
-    def execute(self, query: str, data_connector: Any) -> List[Dict[str, Any]]:
+    def execute(self, query: str, data_connector: Any, parameters: Optional[Dict[str, Any]] = None,
+                context: Optional[RequestContext] = None) -> List[SearchResult]:
         """
         Execute an AQL query using the provided data connector.
 
         Args:
             query (str): The AQL query to execute
             data_connector (Any): The connector to the ArangoDB data source
+            parameters (Optional[Dict[str, Any]]): The values of the query's bind parameters
+            context (Optional[RequestContext]): The request's deadline and cancellation state
 
         Returns:
-            List[Dict[str, Any]]: The query results
+            List[SearchResult]: The query results
         """
         if not self.validate_query(query):
             raise ValueError("Invalid AQL query")
 
-        raw_results = data_connector.execute_aql(query)
+        raw_results = data_connector.execute_aql(query, parameters, context)
         return self.format_results(raw_results)
 
+    def execute_stream(self, query: str, data_connector: Any, batch_size: int = DEFAULT_BATCH_SIZE,
+                       parameters: Optional[Dict[str, Any]] = None,
+                       context: Optional[RequestContext] = None) -> Iterator[List[SearchResult]]:
+        """
+        Execute an AQL query and yield the results batch by batch from a server-side cursor.
+
+        The query is validated before this method returns; the cursor is
+        only opened when the first batch is requested.
+
+        Args:
+            query (str): The AQL query to execute
+            data_connector (Any): The connector to the ArangoDB data source
+            batch_size (int): The maximum number of results per batch
+            parameters (Optional[Dict[str, Any]]): The values of the query's bind parameters
+            context (Optional[RequestContext]): The request's deadline and cancellation state
+
+        Returns:
+            Iterator[List[SearchResult]]: The query results, one batch at a time
+        """
+        if not self.validate_query(query):
+            raise ValueError("Invalid AQL query")
+
+        batches = data_connector.cursor_aql(query, batch_size, parameters, context)
+        if context is not None:
+            # Stop at the deadline and keep the batches fetched so far
+            batches = context.bounded(batches, "execute")
+        return (self.format_results(batch) for batch in batches)
+
+    def result_order(self, query: str,
+                     parameters: Optional[Dict[str, Any]] = None) -> Tuple[List[Tuple[str, bool]], Optional[int]]:
+        """
+        Get the SORT and LIMIT that apply to the documents the query returns.
+
+        Only the operations after the last top-level FOR are read, and only
+        when the query returns that FOR's documents unchanged. A SORT counts
+        when every item is an attribute of the loop variable and no LIMIT
+        precedes it; the limit is the count of the last LIMIT, a number or a
+        bind parameter.
+
+        Args:
+            query (str): The AQL query
+            parameters (Optional[Dict[str, Any]]): The values of the query's bind parameters
+
+        Returns:
+            Tuple[List[Tuple[str, bool]], Optional[int]]: The sort fields, each with whether it is descending, and the limit, or None
+        """
+        try:
+            operations = parse_aql(query).operations
+        except AQLSyntaxError:
+            return [], None
+        loops = [index for index, operation in enumerate(operations) if operation.keyword == "FOR"]
+        if not loops or not operations[loops[-1]].tokens or operations[-1].keyword != "RETURN":
+            return [], None
+        variable = operations[loops[-1]].tokens[0].value
+        if operations[-1].tokens != [AQLToken("name", variable)]:
+            return [], None
+
+        order, limit = [], None
+        for operation in operations[loops[-1] + 1:-1]:
+            if operation.keyword == "SORT":
+                order = self._sort_fields(operation.tokens, variable) if limit is None else []
+            elif operation.keyword == "LIMIT":
+                count = self._limit_count(operation.tokens, parameters)
+                if count is None:
+                    return [], None
+                limit = count if limit is None else min(limit, count)
+            elif operation.keyword != "FILTER":
+                return [], None
+        return order, limit
+
     def validate_query(self, query: str) -> bool:
         """
         Validate the AQL query before execution.
@@ -35,20 +111,64 @@ class AQLExecutor(ExecutorBase):
         Returns:
             bool: True if the query is valid, False otherwise
         """
-        # Implement AQL query validation logic
-        # This is a placeholder implementation
-        return "FOR" in query and "RETURN" in query
+        return is_valid_aql(query)
+
+    def format_results(self, raw_results: Any) -> List[SearchResult]:
+        """
+        Format the raw AQL query results into search results.
+
+        Each file record of the batch is read directly into a SearchResult.
+
+        Args:
+            raw_results (Any): The file records returned by the AQL query execution
+
+        Returns:
+            List[SearchResult]: The formatted results
+        """
+        return [SearchResult.from_record(record) for record in raw_results]
+
+    def _sort_fields(self, tokens: List[AQLToken], variable: str) -> List[Tuple[str, bool]]:
+        """
+        Read the items of a SORT on attributes of the loop variable.
+
+        Args:
+            tokens (List[AQLToken]): The tokens following SORT
+            variable (str): The loop variable
+
+        Returns:
+            List[Tuple[str, bool]]: The fields, each with whether it is descending, or an empty list for any other SORT
+        """
+        items, item = [], []
+        for token in tokens + [AQLToken("op", ",")]:
+            if token != AQLToken("op", ","):
+                item.append(token)
+                continue
+            descending = False
+            if item and item[-1].kind == "keyword" and item[-1].value in ("ASC", "DESC"):
+                descending = item.pop().value == "DESC"
+            if (len(item) != 3 or item[0] != AQLToken("name", variable) or item[1] != AQLToken("op", ".")
+                    or item[2].kind not in ("name", "keyword")):
+                return []
+            items.append((item[2].value.strip("`"), descending))
+            item = []
+        return items
 
-    def format_results(self, raw_results: Any) -> List[Dict[str, Any]]:
+    def _limit_count(self, tokens: List[AQLToken], parameters: Optional[Dict[str, Any]]) -> Optional[int]:
         """
-        Format the raw AQL query results into a standardized format.
+        Read the count of a LIMIT, given as "count" or "offset, count".
 
         Args:
-            raw_results (Any): The raw results from the AQL query execution
+            tokens (List[AQLToken]): The tokens following LIMIT
+            parameters (Optional[Dict[str, Any]]): The values of the query's bind parameters
 
         Returns:
-            List[Dict[str, Any]]: The formatted results
+            Optional[int]: The count, or None if it is not a number or a bound parameter
         """
-        # Implement result formatting logic
-        # This is a placeholder implementation
-        return [{"result": str(item)} for item in raw_results]
+        token = tokens[-1] if tokens else None
+        if token is not None and token.kind == "number" and token.value.isdigit():
+            return int(token.value)
+        if token is not None and token.kind == "bind" and not token.value.startswith("@@"):
+            value = (parameters or {}).get(token.value[1:])
+            if isinstance(value, int) and not isinstance(value, bool):
+                return value
+        return None
@@ -1,7 +1,12 @@
 #!/usr/bin/env python3
 
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator, Optional, Tuple
+from search_execution.search_result import SearchResult
+from utils.request_context import RequestContext
+
+# Number of records fetched per round trip when streaming from a server-side cursor
+DEFAULT_BATCH_SIZE = 100
 
 class ExecutorBase(ABC):
     """
@@ -9,19 +14,63 @@ class ExecutorBase(ABC):
     """
 
     @abstractmethod
-    def execute(self, query: str, data_connector: Any) -> List[Dict[str, Any]]:
+    def execute(self, query: str, data_connector: Any, parameters: Optional[Dict[str, Any]] = None,
+                context: Optional[RequestContext] = None) -> List[SearchResult]:
         """
         Execute the query using the provided data connector.
 
         Args:
             query (str): The query to execute
             data_connector (Any): The connector to the data source
+            parameters (Optional[Dict[str, Any]]): The query's bind parameters (AQL bindVars or GraphQL variables)
+            context (Optional[RequestContext]): The request's deadline and cancellation state
 
         Returns:
-            List[Dict[str, Any]]: The query results
+            List[SearchResult]: The query results
         """
         pass
 
+    def execute_stream(self, query: str, data_connector: Any, batch_size: int = DEFAULT_BATCH_SIZE,
+                       parameters: Optional[Dict[str, Any]] = None,
+                       context: Optional[RequestContext] = None) -> Iterator[List[SearchResult]]:
+        """
+        Execute the query and yield the results in batches.
+
+        This default implementation materializes the whole result set and
+        slices it; executors whose data source has server-side cursors
+        override it so that only one batch is held at a time and a stream
+        cut short by the request's deadline still yields its first batches.
+
+        Args:
+            query (str): The query to execute
+            data_connector (Any): The connector to the data source
+            batch_size (int): The maximum number of results per batch
+            parameters (Optional[Dict[str, Any]]): The query's bind parameters (AQL bindVars or GraphQL variables)
+            context (Optional[RequestContext]): The request's deadline and cancellation state
+
+        Returns:
+            Iterator[List[SearchResult]]: The query results, one batch at a time
+        """
+        results = self.execute(query, data_connector, parameters, context)
+        return (results[start:start + batch_size] for start in range(0, len(results), batch_size))
+
+    def result_order(self, query: str,
+                     parameters: Optional[Dict[str, Any]] = None) -> Tuple[List[Tuple[str, bool]], Optional[int]]:
+        """
+        Get the order and the number of results the query asks for.
+
+        Executors that cannot read this from their query language return no
+        order and no limit.
+
+        Args:
+            query (str): The query
+            parameters (Optional[Dict[str, Any]]): The query's bind parameters
+
+        Returns:
+            Tuple[List[Tuple[str, bool]], Optional[int]]: The record fields the results are sorted by, each with whether the order is descending, and the maximum number of results, or None
+        """
+        return [], None
+
     @abstractmethod
     def validate_query(self, query: str) -> bool:
         """
@@ -36,7 +85,7 @@ class ExecutorBase(ABC):
         pass
 
     @abstractmethod
-    def format_results(self, raw_results: Any) -> List[Dict[str, Any]]:
+    def format_results(self, raw_results: Any) -> List[SearchResult]:
         """
         Format the raw query results into a standardized format.
 
@@ -44,6 +93,6 @@ class ExecutorBase(ABC):
             raw_results (Any): The raw results from the query execution
 
         Returns:
-            List[Dict[str, Any]]: The formatted results
+            List[SearchResult]: The formatted results
         """
         pass
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+
+import heapq
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Dict, Any, Callable, Iterable, List, Optional, Tuple
+from .executor_base import ExecutorBase, DEFAULT_BATCH_SIZE
+from data_access.local_metadata_store import sort_key
+from search_execution.search_result import SearchResult
+from utils.request_context import RequestContext
+
+class ShardTimeout(TimeoutError):
+    """
+    Raised when no shard answers a fanned-out query within the shard timeout.
+    """
+
+class _Descending:
+    """
+    Wraps a sort key so that larger values order first.
+    """
+
+    __slots__ = ("value",)
+
+    def __init__(self, value: Any):
+        """
+        Initialize the wrapper.
+
+        Args:
+            value (Any): The wrapped key
+        """
+        self.value = value
+
+    def __lt__(self, other: "_Descending") -> bool:
+        return other.value < self.value
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, _Descending) and self.value == other.value
+
+def order_key(order: List[Tuple[str, bool]]) -> Callable[[SearchResult], Tuple]:
+    """
+    Build the rank key of a query's sort order.
+
+    Args:
+        order (List[Tuple[str, bool]]): The sort fields, each with whether it is descending
+
+    Returns:
+        Callable[[SearchResult], Tuple]: Key of a result, higher for results the query sorts first
+    """
+    def key(result: SearchResult) -> Tuple:
+        return tuple(sort_key(result.get(field)) if descending else _Descending(sort_key(result.get(field)))
+                     for field, descending in order)
+    return key
+
+class FanoutExecutor(ExecutorBase):
+    """
+    Executes a query on every shard of the UPI metadata at once.
+
+    The data connector passed to execute is a list (or a name to connector
+    dict) of shards; a single connector is treated as one shard. The query is
+    sent to all shards concurrently through the wrapped executor, which reads
+    each shard's results batch by batch and keeps only that shard's best
+    results. The per-shard lists are then combined with a k-way heap merge,
+    so no more than the result limit per shard and in total is ever
+    materialized.
+
+    Results are ranked by rank_key when one is given, and otherwise by the
+    query's own sort order as the wrapped executor reads it
+    (ExecutorBase.result_order), so that the merged results are the ones a
+    single store holding every shard would return. The result limit is the
+    smaller of top_k and the query's own limit; with neither, every result
+    is returned. An offset in the query is applied by each shard, so paged
+    queries are not merged into the global page.
+
+    Shards that fail or do not answer within shard_timeout are left out and
+    the merged results of the others are returned; last_shards records which
+    shards contributed. Only when no shard answers is an error raised. The
+    wait is also bounded by the request's deadline, and a shard whose stream
+    is cut short by it contributes the results it has read.
+
+    Without a rank_key or a sort order known to the wrapped executor, each
+    shard's own result order is kept and the shards are interleaved by
+    position.
+    """
+
+    def __init__(self, executor: ExecutorBase, top_k: Optional[int] = 100, shard_timeout: float = 5.0,
+                 rank_key: Optional[Callable[[SearchResult], Any]] = None,
+                 batch_size: int = DEFAULT_BATCH_SIZE, max_workers: int = 16):
+        """
+        Initialize the fan-out executor.
+
+        Args:
+            executor (ExecutorBase): The executor for the shards' query language
+            top_k (Optional[int]): The maximum number of merged results to return, or None for no cap beyond the query's limit
+            shard_timeout (float): Seconds to wait for the shards before returning partial results
+            rank_key (Optional[Callable[[SearchResult], Any]]): Key of a result, higher is better, or None to rank by the query's sort order
+            batch_size (int): The number of results fetched per round trip from each shard
+            max_workers (int): The maximum number of shards queried at the same time
+        """
+        if top_k is not None and top_k < 1:
+            raise ValueError("top_k must be positive")
+        self.executor = executor
+        self.top_k = top_k
+        self.shard_timeout = shard_timeout
+        self.rank_key = rank_key
+        self.batch_size = batch_size
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="shard-fanout")
+        self.last_shards: Dict[str, str] = {}
+        self.stats = {"queries": 0, "partial_results": 0, "shard_timeouts": 0, "shard_failures": 0}
+        self._lock = threading.Lock()
+
+    @property
+    def last_cost(self) -> Any:
+        """
+        Get the estimated cost of the last query, if the wrapped executor computes one.
+
+        Returns:
+            Any: The wrapped executor's last_cost, or None
+        """
+        return getattr(self.executor, "last_cost", None)
+
+    def execute(self, query: str, data_connector: Any, parameters: Optional[Dict[str, Any]] = None,
+                context: Optional[RequestContext] = None) -> List[SearchResult]:
+        """
+        Execute the query on every shard and merge the results.
+
+        Args:
+            query (str): The query to execute
+            data_connector (Any): The shards, as a list or a name to connector dict, or a single connector
+            parameters (Optional[Dict[str, Any]]): The query's bind parameters, sent to every shard
+            context (Optional[RequestContext]): The request's deadline and cancellation state
+
+        Returns:
+            List[SearchResult]: The global best results, up to the result limit
+
+        Raises:
+            ShardTimeout: If no shard answers within the shard timeout
+            RequestCancelled: If no shard answers before the request is cancelled or out of time
+            Exception: The error of the first shard to fail, if every shard fails
+        """
+        if not self.validate_query(query):
+            raise ValueError("Invalid query")
+
+        shards = self._shards(data_connector)
+        order, count = self.executor.result_order(query, parameters)
+        rank_key = self.rank_key
+        if rank_key is None and order:
+            rank_key = order_key(order)
+        limits = [limit for limit in (self.top_k, count) if limit is not None]
+        limit = min(limits) if limits else None
+        futures = {
+            self.pool.submit(self._query_shard, query, connector, parameters, rank_key, limit, context): name
+            for name, connector in shards
+        }
+        if context is None:
+            done, pending = wait(futures, timeout=self.shard_timeout)
+        else:
+            done, pending = context.wait(futures, timeout=self.shard_timeout)
+
+        status = {}
+        errors = []
+        shard_results = []
+        for future, name in futures.items():
+            if future in pending:
+                # A running call cannot be interrupted; its result is discarded when it arrives
+                future.cancel()
+                status[name] = "timeout"
+            elif future.exception() is not None:
+                errors.append(future.exception())
+                status[name] = "failed"
+            else:
+                shard_results.append(future.result())
+                status[name] = "ok"
+
+        with self._lock:
+            self.last_shards = status
+            self.stats["queries"] += 1
+            self.stats["shard_timeouts"] += len(pending)
+            self.stats["shard_failures"] += len(errors)
+            if shard_results and len(shard_results) < len(shards):
+                self.stats["partial_results"] += 1
+
+        if not shard_results:
+            if context is not None:
+                context.check("execute")
+            if errors:
+                raise errors[0]
+            raise ShardTimeout(f"No shard answered within {self.shard_timeout} seconds")
+        if context is not None and len(shard_results) < len(shards):
+            context.mark_partial("execute")
+        return self._merge(shard_results, rank_key, limit)
+
+    def validate_query(self, query: str) -> bool:
+        """
+        Validate the query with the wrapped executor.
+
+        Args:
+            query (str): The query to validate
+
+        Returns:
+            bool: True if the query is valid, False otherwise
+        """
+        return self.executor.validate_query(query)
+
+    def format_results(self, raw_results: Any) -> List[SearchResult]:
+        """
+        Format raw results with the wrapped executor.
+
+        Args:
+            raw_results (Any): The raw results of one shard
+
+        Returns:
+            List[SearchResult]: The formatted results
+        """
+        return self.executor.format_results(raw_results)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get the fan-out counters.
+
+        Returns:
+            Dict[str, Any]: The number of queries, of queries answered by only some shards, and of shard timeouts and failures
+        """
+        with self._lock:
+            return dict(self.stats)
+
+    def shutdown(self) -> None:
+        """
+        Release the worker threads.
+        """
+        self.pool.shutdown(wait=False)
+
+    def _shards(self, data_connector: Any) -> List[Tuple[str, Any]]:
+        """
+        Get the named shards of a data connector argument.
+
+        Args:
+            data_connector (Any): A list or dict of connectors, or a single connector
+
+        Returns:
+            List[Tuple[str, Any]]: The name and connector of each shard
+        """
+        if isinstance(data_connector, dict):
+            shards = [(str(name), connector) for name, connector in data_connector.items()]
+        elif isinstance(data_connector, (list, tuple)):
+            shards = [(f"shard-{index}", connector) for index, connector in enumerate(data_connector)]
+        else:
+            shards = [("shard-0", data_connector)]
+        if not shards:
+            raise ValueError("At least one shard is required")
+        return shards
+
+    def _query_shard(self, query: str, connector: Any, parameters: Optional[Dict[str, Any]],
+                     rank_key: Optional[Callable[[SearchResult], Any]], limit: Optional[int],
+                     context: Optional[RequestContext] = None) -> List[Any]:
+        """
+        Query one shard and keep its best results.
+
+        Args:
+            query (str): The query to execute
+            connector (Any): The connector to the shard
+            parameters (Optional[Dict[str, Any]]): The query's bind parameters
+            rank_key (Optional[Callable[[SearchResult], Any]]): Key of a result, higher is better, or None to keep the shard's order
+            limit (Optional[int]): The number of results to keep, or None for all
+            context (Optional[RequestContext]): The request's deadline and cancellation state
+
+        Returns:
+            List[Any]: The shard's best results, best first, as (key, result) pairs when ranking by rank_key
+        """
+        results = itertools.chain.from_iterable(
+            self.executor.execute_stream(query, connector, self.batch_size, parameters, context)
+        )
+        if rank_key is None:
+            return list(itertools.islice(results, limit))
+        keyed = ((rank_key(result), result) for result in results)
+        if limit is None:
+            return sorted(keyed, key=lambda entry: entry[0], reverse=True)
+        return heapq.nlargest(limit, keyed, key=lambda entry: entry[0])
+
+    def _merge(self, shard_results: Iterable[List[Any]], rank_key: Optional[Callable[[SearchResult], Any]],
+               limit: Optional[int]) -> List[SearchResult]:
+        """
+        Merge the per-shard results into the global best results.
+
+        Args:
+            shard_results (Iterable[List[Any]]): The best results of each shard, best first
+            rank_key (Optional[Callable[[SearchResult], Any]]): The key the shard results were ranked by, or None
+            limit (Optional[int]): The number of results to return, or None for all
+
+        Returns:
+            List[SearchResult]: The global best results
+        """
+        if rank_key is None:
+            positioned = (enumerate(results) for results in shard_results)
+            merged = heapq.merge(*positioned, key=lambda entry: entry[0])
+            return [result for _, result in itertools.islice(merged, limit)]
+        merged = heapq.merge(*shard_results, key=lambda entry: entry[0], reverse=True)
+        return [result for _, result in itertools.islice(merged, limit)]
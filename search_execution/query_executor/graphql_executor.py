@@ -1,30 +1,83 @@
 #!/usr/bin/env python3
 
-from typing import List, Dict, Any
-from .executor_base import ExecutorBase
+from typing import List, Dict, Any, Iterator, Optional
+from .executor_base import ExecutorBase, DEFAULT_BATCH_SIZE
+from query_processing.query_translator.graphql_schema import GraphQLCost, GraphQLCostGuard
+from search_execution.search_result import SearchResult
+from utils.request_context import RequestContext
 
 class GraphQLExecutor(ExecutorBase):
     """
     Executor for GraphQL queries.
+
+    Queries are validated against the schema and their static cost is
+    checked before they are sent; the cost of the last query is kept in
+    last_cost so that it can be logged next to the measured latency.
     """
 
-    def execute(self, query: str, data_connector: Any) -> List[Dict[str, Any]]:
+    def __init__(self, cost_guard: Optional[GraphQLCostGuard] = None):
+        """
+        Initialize the GraphQL executor.
+
+        Args:
+            cost_guard (Optional[GraphQLCostGuard]): Schema validation and cost budget, or None for the UPI schema defaults
+        """
+        self.cost_guard = cost_guard or GraphQLCostGuard()
+        self.last_cost: Optional[GraphQLCost] = None
+
+    def execute(self, query: str, data_connector: Any, parameters: Optional[Dict[str, Any]] = None,
+                context: Optional[RequestContext] = None) -> List[SearchResult]:
         """
         Execute a GraphQL query using the provided data connector.
 
         Args:
             query (str): The GraphQL query to execute
             data_connector (Any): The connector to the GraphQL data source
+            parameters (Optional[Dict[str, Any]]): The values of the query's variables
+            context (Optional[RequestContext]): The request's deadline and cancellation state
 
         Returns:
-            List[Dict[str, Any]]: The query results
+            List[SearchResult]: The query results
         """
         if not self.validate_query(query):
             raise ValueError("Invalid GraphQL query")
 
-        raw_results = data_connector.execute_graphql(query)
+        # Reject or trim queries whose estimated cost exceeds the budget
+        query, self.last_cost = self.cost_guard.enforce(query, parameters)
+
+        raw_results = data_connector.execute_graphql(query, parameters, context)
         return self.format_results(raw_results)
 
+    def execute_stream(self, query: str, data_connector: Any, batch_size: int = DEFAULT_BATCH_SIZE,
+                       parameters: Optional[Dict[str, Any]] = None,
+                       context: Optional[RequestContext] = None) -> Iterator[List[SearchResult]]:
+        """
+        Execute a GraphQL query and yield the results batch by batch from a server-side cursor.
+
+        Validation and the cost check happen before this method returns, so
+        last_cost is set even if no batch is consumed.
+
+        Args:
+            query (str): The GraphQL query to execute
+            data_connector (Any): The connector to the GraphQL data source
+            batch_size (int): The maximum number of results per batch
+            parameters (Optional[Dict[str, Any]]): The values of the query's variables
+            context (Optional[RequestContext]): The request's deadline and cancellation state
+
+        Returns:
+            Iterator[List[SearchResult]]: The query results, one batch at a time
+        """
+        if not self.validate_query(query):
+            raise ValueError("Invalid GraphQL query")
+
+        query, self.last_cost = self.cost_guard.enforce(query, parameters)
+
+        batches = data_connector.cursor_graphql(query, batch_size, parameters, context)
+        if context is not None:
+            # Stop at the deadline and keep the batches fetched so far
+            batches = context.bounded(batches, "execute")
+        return (self.format_results(batch) for batch in batches)
+
     def validate_query(self, query: str) -> bool:
         """
         Validate the GraphQL query before execution.
@@ -35,20 +88,18 @@ class GraphQLExecutor(ExecutorBase):
         Returns:
             bool: True if the query is valid, False otherwise
         """
-        # Implement GraphQL query validation logic
-        # This is a placeholder implementation
-        return "query" in query or "mutation" in query
+        return self.cost_guard.is_valid(query)
 
-    def format_results(self, raw_results: Any) -> List[Dict[str, Any]]:
+    def format_results(self, raw_results: Any) -> List[SearchResult]:
         """
-        Format the raw GraphQL query results into a standardized format.
+        Format the raw GraphQL query results into search results.
+
+        Each file record of the batch is read directly into a SearchResult.
 
         Args:
-            raw_results (Any): The raw results from the GraphQL query execution
+            raw_results (Any): The file records returned by the GraphQL query execution
 
         Returns:
-            List[Dict[str, Any]]: The formatted results
+            List[SearchResult]: The formatted results
         """
-        # Implement result formatting logic
-        # This is a placeholder implementation
-        return [{"result": str(item)} for item in raw_results]
+        return [SearchResult.from_record(record) for record in raw_results]
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, Any, List, Optional, Tuple
+from query_processing.query_translator.translator_base import TranslatorBase
+from .executor_base import ExecutorBase
+from search_execution.search_result import SearchResult
+from utils.request_context import RequestCancelled, RequestContext
+
+class RaceCancelled(Exception):
+    """
+    Raised inside a losing backend when the race has already been decided.
+    """
+
+class RacingExecutor:
+    """
+    Speculatively translates and executes a query on several backends at once.
+
+    Every backend is a translator paired with the executor for its query
+    language. All of them run concurrently; the first to return a result set
+    without raising wins and the others are cancelled. A backend that has not
+    started yet is never started, and one that is still translating stops
+    before it sends its query to the data source. A call that is already in
+    flight cannot be interrupted from another thread, so its result is
+    discarded when it arrives. If no backend finishes before the request's
+    deadline or cancellation, the race is abandoned the same way.
+
+    Per-intent win counts and latencies are kept for every backend, including
+    the latencies of losers that finish after the race is decided.
+    """
+
+    def __init__(self, backends: Dict[str, Tuple[TranslatorBase, ExecutorBase]], history_size: int = 1000):
+        """
+        Initialize the racing executor.
+
+        Args:
+            backends (Dict[str, Tuple[TranslatorBase, ExecutorBase]]): Translator and executor for each backend name
+            history_size (int): The number of latency samples kept per intent and backend
+        """
+        if not backends:
+            raise ValueError("At least one backend is required")
+        self.backends = backends
+        self.history_size = history_size
+        self.pool = ThreadPoolExecutor(max_workers=2 * len(backends), thread_name_prefix="backend-race")
+        self.stats: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def run(self, parsed_query: Dict[str, Any], llm_connector: Any, data_connector: Any,
+            context: Optional[RequestContext] = None) -> Tuple[str, str, Dict[str, Any], List[SearchResult]]:
+        """
+        Race the backends on a parsed query.
+
+        Args:
+            parsed_query (Dict[str, Any]): The parsed query from NLParser
+            llm_connector (Any): Connector to the LLM service
+            data_connector (Any): The connector to the data source
+            context (Optional[RequestContext]): The request's deadline and cancellation state
+
+        Returns:
+            Tuple[str, str, Dict[str, Any], List[SearchResult]]: The winning backend, its translated query, the query's bind parameters and its results
+
+        Raises:
+            RequestCancelled: If no backend finishes before the request is cancelled or out of time
+            Exception: The error of the first backend to fail, if every backend fails
+        """
+        intent = parsed_query.get("intent") or "unknown"
+        cancelled = threading.Event()
+        futures = {
+            self.pool.submit(self._run_backend, name, parsed_query, llm_connector, data_connector,
+                             cancelled, context): name
+            for name in self.backends
+        }
+        for future, name in futures.items():
+            future.add_done_callback(lambda done, name=name: self._record_finish(intent, name, done))
+
+        errors = []
+        pending = set(futures)
+        while pending:
+            if context is None:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            else:
+                done, pending = context.wait(pending, return_when=FIRST_COMPLETED)
+                if not done:
+                    cancelled.set()
+                    for loser in pending:
+                        loser.cancel()
+                    self._record_race(intent, None)
+                    context.check("race")
+            for future in done:
+                if future.exception() is not None:
+                    errors.append(future.exception())
+                    continue
+                cancelled.set()
+                for loser in pending:
+                    loser.cancel()
+                self._record_race(intent, futures[future])
+                translated_query, parameters, results = future.result()[1:]
+                return futures[future], translated_query, parameters, results
+        self._record_race(intent, None)
+        raise errors[0]
+
+    def get_stats(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """
+        Get the per-intent race statistics.
+
+        Returns:
+            Dict[str, Dict[str, Dict[str, Any]]]: For each intent and backend the races, wins, win rate, failures and mean and p95 latency in seconds
+        """
+        with self._lock:
+            snapshot = {
+                intent: {name: dict(entry, latencies=list(entry["latencies"])) for name, entry in backends.items()}
+                for intent, backends in self.stats.items()
+            }
+        for backends in snapshot.values():
+            for entry in backends.values():
+                latencies = sorted(entry.pop("latencies"))
+                entry["win_rate"] = entry["wins"] / entry["races"] if entry["races"] else 0.0
+                entry["mean_latency"] = sum(latencies) / len(latencies) if latencies else 0.0
+                entry["p95_latency"] = latencies[int(0.95 * (len(latencies) - 1))] if latencies else 0.0
+        return snapshot
+
+    def shutdown(self) -> None:
+        """
+        Stop the worker threads once the running backends have finished.
+        """
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+    def _run_backend(self, name: str, parsed_query: Dict[str, Any], llm_connector: Any, data_connector: Any,
+                     cancelled: threading.Event,
+                     context: Optional[RequestContext] = None) -> Tuple[float, str, Dict[str, Any], List[SearchResult]]:
+        """
+        Translate and execute a query on one backend.
+
+        Args:
+            name (str): The backend name
+            parsed_query (Dict[str, Any]): The parsed query from NLParser
+            llm_connector (Any): Connector to the LLM service
+            data_connector (Any): The connector to the data source
+            cancelled (threading.Event): Set once another backend has won
+            context (Optional[RequestContext]): The request's deadline and cancellation state
+
+        Returns:
+            Tuple[float, str, Dict[str, Any], List[SearchResult]]: The elapsed time, the translated query, its bind parameters and the results
+        """
+        translator, executor = self.backends[name]
+        start_time = time.perf_counter()
+        translated_query, parameters = translator.translate_parameterized(parsed_query, llm_connector, context)
+        if cancelled.is_set():
+            raise RaceCancelled(name)
+        results = executor.execute(translated_query, data_connector, parameters, context)
+        return time.perf_counter() - start_time, translated_query, parameters, results
+
+    def _entry(self, intent: str, name: str) -> Dict[str, Any]:
+        """
+        Get the statistics entry of a backend for an intent; the caller holds the lock.
+
+        Args:
+            intent (str): The query intent
+            name (str): The backend name
+
+        Returns:
+            Dict[str, Any]: The mutable statistics entry
+        """
+        backends = self.stats.setdefault(intent, {})
+        if name not in backends:
+            backends[name] = {"races": 0, "wins": 0, "failures": 0, "latencies": deque(maxlen=self.history_size)}
+        return backends[name]
+
+    def _record_race(self, intent: str, winner: Optional[str]) -> None:
+        """
+        Count a race and its winner.
+
+        Args:
+            intent (str): The query intent
+            winner (Optional[str]): The winning backend, or None if every backend failed or the request stopped first
+        """
+        with self._lock:
+            for backend in self.backends:
+                self._entry(intent, backend)["races"] += 1
+            if winner is not None:
+                self._entry(intent, winner)["wins"] += 1
+
+    def _record_finish(self, intent: str, name: str, future: Any) -> None:
+        """
+        Record the latency or failure of a backend once it finishes.
+
+        Args:
+            intent (str): The query intent
+            name (str): The backend name
+            future (Any): The finished future of the backend
+        """
+        if future.cancelled() or isinstance(future.exception(), (RaceCancelled, RequestCancelled)):
+            return
+        with self._lock:
+            entry = self._entry(intent, name)
+            if future.exception() is not None:
+                entry["failures"] += 1
+            else:
+                entry["latencies"].append(future.result()[0])
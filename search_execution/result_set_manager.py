@@ -0,0 +1,809 @@
+#!/usr/bin/env python3
+
+import hashlib
+import json
+import mmap
+import re
+import sys
+import tempfile
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from collections.abc import Mapping, Sequence
+from datetime import datetime, timedelta
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple, Union
+from utils.disk_cache import DiskCache
+from utils.request_context import RequestContext
+from .search_result import SearchResult
+
+EPOCH = datetime(1970, 1, 1)
+
+TIMESTAMP_PATTERN = re.compile(r"\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(?:\.\d{6})?")
+
+# Number of distinct values above which a string column stops being dictionary-encoded
+MAX_DICTIONARY_SIZE = 1024
+
+# Per-row states kept in a column's mask
+ABSENT, PRESENT, NULL = 0, 1, 2
+
+class _Column:
+    """
+    One column of a ColumnarResultSet.
+
+    Kinds and their storage:
+        int: signed 64-bit array
+        float: double array
+        time: ISO-8601 timestamps as microseconds since the epoch in a signed 64-bit array
+        text: dictionary-encoded strings, codes in an unsigned 32-bit array
+        blob: UTF-8 strings concatenated in a byte buffer, with end offsets in an unsigned 64-bit array
+        group: nested dictionaries, whose keys are columns of their own; only the mask is used
+        object: anything else, as a list of Python objects
+    """
+
+    __slots__ = ("kind", "mask", "data", "table", "codes", "blob")
+
+    def __init__(self, kind: str):
+        self.kind = kind
+        self.mask = bytearray()
+        self.data = {"int": array("q"), "float": array("d"), "time": array("q"), "text": array("I"),
+                     "blob": array("Q"), "group": None, "object": []}[kind]
+        self.table: List[str] = [] if kind == "text" else None
+        self.codes: Dict[str, int] = {} if kind == "text" else None
+        self.blob = bytearray() if kind == "blob" else None
+
+    def append(self, state: int, value: Any = None) -> None:
+        """
+        Append a row; the value must be of the column's kind unless the state is ABSENT or NULL.
+
+        Args:
+            state (int): ABSENT, PRESENT or NULL
+            value (Any): The value, for PRESENT rows
+        """
+        self.mask.append(state)
+        kind = self.kind
+        if kind == "group":
+            return
+        if kind == "object":
+            self.data.append(value if state == PRESENT else None)
+        elif state != PRESENT:
+            if kind == "blob":
+                self.data.append(len(self.blob))
+            else:
+                self.data.append(0)
+        elif kind == "time":
+            self.data.append((datetime.fromisoformat(value) - EPOCH) // timedelta(microseconds=1))
+        elif kind == "text":
+            code = self.codes.get(value)
+            if code is None:
+                code = self.codes[value] = len(self.table)
+                self.table.append(sys.intern(value))
+            self.data.append(code)
+        elif kind == "blob":
+            self.blob += value.encode("utf-8")
+            self.data.append(len(self.blob))
+        else:
+            self.data.append(value)
+
+    def get(self, index: int) -> Any:
+        """
+        Decode the value of a row.
+
+        Args:
+            index (int): The row index
+
+        Returns:
+            Any: The value, or None for ABSENT and NULL rows
+        """
+        if self.mask[index] != PRESENT:
+            return None
+        kind = self.kind
+        if kind == "time":
+            return (EPOCH + timedelta(microseconds=self.data[index])).isoformat()
+        if kind == "text":
+            return self.table[self.data[index]]
+        if kind == "blob":
+            start = self.data[index - 1] if index else 0
+            return bytes(self.blob[start:self.data[index]]).decode("utf-8")
+        return self.data[index]
+
+    def nbytes(self) -> int:
+        """
+        Estimate the memory held by the column, excluding spilled buffers.
+
+        Returns:
+            int: The size in bytes
+        """
+        total = 0
+        for buffer in (self.mask, self.data, self.blob):
+            if isinstance(buffer, (bytearray, array)):
+                total += len(buffer) * (buffer.itemsize if isinstance(buffer, array) else 1)
+            elif isinstance(buffer, list):
+                total += sys.getsizeof(buffer) + sum(sys.getsizeof(value) for value in buffer if value is not None)
+        if self.table is not None:
+            total += sys.getsizeof(self.table) + sum(sys.getsizeof(value) for value in self.table)
+        return total
+
+def _value_kind(value: Any) -> str:
+    """
+    Get the column kind a value is stored as.
+
+    Args:
+        value (Any): A non-None value
+
+    Returns:
+        str: "int", "float", "time", "text", "group" or "object"
+    """
+    if isinstance(value, bool):
+        return "object"
+    if isinstance(value, int):
+        return "int" if -2 ** 63 <= value < 2 ** 63 else "object"
+    if isinstance(value, float):
+        return "float"
+    if isinstance(value, str):
+        if TIMESTAMP_PATTERN.fullmatch(value) and datetime.fromisoformat(value).isoformat() == value:
+            return "time"
+        return "text"
+    if isinstance(value, Mapping):
+        return "group"
+    return "object"
+
+def _encode(value: Any) -> Any:
+    """
+    Encode a value json cannot serialize by itself.
+
+    Args:
+        value (Any): The value
+
+    Returns:
+        Any: The fields of a SearchResult, or the value's string form
+    """
+    if isinstance(value, SearchResult):
+        return value.to_dict()
+    return str(value)
+
+class ColumnarResultSet(Sequence):
+    """
+    Immutable, column-oriented storage for a result set.
+
+    Each field of the results becomes a typed column: integers, floats and
+    ISO-8601 timestamps in arrays, repeated strings dictionary-encoded with
+    interned values, mostly-distinct strings packed as UTF-8 into a single
+    buffer, and nested dictionaries (such as the "original" record of an
+    analyzed result) as columns of their own. Only values that fit none of
+    these, and fields that are nested dictionaries in some rows but not in
+    others, are kept as Python objects.
+
+    Indexing returns lightweight read-only row views that behave like the
+    original dictionaries (get, keys, items, nested access, equality), so
+    existing consumers work unchanged; a result set built from SearchResults
+    returns a fresh SearchResult per row instead. Result sets with more than
+    spill_rows rows move their arrays to memory-mapped temporary files,
+    leaving paging to the operating system.
+    """
+
+    def __init__(self, rows: Iterable[Mapping] = (), spill_rows: int = 10000, spill_dir: Optional[str] = None):
+        """
+        Build the result set.
+
+        Args:
+            rows (Iterable[Mapping]): The results, as mappings or SearchResults; they are read once and not retained
+            spill_rows (int): The number of rows above which the columns are spilled to memory-mapped files
+            spill_dir (Optional[str]): The directory for spill files, or None for the system default
+        """
+        self._columns: Dict[Tuple[str, ...], _Column] = {}
+        self._children: Dict[Tuple[str, ...], List[str]] = {(): []}
+        self._length = 0
+        self._spill_files = []
+        self._views = []
+        self._records = False
+        for row in rows:
+            self._records = self._records or isinstance(row, SearchResult)
+            self._append(row, ())
+            self._length += 1
+            for column in self._columns.values():
+                if len(column.mask) < self._length:
+                    column.append(ABSENT)
+        for column in self._columns.values():
+            column.codes = None
+        if self._length > spill_rows:
+            self._spill(spill_dir)
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, index: Union[int, slice]) -> Union["ResultRow", SearchResult, List[Any]]:
+        if isinstance(index, slice):
+            return [self._row(i) for i in range(*index.indices(self._length))]
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("result index out of range")
+        return self._row(index)
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, Sequence) or isinstance(other, (str, bytes)):
+            return NotImplemented
+        return len(self) == len(other) and all(row == value for row, value in zip(self, other))
+
+    def __repr__(self) -> str:
+        return f"ColumnarResultSet({self._length} rows, {len(self._columns)} columns)"
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        """
+        Materialize the results as dictionaries.
+
+        Returns:
+            List[Dict[str, Any]]: The results
+        """
+        return [row.to_dict() for row in self]
+
+    def nbytes(self) -> int:
+        """
+        Estimate the memory held by the result set, excluding spilled buffers.
+
+        Returns:
+            int: The size in bytes
+        """
+        return sum(column.nbytes() for column in self._columns.values())
+
+    @property
+    def spilled(self) -> bool:
+        """
+        Whether the columns live in memory-mapped files.
+
+        Returns:
+            bool: True if the result set was spilled
+        """
+        return bool(self._spill_files)
+
+    @property
+    def records(self) -> bool:
+        """
+        Whether the rows are returned as SearchResults.
+
+        Returns:
+            bool: True if the result set was built from SearchResults
+        """
+        return self._records
+
+    def close(self) -> None:
+        """
+        Release the spill files; the result set must not be used afterwards.
+        """
+        for view in self._views:
+            view.release()
+        for mapped, handle in self._spill_files:
+            mapped.close()
+            handle.close()
+        self._views = []
+        self._spill_files = []
+
+    def _row(self, index: int) -> Union["ResultRow", SearchResult]:
+        """
+        Get one row in the form the result set was built from.
+
+        Args:
+            index (int): The row index
+
+        Returns:
+            Union[ResultRow, SearchResult]: A view of the row, or a SearchResult read from it
+        """
+        row = ResultRow(self, index, ())
+        return SearchResult.from_record(row) if self._records else row
+
+    def _append(self, row: Mapping, prefix: Tuple[str, ...]) -> None:
+        """
+        Append the fields of a (possibly nested) row to the columns.
+
+        Args:
+            row (Mapping): The row, or a nested dictionary of it
+            prefix (Tuple[str, ...]): The path of the nested dictionary
+        """
+        for key, value in row.items():
+            path = prefix + (key,)
+            kind = "object" if value is None else _value_kind(value)
+            column = self._columns.get(path)
+            if column is None:
+                column = self._add_column(path, "text" if kind == "object" and value is None else kind)
+            elif value is not None and column.kind != kind:
+                column = self._coerce(path, column, kind, value)
+
+            if value is None:
+                column.append(NULL)
+            elif column.kind == "group":
+                column.append(PRESENT)
+                self._append(value, path)
+            else:
+                column.append(PRESENT, value)
+                if column.kind == "text" and len(column.table) > MAX_DICTIONARY_SIZE and len(column.table) * 2 > len(column.mask):
+                    self._rebuild(path, column, "blob")
+
+    def _add_column(self, path: Tuple[str, ...], kind: str) -> _Column:
+        """
+        Add a column, marking the rows before the current one as absent.
+
+        Args:
+            path (Tuple[str, ...]): The path of the field
+            kind (str): The column kind
+
+        Returns:
+            _Column: The new column
+        """
+        column = self._columns[path] = _Column(kind)
+        self._children[path[:-1]].append(path[-1])
+        if kind == "group":
+            self._children[path] = []
+        for _ in range(self._length):
+            column.append(ABSENT)
+        return column
+
+    def _coerce(self, path: Tuple[str, ...], column: _Column, kind: str, value: Any) -> _Column:
+        """
+        Convert a column so that it can hold a value of another kind.
+
+        Args:
+            path (Tuple[str, ...]): The path of the field
+            column (_Column): The column
+            kind (str): The kind of the new value
+            value (Any): The new value
+
+        Returns:
+            _Column: The column to append the value to
+        """
+        if PRESENT not in column.mask:
+            # Only absent and null rows so far, so the column can take any kind
+            return self._rebuild(path, column, kind)
+        if column.kind in ("text", "blob") and kind in ("text", "time"):
+            return column
+        if column.kind == "time" and kind == "text":
+            return self._rebuild(path, column, "text")
+        if column.kind == "object":
+            return column
+        if column.kind == "group":
+            # A field that is a nested dictionary in some rows and not in others is kept as Python objects
+            return self._ungroup(path, column)
+        return self._rebuild(path, column, "object")
+
+    def _rebuild(self, path: Tuple[str, ...], column: _Column, kind: str) -> _Column:
+        """
+        Re-encode a column as another kind.
+
+        Args:
+            path (Tuple[str, ...]): The path of the field
+            column (_Column): The column
+            kind (str): The new kind
+
+        Returns:
+            _Column: The re-encoded column
+        """
+        rebuilt = _Column(kind)
+        if kind == "group":
+            self._children.setdefault(path, [])
+        for index, state in enumerate(column.mask):
+            rebuilt.append(state, column.get(index))
+        self._columns[path] = rebuilt
+        return rebuilt
+
+    def _ungroup(self, path: Tuple[str, ...], column: _Column) -> _Column:
+        """
+        Replace a group column and its nested columns by an object column of materialized dictionaries.
+
+        Args:
+            path (Tuple[str, ...]): The path of the field
+            column (_Column): The group column
+
+        Returns:
+            _Column: The object column
+        """
+        rebuilt = _Column("object")
+        for index, state in enumerate(column.mask):
+            rebuilt.append(state, ResultRow(self, index, path).to_dict() if state == PRESENT else None)
+        for nested in [nested for nested in self._columns if nested[:len(path)] == path and len(nested) > len(path)]:
+            del self._columns[nested]
+        for nested in [nested for nested in self._children if nested[:len(path)] == path]:
+            del self._children[nested]
+        self._columns[path] = rebuilt
+        return rebuilt
+
+    def _spill(self, spill_dir: Optional[str]) -> None:
+        """
+        Move the column buffers to memory-mapped temporary files.
+
+        Args:
+            spill_dir (Optional[str]): The directory for spill files, or None for the system default
+        """
+        for column in self._columns.values():
+            column.mask = self._map(column.mask, "B", spill_dir)
+            if isinstance(column.data, array):
+                column.data = self._map(column.data, column.data.typecode, spill_dir)
+            if column.blob is not None:
+                column.blob = self._map(column.blob, "B", spill_dir)
+
+    def _map(self, buffer: Union[array, bytearray], typecode: str, spill_dir: Optional[str]) -> Union[memoryview, array, bytearray]:
+        """
+        Write a buffer to a temporary file and map it back read-only.
+
+        Args:
+            buffer (Union[array, bytearray]): The buffer to spill
+            typecode (str): The array typecode of its items
+            spill_dir (Optional[str]): The directory for spill files, or None for the system default
+
+        Returns:
+            Union[memoryview, array, bytearray]: A typed view of the mapped file, or the buffer itself if it is empty
+        """
+        if not len(buffer):
+            return buffer
+        handle = tempfile.TemporaryFile(dir=spill_dir)
+        handle.write(memoryview(buffer).cast("B"))
+        handle.flush()
+        mapped = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(mapped).cast(typecode)
+        self._spill_files.append((mapped, handle))
+        self._views.append(view)
+        return view
+
+class ResultRow(Mapping):
+    """
+    Read-only dictionary view of one row (or one nested dictionary of a row) of a ColumnarResultSet.
+    """
+
+    __slots__ = ("_results", "_index", "_prefix")
+
+    def __init__(self, results: ColumnarResultSet, index: int, prefix: Tuple[str, ...]):
+        self._results = results
+        self._index = index
+        self._prefix = prefix
+
+    def __getitem__(self, key: str) -> Any:
+        path = self._prefix + (key,)
+        column = self._results._columns.get(path)
+        if column is None or column.mask[self._index] == ABSENT:
+            raise KeyError(key)
+        if column.kind == "group" and column.mask[self._index] == PRESENT:
+            return ResultRow(self._results, self._index, path)
+        return column.get(self._index)
+
+    def __iter__(self) -> Iterator[str]:
+        columns = self._results._columns
+        for key in self._results._children[self._prefix]:
+            if columns[self._prefix + (key,)].mask[self._index] != ABSENT:
+                yield key
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        return repr(self.to_dict())
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Materialize the row as a dictionary.
+
+        Returns:
+            Dict[str, Any]: The row, with nested dictionaries materialized too
+        """
+        return {key: value.to_dict() if isinstance(value, ResultRow) else value for key, value in self.items()}
+
+class ResultSetManager:
+    """
+    Cache of query result sets.
+
+    Result sets are keyed on the executed query text (whitespace collapsed),
+    its bind parameters and its query language. Each entry records the
+    collection version the data connector reported when it was stored; a
+    lookup under a different version drops the entry, so writes to the UPI
+    collections invalidate every result set computed before them. Connectors
+    that cannot report a version are cached for ttl seconds only.
+
+    Entries are kept in an in-memory LRU of ColumnarResultSets, bounded by
+    entry count and by their memory footprint, and optionally in an on-disk
+    store so that a later session can reuse them. Cache hits return the
+    ColumnarResultSet, whose rows read like the original dictionaries.
+    Results that a request's deadline cut short are returned but not stored.
+    """
+
+    def __init__(self, max_entries: int = 256, max_bytes: int = 64 * 1024 * 1024, ttl: float = 300.0,
+                 cache_path: Optional[str] = None, spill_rows: int = 10000):
+        """
+        Initialize the result set manager.
+
+        Args:
+            max_entries (int): The maximum number of result sets kept in memory
+            max_bytes (int): The maximum total size of the result sets kept in memory
+            ttl (float): Seconds a result set stays valid when the connector reports no collection version
+            cache_path (Optional[str]): Path of the on-disk store, or None to cache in memory only
+            spill_rows (int): The number of rows above which a cached result set is spilled to memory-mapped files
+        """
+        self.max_entries = max_entries
+        self.spill_rows = spill_rows
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.disk_cache = DiskCache(cache_path, max_entries=max_entries * 16, max_bytes=max_bytes * 4) if cache_path else None
+
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "memory_hits": 0, "disk_hits": 0,
+                      "invalidations": 0, "evictions": 0, "uncacheable": 0, "partial": 0}
+
+    def execute(self, executor: Any, query: str, data_connector: Any,
+                parameters: Optional[Dict[str, Any]] = None, query_language: Optional[str] = None,
+                context: Optional[RequestContext] = None) -> Sequence[Mapping[str, Any]]:
+        """
+        Execute a query, serving its results from the cache when possible.
+
+        Args:
+            executor (Any): The executor to run cache misses with (an ExecutorBase)
+            query (str): The query to execute
+            data_connector (Any): The connector to the data source, or a list or dict of shard connectors
+            parameters (Optional[Dict[str, Any]]): The query's bind parameters
+            query_language (Optional[str]): The query language, or None to use the executor's class name
+            context (Optional[RequestContext]): The request's deadline and cancellation state
+
+        Returns:
+            Sequence[Mapping[str, Any]]: The query results; a ColumnarResultSet when served from the cache
+        """
+        key = self.make_key(query, parameters, query_language or type(executor).__name__)
+        version = self.collection_version(data_connector)
+        cached = self.get(key, version)
+        if cached is not None:
+            return cached
+
+        partial = len(context.partial) if context is not None else 0
+        results = executor.execute(query, data_connector, parameters, context)
+        if context is not None and len(context.partial) > partial:
+            # Results cut short by the deadline would be served as complete later
+            self._count("partial")
+            return results
+        self.put(key, version, results)
+        return results
+
+    def execute_stream(self, executor: Any, query: str, data_connector: Any, batch_size: int,
+                       parameters: Optional[Dict[str, Any]] = None, query_language: Optional[str] = None,
+                       context: Optional[RequestContext] = None) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Execute a query in batches, serving cached results when possible.
+
+        A cached result set is returned in batches of batch_size. A miss is
+        streamed from the executor, and a copy of each batch is taken as it
+        is yielded; the result set is stored once the stream is exhausted,
+        unless the request's deadline or cancellation cut it short or the
+        consumer stopped reading.
+
+        Args:
+            executor (Any): The executor to run cache misses with (an ExecutorBase)
+            query (str): The query to execute
+            data_connector (Any): The connector to the data source, or a list or dict of shard connectors
+            batch_size (int): The maximum number of results per batch
+            parameters (Optional[Dict[str, Any]]): The query's bind parameters
+            query_language (Optional[str]): The query language, or None to use the executor's class name
+            context (Optional[RequestContext]): The request's deadline and cancellation state
+
+        Returns:
+            Iterator[List[Dict[str, Any]]]: The query results, one batch at a time
+        """
+        key = self.make_key(query, parameters, query_language or type(executor).__name__)
+        version = self.collection_version(data_connector)
+        cached = self.get(key, version)
+        if cached is not None:
+            return (cached[start:start + batch_size] for start in range(0, len(cached), batch_size))
+
+        partial = len(context.partial) if context is not None else 0
+        batches = executor.execute_stream(query, data_connector, batch_size, parameters, context)
+        return self._store_stream(key, version, batches, partial, context)
+
+    def make_key(self, query: str, parameters: Optional[Dict[str, Any]] = None,
+                 query_language: Optional[str] = None) -> str:
+        """
+        Build the cache key for a query.
+
+        Args:
+            query (str): The query text
+            parameters (Optional[Dict[str, Any]]): The query's bind parameters
+            query_language (Optional[str]): The query language
+
+        Returns:
+            str: A hex digest identifying the query
+        """
+        payload = json.dumps(
+            {"language": query_language, "query": " ".join(query.split()), "parameters": parameters or {}},
+            sort_keys=True, separators=(",", ":"), default=str
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def collection_version(self, data_connector: Any) -> Optional[str]:
+        """
+        Get the collection version reported by a data connector.
+
+        Args:
+            data_connector (Any): The connector, or a list or dict of shard connectors
+
+        Returns:
+            Optional[str]: The version or etag, combined over all shards, or None if any connector cannot report one
+        """
+        if isinstance(data_connector, dict):
+            connectors = list(data_connector.values())
+        elif isinstance(data_connector, (list, tuple)):
+            connectors = list(data_connector)
+        else:
+            connectors = [data_connector]
+
+        versions = []
+        for connector in connectors:
+            report = getattr(connector, "collection_version", None)
+            version = report() if callable(report) else None
+            if version is None:
+                return None
+            versions.append(str(version))
+        return "|".join(versions)
+
+    def get(self, key: str, version: Optional[str]) -> Optional[ColumnarResultSet]:
+        """
+        Look up a result set, counting the hit or miss.
+
+        Args:
+            key (str): The cache key
+            version (Optional[str]): The current collection version, or None if unknown
+
+        Returns:
+            Optional[ColumnarResultSet]: The cached results, or None on a miss
+        """
+        cached, stale = self._get_memory(key, version)
+        if cached is not None:
+            self._count("hits", "memory_hits")
+            return cached
+
+        if self.disk_cache is not None and version is not None:
+            stored = self.disk_cache.get(key)
+            if stored is not None:
+                entry = json.loads(stored)
+                if entry["version"] == version:
+                    self._count("hits", "disk_hits")
+                    results = entry["results"]
+                    if entry.get("records"):
+                        results = (SearchResult.from_record(result) for result in results)
+                    return self._put_memory(key, version, ColumnarResultSet(results, self.spill_rows))
+                self.disk_cache.delete(key)
+                if not stale:
+                    # Counted already if the in-memory copy was dropped as stale
+                    self._count("invalidations")
+
+        self._count("misses")
+        return None
+
+    def put(self, key: str, version: Optional[str], results: Sequence[Mapping[str, Any]]) -> None:
+        """
+        Store a result set.
+
+        Result sets whose columnar form is larger than max_bytes are not stored. Without a version
+        the entry is kept in memory only, since its age cannot be checked
+        against the collection across sessions.
+
+        Args:
+            key (str): The cache key
+            version (Optional[str]): The collection version the results were computed at, or None if unknown
+            results (Sequence[Mapping[str, Any]]): The query results
+        """
+        columnar = ColumnarResultSet(results, self.spill_rows)
+        if columnar.nbytes() > self.max_bytes:
+            self._count("uncacheable")
+            return
+        self._put_memory(key, version, columnar)
+        if self.disk_cache is not None and version is not None:
+            entry = {"version": version, "records": columnar.records, "results": results}
+            self.disk_cache.set(key, json.dumps(entry, separators=(",", ":"), default=_encode))
+
+    def invalidate(self) -> None:
+        """
+        Drop all cached result sets, in memory and on disk.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+        if self.disk_cache is not None:
+            self.disk_cache.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get the cache counters.
+
+        Returns:
+            Dict[str, Any]: The counters, the hit ratio, and the number of entries and bytes held in memory
+        """
+        with self._lock:
+            stats = dict(self.stats)
+            stats["entries"] = len(self._entries)
+            stats["bytes"] = self._bytes
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+    def _store_stream(self, key: str, version: Optional[str], batches: Iterable[List[Any]], partial: int,
+                      context: Optional[RequestContext] = None) -> Iterator[List[Any]]:
+        """
+        Pass a streamed miss through and store it once it is complete.
+
+        Each row is copied when its batch is yielded, so that analysis of the
+        yielded results does not reach the cached ones.
+
+        Args:
+            key (str): The cache key
+            version (Optional[str]): The collection version when the query was started, or None if unknown
+            batches (Iterable[List[Any]]): The executor's batches
+            partial (int): The number of stages the context had marked partial before the query started
+            context (Optional[RequestContext]): The request's deadline and cancellation state
+
+        Returns:
+            Iterator[List[Any]]: The batches, unchanged
+        """
+        rows = []
+        for batch in batches:
+            rows.extend(SearchResult.from_record(row.to_dict()) if isinstance(row, SearchResult) else dict(row)
+                        for row in batch)
+            yield batch
+        if context is not None and (context.cancelled or len(context.partial) > partial):
+            # Results cut short by the deadline would be served as complete later
+            self._count("partial")
+            return
+        self.put(key, version, rows)
+
+    def _get_memory(self, key: str, version: Optional[str]) -> Tuple[Optional[ColumnarResultSet], bool]:
+        """
+        Look up a result set in the in-memory LRU, dropping it if it is stale.
+
+        Args:
+            key (str): The cache key
+            version (Optional[str]): The current collection version, or None if unknown
+
+        Returns:
+            Tuple[Optional[ColumnarResultSet], bool]: The cached results, or None if missing or stale, and whether a stale entry was dropped
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None, False
+            stored_at, stored_version, size, results = entry
+            if stored_version != version or (version is None and time.monotonic() - stored_at > self.ttl):
+                del self._entries[key]
+                self._bytes -= size
+                self.stats["invalidations"] += 1
+                return None, True
+            self._entries.move_to_end(key)
+            return results, False
+
+    def _put_memory(self, key: str, version: Optional[str], results: ColumnarResultSet) -> ColumnarResultSet:
+        """
+        Store a result set in the in-memory LRU, evicting the oldest entries if needed.
+
+        Args:
+            key (str): The cache key
+            version (Optional[str]): The collection version of the results
+            results (ColumnarResultSet): The query results
+
+        Returns:
+            ColumnarResultSet: The stored results
+        """
+        size = results.nbytes()
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[2]
+            self._entries[key] = (time.monotonic(), version, size, results)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted[2]
+                self.stats["evictions"] += 1
+        return results
+
+    def _count(self, *counters: str) -> None:
+        """
+        Increment one or more counters.
+
+        Args:
+            *counters (str): The names of the counters to increment
+        """
+        with self._lock:
+            for counter in counters:
+                self.stats[counter] += 1
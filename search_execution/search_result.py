@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+
+from collections.abc import Mapping
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+from data_access.upi_schema import FILE_FIELDS
+
+# Record keys read into SearchResult slots: the document key and the file metadata fields
+RECORD_FIELDS = ("_key",) + tuple(FILE_FIELDS)
+
+_RECORD_KEYS = frozenset(RECORD_FIELDS)
+
+class SearchResult:
+    """
+    One search result: a file metadata record plus what analysis adds to it.
+
+    Executors build results straight from the records of a cursor batch;
+    the metadata fields are read into slots, and only fields outside
+    upi_schema.FILE_FIELDS are kept, in a dictionary of extras allocated
+    when a record has any. The analyzer then fills in relevance, summary,
+    keywords and metadata on the same object, and the ranker, facet
+    generator and interfaces read the attributes directly.
+
+    items() and get() expose the fields like a dictionary's, which is how a
+    ColumnarResultSet stores and restores results.
+    """
+
+    __slots__ = ("key", "name", "path", "extension", "size", "created", "modified", "accessed", "owner",
+                 "relevance", "summary", "keywords", "metadata", "extra")
+
+    def __init__(self, key: Optional[str] = None, name: Optional[str] = None, path: Optional[str] = None,
+                 extension: Optional[str] = None, size: Optional[int] = None, created: Optional[str] = None,
+                 modified: Optional[str] = None, accessed: Optional[str] = None, owner: Optional[str] = None,
+                 relevance: float = 0.0, summary: str = "", keywords: Optional[List[str]] = None,
+                 metadata: Optional[Dict[str, Any]] = None, extra: Optional[Dict[str, Any]] = None):
+        """
+        Initialize a search result.
+
+        Args:
+            key (Optional[str]): The document key of the file record
+            name (Optional[str]): The file name including the extension
+            path (Optional[str]): The full path of the file
+            extension (Optional[str]): The lower-case extension without the leading dot
+            size (Optional[int]): The size in bytes
+            created (Optional[str]): The ISO-8601 creation timestamp
+            modified (Optional[str]): The ISO-8601 last modification timestamp
+            accessed (Optional[str]): The ISO-8601 last access timestamp
+            owner (Optional[str]): The owning user name
+            relevance (float): The relevance score between 0 and 1
+            summary (str): The summary of the file's content
+            keywords (Optional[List[str]]): The keywords extracted from the file's content
+            metadata (Optional[Dict[str, Any]]): Metadata extracted by analysis
+            extra (Optional[Dict[str, Any]]): Record fields outside the file metadata schema
+        """
+        self.key = key
+        self.name = name
+        self.path = path
+        self.extension = extension
+        self.size = size
+        self.created = created
+        self.modified = modified
+        self.accessed = accessed
+        self.owner = owner
+        self.relevance = relevance
+        self.summary = summary
+        self.keywords = keywords
+        self.metadata = metadata
+        self.extra = extra
+
+    @classmethod
+    def from_record(cls, record: Mapping) -> "SearchResult":
+        """
+        Build a result from a backend record without copying the record.
+
+        Records produced by items() (for example rows of a cached
+        ColumnarResultSet) carry the analysis fields too, and get them back.
+
+        Args:
+            record (Mapping): A file metadata record as returned by the UPI service
+
+        Returns:
+            SearchResult: The result
+        """
+        get = record.get
+        result = cls.__new__(cls)
+        result.key = get("_key")
+        result.name = get("name")
+        result.path = get("path")
+        result.extension = get("extension")
+        result.size = get("size")
+        result.created = get("created")
+        result.modified = get("modified")
+        result.accessed = get("accessed")
+        result.owner = get("owner")
+        result.relevance = 0.0
+        result.summary = ""
+        result.keywords = None
+        result.metadata = None
+        result.extra = None
+        if not record.keys() <= _RECORD_KEYS:
+            extra = {key: value for key, value in record.items() if key not in _RECORD_KEYS}
+            result.relevance = extra.pop("relevance", 0.0)
+            result.summary = extra.pop("summary", "")
+            keywords = extra.pop("keywords", None)
+            result.keywords = None if keywords is None else list(keywords)
+            metadata = extra.pop("metadata", None)
+            result.metadata = None if metadata is None else dict(metadata)
+            result.extra = extra or None
+        return result
+
+    @property
+    def title(self) -> str:
+        """
+        Get the title to display for the result.
+
+        Returns:
+            str: The file name, or the path or key if the record has no name
+        """
+        return self.name or self.path or str(self.key or "")
+
+    @property
+    def snippet(self) -> str:
+        """
+        Get the text to display under the title.
+
+        Returns:
+            str: The content summary, or the record's own snippet field if there is no summary
+        """
+        return self.summary or str(self.get("snippet", ""))
+
+    def get(self, field: str, default: Any = None) -> Any:
+        """
+        Get a field by its record name.
+
+        Args:
+            field (str): A record field name, an analysis field name, or an extra field name
+            default (Any): The value to return if the field is missing or None
+
+        Returns:
+            Any: The field's value, or default
+        """
+        if field == "_key":
+            value = self.key
+        elif field in self.__slots__ and field != "extra":
+            value = getattr(self, field)
+        else:
+            value = self.extra.get(field) if self.extra else None
+        return default if value is None else value
+
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        """
+        Iterate over the fields that are set, under their record names.
+
+        Returns:
+            Iterator[Tuple[str, Any]]: The record fields, then the analysis fields, then the extra fields
+        """
+        for field, value in zip(RECORD_FIELDS, (self.key, self.name, self.path, self.extension, self.size,
+                                                self.created, self.modified, self.accessed, self.owner)):
+            if value is not None:
+                yield field, value
+        if self.relevance:
+            yield "relevance", self.relevance
+        if self.summary:
+            yield "summary", self.summary
+        if self.keywords is not None:
+            yield "keywords", self.keywords
+        if self.metadata is not None:
+            yield "metadata", self.metadata
+        if self.extra:
+            yield from self.extra.items()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Get the fields that are set as a dictionary.
+
+        Returns:
+            Dict[str, Any]: The fields, as from items()
+        """
+        return dict(self.items())
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, SearchResult):
+            return self.to_dict() == other.to_dict()
+        if isinstance(other, Mapping):
+            return self.to_dict() == dict(other.items())
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"SearchResult({self.to_dict()!r})"
@@ -0,0 +1,77 @@
+import pytest
+
+from data_access.local_metadata_store import LocalMetadataStore
+from data_access.local_upi_connector import LocalUPIConnector
+from query_processing.query_translator.aql_optimizer import AQLOptimizer
+from query_processing.query_translator.aql_parser import AQLSyntaxError, AQLToken, is_valid_aql, parse_aql, tokenize_aql
+
+QUERIES = [
+    "FOR doc IN Objects SORT doc.modified DESC FILTER doc.extension IN ['pdf'] RETURN doc",
+    "FOR doc IN Objects LET owners = (FOR u IN Users RETURN u.name) "
+    "FILTER LIKE(doc.name, 'report%') AND 1000 < doc.size FILTER doc.owner IN owners RETURN doc",
+    "FOR doc IN Objects FILTER doc.size > 1048576 LIMIT 5 RETURN doc",
+    "for doc in Objects filter doc.filter == 1 return {sort: doc.sort, `limit`: doc.limit}",
+    "FOR doc IN Objects FILTER doc.a == 1 || doc.b == 2 RETURN doc",
+    "FOR doc IN Objects FILTER doc.name == 'it''s \\\\ \"quoted\"' RETURN doc",
+]
+
+@pytest.mark.parametrize("query", QUERIES)
+def test_rendered_query_parses_back_to_itself(query):
+    rendered = parse_aql(query).to_aql()
+    assert parse_aql(rendered).to_aql() == rendered
+    assert tokenize_aql(rendered) == tokenize_aql(query.replace("for ", "FOR ").replace(" in ", " IN ")
+                                                    .replace(" filter ", " FILTER ").replace(" return ", " RETURN "))
+
+@pytest.mark.parametrize("query", QUERIES)
+def test_optimized_query_is_valid_and_stable(query):
+    optimizer = AQLOptimizer()
+    optimized = optimizer.optimize(query)
+    assert is_valid_aql(optimized)
+    assert optimizer.optimize(optimized) == optimized
+
+def test_optimizer_rewrites_for_index_use():
+    optimized = AQLOptimizer().optimize(QUERIES[1]).split("\n")
+    assert optimized[0] == "LET owners = ("
+    assert optimized[4:] == [
+        "FOR doc IN Objects", "FILTER LIKE(doc.name, 'report%')", "FILTER doc.size > 1000",
+        "FILTER doc.owner IN owners", "LIMIT 20", "RETURN doc",
+    ]
+    assert AQLOptimizer().optimize(QUERIES[0]).split("\n") == [
+        "FOR doc IN Objects", "FILTER doc.extension == 'pdf'", "SORT doc.modified DESC", "LIMIT 20", "RETURN doc",
+    ]
+
+def test_existing_limit_is_kept_and_disjunctions_are_not_split():
+    assert "LIMIT 20" not in AQLOptimizer().optimize(QUERIES[2])
+    assert "FILTER doc.a == 1 || doc.b == 2" in AQLOptimizer().optimize(QUERIES[4])
+    assert "LIMIT" not in AQLOptimizer(page_size=None).optimize(QUERIES[4])
+
+@pytest.mark.parametrize("query", [
+    "FOR doc IN Objects SORT doc.size DESC FILTER doc.extension IN ['pdf'] FILTER 100 <= doc.size RETURN doc",
+    "FOR doc IN Objects FILTER doc.extension == 'txt' AND doc.size < 500 SORT doc.name RETURN doc",
+    "FOR doc IN Objects SORT doc.name FILTER LIKE(doc.name, 'f1%', true) RETURN doc",
+])
+def test_optimized_query_returns_the_same_results(query):
+    records = [{"_key": str(index), "name": f"f{index}", "extension": ("pdf", "txt")[index % 2], "size": index * 7 % 1000}
+               for index in range(300)]
+    connector = LocalUPIConnector(LocalMetadataStore(records))
+    optimized = AQLOptimizer(page_size=None).optimize(query)
+    assert optimized != parse_aql(query).to_aql()
+    assert connector.execute_aql(optimized) == connector.execute_aql(query)
+
+def test_keyword_like_names_stay_names():
+    assert tokenize_aql("doc.filter")[2] == AQLToken("name", "filter")
+    assert tokenize_aql("{sort: 1}")[1] == AQLToken("name", "sort")
+    assert tokenize_aql("FOR x IN y SORT x")[4] == AQLToken("keyword", "SORT")
+
+@pytest.mark.parametrize("query", [
+    "FOR doc IN Objects FILTER (doc.a RETURN doc",
+    "FOR doc IN",
+])
+def test_malformed_query_is_rejected(query):
+    with pytest.raises(AQLSyntaxError):
+        parse_aql(query)
+    assert not is_valid_aql(query)
+
+def test_modifying_query_is_not_valid():
+    assert not is_valid_aql("FOR doc IN Objects REMOVE doc IN Objects")
+    assert not is_valid_aql("FOR doc IN Objects LET x = (FOR u IN Users UPDATE u WITH {a: 1} IN Users) RETURN doc")
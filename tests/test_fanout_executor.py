@@ -0,0 +1,75 @@
+import random
+
+import pytest
+
+from data_access.local_metadata_store import LocalMetadataStore
+from data_access.local_upi_connector import LocalUPIConnector
+from search_execution.query_executor.aql_executor import AQLExecutor
+from search_execution.query_executor.fanout_executor import FanoutExecutor
+
+@pytest.fixture
+def records():
+    rnd = random.Random(1)
+    return [
+        {
+            "_key": f"k{index:03d}",
+            "name": f"f{index}.txt",
+            "path": f"/d/f{index}.txt",
+            "extension": rnd.choice(["txt", "pdf"]),
+            "size": rnd.randint(0, 10 ** 6),
+            "owner": rnd.choice(["a", "b", None]),
+        }
+        for index in range(300)
+    ]
+
+@pytest.fixture
+def shards(records):
+    return [LocalUPIConnector(LocalMetadataStore([dict(record) for record in records[shard::3]])) for shard in range(3)]
+
+@pytest.fixture
+def single(records):
+    return LocalUPIConnector(LocalMetadataStore([dict(record) for record in records]))
+
+@pytest.fixture
+def fanout():
+    executor = FanoutExecutor(AQLExecutor(), top_k=None)
+    yield executor
+    executor.shutdown()
+
+@pytest.mark.parametrize("query, parameters", [
+    ("FOR doc IN Objects SORT doc.size DESC LIMIT 20 RETURN doc", None),
+    ("FOR doc IN Objects FILTER doc.size > 1000 SORT doc.extension ASC, doc.size DESC LIMIT @n RETURN doc", {"n": 15}),
+    ("FOR doc IN Objects SORT doc.owner, doc._key LIMIT 30 RETURN doc", None),
+    ("FOR doc IN Objects SORT doc.size RETURN doc", None),
+])
+def test_merge_matches_single_store(fanout, shards, single, query, parameters):
+    merged = [result.key for result in fanout.execute(query, shards, parameters)]
+    assert merged == [result.key for result in AQLExecutor().execute(query, single, parameters)]
+
+def test_limit_with_offset_is_applied_to_merged_results(fanout, shards):
+    results = fanout.execute("FOR doc IN Objects SORT doc.owner, doc._key LIMIT 5, 10 RETURN doc", shards)
+    assert len(results) == 10
+
+def test_unsorted_query_returns_every_shard_result(fanout, shards, records):
+    results = fanout.execute("FOR doc IN Objects RETURN doc", shards)
+    assert sorted(result.key for result in results) == sorted(record["_key"] for record in records)
+
+def test_rank_key_and_top_k_pick_global_best(shards, records):
+    executor = FanoutExecutor(AQLExecutor(), top_k=5, rank_key=lambda result: result.size)
+    try:
+        results = executor.execute("FOR doc IN Objects RETURN doc", shards)
+    finally:
+        executor.shutdown()
+    best = sorted(records, key=lambda record: record["size"], reverse=True)[:5]
+    assert [result.key for result in results] == [record["_key"] for record in best]
+
+@pytest.mark.parametrize("query, parameters, expected", [
+    ("FOR doc IN Objects SORT doc.size DESC LIMIT 20 RETURN doc", None, ([("size", True)], 20)),
+    ("FOR doc IN Objects SORT doc.extension, doc.size DESC LIMIT @n RETURN doc", {"n": 7},
+     ([("extension", False), ("size", True)], 7)),
+    ("FOR doc IN Objects LIMIT 3 SORT doc.size RETURN doc", None, ([], 3)),
+    ("FOR doc IN Objects SORT doc.size RETURN doc.name", None, ([], None)),
+    ("FOR doc IN Objects SORT LENGTH(doc.name) RETURN doc", None, ([], None)),
+])
+def test_result_order(query, parameters, expected):
+    assert AQLExecutor().result_order(query, parameters) == expected
@@ -0,0 +1,69 @@
+import pytest
+
+from data_access.local_metadata_store import LocalMetadataStore
+from data_access.local_upi_connector import LocalUPIConnector
+from query_processing.query_translator.graphql_parser import parse_graphql
+from query_processing.query_translator.graphql_schema import GraphQLCostGuard, GraphQLSchema, GraphQLValidationError
+from search_execution.query_executor.graphql_executor import GraphQLExecutor
+
+NESTED_SCHEMA = GraphQLSchema.from_sdl("""
+type Query { folders(limit: Int): [Folder!]! }
+type Folder { name: String children(limit: Int): [Folder!]! files(limit: Int): [File!]! }
+type File { name: String size: Int }
+""")
+
+def test_cost_multiplies_list_sizes():
+    cost = GraphQLCostGuard().schema.estimate_cost(parse_graphql("{ files(limit: 1000) { name path size } }"))
+    assert cost.as_dict() == {"depth": 2, "breadth": 3, "fields": 4, "complexity": 3001}
+    cost = GraphQLCostGuard().schema.estimate_cost(
+        parse_graphql("query Q($n: Int) { files(limit: $n) { name size } }"), {"n": 50}
+    )
+    assert cost.complexity == 101
+
+def test_query_over_budget_is_rejected_without_trimming():
+    guard = GraphQLCostGuard(max_complexity=500, trim=False)
+    with pytest.raises(GraphQLValidationError, match="exceeds the budget"):
+        guard.enforce("{ files(limit: 1000) { name path size } }")
+    query, cost = guard.enforce("{ files(limit: 100) { name path size } }")
+    assert cost.complexity == 301 and query == "{ files(limit: 100) { name path size } }"
+
+def test_query_over_budget_is_trimmed_to_fit():
+    query, cost = GraphQLCostGuard(max_complexity=500).enforce("{ files(limit: 1000) { name path size } }")
+    assert query == "query { files(limit: 125) { name path size } }"
+    assert cost.complexity <= 500
+
+def test_query_too_deep_is_rejected_or_trimmed():
+    query = "{ folders(limit: 2) { name children(limit: 2) { name children(limit: 2) { name files { name } } } } }"
+    assert GraphQLCostGuard(NESTED_SCHEMA).schema.estimate_cost(parse_graphql(query)).depth == 5
+    with pytest.raises(GraphQLValidationError):
+        GraphQLCostGuard(NESTED_SCHEMA, max_depth=3, trim=False).enforce(query)
+    trimmed, cost = GraphQLCostGuard(NESTED_SCHEMA, max_depth=3).enforce(query)
+    assert cost.depth <= 3 and "files" not in trimmed
+
+def test_executor_rejects_query_over_budget():
+    connector = LocalUPIConnector(LocalMetadataStore([{"_key": "a", "name": "a.txt"}]))
+    executor = GraphQLExecutor(GraphQLCostGuard(max_complexity=100, trim=False))
+    with pytest.raises(GraphQLValidationError):
+        executor.execute("{ files(limit: 1000) { name } }", connector)
+    assert [result.name for result in executor.execute("{ files(limit: 10) { name } }", connector)] == ["a.txt"]
+    assert executor.last_cost.complexity == 11
+
+@pytest.mark.parametrize("query", [
+    "{ files { name unknown } }",
+    "{ files(filter: {sizeMin: \"big\"}) { name } }",
+    "{ files(filter: {sizeMin: 9223372036854775808}) { name } }",
+    "{ files(limit: 2147483648) { name } }",
+    "{ files(filter: {nope: 1}) { name } }",
+    "query Q($n: Int) { files { name } }",
+    "query Q($f: String) { files(filter: $f) { name } }",
+])
+def test_invalid_query_is_rejected(query):
+    assert not GraphQLCostGuard().is_valid(query)
+
+@pytest.mark.parametrize("query", [
+    "{ files(filter: {sizeMin: 9223372036854775807}) { name size } }",
+    "query Q($f: FileFilter, $n: Int) { files(filter: $f, limit: $n) { name @include(if: true) } }",
+    "{ file(path: \"/a\\u00e9\") { name } }",
+])
+def test_valid_query_is_accepted(query):
+    assert GraphQLCostGuard().is_valid(query)
@@ -0,0 +1,99 @@
+import json
+import os
+
+import pytest
+
+from data_access.local_metadata_store import LocalMetadataStore
+from data_access.metadata_ingester import MetadataIngester
+
+class Interrupted(Exception):
+    pass
+
+def interrupt_after(batches):
+    def progress(report):
+        if report["batches"] >= batches:
+            raise Interrupted()
+    return progress
+
+def stored_lines(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / "source.jsonl"
+    records = [{"path": f"/data/file{index}.txt", "size": index} for index in range(25)]
+    records += [{"name": f"keyless{index}"} for index in range(5)]
+    path.write_text("".join(json.dumps(record) + "\n" for record in records) + "not json\n", encoding="utf-8")
+    return str(path)
+
+def test_interrupted_jsonl_ingestion_resumes(tmp_path, source):
+    store_path = str(tmp_path / "store.jsonl")
+    with pytest.raises(Interrupted):
+        MetadataIngester(store_path=store_path, batch_size=10, progress=interrupt_after(1)).ingest_jsonl(source)
+    assert os.path.exists(f"{store_path}.checkpoint")
+    assert len(stored_lines(store_path)) == 10
+
+    ingester = MetadataIngester(store_path=store_path, batch_size=10)
+    assert len(ingester.store) == 10
+    report = ingester.ingest_jsonl(source)
+    assert report["resumed_from"] and report["records"] == 20 and report["errors"] == 1
+    assert len(ingester.store) == 30
+    assert not os.path.exists(f"{store_path}.checkpoint")
+
+    keys = [record["_key"] for record in stored_lines(store_path)]
+    assert len(keys) == len(set(keys)) == 30
+    assert len(MetadataIngester(store_path=store_path).store) == 30
+
+def test_batch_written_after_checkpoint_is_discarded(tmp_path, source):
+    store_path = str(tmp_path / "store.jsonl")
+    with pytest.raises(Interrupted):
+        MetadataIngester(store_path=store_path, batch_size=10, progress=interrupt_after(1)).ingest_jsonl(source)
+    with open(store_path, "a", encoding="utf-8") as f:
+        f.write(json.dumps({"_key": "torn", "path": "/data/torn.txt"}) + "\n")
+
+    ingester = MetadataIngester(store_path=store_path, batch_size=10)
+    assert ingester.store.get("torn") is None
+    ingester.ingest_jsonl(source)
+    assert len(stored_lines(store_path)) == len(ingester.store) == 30
+
+def test_checkpoint_of_another_source_is_ignored(tmp_path, source):
+    store_path = str(tmp_path / "store.jsonl")
+    other = tmp_path / "other.jsonl"
+    other.write_text(json.dumps({"path": "/other/a.txt"}) + "\n", encoding="utf-8")
+    with pytest.raises(Interrupted):
+        MetadataIngester(store_path=store_path, batch_size=10, progress=interrupt_after(1)).ingest_jsonl(source)
+
+    report = MetadataIngester(store_path=store_path, batch_size=10).ingest_jsonl(str(other))
+    assert report["resumed_from"] is None and report["records"] == 1
+    assert not os.path.exists(f"{store_path}.checkpoint")
+
+def test_interrupted_directory_walk_resumes(tmp_path):
+    root = tmp_path / "tree"
+    for index in range(12):
+        folder = root / f"dir{index % 3}"
+        folder.mkdir(parents=True, exist_ok=True)
+        (folder / f"file{index}.txt").write_text("x" * index, encoding="utf-8")
+    store_path = str(tmp_path / "store.jsonl")
+    with pytest.raises(Interrupted):
+        MetadataIngester(store_path=store_path, batch_size=5, workers=2,
+                         progress=interrupt_after(1)).ingest_directory(str(root))
+
+    ingester = MetadataIngester(store_path=store_path, batch_size=5, workers=2)
+    report = ingester.ingest_directory(str(root))
+    assert report["resumed_from"] == 5 and report["records"] == 7
+    paths = [record["path"] for record in stored_lines(store_path)]
+    assert len(paths) == len(set(paths)) == 12
+    assert not os.path.exists(f"{store_path}.checkpoint")
+
+def test_reloaded_store_does_not_reuse_generated_keys(tmp_path):
+    store = LocalMetadataStore()
+    for _ in range(3):
+        store.put_many([{"_key": f"p{index}", "path": f"/d/{index}"} for index in range(10)])
+    store.put({"name": "x"})
+    path = str(tmp_path / "store.jsonl")
+    store.save(path)
+
+    store = LocalMetadataStore.load(path)
+    store.put_many([{"name": f"y{index}"} for index in range(40)])
+    assert len(store) == 51
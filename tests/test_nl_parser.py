@@ -0,0 +1,61 @@
+import os
+from datetime import datetime
+
+import pytest
+
+from query_processing.nl_parser import NLParser
+from query_processing.query_translator.rule_translator import RuleBasedTranslator
+
+@pytest.fixture
+def parser():
+    return NLParser(clock=lambda: datetime(2026, 10, 17, 15, 30))
+
+@pytest.mark.parametrize("query, filters", [
+    ("pdf files larger than 10MB", {"extensions": ["pdf"], "size_min": 10 * 2 ** 20}),
+    ("spreadsheets under 500 kb", {"extensions": ["xls", "xlsx", "ods", "csv"], "size_max": 500 * 1024}),
+    ("logs between 1mb and 20mb", {"extensions": ["log"], "size_min": 2 ** 20, "size_max": 20 * 2 ** 20}),
+    ("photos owned by alice", {"owner": "alice", "extensions": ["jpg", "jpeg", "png", "heic"]}),
+    ("pdf files by alice", {"owner": "alice", "extensions": ["pdf"]}),
+    ("bob's pdfs", {"owner": "bob", "extensions": ["pdf"]}),
+    ("files in /home/bob/finance", {"path_prefix": "/home/bob/finance"}),
+    ("files modified in 2025", {"modified_after": "2025-01-01T00:00:00", "modified_before": "2026-01-01T00:00:00"}),
+    ("files created before 2024-01-01", {"created_before": "2024-01-01T00:00:00"}),
+    ("files accessed in the past 3 days", {"accessed_after": "2026-10-14T00:00:00"}),
+    ("files modified yesterday", {"modified_after": "2026-10-16T00:00:00", "modified_before": "2026-10-17T00:00:00"}),
+    ("files whose name starts with invoice", {"name_pattern": "invoice*"}),
+    ('word documents named "quarterly report"', {"extensions": ["doc", "docx"], "name_pattern": "*quarterly report*"}),
+    ("*.log", {"extensions": ["log"]}),
+])
+def test_filters(parser, query, filters):
+    parsed = parser.parse(query)
+    assert parsed["filters"] == filters
+    assert parsed["terms"] == []
+
+def test_home_relative_path_is_expanded(parser):
+    assert parser.parse("videos in ~/Movies")["filters"]["path_prefix"] == os.path.expanduser("~/Movies")
+
+@pytest.mark.parametrize("query, field", [
+    ("pdf files by size", "size"),
+    ("files sorted by name", "name"),
+    ("documents ordered by created", "created"),
+])
+def test_by_a_sort_field_orders_instead_of_filtering_on_owner(parser, query, field):
+    parsed = parser.parse(query)
+    assert "owner" not in parsed["filters"]
+    assert parsed["entities"]["order_by"] == field
+    assert not RuleBasedTranslator("graphql").covers(parsed)
+
+def test_count_before_an_ordering_is_a_limit(parser):
+    parsed = parser.parse("10 largest files")
+    assert parsed["entities"] == {"limit": 10, "order_by": "size", "order": "desc"}
+    assert parsed["terms"] == []
+
+def test_unmapped_words_are_terms(parser):
+    parsed = parser.parse("notes about the kubernetes migration")
+    assert parsed["filters"] == {}
+    assert parsed["terms"] == ["notes", "kubernetes", "migration"]
+
+def test_huge_window_covers_all_time(parser):
+    assert parser.parse("files modified in the last 99999999 years")["filters"] == {
+        "modified_after": datetime.min.isoformat()
+    }
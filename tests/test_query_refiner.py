@@ -0,0 +1,81 @@
+import random
+
+import pytest
+
+from data_access.local_metadata_store import LocalMetadataStore
+from data_access.local_upi_connector import LocalUPIConnector
+from query_processing.query_refiner import QueryRefiner
+from query_processing.query_translator.rule_translator import RuleBasedTranslator
+from search_execution.query_executor.aql_executor import AQLExecutor
+from search_execution.query_executor.graphql_executor import GraphQLExecutor
+
+EXECUTORS = {"aql": AQLExecutor(), "graphql": GraphQLExecutor()}
+
+@pytest.fixture(scope="module")
+def connector():
+    rng = random.Random(7)
+    records = []
+    for index in range(3000):
+        year = rng.choice((2024, 2025, 2026))
+        records.append({
+            "_key": f"f{index}", "name": f"file{index}.{rng.choice(('pdf', 'txt', 'jpg'))}",
+            "path": f"/home/{rng.choice(('alice', 'bob'))}/{rng.choice(('docs', 'media'))}/file{index}",
+            "extension": rng.choice(("pdf", "txt", "jpg")), "size": rng.randint(0, 50 * 2 ** 20),
+            "owner": rng.choice(("alice", "bob")),
+            "modified": f"{year}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T12:00:00",
+        })
+    return LocalUPIConnector(LocalMetadataStore(records))
+
+def run(language, connector, parsed_query):
+    translator = RuleBasedTranslator(language)
+    query, parameters = translator.translate_parameterized(parsed_query, None)
+    entry = {"parsed_query": parsed_query, "query_language": language, "translated_query": query,
+             "parameters": parameters}
+    return entry, len(EXECUTORS[language].execute(query, connector, parameters))
+
+def refine(language, connector, entry, facet):
+    refiner = QueryRefiner({language: RuleBasedTranslator(language)})
+    parsed_query, query, parameters = refiner.refine(entry, facet, None)
+    count = 0 if query is None else len(EXECUTORS[language].execute(query, connector, parameters))
+    return parsed_query, query, count
+
+@pytest.mark.parametrize("language", ["aql", "graphql"])
+@pytest.mark.parametrize("filters, facet", [
+    ({"modified_after": "2025-06-01T00:00:00"}, "modified:2026"),
+    ({"modified_after": "2026-03-01T00:00:00"}, "modified:2026"),
+    ({"modified_before": "2025-03-01T00:00:00"}, "modified:2025"),
+    ({"size_min": 10 * 2 ** 20}, "size:>1MB"),
+    ({"size_min": 1 * 2 ** 20, "size_max": 20 * 2 ** 20}, "size:10MB-40MB"),
+    ({"extensions": ["pdf", "txt"]}, "extension:pdf"),
+    ({"path_prefix": "/home/alice"}, "path:/home/alice/docs"),
+    ({"path_prefix": "/home/alice/docs"}, "path:/home/alice"),
+    ({"owner": "alice"}, "owner:alice"),
+])
+def test_drill_down_never_increases_result_count(language, connector, filters, facet):
+    entry, before = run(language, connector, {"original_query": "files", "intent": "search", "filters": dict(filters), "terms": []})
+    parsed_query, _, after = refine(language, connector, entry, facet)
+    _, expected = run(language, connector, parsed_query)
+    assert after <= before
+    assert after == expected
+
+@pytest.mark.parametrize("language", ["aql", "graphql"])
+def test_range_facet_keeps_the_tighter_bound(language, connector):
+    entry, _ = run(language, connector, {"original_query": "files", "intent": "search", "filters": {"size_min": 10 * 2 ** 20},
+                                         "terms": []})
+    parsed_query, query, _ = refine(language, connector, entry, "size:>1MB")
+    assert parsed_query["filters"]["size_min"] == 10 * 2 ** 20
+    assert query == entry["translated_query"]
+
+@pytest.mark.parametrize("language", ["aql", "graphql"])
+@pytest.mark.parametrize("filters, facet", [
+    ({"modified_before": "2025-01-01T00:00:00"}, "modified:2026"),
+    ({"size_max": 2 ** 20}, "size:>10MB"),
+    ({"extensions": ["pdf"]}, "extension:jpg"),
+    ({"owner": "alice"}, "owner:bob"),
+    ({"path_prefix": "/home/alice"}, "path:/home/bob"),
+])
+def test_disjoint_facet_returns_no_query(language, connector, filters, facet):
+    entry, _ = run(language, connector, {"original_query": "files", "intent": "search", "filters": dict(filters), "terms": []})
+    _, query, count = refine(language, connector, entry, facet)
+    assert query is None
+    assert count == 0
@@ -0,0 +1,71 @@
+import pytest
+
+from data_access.local_metadata_store import LocalMetadataStore
+from data_access.local_upi_connector import LocalUPIConnector
+from search_execution.query_executor.aql_executor import AQLExecutor
+from search_execution.result_set_manager import ResultSetManager
+from utils.request_context import RequestContext
+
+QUERY = "FOR doc IN Objects FILTER doc.extension == @extension SORT doc.size RETURN doc"
+PARAMETERS = {"extension": "pdf"}
+
+@pytest.fixture
+def connector():
+    records = [{"_key": f"f{index}", "name": f"file{index}.pdf", "extension": "pdf", "size": index}
+               for index in range(25)]
+    return LocalUPIConnector(LocalMetadataStore(records))
+
+def stream(manager, connector, context=None):
+    return manager.execute_stream(AQLExecutor(), QUERY, connector, 10, PARAMETERS, "aql", context)
+
+def test_hit_until_the_collection_version_changes(connector):
+    manager = ResultSetManager()
+    first = manager.execute(AQLExecutor(), QUERY, connector, PARAMETERS, "aql")
+    assert manager.execute(AQLExecutor(), QUERY, connector, PARAMETERS, "aql") == first
+    assert manager.get_stats()["hits"] == 1
+
+    connector.store.put({"_key": "new", "name": "new.pdf", "extension": "pdf", "size": -1})
+    results = manager.execute(AQLExecutor(), QUERY, connector, PARAMETERS, "aql")
+    assert len(results) == 26 and results[0].key == "new"
+    stats = manager.get_stats()
+    assert stats["hits"] == 1 and stats["misses"] == 2 and stats["invalidations"] == 1
+
+def test_disk_entry_is_dropped_when_the_version_changes(connector, tmp_path):
+    path = str(tmp_path / "results.db")
+    ResultSetManager(cache_path=path).execute(AQLExecutor(), QUERY, connector, PARAMETERS, "aql")
+    assert len(ResultSetManager(cache_path=path).execute(AQLExecutor(), QUERY, connector, PARAMETERS, "aql")) == 25
+
+    connector.store.remove("f0")
+    manager = ResultSetManager(cache_path=path)
+    assert len(manager.execute(AQLExecutor(), QUERY, connector, PARAMETERS, "aql")) == 24
+    assert manager.get_stats()["invalidations"] == 1
+
+def test_streamed_miss_is_stored_when_exhausted(connector):
+    manager = ResultSetManager()
+    batches = list(stream(manager, connector))
+    assert [len(batch) for batch in batches] == [10, 10, 5]
+    for batch in batches:
+        for result in batch:
+            result.relevance = 1.0
+
+    cached = list(stream(manager, connector))
+    assert manager.get_stats()["hits"] == 1
+    assert [result.key for batch in cached for result in batch] == [f"f{index}" for index in range(25)]
+    assert all(result.relevance == 0.0 for batch in cached for result in batch)
+
+def test_streamed_miss_read_in_part_is_not_stored(connector):
+    manager = ResultSetManager()
+    next(iter(stream(manager, connector)))
+    list(stream(manager, connector))
+    assert manager.get_stats()["hits"] == 0
+
+def test_streamed_miss_cut_short_is_not_stored(connector):
+    manager = ResultSetManager()
+    context = RequestContext()
+    batches = stream(manager, connector, context)
+    next(batches)
+    context.cancel()
+    assert list(batches) == []
+    assert manager.get_stats()["partial"] == 1
+    list(stream(manager, connector))
+    assert manager.get_stats()["hits"] == 0
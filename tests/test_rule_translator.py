@@ -0,0 +1,48 @@
+import pytest
+
+from data_access.local_metadata_store import LocalMetadataStore
+from data_access.local_upi_connector import LocalUPIConnector
+from query_processing.query_translator.rule_translator import RuleBasedTranslator, aql_filter_conditions
+from search_execution.query_executor.aql_executor import AQLExecutor
+from search_execution.query_executor.graphql_executor import GraphQLExecutor
+
+EXECUTORS = {"aql": AQLExecutor(), "graphql": GraphQLExecutor()}
+
+@pytest.fixture(scope="module")
+def connector():
+    records = [{"_key": f"f{index}", "name": f"report{index}.pdf", "extension": "pdf", "size": index}
+               for index in range(100)]
+    records += [
+        {"_key": "slash", "name": "a\\b.txt", "extension": "txt", "size": 1},
+        {"_key": "escape", "name": "a_b.txt", "extension": "txt", "size": 2},
+        {"_key": "other", "name": "ab.txt", "extension": "txt", "size": 3},
+    ]
+    return LocalUPIConnector(LocalMetadataStore(records))
+
+def search(language, connector, filters, entities=None):
+    parsed_query = {"original_query": "", "intent": "search", "entities": entities or {}, "filters": filters,
+                    "terms": []}
+    query, parameters = RuleBasedTranslator(language).translate_parameterized(parsed_query, None)
+    return [result.name for result in EXECUTORS[language].execute(query, connector, parameters)]
+
+def test_like_escapes_the_escape_character_first():
+    bind_vars = {}
+    assert aql_filter_conditions({"name_pattern": "a\\_*"}, bind_vars=bind_vars) == ["LIKE(doc.name, @name_pattern, true)"]
+    assert bind_vars["name_pattern"] == "a\\\\\\_%"
+
+@pytest.mark.parametrize("language", ["aql", "graphql"])
+def test_name_with_a_backslash_matches_itself(language, connector):
+    assert search(language, connector, {"name_pattern": "a\\b.txt"}) == ["a\\b.txt"]
+    assert search(language, connector, {"name_pattern": "a_b.txt"}) == ["a_b.txt"]
+
+def test_aql_fast_path_is_bounded_by_the_page_size(connector):
+    assert len(search("aql", connector, {"extensions": ["pdf"]})) == 20
+
+def test_aql_fast_path_compiles_ordering_and_limit(connector):
+    keys = search("aql", connector, {"extensions": ["pdf"]}, {"order_by": "size", "order": "desc", "limit": 3})
+    assert keys == ["report99.pdf", "report98.pdf", "report97.pdf"]
+
+def test_graphql_fast_path_compiles_limit_but_not_ordering(connector):
+    assert len(search("graphql", connector, {"extensions": ["pdf"]}, {"limit": 5})) == 5
+    assert not RuleBasedTranslator("graphql").covers({"intent": "search", "filters": {"extensions": ["pdf"]},
+                                                      "entities": {"order_by": "size", "order": "desc"}})
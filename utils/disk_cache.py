@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+class DiskCache:
+    """
+    A small persistent key/value store backed by SQLite.
+
+    Values are stored as text, so callers are expected to serialize them
+    (usually as JSON). Each thread gets its own connection and the database
+    runs in WAL mode, so several readers (threads or processes) can use the
+    same file while one of them writes.
+    """
+
+    def __init__(self, path: str, ttl: Optional[float] = None,
+                 max_entries: Optional[int] = None, max_bytes: Optional[int] = None):
+        """
+        Initialize the disk cache.
+
+        Args:
+            path (str): The path of the SQLite database file
+            ttl (Optional[float]): Seconds after which an entry expires, or None to keep entries forever
+            max_entries (Optional[int]): The maximum number of entries to keep, or None for no limit
+            max_bytes (Optional[int]): The maximum total size of stored values, or None for no limit
+        """
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                " key TEXT PRIMARY KEY,"
+                " value TEXT NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " created REAL NOT NULL,"
+                " accessed REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)")
+
+    def _connection(self) -> sqlite3.Connection:
+        """
+        Get the SQLite connection for the calling thread.
+
+        Returns:
+            sqlite3.Connection: The thread's connection
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Look up a value.
+
+        Args:
+            key (str): The cache key
+
+        Returns:
+            Optional[str]: The stored value, or None if missing or expired
+        """
+        conn = self._connection()
+        row = conn.execute("SELECT value, created FROM cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+
+        value, created = row
+        now = time.time()
+        if self.ttl is not None and now - created > self.ttl:
+            with conn:
+                conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+            return None
+
+        try:
+            with conn:
+                conn.execute("UPDATE cache SET accessed = ? WHERE key = ?", (now, key))
+        except sqlite3.OperationalError:
+            # Another process holds the write lock; the access time is only a hint
+            pass
+        return value
+
+    def set(self, key: str, value: str) -> None:
+        """
+        Store a value, evicting the least recently used entries if a bound is exceeded.
+
+        Args:
+            key (str): The cache key
+            value (str): The value to store
+        """
+        conn = self._connection()
+        now = time.time()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, size, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, value, len(value.encode("utf-8")), now, now)
+            )
+            self._evict(conn)
+
+    def delete(self, key: str) -> None:
+        """
+        Remove a value.
+
+        Args:
+            key (str): The cache key
+        """
+        conn = self._connection()
+        with conn:
+            conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def clear(self) -> None:
+        """
+        Remove all values.
+        """
+        conn = self._connection()
+        with conn:
+            conn.execute("DELETE FROM cache")
+
+    def __len__(self) -> int:
+        """
+        Get the number of stored entries.
+
+        Returns:
+            int: The number of entries
+        """
+        return self._connection().execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+    def total_bytes(self) -> int:
+        """
+        Get the total size of the stored values.
+
+        Returns:
+            int: The number of bytes held by the cache
+        """
+        return self._connection().execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+
+    def close(self) -> None:
+        """
+        Close the calling thread's connection.
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        """
+        Drop the least recently used entries until the cache is within its bounds.
+
+        Args:
+            conn (sqlite3.Connection): The connection to use, inside an open transaction
+        """
+        if self.max_entries is not None:
+            count = conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+            if count > self.max_entries:
+                conn.execute(
+                    "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY accessed LIMIT ?)",
+                    (count - self.max_entries,)
+                )
+
+        if self.max_bytes is not None:
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+            if total > self.max_bytes:
+                excess = total - self.max_bytes
+                freed = 0
+                victims = []
+                for key, size in conn.execute("SELECT key, size FROM cache ORDER BY accessed"):
+                    victims.append((key,))
+                    freed += size
+                    if freed >= excess:
+                        break
+                conn.executemany("DELETE FROM cache WHERE key = ?", victims)
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+
+import math
+import random
+import time
+from typing import Dict, Any, Callable, Optional
+
+class InjectedFailure(RuntimeError):
+    """
+    Raised by LatencyInjector when it injects a failure.
+    """
+    pass
+
+class LatencyInjector:
+    """
+    Injects artificial latency and failures into simulated calls.
+
+    Latencies are drawn from a configurable distribution using a seeded random
+    generator, so a benchmark run can be repeated exactly.
+    """
+
+    DISTRIBUTIONS = ("fixed", "uniform", "normal", "lognormal", "exponential")
+
+    def __init__(self, distribution: str = "fixed", mean: float = 0.0, spread: float = 0.0,
+                 failure_rate: float = 0.0, seed: Optional[int] = 0):
+        """
+        Initialize the latency injector.
+
+        Args:
+            distribution (str): One of "fixed", "uniform", "normal", "lognormal" or "exponential"
+            mean (float): The mean latency in seconds
+            spread (float): Distribution width: half-range for uniform, standard deviation for normal, sigma for lognormal
+            failure_rate (float): Probability in [0, 1] that a call fails
+            seed (Optional[int]): Seed of the random generator, or None for a random seed
+        """
+        if distribution not in self.DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution: {distribution}")
+        if not 0.0 <= failure_rate <= 1.0:
+            raise ValueError("failure_rate must be between 0 and 1")
+        self.distribution = distribution
+        self.mean = mean
+        self.spread = spread
+        self.failure_rate = failure_rate
+        self.random = random.Random(seed)
+        self.calls = 0
+        self.failures = 0
+        self.total_latency = 0.0
+
+    def sample(self) -> float:
+        """
+        Draw a latency from the configured distribution.
+
+        Returns:
+            float: A non-negative latency in seconds
+        """
+        if self.mean <= 0.0:
+            return 0.0
+        if self.distribution == "fixed":
+            latency = self.mean
+        elif self.distribution == "uniform":
+            latency = self.random.uniform(self.mean - self.spread, self.mean + self.spread)
+        elif self.distribution == "normal":
+            latency = self.random.gauss(self.mean, self.spread)
+        elif self.distribution == "lognormal":
+            # Choose mu so that the distribution's mean equals self.mean
+            mu = math.log(self.mean) - self.spread ** 2 / 2
+            latency = self.random.lognormvariate(mu, self.spread)
+        else:
+            latency = self.random.expovariate(1.0 / self.mean)
+        return max(0.0, latency)
+
+    def inject(self, extra: float = 0.0, sleep: Callable[[float], Any] = time.sleep) -> float:
+        """
+        Sleep for a sampled latency and possibly raise an injected failure.
+
+        Args:
+            extra (float): Additional latency in seconds, e.g. proportional to the result size
+            sleep (Callable[[float], Any]): Waits for the latency, e.g. a RequestContext's sleep so that a deadline cuts it short
+
+        Returns:
+            float: The latency that was injected
+        """
+        latency = self.sample() + extra
+        self.calls += 1
+        self.total_latency += latency
+        if latency > 0.0:
+            sleep(latency)
+        if self.failure_rate and self.random.random() < self.failure_rate:
+            self.failures += 1
+            raise InjectedFailure("Injected failure")
+        return latency
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get the injection counters.
+
+        Returns:
+            Dict[str, Any]: The number of calls and failures and the total and mean injected latency
+        """
+        return {
+            "calls": self.calls,
+            "failures": self.failures,
+            "total_latency": self.total_latency,
+            "mean_latency": self.total_latency / self.calls if self.calls else 0.0
+        }
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+
+from abc import ABC, abstractmethod
+from typing import List, Optional
+
+class AsyncLLMBase(ABC):
+    """
+    Abstract base class for asynchronous LLM connectors.
+
+    This is the asyncio counterpart of LLMBase. Every method is a coroutine
+    and accepts an optional per-call timeout, so callers can fan out many
+    requests with asyncio.gather instead of issuing them one at a time.
+    """
+
+    @abstractmethod
+    async def generate_query(self, prompt: str, timeout: Optional[float] = None) -> str:
+        """
+        Generate a query based on the given prompt.
+
+        Args:
+            prompt (str): The prompt to generate the query from
+            timeout (Optional[float]): Deadline for the call in seconds, or None for the connector default
+
+        Returns:
+            str: The generated query
+        """
+        pass
+
+    @abstractmethod
+    async def summarize_text(self, text: str, max_length: int = 100, timeout: Optional[float] = None) -> str:
+        """
+        Summarize the given text.
+
+        Args:
+            text (str): The text to summarize
+            max_length (int): The maximum length of the summary
+            timeout (Optional[float]): Deadline for the call in seconds, or None for the connector default
+
+        Returns:
+            str: The summarized text
+        """
+        pass
+
+    @abstractmethod
+    async def extract_keywords(self, text: str, num_keywords: int = 5, timeout: Optional[float] = None) -> List[str]:
+        """
+        Extract keywords from the given text.
+
+        Args:
+            text (str): The text to extract keywords from
+            num_keywords (int): The number of keywords to extract
+            timeout (Optional[float]): Deadline for the call in seconds, or None for the connector default
+
+        Returns:
+            List[str]: The extracted keywords
+        """
+        pass
+
+    @abstractmethod
+    async def classify_text(self, text: str, categories: List[str], timeout: Optional[float] = None) -> str:
+        """
+        Classify the given text into one of the provided categories.
+
+        Args:
+            text (str): The text to classify
+            categories (List[str]): The list of possible categories
+            timeout (Optional[float]): Deadline for the call in seconds, or None for the connector default
+
+        Returns:
+            str: The predicted category
+        """
+        pass
+
+    @abstractmethod
+    async def answer_question(self, context: str, question: str, timeout: Optional[float] = None) -> str:
+        """
+        Answer a question based on the given context.
+
+        Args:
+            context (str): The context to base the answer on
+            question (str): The question to answer
+            timeout (Optional[float]): Deadline for the call in seconds, or None for the connector default
+
+        Returns:
+            str: The answer to the question
+        """
+        pass
+
+    async def aclose(self) -> None:
+        """
+        Release any resources held by the connector, such as pooled connections.
+        """
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.aclose()
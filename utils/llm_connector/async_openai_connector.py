@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+
+import asyncio
+import httpx
+
+from typing import Dict, Any, List, Optional
+from .async_llm_base import AsyncLLMBase
+
+class AsyncOpenAIConnector(AsyncLLMBase):
+    """
+    Asynchronous connector for OpenAI-compatible chat-completions endpoints.
+
+    Requests go through a single pooled keep-alive HTTP client. A semaphore
+    bounds the number of calls in flight, and each call is subject to a
+    deadline. The API key is held per connector instead of in global state.
+    """
+
+    def __init__(self, api_key: str, model: str = "gpt-3.5-turbo",
+                 base_url: str = "https://api.openai.com/v1", max_concurrency: int = 8,
+                 max_connections: int = 16, timeout: float = 30.0):
+        """
+        Initialize the asynchronous OpenAI connector.
+
+        Args:
+            api_key (str): The OpenAI API key
+            model (str): The name of the OpenAI model to use
+            base_url (str): Base URL of the API, e.g. a local stub server
+            max_concurrency (int): The maximum number of calls in flight at once
+            max_connections (int): The maximum number of pooled HTTP connections
+            timeout (float): Default deadline for a call in seconds
+        """
+        self.model = model
+        self.timeout = timeout
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.client = httpx.AsyncClient(
+            base_url=base_url.rstrip("/"),
+            headers={"Authorization": f"Bearer {api_key}"},
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            timeout=timeout
+        )
+
+    async def generate_query(self, prompt: str, timeout: Optional[float] = None) -> str:
+        """
+        Generate a query using OpenAI's model.
+
+        Args:
+            prompt (str): The prompt to generate the query from
+            timeout (Optional[float]): Deadline for the call in seconds, or None for the connector default
+
+        Returns:
+            str: The generated query
+        """
+        return await self._complete(
+            "You are a helpful assistant that generates database queries.", prompt, timeout
+        )
+
+    async def summarize_text(self, text: str, max_length: int = 100, timeout: Optional[float] = None) -> str:
+        """
+        Summarize the given text using OpenAI's model.
+
+        Args:
+            text (str): The text to summarize
+            max_length (int): The maximum length of the summary
+            timeout (Optional[float]): Deadline for the call in seconds, or None for the connector default
+
+        Returns:
+            str: The summarized text
+        """
+        prompt = f"Summarize the following text in no more than {max_length} words:\n\n{text}"
+        return await self._complete("You are a helpful assistant that summarizes text.", prompt, timeout)
+
+    async def extract_keywords(self, text: str, num_keywords: int = 5, timeout: Optional[float] = None) -> List[str]:
+        """
+        Extract keywords from the given text using OpenAI's model.
+
+        Args:
+            text (str): The text to extract keywords from
+            num_keywords (int): The number of keywords to extract
+            timeout (Optional[float]): Deadline for the call in seconds, or None for the connector default
+
+        Returns:
+            List[str]: The extracted keywords
+        """
+        prompt = f"Extract {num_keywords} keywords from the following text:\n\n{text}"
+        content = await self._complete(
+            "You are a helpful assistant that extracts keywords from text.", prompt, timeout
+        )
+        keywords = content.split(',')
+        return [keyword.strip() for keyword in keywords[:num_keywords]]
+
+    async def classify_text(self, text: str, categories: List[str], timeout: Optional[float] = None) -> str:
+        """
+        Classify the given text into one of the provided categories using OpenAI's model.
+
+        Args:
+            text (str): The text to classify
+            categories (List[str]): The list of possible categories
+            timeout (Optional[float]): Deadline for the call in seconds, or None for the connector default
+
+        Returns:
+            str: The predicted category
+        """
+        categories_str = ", ".join(categories)
+        prompt = f"Classify the following text into one of these categories: {categories_str}\n\nText: {text}"
+        return await self._complete("You are a helpful assistant that classifies text.", prompt, timeout)
+
+    async def answer_question(self, context: str, question: str, timeout: Optional[float] = None) -> str:
+        """
+        Answer a question based on the given context using OpenAI's model.
+
+        Args:
+            context (str): The context to base the answer on
+            question (str): The question to answer
+            timeout (Optional[float]): Deadline for the call in seconds, or None for the connector default
+
+        Returns:
+            str: The answer to the question
+        """
+        prompt = f"Context: {context}\n\nQuestion: {question}\n\nAnswer:"
+        return await self._complete(
+            "You are a helpful assistant that answers questions based on provided context.", prompt, timeout
+        )
+
+    async def aclose(self) -> None:
+        """
+        Close the pooled HTTP client.
+        """
+        await self.client.aclose()
+
+    async def _complete(self, system_prompt: str, prompt: str, timeout: Optional[float] = None) -> str:
+        """
+        Send a chat-completions request and return the reply text.
+
+        The deadline covers the time spent waiting for a concurrency slot as
+        well as the request itself.
+
+        Args:
+            system_prompt (str): The system message
+            prompt (str): The user message
+            timeout (Optional[float]): Deadline for the call in seconds, or None for the connector default
+
+        Returns:
+            str: The content of the first choice
+        """
+        payload: Dict[str, Any] = {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": prompt}
+            ]
+        }
+        deadline = self.timeout if timeout is None else timeout
+
+        async def call() -> str:
+            async with self.semaphore:
+                response = await self.client.post("/chat/completions", json=payload)
+            response.raise_for_status()
+            return response.json()["choices"][0]["message"]["content"].strip()
+
+        return await asyncio.wait_for(call(), deadline)
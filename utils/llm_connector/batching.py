@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+
+import json
+import math
+import re
+from typing import Dict, Any, List
+
+# Rough number of characters per token for English text
+CHARS_PER_TOKEN = 4
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the number of tokens in a piece of text.
+
+    Args:
+        text (str): The text to measure
+
+    Returns:
+        int: The estimated token count
+    """
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    Truncate text so that it fits in the given number of tokens.
+
+    Args:
+        text (str): The text to truncate
+        max_tokens (int): The token budget
+
+    Returns:
+        str: The text, cut at the budget if it was longer
+    """
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    return text if len(text) <= max_chars else text[:max_chars]
+
+def pack_documents(texts: List[str], max_prompt_tokens: int, max_documents: int,
+                   overhead_tokens: int = 0) -> List[List[int]]:
+    """
+    Group documents into batches that fit in a prompt token budget.
+
+    Documents are packed greedily in their original order. A document that
+    does not fit in an empty batch on its own must be truncated by the caller
+    beforehand; it is placed in a batch of its own here.
+
+    Args:
+        texts (List[str]): The documents to pack
+        max_prompt_tokens (int): The token budget of a single prompt
+        max_documents (int): The maximum number of documents per prompt
+        overhead_tokens (int): Tokens used by the instructions of each prompt
+
+    Returns:
+        List[List[int]]: The indices of the documents in each batch
+    """
+    batches = []
+    current = []
+    used = overhead_tokens
+    for index, text in enumerate(texts):
+        # Every document is framed with its number, which costs a few tokens
+        cost = estimate_tokens(text) + 4
+        if current and (used + cost > max_prompt_tokens or len(current) >= max_documents):
+            batches.append(current)
+            current = []
+            used = overhead_tokens
+        current.append(index)
+        used += cost
+    if current:
+        batches.append(current)
+    return batches
+
+def build_batch_prompt(instruction: str, documents: List[str]) -> str:
+    """
+    Build a multi-document prompt asking for a JSON object keyed by document number.
+
+    Args:
+        instruction (str): What to do with each document
+        documents (List[str]): The documents in the batch
+
+    Returns:
+        str: The prompt for the LLM
+    """
+    lines = [
+        f"{instruction} for each of the {len(documents)} documents below.",
+        "Respond only with a JSON object whose keys are the document numbers (as strings) "
+        "and whose values are the results for those documents.",
+        ""
+    ]
+    for number, document in enumerate(documents, 1):
+        lines.append(f"### Document {number}")
+        lines.append(document)
+        lines.append("")
+    return "\n".join(lines)
+
+def parse_batch_response(content: str, count: int) -> Dict[int, Any]:
+    """
+    Split a multi-document response back into per-document results.
+
+    Args:
+        content (str): The LLM's response to a prompt from build_batch_prompt
+        count (int): The number of documents in the batch
+
+    Returns:
+        Dict[int, Any]: The results keyed by zero-based position in the batch; documents the response omitted are missing
+    """
+    match = re.search(r"\{.*\}", content, re.DOTALL)
+    if not match:
+        return {}
+    try:
+        payload = json.loads(match.group(0))
+    except json.JSONDecodeError:
+        return {}
+    if not isinstance(payload, dict):
+        return {}
+
+    results = {}
+    for key, value in payload.items():
+        digits = re.sub(r"\D", "", str(key))
+        if digits and 1 <= int(digits) <= count:
+            results[int(digits) - 1] = value
+    return results
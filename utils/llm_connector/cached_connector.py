@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+
+import hashlib
+import json
+import threading
+from typing import Dict, Any, List, Optional
+from .llm_base import LLMBase
+from utils.disk_cache import DiskCache
+
+class CachedLLMConnector(LLMBase):
+    """
+    Content-addressed persistent cache in front of any LLMBase connector.
+
+    Summaries, keywords and classifications depend only on the text, the
+    model and the call parameters, so they are stored under a digest of
+    (method, model, parameters, content digest) in a size-bounded SQLite
+    store. The store runs in WAL mode, so several sessions and processes can
+    share one file and a popular file is only ever sent to the model once.
+    Query generation and question answering are passed through uncached.
+    """
+
+    def __init__(self, connector: LLMBase, cache_path: str = "llm_cache.db",
+                 max_bytes: Optional[int] = 64 * 1024 * 1024, ttl: Optional[float] = None):
+        """
+        Initialize the cached connector.
+
+        Args:
+            connector (LLMBase): The connector to delegate cache misses to
+            cache_path (str): Path of the SQLite store
+            max_bytes (Optional[int]): The maximum total size of cached values, or None for no limit
+            ttl (Optional[float]): Seconds a cached result stays valid, or None to keep results until evicted
+        """
+        self.connector = connector
+        self.model = getattr(connector, "model", None) or type(connector).__name__
+        self.disk_cache = DiskCache(cache_path, ttl=ttl, max_bytes=max_bytes)
+        self.stats = {"hits": 0, "misses": 0}
+        self._lock = threading.Lock()
+
+    def generate_query(self, prompt: str) -> str:
+        """
+        Generate a query; not cached, since prompts embed the current query.
+
+        Args:
+            prompt (str): The prompt to generate the query from
+
+        Returns:
+            str: The generated query
+        """
+        return self.connector.generate_query(prompt)
+
+    def summarize_text(self, text: str, max_length: int = 100) -> str:
+        """
+        Summarize the given text, reusing a cached summary of the same content.
+
+        Args:
+            text (str): The text to summarize
+            max_length (int): The maximum length of the summary
+
+        Returns:
+            str: The summarized text
+        """
+        return self.summarize_batch([text], max_length)[0]
+
+    def extract_keywords(self, text: str, num_keywords: int = 5) -> List[str]:
+        """
+        Extract keywords from the given text, reusing cached keywords of the same content.
+
+        Args:
+            text (str): The text to extract keywords from
+            num_keywords (int): The number of keywords to extract
+
+        Returns:
+            List[str]: The extracted keywords
+        """
+        return self.extract_keywords_batch([text], num_keywords)[0]
+
+    def classify_text(self, text: str, categories: List[str]) -> str:
+        """
+        Classify the given text, reusing a cached classification of the same content.
+
+        Args:
+            text (str): The text to classify
+            categories (List[str]): The list of possible categories
+
+        Returns:
+            str: The predicted category
+        """
+        key = self.make_key("classify_text", {"categories": sorted(categories)}, text)
+        cached = self._get(key)
+        if cached is not None:
+            return cached
+        category = self.connector.classify_text(text, categories)
+        self._set(key, category)
+        return category
+
+    def answer_question(self, context: str, question: str) -> str:
+        """
+        Answer a question based on the given context; not cached.
+
+        Args:
+            context (str): The context to base the answer on
+            question (str): The question to answer
+
+        Returns:
+            str: The answer to the question
+        """
+        return self.connector.answer_question(context, question)
+
+    def summarize_batch(self, texts: List[str], max_length: int = 100) -> List[str]:
+        """
+        Summarize several texts, sending only the uncached ones to the wrapped connector in one batch.
+
+        Args:
+            texts (List[str]): The texts to summarize
+            max_length (int): The maximum length of each summary
+
+        Returns:
+            List[str]: The summaries, in the order of the input
+        """
+        return self._cached_batch(
+            "summarize_text", {"max_length": max_length}, texts,
+            lambda missing: self.connector.summarize_batch(missing, max_length)
+        )
+
+    def extract_keywords_batch(self, texts: List[str], num_keywords: int = 5) -> List[List[str]]:
+        """
+        Extract keywords from several texts, sending only the uncached ones to the wrapped connector in one batch.
+
+        Args:
+            texts (List[str]): The texts to extract keywords from
+            num_keywords (int): The number of keywords to extract from each text
+
+        Returns:
+            List[List[str]]: The keywords of each text, in the order of the input
+        """
+        return self._cached_batch(
+            "extract_keywords", {"num_keywords": num_keywords}, texts,
+            lambda missing: self.connector.extract_keywords_batch(missing, num_keywords)
+        )
+
+    def make_key(self, method: str, params: Dict[str, Any], text: str) -> str:
+        """
+        Build the cache key of a call.
+
+        Args:
+            method (str): The LLMBase method name
+            params (Dict[str, Any]): The call parameters other than the text
+            text (str): The content the call operates on
+
+        Returns:
+            str: A hex digest of the method, model, parameters and content digest
+        """
+        content_digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        payload = json.dumps(
+            {"method": method, "model": self.model, "params": params, "content": content_digest},
+            sort_keys=True, separators=(",", ":")
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get the cache hit/miss counters.
+
+        Returns:
+            Dict[str, Any]: The counters, the hit ratio and the number and total size of stored entries
+        """
+        with self._lock:
+            stats = dict(self.stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = stats["hits"] / lookups if lookups else 0.0
+        stats["entries"] = len(self.disk_cache)
+        stats["bytes"] = self.disk_cache.total_bytes()
+        return stats
+
+    def clear(self) -> None:
+        """
+        Drop all cached results.
+        """
+        self.disk_cache.clear()
+
+    def _cached_batch(self, method: str, params: Dict[str, Any], texts: List[str], compute: Any) -> List[Any]:
+        """
+        Serve a batch call from the cache, computing the missing results in one delegated call.
+
+        Identical texts within the batch are computed once.
+
+        Args:
+            method (str): The LLMBase method name used in the cache key
+            params (Dict[str, Any]): The call parameters other than the texts
+            texts (List[str]): The texts of the batch
+            compute (Any): Callable that takes the missing texts and returns their results in order
+
+        Returns:
+            List[Any]: The results, in the order of the input
+        """
+        keys = [self.make_key(method, params, text) for text in texts]
+        results = [self._get(key) for key in keys]
+
+        missing = {}
+        for index, result in enumerate(results):
+            if result is None:
+                missing.setdefault(keys[index], []).append(index)
+        if missing:
+            computed = compute([texts[indexes[0]] for indexes in missing.values()])
+            for (key, indexes), value in zip(missing.items(), computed):
+                # Empty results mean the model skipped the document; leave them to be retried
+                if value:
+                    self._set(key, value)
+                for index in indexes:
+                    results[index] = value
+        return results
+
+    def _get(self, key: str) -> Optional[Any]:
+        """
+        Look up a cached result, counting the hit or miss.
+
+        Args:
+            key (str): The cache key
+
+        Returns:
+            Optional[Any]: The cached result, or None if there is none
+        """
+        value = self.disk_cache.get(key)
+        with self._lock:
+            self.stats["hits" if value is not None else "misses"] += 1
+        return json.loads(value) if value is not None else None
+
+    def _set(self, key: str, value: Any) -> None:
+        """
+        Store a result.
+
+        Args:
+            key (str): The cache key
+            value (Any): The JSON-serializable result
+        """
+        self.disk_cache.set(key, json.dumps(value))
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Any, List, Optional
+
+class ChatCompletionsStub:
+    """
+    A local HTTP server that mimics the OpenAI chat-completions endpoint.
+
+    It is meant for exercising the LLM connectors without network access. The
+    reply content comes from a responder callable, every request can be
+    delayed by a fixed amount, and the server counts requests and accepted
+    connections so that connection reuse can be observed.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, delay: float = 0.0,
+                 responder: Optional[Callable[[List[Dict[str, Any]]], str]] = None):
+        """
+        Initialize the stub server.
+
+        Args:
+            host (str): The address to bind to
+            port (int): The port to bind to, or 0 to pick a free one
+            delay (float): Seconds to wait before answering each request
+            responder (Optional[Callable[[List[Dict[str, Any]]], str]]): Produces the reply content from the request messages
+        """
+        self.delay = delay
+        self.responder = responder or (lambda messages: "FOR doc IN Objects RETURN doc")
+        self.request_count = 0
+        self.connection_count = 0
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), self._make_handler())
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        """
+        Get the base URL to configure a connector with.
+
+        Returns:
+            str: The URL of the stub's /v1 prefix
+        """
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "ChatCompletionsStub":
+        """
+        Start serving in a background thread.
+
+        Returns:
+            ChatCompletionsStub: The stub itself
+        """
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """
+        Stop the server and release its socket.
+        """
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def _make_handler(self):
+        """
+        Build the request handler class bound to this stub.
+
+        Returns:
+            type: A BaseHTTPRequestHandler subclass
+        """
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                with stub._lock:
+                    stub.connection_count += 1
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                if not self.path.rstrip("/").endswith("/chat/completions"):
+                    self._reply(404, {"error": {"message": "not found"}})
+                    return
+
+                request = json.loads(body or b"{}")
+                with stub._lock:
+                    stub.request_count += 1
+                if stub.delay:
+                    time.sleep(stub.delay)
+
+                content = stub.responder(request.get("messages", []))
+                self._reply(200, {
+                    "id": f"chatcmpl-stub-{stub.request_count}",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": request.get("model", ""),
+                    "choices": [{
+                        "index": 0,
+                        "message": {"role": "assistant", "content": content},
+                        "finish_reason": "stop"
+                    }],
+                    "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+                })
+
+            def _reply(self, status: int, payload: Dict[str, Any]) -> None:
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                try:
+                    self.wfile.write(data)
+                except (BrokenPipeError, ConnectionResetError):
+                    # The client gave up waiting (e.g. its deadline expired)
+                    self.close_connection = True
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
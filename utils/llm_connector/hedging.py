@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+
+import bisect
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Callable, Dict, Optional
+
+class PartialResponseError(ValueError):
+    """
+    Raised when a model response is truncated, empty or otherwise unusable.
+    """
+    pass
+
+class DeadlineExceeded(TimeoutError):
+    """
+    Raised when a call does not produce a usable response within its deadline.
+    """
+    pass
+
+class LatencyTracker:
+    """
+    Online latency percentiles over a sliding window of recent observations.
+
+    The window is kept both in arrival order, to expire the oldest sample,
+    and in sorted order, so a percentile is a single index lookup.
+    """
+
+    def __init__(self, window: int = 500):
+        """
+        Initialize the latency tracker.
+
+        Args:
+            window (int): The number of most recent latencies the percentiles are computed over
+        """
+        self.window = window
+        self.samples = deque()
+        self.sorted_samples = []
+        self._lock = threading.Lock()
+
+    def observe(self, latency: float) -> None:
+        """
+        Record an observed latency.
+
+        Args:
+            latency (float): The latency in seconds
+        """
+        with self._lock:
+            if len(self.samples) == self.window:
+                oldest = self.samples.popleft()
+                del self.sorted_samples[bisect.bisect_left(self.sorted_samples, oldest)]
+            self.samples.append(latency)
+            bisect.insort(self.sorted_samples, latency)
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """
+        Get a latency percentile.
+
+        Args:
+            fraction (float): The percentile as a fraction in [0, 1], e.g. 0.95
+
+        Returns:
+            Optional[float]: The latency in seconds, or None if nothing has been observed
+        """
+        with self._lock:
+            if not self.sorted_samples:
+                return None
+            return self.sorted_samples[min(len(self.sorted_samples) - 1, int(fraction * len(self.sorted_samples)))]
+
+    def __len__(self) -> int:
+        """
+        Get the number of latencies in the window.
+
+        Returns:
+            int: The number of samples
+        """
+        return len(self.samples)
+
+class HedgedCaller:
+    """
+    Runs blocking calls with a deadline, hedging and jittered retries.
+
+    Each attempt sends a request and, if it has not answered by the learned
+    hedge percentile of recent latencies, sends a duplicate; the first usable
+    response wins. Responses that fail validation are rejected as soon as they
+    arrive instead of being passed on. When every request of an attempt fails
+    the call backs off with full jitter and retries, as long as the remaining
+    deadline allows. Requests that lose a race are abandoned, not interrupted,
+    so the function should bound its own duration with the timeout it is given.
+    """
+
+    def __init__(self, deadline: float = 30.0, max_attempts: int = 3, hedge_percentile: float = 0.95,
+                 default_hedge_delay: float = 2.0, min_hedge_delay: float = 0.05, min_samples: int = 20,
+                 backoff_base: float = 0.25, backoff_cap: float = 4.0, max_workers: int = 8,
+                 is_retryable: Optional[Callable[[Exception], bool]] = None, seed: Optional[int] = None):
+        """
+        Initialize the hedged caller.
+
+        Args:
+            deadline (float): The default time budget of a call in seconds
+            max_attempts (int): The maximum number of attempts, each of which may be hedged once
+            hedge_percentile (float): Latency percentile after which a duplicate request is sent
+            default_hedge_delay (float): Hedge delay in seconds until min_samples latencies have been observed
+            min_hedge_delay (float): Lower bound of the hedge delay in seconds
+            min_samples (int): The number of observed latencies before the learned percentile is used
+            backoff_base (float): Base of the exponential backoff between attempts in seconds
+            backoff_cap (float): Upper bound of the backoff between attempts in seconds
+            max_workers (int): The number of threads that run requests
+            is_retryable (Optional[Callable[[Exception], bool]]): Decides whether an error is worth retrying; all are by default
+            seed (Optional[int]): Seed of the backoff jitter, or None for a random seed
+        """
+        self.deadline = deadline
+        self.max_attempts = max_attempts
+        self.hedge_percentile = hedge_percentile
+        self.default_hedge_delay = default_hedge_delay
+        self.min_hedge_delay = min_hedge_delay
+        self.min_samples = min_samples
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.is_retryable = is_retryable or (lambda error: True)
+        self.random = random.Random(seed)
+        self.latency = LatencyTracker()
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hedged-call")
+        self.stats = {"calls": 0, "requests": 0, "hedges": 0, "hedge_wins": 0,
+                      "retries": 0, "partial_responses": 0, "deadline_exceeded": 0}
+        self._lock = threading.Lock()
+
+    def hedge_delay(self) -> float:
+        """
+        Get the delay after which an unanswered request is hedged.
+
+        Returns:
+            float: The delay in seconds
+        """
+        if len(self.latency) < self.min_samples:
+            return self.default_hedge_delay
+        return max(self.min_hedge_delay, self.latency.percentile(self.hedge_percentile))
+
+    def call(self, function: Callable[[float], Any], validate: Optional[Callable[[Any], Any]] = None,
+             deadline: Optional[float] = None) -> Any:
+        """
+        Call a function under the hedging and retry policy.
+
+        Args:
+            function (Callable[[float], Any]): Sends one request; receives the seconds left before the deadline
+            validate (Optional[Callable[[Any], Any]]): Turns a raw response into the result, raising PartialResponseError if it is unusable
+            deadline (Optional[float]): The time budget of this call in seconds, or None for the default
+
+        Returns:
+            Any: The validated result of the first usable response
+
+        Raises:
+            DeadlineExceeded: If no usable response arrives within the deadline
+            Exception: The last error, if it is not retryable or the attempts are exhausted
+        """
+        validate = validate or (lambda response: response)
+        expires = time.monotonic() + (self.deadline if deadline is None else deadline)
+        self._count("calls")
+        error = None
+        for attempt in range(self.max_attempts):
+            if attempt:
+                # Full jitter keeps retries of concurrent callers from synchronizing
+                backoff = self.random.uniform(0.0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+                if time.monotonic() + backoff >= expires:
+                    break
+                time.sleep(backoff)
+                self._count("retries")
+            try:
+                return self._attempt(function, validate, expires)
+            except DeadlineExceeded:
+                break
+            except Exception as exc:
+                error = exc
+                if not self.is_retryable(exc):
+                    raise
+        else:
+            raise error
+        self._count("deadline_exceeded")
+        raise DeadlineExceeded("No usable response before the deadline") from error
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get the call counters and the learned latency percentiles.
+
+        Returns:
+            Dict[str, Any]: Calls, requests, hedges, hedge wins, retries, partial responses, deadline misses and p50/p95 latency
+        """
+        with self._lock:
+            stats = dict(self.stats)
+        stats["p50_latency"] = self.latency.percentile(0.5)
+        stats["p95_latency"] = self.latency.percentile(0.95)
+        stats["hedge_delay"] = self.hedge_delay()
+        return stats
+
+    def _attempt(self, function: Callable[[float], Any], validate: Callable[[Any], Any], expires: float) -> Any:
+        """
+        Run one attempt: a request, hedged once if it is slow.
+
+        Args:
+            function (Callable[[float], Any]): Sends one request
+            validate (Callable[[Any], Any]): Turns a raw response into the result
+            expires (float): The monotonic time of the deadline
+
+        Returns:
+            Any: The validated result of the first usable response
+        """
+        pending = {self._submit(function, expires): False}
+        hedged = False
+        error = None
+        while pending:
+            remaining = expires - time.monotonic()
+            if remaining <= 0:
+                raise DeadlineExceeded("No usable response before the deadline")
+            timeout = remaining if hedged else min(remaining, self.hedge_delay())
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                if not hedged:
+                    hedged = True
+                    self._count("hedges")
+                    pending[self._submit(function, expires)] = True
+                continue
+            for future in done:
+                is_hedge = pending.pop(future)
+                try:
+                    started, response = future.result()
+                    result = validate(response)
+                except PartialResponseError as exc:
+                    self._count("partial_responses")
+                    error = exc
+                    continue
+                except Exception as exc:
+                    error = exc
+                    continue
+                self.latency.observe(time.monotonic() - started)
+                if is_hedge:
+                    self._count("hedge_wins")
+                return result
+        raise error
+
+    def _submit(self, function: Callable[[float], Any], expires: float) -> Any:
+        """
+        Send a request on the worker pool.
+
+        Args:
+            function (Callable[[float], Any]): Sends one request
+            expires (float): The monotonic time of the deadline
+
+        Returns:
+            Any: The future of (start time, response)
+        """
+        self._count("requests")
+
+        def run():
+            started = time.monotonic()
+            return started, function(max(0.0, expires - started))
+        return self.pool.submit(run)
+
+    def _count(self, counter: str) -> None:
+        """
+        Increment a call counter.
+
+        Args:
+            counter (str): The counter name
+        """
+        with self._lock:
+            self.stats[counter] += 1
@@ -76,3 +76,35 @@ class LLMBase(ABC):
             str: The answer to the question
         """
         pass
+
+    def summarize_batch(self, texts: List[str], max_length: int = 100) -> List[str]:
+        """
+        Summarize several texts.
+
+        Connectors that can pack several documents into one request should
+        override this; the default issues one summarize_text call per text.
+
+        Args:
+            texts (List[str]): The texts to summarize
+            max_length (int): The maximum length of each summary
+
+        Returns:
+            List[str]: The summaries, in the order of the input
+        """
+        return [self.summarize_text(text, max_length) for text in texts]
+
+    def extract_keywords_batch(self, texts: List[str], num_keywords: int = 5) -> List[List[str]]:
+        """
+        Extract keywords from several texts.
+
+        Connectors that can pack several documents into one request should
+        override this; the default issues one extract_keywords call per text.
+
+        Args:
+            texts (List[str]): The texts to extract keywords from
+            num_keywords (int): The number of keywords to extract from each text
+
+        Returns:
+            List[List[str]]: The keywords of each text, in the order of the input
+        """
+        return [self.extract_keywords(text, num_keywords) for text in texts]
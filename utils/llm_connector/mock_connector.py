@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+
+import re
+from collections import Counter
+from typing import Dict, Any, List, Optional
+from .llm_base import LLMBase
+from .batching import pack_documents
+from utils.latency_injector import LatencyInjector
+from data_access.upi_schema import FILTER_FIELDS, GRAPHQL_FILTER_ARGUMENTS, OBJECTS_COLLECTION
+
+class MockLLMConnector(LLMBase):
+    """
+    In-process stand-in for an LLM connector.
+
+    Responses are derived deterministically from the prompt, so the rest of
+    the pipeline can be profiled and load-tested without network access.
+    Latency and failures are injected through a LatencyInjector.
+    """
+
+    def __init__(self, latency: Optional[LatencyInjector] = None, max_prompt_tokens: int = 3000,
+                 max_batch_documents: int = 20):
+        """
+        Initialize the mock connector.
+
+        Args:
+            latency (Optional[LatencyInjector]): Latency and failure model applied to every request, or None for no delay
+            max_prompt_tokens (int): Token budget of a simulated multi-document prompt
+            max_batch_documents (int): The maximum number of documents per simulated batch request
+        """
+        self.latency = latency or LatencyInjector()
+        self.max_prompt_tokens = max_prompt_tokens
+        self.max_batch_documents = max_batch_documents
+        self.request_count = 0
+
+    def generate_query(self, prompt: str) -> str:
+        """
+        Generate a query that refers to every filter placeholder named in the prompt.
+
+        Args:
+            prompt (str): The prompt to generate the query from
+
+        Returns:
+            str: An AQL query, or a GraphQL query if the prompt asks for one
+        """
+        self._request()
+        if "GraphQL" in prompt:
+            variables = sorted(set(re.findall(r"\$filters_(\w+)", prompt)))
+            arguments = ", ".join(
+                f"{GRAPHQL_FILTER_ARGUMENTS[key]}: $filters_{key}" for key in variables if key in GRAPHQL_FILTER_ARGUMENTS
+            )
+            selection = f"(filter: {{{arguments}}})" if arguments else ""
+            return f"query {{ files{selection} {{ name path size modified }} }}"
+
+        parameters = sorted(set(re.findall(r"(?<![\w@])@filters_(\w+)", prompt)))
+        filters = "".join(
+            f" FILTER doc.{FILTER_FIELDS[key][0]} == @filters_{key}" for key in parameters if key in FILTER_FIELDS
+        )
+        return f"FOR doc IN {OBJECTS_COLLECTION}{filters} RETURN doc"
+
+    def summarize_text(self, text: str, max_length: int = 100) -> str:
+        """
+        Summarize the given text by keeping its first words.
+
+        Args:
+            text (str): The text to summarize
+            max_length (int): The maximum length of the summary
+
+        Returns:
+            str: The summarized text
+        """
+        self._request()
+        return self._summarize(text, max_length)
+
+    def extract_keywords(self, text: str, num_keywords: int = 5) -> List[str]:
+        """
+        Extract the most frequent words of the given text.
+
+        Args:
+            text (str): The text to extract keywords from
+            num_keywords (int): The number of keywords to extract
+
+        Returns:
+            List[str]: The extracted keywords
+        """
+        self._request()
+        return self._keywords(text, num_keywords)
+
+    def classify_text(self, text: str, categories: List[str]) -> str:
+        """
+        Classify the given text as the category that shares the most words with it.
+
+        Args:
+            text (str): The text to classify
+            categories (List[str]): The list of possible categories
+
+        Returns:
+            str: The predicted category
+        """
+        self._request()
+        words = Counter(self._words(text))
+        return max(categories, key=lambda category: sum(words[w] for w in self._words(category)))
+
+    def answer_question(self, context: str, question: str) -> str:
+        """
+        Answer a question with the first sentence of the context.
+
+        Args:
+            context (str): The context to base the answer on
+            question (str): The question to answer
+
+        Returns:
+            str: The answer to the question
+        """
+        self._request()
+        return context.split(". ")[0].strip()
+
+    def summarize_batch(self, texts: List[str], max_length: int = 100) -> List[str]:
+        """
+        Summarize several texts, simulating one request per token-budgeted batch.
+
+        Args:
+            texts (List[str]): The texts to summarize
+            max_length (int): The maximum length of each summary
+
+        Returns:
+            List[str]: The summaries, in the order of the input
+        """
+        for _ in pack_documents(texts, self.max_prompt_tokens, self.max_batch_documents):
+            self._request()
+        return [self._summarize(text, max_length) for text in texts]
+
+    def extract_keywords_batch(self, texts: List[str], num_keywords: int = 5) -> List[List[str]]:
+        """
+        Extract keywords from several texts, simulating one request per token-budgeted batch.
+
+        Args:
+            texts (List[str]): The texts to extract keywords from
+            num_keywords (int): The number of keywords to extract from each text
+
+        Returns:
+            List[List[str]]: The keywords of each text, in the order of the input
+        """
+        for _ in pack_documents(texts, self.max_prompt_tokens, self.max_batch_documents):
+            self._request()
+        return [self._keywords(text, num_keywords) for text in texts]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get the request and latency counters.
+
+        Returns:
+            Dict[str, Any]: The number of requests and the injected latency statistics
+        """
+        stats = self.latency.get_stats()
+        stats["requests"] = self.request_count
+        return stats
+
+    def _request(self) -> None:
+        """
+        Account for one simulated request, injecting latency and failures.
+        """
+        self.request_count += 1
+        self.latency.inject()
+
+    def _summarize(self, text: str, max_length: int) -> str:
+        """
+        Build a summary from the first words of a text.
+
+        Args:
+            text (str): The text to summarize
+            max_length (int): The maximum number of words
+
+        Returns:
+            str: The summary
+        """
+        return " ".join(text.split()[:max_length])
+
+    def _keywords(self, text: str, num_keywords: int) -> List[str]:
+        """
+        Pick the most frequent words of a text, breaking ties alphabetically.
+
+        Args:
+            text (str): The text to extract keywords from
+            num_keywords (int): The number of keywords to extract
+
+        Returns:
+            List[str]: The keywords
+        """
+        counts = Counter(word for word in self._words(text) if len(word) > 3)
+        ranked = sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+        return [word for word, _ in ranked[:num_keywords]]
+
+    def _words(self, text: str) -> List[str]:
+        """
+        Split text into lower-case words.
+
+        Args:
+            text (str): The text to split
+
+        Returns:
+            List[str]: The words
+        """
+        return re.findall(r"[a-z0-9]+", text.lower())
@@ -2,24 +2,51 @@
 
 import openai
 
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from .llm_base import LLMBase
+from .hedging import HedgedCaller, PartialResponseError
+from .batching import (
+    build_batch_prompt, estimate_tokens, pack_documents, parse_batch_response, truncate_to_tokens
+)
 
 class OpenAIConnector(LLMBase):
     """
     Connector for OpenAI's language models.
+
+    Every request runs under a deadline. A request that is slower than the
+    learned p95 latency is hedged with a duplicate, failed attempts are
+    retried with jittered backoff while the deadline allows, and truncated or
+    empty completions are rejected instead of being returned.
     """
 
-    def __init__(self, api_key: str, model: str = "gpt-3.5-turbo"):
+    # Errors that a repeated request cannot fix
+    NON_RETRYABLE_ERRORS = (
+        openai.error.InvalidRequestError, openai.error.AuthenticationError, openai.error.PermissionError
+    )
+
+    def __init__(self, api_key: str, model: str = "gpt-3.5-turbo",
+                 max_prompt_tokens: int = 3000, max_batch_documents: int = 20,
+                 deadline: float = 30.0, max_attempts: int = 3, hedge_percentile: float = 0.95):
         """
         Initialize the OpenAI connector.
 
         Args:
             api_key (str): The OpenAI API key
             model (str): The name of the OpenAI model to use
+            max_prompt_tokens (int): Token budget of a single multi-document prompt
+            max_batch_documents (int): The maximum number of documents packed into one prompt
+            deadline (float): The time budget of a call, including hedges and retries, in seconds
+            max_attempts (int): The maximum number of attempts per call
+            hedge_percentile (float): Latency percentile after which a slow request is hedged
         """
         openai.api_key = api_key
         self.model = model
+        self.max_prompt_tokens = max_prompt_tokens
+        self.max_batch_documents = max_batch_documents
+        self.caller = HedgedCaller(
+            deadline=deadline, max_attempts=max_attempts, hedge_percentile=hedge_percentile,
+            is_retryable=lambda error: not isinstance(error, self.NON_RETRYABLE_ERRORS)
+        )
 
     def generate_query(self, prompt: str) -> str:
         """
@@ -31,14 +58,7 @@ class OpenAIConnector(LLMBase):
         Returns:
             str: The generated query
         """
-        response = openai.ChatCompletion.create(
-            model=self.model,
-            messages=[
-                {"role": "system", "content": "You are a helpful assistant that generates database queries."},
-                {"role": "user", "content": prompt}
-            ]
-        )
-        return response.choices[0].message['content'].strip()
+        return self._chat_completion("You are a helpful assistant that generates database queries.", prompt)
 
     def summarize_text(self, text: str, max_length: int = 100) -> str:
         """
@@ -52,14 +72,7 @@ class OpenAIConnector(LLMBase):
             str: The summarized text
         """
         prompt = f"Summarize the following text in no more than {max_length} words:\n\n{text}"
-        response = openai.ChatCompletion.create(
-            model=self.model,
-            messages=[
-                {"role": "system", "content": "You are a helpful assistant that summarizes text."},
-                {"role": "user", "content": prompt}
-            ]
-        )
-        return response.choices[0].message['content'].strip()
+        return self._chat_completion("You are a helpful assistant that summarizes text.", prompt)
 
     def extract_keywords(self, text: str, num_keywords: int = 5) -> List[str]:
         """
@@ -73,14 +86,9 @@ class OpenAIConnector(LLMBase):
             List[str]: The extracted keywords
         """
         prompt = f"Extract {num_keywords} keywords from the following text:\n\n{text}"
-        response = openai.ChatCompletion.create(
-            model=self.model,
-            messages=[
-                {"role": "system", "content": "You are a helpful assistant that extracts keywords from text."},
-                {"role": "user", "content": prompt}
-            ]
-        )
-        keywords = response.choices[0].message['content'].strip().split(',')
+        keywords = self._chat_completion(
+            "You are a helpful assistant that extracts keywords from text.", prompt
+        ).split(',')
         return [keyword.strip() for keyword in keywords[:num_keywords]]
 
     def classify_text(self, text: str, categories: List[str]) -> str:
@@ -96,14 +104,7 @@ class OpenAIConnector(LLMBase):
         """
         categories_str = ", ".join(categories)
         prompt = f"Classify the following text into one of these categories: {categories_str}\n\nText: {text}"
-        response = openai.ChatCompletion.create(
-            model=self.model,
-            messages=[
-                {"role": "system", "content": "You are a helpful assistant that classifies text."},
-                {"role": "user", "content": prompt}
-            ]
-        )
-        return response.choices[0].message['content'].strip()
+        return self._chat_completion("You are a helpful assistant that classifies text.", prompt)
 
     def answer_question(self, context: str, question: str) -> str:
         """
@@ -117,11 +118,129 @@ class OpenAIConnector(LLMBase):
             str: The answer to the question
         """
         prompt = f"Context: {context}\n\nQuestion: {question}\n\nAnswer:"
-        response = openai.ChatCompletion.create(
-            model=self.model,
-            messages=[
-                {"role": "system", "content": "You are a helpful assistant that answers questions based on provided context."},
-                {"role": "user", "content": prompt}
-            ]
+        return self._chat_completion("You are a helpful assistant that answers questions based on provided context.", prompt)
+
+    def summarize_batch(self, texts: List[str], max_length: int = 100) -> List[str]:
+        """
+        Summarize several texts, packing them into as few requests as the token budget allows.
+
+        Args:
+            texts (List[str]): The texts to summarize
+            max_length (int): The maximum length of each summary
+
+        Returns:
+            List[str]: The summaries, in the order of the input; empty for documents the model skipped
+        """
+        results = self._run_batches(
+            texts,
+            f"Summarize the text in no more than {max_length} words",
+            "You are a helpful assistant that summarizes multiple documents and answers in JSON."
+        )
+        return [str(results[i]).strip() if i in results else "" for i in range(len(texts))]
+
+    def extract_keywords_batch(self, texts: List[str], num_keywords: int = 5) -> List[List[str]]:
+        """
+        Extract keywords from several texts, packing them into as few requests as the token budget allows.
+
+        Args:
+            texts (List[str]): The texts to extract keywords from
+            num_keywords (int): The number of keywords to extract from each text
+
+        Returns:
+            List[List[str]]: The keywords of each text, in the order of the input
+        """
+        results = self._run_batches(
+            texts,
+            f"Extract {num_keywords} keywords, as a JSON list of strings,",
+            "You are a helpful assistant that extracts keywords from multiple documents and answers in JSON."
         )
-        return response.choices[0].message['content'].strip()
+        keywords = []
+        for i in range(len(texts)):
+            value = results.get(i, [])
+            if isinstance(value, str):
+                value = value.split(',')
+            keywords.append([str(keyword).strip() for keyword in value[:num_keywords]])
+        return keywords
+
+    def _run_batches(self, texts: List[str], instruction: str, system_prompt: str) -> Dict[int, Any]:
+        """
+        Send texts to the model in token-budgeted multi-document prompts.
+
+        Args:
+            texts (List[str]): The documents to process
+            instruction (str): What to do with each document
+            system_prompt (str): The system message for each request
+
+        Returns:
+            Dict[int, Any]: The per-document results keyed by index into texts
+        """
+        overhead = estimate_tokens(build_batch_prompt(instruction, [])) + estimate_tokens(system_prompt)
+        # A single document may use at most half of the budget so that batches stay useful
+        per_document = max(1, (self.max_prompt_tokens - overhead) // 2)
+        documents = [truncate_to_tokens(text, per_document) for text in texts]
+
+        results = {}
+        for batch in pack_documents(documents, self.max_prompt_tokens, self.max_batch_documents, overhead):
+            prompt = build_batch_prompt(instruction, [documents[i] for i in batch])
+            content = self._chat_completion(system_prompt, prompt)
+            for position, value in parse_batch_response(content, len(batch)).items():
+                results[batch[position]] = value
+        return results
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get the request counters and the learned latency percentiles.
+
+        Returns:
+            Dict[str, Any]: Calls, requests, hedges, hedge wins, retries, partial responses, deadline misses and p50/p95 latency
+        """
+        return self.caller.get_stats()
+
+    def _chat_completion(self, system_prompt: str, prompt: str, deadline: Optional[float] = None) -> str:
+        """
+        Send a chat-completions request and return the reply text.
+
+        Args:
+            system_prompt (str): The system message
+            prompt (str): The user message
+            deadline (Optional[float]): The time budget in seconds, or None for the connector default
+
+        Returns:
+            str: The content of the first choice
+
+        Raises:
+            DeadlineExceeded: If no complete reply arrives within the deadline
+        """
+        def request(remaining: float) -> Any:
+            return openai.ChatCompletion.create(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": prompt}
+                ],
+                request_timeout=remaining
+            )
+        return self.caller.call(request, self._completion_content, deadline)
+
+    def _completion_content(self, response: Any) -> str:
+        """
+        Extract the reply text of a completion, rejecting partial replies.
+
+        Args:
+            response (Any): The chat-completions response
+
+        Returns:
+            str: The content of the first choice
+
+        Raises:
+            PartialResponseError: If the reply was cut off, filtered or is empty
+        """
+        if not response.choices:
+            raise PartialResponseError("Completion has no choices")
+        choice = response.choices[0]
+        if choice.get("finish_reason") in ("length", "content_filter"):
+            raise PartialResponseError(f"Completion stopped early: {choice['finish_reason']}")
+        content = (choice.message.get("content") or "").strip()
+        if not content:
+            raise PartialResponseError("Completion is empty")
+        return content
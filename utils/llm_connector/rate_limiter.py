@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+
+import heapq
+import itertools
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Optional
+from .hedging import LatencyTracker
+
+# Request priorities; lower values are dispatched first
+INTERACTIVE = 0
+BACKGROUND = 1
+
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BACKGROUND: "background"}
+
+class TokenBucket:
+    """
+    A token bucket refilled continuously at a per-minute rate.
+
+    The bucket is not thread-safe by itself; RequestScheduler only touches it
+    while holding its own lock.
+    """
+
+    def __init__(self, per_minute: float, capacity: Optional[float] = None):
+        """
+        Initialize the token bucket.
+
+        Args:
+            per_minute (float): The refill rate in tokens per minute
+            capacity (Optional[float]): The burst size, or None for one minute's worth of tokens
+        """
+        if per_minute <= 0:
+            raise ValueError("per_minute must be positive")
+        self.rate = per_minute / 60.0
+        self.capacity = capacity if capacity is not None else per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def delay(self, amount: float) -> float:
+        """
+        Get the time until an amount can be taken from the bucket.
+
+        Args:
+            amount (float): The number of tokens needed; amounts above the capacity are capped
+
+        Returns:
+            float: Seconds to wait, 0.0 if the tokens are available now
+        """
+        self._refill()
+        missing = min(amount, self.capacity) - self.tokens
+        return max(0.0, missing / self.rate)
+
+    def take(self, amount: float) -> None:
+        """
+        Take an amount from the bucket; call only once delay() has returned 0.
+
+        Args:
+            amount (float): The number of tokens to take; amounts above the capacity are capped
+        """
+        self._refill()
+        self.tokens -= min(amount, self.capacity)
+
+    def _refill(self) -> None:
+        """
+        Add the tokens accumulated since the last update.
+        """
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+class _Job:
+    """
+    A queued request and everyone waiting for its result.
+    """
+
+    __slots__ = ("key", "function", "tokens", "future", "enqueued", "started")
+
+    def __init__(self, key: Optional[Hashable], function: Callable[[], Any], tokens: float):
+        self.key = key
+        self.function = function
+        self.tokens = tokens
+        self.future = Future()
+        self.enqueued = time.monotonic()
+        self.started = False
+
+class RequestScheduler:
+    """
+    Shared client-side scheduler for rate-limited LLM requests.
+
+    Requests wait in a priority queue and are dispatched, highest priority
+    first and in arrival order within a priority, once both the
+    requests-per-minute and the tokens-per-minute bucket allow it. Identical
+    requests submitted while one is queued or running share its result; a
+    duplicate with a higher priority promotes the queued request.
+
+    One scheduler is meant to be shared by every connector in a process, so
+    that concurrent sessions draw from the same provider quota.
+    """
+
+    def __init__(self, requests_per_minute: float = 3500, tokens_per_minute: float = 90000,
+                 max_concurrency: int = 8, burst_seconds: float = 10.0):
+        """
+        Initialize the request scheduler.
+
+        Args:
+            requests_per_minute (float): The request quota per minute
+            tokens_per_minute (float): The token quota per minute
+            max_concurrency (int): The maximum number of requests in flight
+            burst_seconds (float): How many seconds of quota can be used in a single burst
+        """
+        self.request_bucket = TokenBucket(requests_per_minute, max(1.0, requests_per_minute * burst_seconds / 60.0))
+        self.token_bucket = TokenBucket(tokens_per_minute, tokens_per_minute * burst_seconds / 60.0)
+        self.pool = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="llm-scheduler")
+        self._slots = threading.Semaphore(max_concurrency)
+        self._queue = []
+        self._sequence = itertools.count()
+        self._inflight: Dict[Hashable, _Job] = {}
+        self._condition = threading.Condition()
+        self._closed = False
+        self._dispatcher = None
+        self.wait_times = {priority: LatencyTracker() for priority in PRIORITY_NAMES}
+        self.stats = {"submitted": 0, "coalesced": 0, "dispatched": 0, "tokens": 0,
+                      "queue_depth": 0, "max_queue_depth": 0, "throttled": 0}
+
+    def submit(self, function: Callable[[], Any], priority: int = BACKGROUND,
+               tokens: float = 0.0, key: Optional[Hashable] = None) -> Future:
+        """
+        Queue a request.
+
+        Args:
+            function (Callable[[], Any]): Sends the request and returns its result
+            priority (int): INTERACTIVE or BACKGROUND
+            tokens (float): The estimated number of tokens the request uses
+            key (Optional[Hashable]): Identifies identical requests to coalesce, or None to never coalesce
+
+        Returns:
+            Future: Resolves to the result of the request
+        """
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("Scheduler is shut down")
+            self.stats["submitted"] += 1
+            job = self._inflight.get(key) if key is not None else None
+            if job is not None:
+                self.stats["coalesced"] += 1
+                if not job.started:
+                    # Promote the queued request; the stale lower-priority entry is skipped when popped
+                    self._push(priority, job)
+                return job.future
+
+            job = _Job(key, function, tokens)
+            if key is not None:
+                self._inflight[key] = job
+            self._push(priority, job)
+            self.stats["queue_depth"] += 1
+            self.stats["max_queue_depth"] = max(self.stats["max_queue_depth"], self.stats["queue_depth"])
+            if self._dispatcher is None:
+                self._dispatcher = threading.Thread(target=self._dispatch, name="llm-dispatcher", daemon=True)
+                self._dispatcher.start()
+            self._condition.notify()
+        return job.future
+
+    def call(self, function: Callable[[], Any], priority: int = BACKGROUND,
+             tokens: float = 0.0, key: Optional[Hashable] = None) -> Any:
+        """
+        Queue a request and wait for its result.
+
+        Args:
+            function (Callable[[], Any]): Sends the request and returns its result
+            priority (int): INTERACTIVE or BACKGROUND
+            tokens (float): The estimated number of tokens the request uses
+            key (Optional[Hashable]): Identifies identical requests to coalesce, or None to never coalesce
+
+        Returns:
+            Any: The result of the request
+        """
+        return self.submit(function, priority, tokens, key).result()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get the queue and wait-time metrics.
+
+        Returns:
+            Dict[str, Any]: Submitted, coalesced and dispatched requests, tokens used, current and maximum queue depth, throttling waits and per-priority wait times in seconds
+        """
+        with self._condition:
+            stats = dict(self.stats)
+        for priority, name in PRIORITY_NAMES.items():
+            tracker = self.wait_times[priority]
+            stats[f"{name}_requests"] = len(tracker)
+            stats[f"{name}_p50_wait"] = tracker.percentile(0.5) or 0.0
+            stats[f"{name}_p95_wait"] = tracker.percentile(0.95) or 0.0
+        return stats
+
+    def shutdown(self) -> None:
+        """
+        Stop accepting requests; queued requests are still dispatched.
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+
+    def _push(self, priority: int, job: _Job) -> None:
+        """
+        Add a queue entry for a job; the caller holds the lock.
+
+        Args:
+            priority (int): The priority of the entry
+            job (_Job): The job to run
+        """
+        heapq.heappush(self._queue, (priority, next(self._sequence), job))
+
+    def _dispatch(self) -> None:
+        """
+        Dispatcher loop: release queued requests as the buckets and concurrency allow.
+        """
+        while True:
+            self._slots.acquire()
+            with self._condition:
+                while True:
+                    while self._queue and self._queue[0][2].started:
+                        heapq.heappop(self._queue)
+                    if not self._queue:
+                        if self._closed:
+                            self._slots.release()
+                            return
+                        self._condition.wait()
+                        continue
+                    priority, _, job = self._queue[0]
+                    delay = max(self.request_bucket.delay(1), self.token_bucket.delay(job.tokens))
+                    if delay <= 0:
+                        break
+                    # A higher-priority arrival wakes the dispatcher up early
+                    self.stats["throttled"] += 1
+                    self._condition.wait(delay)
+
+                heapq.heappop(self._queue)
+                job.started = True
+                self.request_bucket.take(1)
+                self.token_bucket.take(job.tokens)
+                self.stats["queue_depth"] -= 1
+                self.stats["dispatched"] += 1
+                self.stats["tokens"] += job.tokens
+            self.wait_times[priority].observe(time.monotonic() - job.enqueued)
+            self.pool.submit(self._run, job)
+
+    def _run(self, job: _Job) -> None:
+        """
+        Run a dispatched request and resolve its future.
+
+        Args:
+            job (_Job): The job to run
+        """
+        try:
+            job.future.set_result(job.function())
+        except BaseException as exc:
+            job.future.set_exception(exc)
+        finally:
+            with self._condition:
+                if job.key is not None and self._inflight.get(job.key) is job:
+                    del self._inflight[job.key]
+            self._slots.release()
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+
+from typing import Dict, Any, List, Optional
+from .llm_base import LLMBase
+from .batching import estimate_tokens
+from .rate_limiter import RequestScheduler, INTERACTIVE, BACKGROUND
+
+# Completion tokens reserved for replies whose length the caller does not bound
+REPLY_TOKENS = 256
+
+class ScheduledLLMConnector(LLMBase):
+    """
+    Routes the calls of any LLMBase connector through a RequestScheduler.
+
+    Query generation and question answering are interactive and jump ahead
+    of background enrichment (summaries, keywords, classification). Each call
+    is charged its estimated prompt plus completion tokens against the
+    tokens-per-minute bucket, and identical concurrent calls are coalesced.
+    """
+
+    def __init__(self, connector: LLMBase, scheduler: Optional[RequestScheduler] = None):
+        """
+        Initialize the scheduled connector.
+
+        Args:
+            connector (LLMBase): The connector that sends the requests
+            scheduler (Optional[RequestScheduler]): The shared scheduler, or None for a private one with default quotas
+        """
+        self.connector = connector
+        self.model = getattr(connector, "model", None)
+        self.scheduler = scheduler or RequestScheduler()
+
+    def generate_query(self, prompt: str) -> str:
+        """
+        Generate a query at interactive priority.
+
+        Args:
+            prompt (str): The prompt to generate the query from
+
+        Returns:
+            str: The generated query
+        """
+        return self.scheduler.call(
+            lambda: self.connector.generate_query(prompt), INTERACTIVE,
+            estimate_tokens(prompt) + REPLY_TOKENS, ("generate_query", prompt)
+        )
+
+    def summarize_text(self, text: str, max_length: int = 100) -> str:
+        """
+        Summarize the given text at background priority.
+
+        Args:
+            text (str): The text to summarize
+            max_length (int): The maximum length of the summary
+
+        Returns:
+            str: The summarized text
+        """
+        return self.scheduler.call(
+            lambda: self.connector.summarize_text(text, max_length), BACKGROUND,
+            estimate_tokens(text) + 2 * max_length, ("summarize_text", text, max_length)
+        )
+
+    def extract_keywords(self, text: str, num_keywords: int = 5) -> List[str]:
+        """
+        Extract keywords from the given text at background priority.
+
+        Args:
+            text (str): The text to extract keywords from
+            num_keywords (int): The number of keywords to extract
+
+        Returns:
+            List[str]: The extracted keywords
+        """
+        return self.scheduler.call(
+            lambda: self.connector.extract_keywords(text, num_keywords), BACKGROUND,
+            estimate_tokens(text) + 4 * num_keywords, ("extract_keywords", text, num_keywords)
+        )
+
+    def classify_text(self, text: str, categories: List[str]) -> str:
+        """
+        Classify the given text at background priority.
+
+        Args:
+            text (str): The text to classify
+            categories (List[str]): The list of possible categories
+
+        Returns:
+            str: The predicted category
+        """
+        return self.scheduler.call(
+            lambda: self.connector.classify_text(text, categories), BACKGROUND,
+            estimate_tokens(text) + estimate_tokens(" ".join(categories)) + 16,
+            ("classify_text", text, tuple(categories))
+        )
+
+    def answer_question(self, context: str, question: str) -> str:
+        """
+        Answer a question at interactive priority.
+
+        Args:
+            context (str): The context to base the answer on
+            question (str): The question to answer
+
+        Returns:
+            str: The answer to the question
+        """
+        return self.scheduler.call(
+            lambda: self.connector.answer_question(context, question), INTERACTIVE,
+            estimate_tokens(context) + estimate_tokens(question) + REPLY_TOKENS,
+            ("answer_question", context, question)
+        )
+
+    def summarize_batch(self, texts: List[str], max_length: int = 100) -> List[str]:
+        """
+        Summarize several texts as one background request.
+
+        Args:
+            texts (List[str]): The texts to summarize
+            max_length (int): The maximum length of each summary
+
+        Returns:
+            List[str]: The summaries, in the order of the input
+        """
+        return self.scheduler.call(
+            lambda: self.connector.summarize_batch(texts, max_length), BACKGROUND,
+            sum(estimate_tokens(text) + 2 * max_length for text in texts),
+            ("summarize_batch", tuple(texts), max_length)
+        )
+
+    def extract_keywords_batch(self, texts: List[str], num_keywords: int = 5) -> List[List[str]]:
+        """
+        Extract keywords from several texts as one background request.
+
+        Args:
+            texts (List[str]): The texts to extract keywords from
+            num_keywords (int): The number of keywords to extract from each text
+
+        Returns:
+            List[List[str]]: The keywords of each text, in the order of the input
+        """
+        return self.scheduler.call(
+            lambda: self.connector.extract_keywords_batch(texts, num_keywords), BACKGROUND,
+            sum(estimate_tokens(text) + 4 * num_keywords for text in texts),
+            ("extract_keywords_batch", tuple(texts), num_keywords)
+        )
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get the scheduler's queue and wait-time metrics.
+
+        Returns:
+            Dict[str, Any]: The scheduler metrics
+        """
+        return self.scheduler.get_stats()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+
+from collections import deque
+from typing import Any, Dict, List, Sequence, Tuple
+
+class PhraseMatcher:
+    """
+    Aho-Corasick automaton over word sequences.
+
+    The dictionary maps phrases (one or more space-separated words) to
+    payloads. After the automaton is built, all occurrences of all phrases in
+    a word sequence are found in a single left-to-right pass, independent of
+    the size of the dictionary.
+    """
+
+    def __init__(self, phrases: Dict[str, Any]):
+        """
+        Build the automaton.
+
+        Args:
+            phrases (Dict[str, Any]): Phrase to payload; phrases are matched word by word and case-sensitively
+        """
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[Tuple[int, Any]]] = [[]]
+
+        for phrase, payload in phrases.items():
+            words = phrase.split()
+            if not words:
+                continue
+            state = 0
+            for word in words:
+                if word not in self._goto[state]:
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                    self._goto[state][word] = len(self._goto) - 1
+                state = self._goto[state][word]
+            self._output[state].append((len(words), payload))
+
+        # Breadth-first construction of the failure links
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for word, child in self._goto[state].items():
+                queue.append(child)
+                fallback = self._fail[state]
+                while fallback and word not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(word, 0)
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def __len__(self) -> int:
+        """
+        Get the number of automaton states.
+
+        Returns:
+            int: The number of states, including the root
+        """
+        return len(self._goto)
+
+    def find_all(self, words: Sequence[str]) -> List[Tuple[int, int, Any]]:
+        """
+        Find every phrase occurrence in a word sequence.
+
+        Args:
+            words (Sequence[str]): The words to scan
+
+        Returns:
+            List[Tuple[int, int, Any]]: (start, end, payload) of each occurrence, with end exclusive
+        """
+        matches = []
+        state = 0
+        for index, word in enumerate(words):
+            while state and word not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(word, 0)
+            for length, payload in self._output[state]:
+                matches.append((index + 1 - length, index + 1, payload))
+        return matches
+
+    def longest_at(self, words: Sequence[str]) -> Dict[int, Tuple[int, Any]]:
+        """
+        Find the longest phrase starting at each position of a word sequence.
+
+        Args:
+            words (Sequence[str]): The words to scan
+
+        Returns:
+            Dict[int, Tuple[int, Any]]: Start position to (end, payload) of the longest phrase starting there
+        """
+        longest = {}
+        for start, end, payload in self.find_all(words):
+            if start not in longest or end > longest[start][0]:
+                longest[start] = (end, payload)
+        return longest
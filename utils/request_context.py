@@ -0,0 +1,390 @@
+#!/usr/bin/env python3
+
+import threading
+import time
+from concurrent.futures import ALL_COMPLETED, FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+# Smallest timeout handed to a blocking call, so that a nearly spent budget never becomes "no timeout"
+MIN_TIMEOUT = 0.001
+
+class RequestCancelled(RuntimeError):
+    """
+    Raised when a stage of a request runs or waits after the request was cancelled.
+    """
+
+    def __init__(self, stage: str, reason: str):
+        """
+        Initialize the error.
+
+        Args:
+            stage (str): The pipeline stage that noticed the cancellation
+            reason (str): Why the request was cancelled
+        """
+        super().__init__(f"Request {reason} during {stage}")
+        self.stage = stage
+        self.reason = reason
+
+class RequestDeadlineExceeded(RequestCancelled):
+    """
+    Raised when a stage of a request runs or waits past the request's deadline.
+    """
+    pass
+
+class RequestContext:
+    """
+    The time budget and cancellation state of one search request.
+
+    A context is created for each query and passed through the pipeline
+    stages: the parser, the translators, the executors, the data connectors
+    and the result analysis. Before doing work a stage calls check(), which
+    raises once the deadline has passed or the request has been cancelled,
+    and blocking calls are bounded by the remaining budget through timeout(),
+    call() or wait(). Optional work, such as summaries and facets, is shed
+    when less than shed_fraction of the budget is left. A stage that stops
+    early and returns what it has so far records itself with mark_partial()
+    rather than failing the request.
+
+    Cancellation can come from any thread and wakes every wait() and call()
+    of the request immediately. Calls that are already running cannot be
+    interrupted; their results are discarded when they arrive.
+    """
+
+    _pool: Optional[ThreadPoolExecutor] = None
+    _pool_lock = threading.Lock()
+
+    def __init__(self, timeout: Optional[float] = None, shed_fraction: float = 0.25,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize the request context.
+
+        Args:
+            timeout (Optional[float]): The time budget of the request in seconds, or None for no deadline
+            shed_fraction (float): The fraction of the budget below which optional work is skipped
+            clock (Callable[[], float]): Returns the current monotonic time in seconds
+        """
+        if timeout is not None and timeout <= 0:
+            raise ValueError("timeout must be positive")
+        self.clock = clock
+        self.budget = timeout
+        self.started = clock()
+        self.deadline = None if timeout is None else self.started + timeout
+        self.shed_reserve = 0.0 if timeout is None else shed_fraction * timeout
+        self.reason: Optional[str] = None
+        self.shed: List[str] = []
+        self.partial: List[str] = []
+        self._cancelled = threading.Event()
+        self._callbacks: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self) -> bool:
+        """
+        Check whether the request has been cancelled.
+
+        Returns:
+            bool: True once cancel() has been called
+        """
+        return self._cancelled.is_set()
+
+    @property
+    def expired(self) -> bool:
+        """
+        Check whether the request should stop.
+
+        Returns:
+            bool: True if the request has been cancelled or its deadline has passed
+        """
+        return self.cancelled or (self.deadline is not None and self.clock() >= self.deadline)
+
+    def remaining(self) -> Optional[float]:
+        """
+        Get the time left before the deadline.
+
+        Returns:
+            Optional[float]: The seconds left, zero once the deadline has passed, or None if there is no deadline
+        """
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - self.clock())
+
+    def elapsed(self) -> float:
+        """
+        Get the time spent on the request so far.
+
+        Returns:
+            float: The seconds since the context was created
+        """
+        return self.clock() - self.started
+
+    def timeout(self, default: Optional[float] = None) -> Optional[float]:
+        """
+        Bound a stage's own timeout by the remaining budget.
+
+        Args:
+            default (Optional[float]): The stage's timeout in seconds, or None for none
+
+        Returns:
+            Optional[float]: The smaller of the two, or None if neither is bounded
+        """
+        remaining = self.remaining()
+        if remaining is None:
+            return default
+        remaining = max(MIN_TIMEOUT, remaining)
+        return remaining if default is None else min(default, remaining)
+
+    def cancel(self, reason: str = "cancelled") -> None:
+        """
+        Cancel the request and wake every stage waiting on it.
+
+        Args:
+            reason (str): Why the request is cancelled, reported by RequestCancelled
+        """
+        with self._lock:
+            if self._cancelled.is_set():
+                return
+            self.reason = reason
+            self._cancelled.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback()
+
+    def on_cancel(self, callback: Callable[[], None]) -> Callable[[], None]:
+        """
+        Register a function to run when the request is cancelled.
+
+        Args:
+            callback (Callable[[], None]): Runs once, on the thread that cancels; immediately if already cancelled
+
+        Returns:
+            Callable[[], None]: Unregisters the callback
+        """
+        with self._lock:
+            if not self._cancelled.is_set():
+                self._callbacks.append(callback)
+                return lambda: self._unregister(callback)
+        callback()
+        return lambda: None
+
+    def check(self, stage: str) -> None:
+        """
+        Stop a stage if the request is cancelled or out of time.
+
+        Args:
+            stage (str): The name of the stage, reported in the error
+
+        Raises:
+            RequestCancelled: If the request has been cancelled
+            RequestDeadlineExceeded: If the deadline has passed
+        """
+        if self.cancelled:
+            raise RequestCancelled(stage, self.reason or "cancelled")
+        if self.deadline is not None and self.clock() >= self.deadline:
+            raise self._deadline_error(stage)
+
+    def skip_optional(self, stage: str) -> bool:
+        """
+        Decide whether to skip an optional stage because the budget is nearly spent.
+
+        Args:
+            stage (str): The name of the optional stage, recorded if it is skipped
+
+        Returns:
+            bool: True if the stage should be skipped
+        """
+        remaining = self.remaining()
+        if not self.cancelled and (remaining is None or remaining >= self.shed_reserve):
+            return False
+        self.mark_shed(stage)
+        return True
+
+    def mark_shed(self, stage: str) -> None:
+        """
+        Record that an optional stage was skipped or abandoned.
+
+        Args:
+            stage (str): The name of the stage
+        """
+        with self._lock:
+            if stage not in self.shed:
+                self.shed.append(stage)
+
+    def mark_partial(self, stage: str) -> None:
+        """
+        Record that a stage returned only part of its results.
+
+        Args:
+            stage (str): The name of the stage
+        """
+        with self._lock:
+            if stage not in self.partial:
+                self.partial.append(stage)
+
+    def sleep(self, seconds: float, stage: str = "sleep") -> None:
+        """
+        Sleep, waking early if the request is cancelled or its deadline passes first.
+
+        Args:
+            seconds (float): The time to sleep in seconds
+            stage (str): The name of the stage that sleeps, reported in the error
+
+        Raises:
+            RequestCancelled: If the request is cancelled or out of time before the sleep ends
+        """
+        remaining = self.remaining()
+        if remaining is None or remaining >= seconds:
+            if self._cancelled.wait(seconds):
+                self.check(stage)
+            return
+        self._cancelled.wait(remaining)
+        self.check(stage)
+        raise self._deadline_error(stage)
+
+    def wait(self, futures: Iterable[Future], timeout: Optional[float] = None,
+             return_when: str = ALL_COMPLETED) -> Tuple[Set[Future], Set[Future]]:
+        """
+        Wait for futures within the remaining budget, waking early on cancellation.
+
+        Args:
+            futures (Iterable[Future]): The futures to wait for
+            timeout (Optional[float]): The stage's own timeout in seconds, or None for none
+            return_when (str): ALL_COMPLETED or FIRST_COMPLETED, as for concurrent.futures.wait
+
+        Returns:
+            Tuple[Set[Future], Set[Future]]: The futures that finished and those that did not
+        """
+        expires = None if timeout is None else self.clock() + timeout
+        woken = Future()
+        unregister = self.on_cancel(lambda: woken.done() or woken.set_result(None))
+        done, pending = set(), set(futures)
+        try:
+            while pending and not woken.done():
+                limit = self.remaining()
+                if expires is not None:
+                    limit = max(0.0, expires - self.clock()) if limit is None else min(limit, expires - self.clock())
+                if limit is not None and limit <= 0:
+                    break
+                finished, pending = wait(pending | {woken}, limit, FIRST_COMPLETED)
+                finished.discard(woken)
+                pending.discard(woken)
+                done |= finished
+                if done and return_when == FIRST_COMPLETED:
+                    break
+        finally:
+            unregister()
+        return done, pending
+
+    def call(self, stage: str, function: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """
+        Run a blocking call that cannot bound its own duration within the remaining budget.
+
+        The call runs on a shared worker thread. If the request is cancelled
+        or its deadline passes first, the call is abandoned and its result
+        discarded when it arrives.
+
+        Args:
+            stage (str): The name of the stage, reported in the error
+            function (Callable[..., Any]): The blocking call
+            *args (Any): Its positional arguments
+            **kwargs (Any): Its keyword arguments
+
+        Returns:
+            Any: The call's result
+
+        Raises:
+            RequestCancelled: If the request is cancelled or out of time before the call returns
+        """
+        self.check(stage)
+        future = self._workers().submit(function, *args, **kwargs)
+        done, _ = self.wait([future])
+        if not done:
+            future.cancel()
+            self.check(stage)
+        return future.result()
+
+    def bounded(self, batches: Iterable[Any], stage: str) -> Iterator[Any]:
+        """
+        Pass batches through until the request is cancelled or out of time.
+
+        When the request stops, the batches yielded so far stand as a partial
+        result: the stage is recorded with mark_partial() and the source is
+        closed instead of raising. An error raised by the source after the
+        request stopped (a read cut short by the deadline) is treated the
+        same way; earlier errors propagate.
+
+        Args:
+            batches (Iterable[Any]): The source of batches
+            stage (str): The name of the stage
+
+        Returns:
+            Iterator[Any]: The batches that arrived within the budget
+        """
+        iterator = iter(batches)
+        try:
+            while True:
+                if self.expired:
+                    self.mark_partial(stage)
+                    return
+                try:
+                    batch = next(iterator)
+                except StopIteration:
+                    return
+                except Exception:
+                    if not self.expired:
+                        raise
+                    self.mark_partial(stage)
+                    return
+                yield batch
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+
+    def as_dict(self) -> Dict[str, Any]:
+        """
+        Get the request's budget and outcome for logging.
+
+        Returns:
+            Dict[str, Any]: The budget, elapsed and remaining seconds, the cancellation reason, and the shed and partial stages
+        """
+        with self._lock:
+            return {
+                "budget": self.budget, "elapsed": self.elapsed(), "remaining": self.remaining(),
+                "cancelled": self.reason, "shed": list(self.shed), "partial": list(self.partial)
+            }
+
+    def _deadline_error(self, stage: str) -> RequestDeadlineExceeded:
+        """
+        Build the error for a stage that ran out of time.
+
+        Args:
+            stage (str): The name of the stage
+
+        Returns:
+            RequestDeadlineExceeded: The error
+        """
+        return RequestDeadlineExceeded(stage, f"exceeded its {self.budget:g} second deadline")
+
+    def _unregister(self, callback: Callable[[], None]) -> None:
+        """
+        Remove a cancellation callback.
+
+        Args:
+            callback (Callable[[], None]): The callback passed to on_cancel
+        """
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    @classmethod
+    def _workers(cls) -> ThreadPoolExecutor:
+        """
+        Get the worker threads shared by the call() of every request.
+
+        Returns:
+            ThreadPoolExecutor: The worker pool, created on first use
+        """
+        with cls._pool_lock:
+            if cls._pool is None:
+                cls._pool = ThreadPoolExecutor(max_workers=16, thread_name_prefix="request-call")
+            return cls._pool